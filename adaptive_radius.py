@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import KDTree
+
+
+# 自适应匹配半径规则（dict，可代替固定的匹配距离阈值传入 kla_match / common_rate）：
+#   base:        基础半径（nm），没有尺寸数据或未配置规则的点使用该半径
+#   casi / kla:  各数据源的尺寸规则（可省略），包含
+#                  column: 尺寸列名，或多个通道的列名列表（取各通道的最大值）
+#                  scale:  半径 = base + scale × 尺寸
+#                  table:  [(尺寸上限, 半径), ...]，按尺寸查表，超出最后一档取最后一档（优先于 scale）
+#   combine:     点对的半径取两点半径的 'max'、'min' 或 'mean'
+#   min_radius / max_radius: 半径上下限
+EXAMPLE_RULE = {
+    'base': 200.0,
+    'casi': {'column': ['DW1O_Size', 'DW2O_Size'], 'scale': 2.0},
+    'kla': {'column': 'DSIZE', 'scale': 2000.0},
+    'combine': 'max',
+    'min_radius': 100.0,
+    'max_radius': 1000.0,
+}
+
+COMBINE_FUNCS = {
+    'max': np.maximum,
+    'min': np.minimum,
+    'mean': lambda a, b: (a + b) / 2,
+}
+
+
+def is_adaptive(threshold):
+    """匹配距离阈值是否为自适应半径规则"""
+    return isinstance(threshold, dict)
+
+
+def base_radius(threshold):
+    """固定阈值本身，或规则的基础半径（用于对齐等需要单一半径的场合）"""
+    return float(threshold['base']) if is_adaptive(threshold) else float(threshold)
+
+
+def describe(threshold):
+    """阈值的简短说明（用于日志和结果表）"""
+    if not is_adaptive(threshold):
+        return f"{threshold}"
+    parts = [f"基础{threshold['base']}"]
+    for source in ('casi', 'kla'):
+        rule = threshold.get(source)
+        if rule:
+            mode = f"查表{len(rule['table'])}档" if rule.get('table') else f"×{rule.get('scale', 0)}"
+            parts.append(f"{source.upper()} {rule['column']} {mode}")
+    return f"自适应（{'，'.join(parts)}，取{threshold.get('combine', 'max')}）"
+
+
+def rule_columns(threshold, source):
+    """规则中某一数据源（'casi' 或 'kla'）用到的尺寸列"""
+    if not is_adaptive(threshold) or not threshold.get(source):
+        return []
+    column = threshold[source]['column']
+    return [column] if isinstance(column, str) else list(column)
+
+
+def point_radius(df, threshold, source):
+    """
+    每个点的匹配半径
+
+    Args:
+        df: 点数据
+        threshold: 固定阈值或自适应半径规则
+        source: 'casi' 或 'kla'，选择规则中对应的尺寸规则
+
+    Returns:
+        ndarray: 每个点的半径；固定阈值时为常数数组
+    """
+    n = len(df)
+    if not is_adaptive(threshold):
+        return np.full(n, float(threshold))
+
+    base = float(threshold['base'])
+    radius = np.full(n, base)
+    rule = threshold.get(source)
+    columns = [col for col in rule_columns(threshold, source) if col in df.columns]
+    if rule and columns:
+        size = df[columns].apply(pd.to_numeric, errors='coerce').max(axis=1).to_numpy(dtype=float)
+        valid = ~np.isnan(size)
+        if rule.get('table'):
+            uppers, radii = np.asarray(rule['table'], dtype=float).T
+            idx = np.minimum(np.searchsorted(uppers, size[valid], side='left'), len(radii) - 1)
+            radius[valid] = radii[idx]
+        else:
+            radius[valid] = base + float(rule.get('scale', 0)) * size[valid]
+
+    return np.clip(radius, threshold.get('min_radius', 0), threshold.get('max_radius', np.inf))
+
+
+def radius_pairs(points_a, radius_a, points_b, radius_b, combine='max', tree_a=None, tree_b=None):
+    """
+    两组点之间、距离不超过点对半径的全部点对
+
+    先用KDTree以最大半径生成候选点对，再按每个点对的半径向量化过滤。
+
+    Args:
+        points_a, points_b: 坐标 (N, 2)、(M, 2)
+        radius_a, radius_b: 每个点的半径
+        combine: 点对半径取两点半径的 'max'、'min' 或 'mean'
+        tree_a, tree_b: 已建好的KDTree（可选）
+
+    Returns:
+        tuple: (a中下标, b中下标, 距离)
+    """
+    radius_a = np.asarray(radius_a, dtype=float)
+    radius_b = np.asarray(radius_b, dtype=float)
+    if len(radius_a) == 0 or len(radius_b) == 0:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0)
+
+    tree_a = tree_a if tree_a is not None else KDTree(points_a)
+    tree_b = tree_b if tree_b is not None else KDTree(points_b)
+    max_radius = COMBINE_FUNCS[combine](radius_a.max(), radius_b.max())
+    pairs = tree_a.sparse_distance_matrix(tree_b, max_radius, output_type='ndarray')
+    idx_a = pairs['i'].astype(np.intp)
+    idx_b = pairs['j'].astype(np.intp)
+    keep = pairs['v'] <= COMBINE_FUNCS[combine](radius_a[idx_a], radius_b[idx_b])
+    return idx_a[keep], idx_b[keep], pairs['v'][keep]
+
+
+def radius_pairs_within(points, radius, combine='max', tree=None):
+    """
+    同一组点内距离不超过点对半径的点对
+
+    Returns:
+        ndarray: 点对下标 (n, 2)，每对 i < j
+    """
+    radius = np.asarray(radius, dtype=float)
+    if len(radius) == 0:
+        return np.zeros((0, 2), dtype=np.intp)
+
+    tree = tree if tree is not None else KDTree(points)
+    pairs = tree.query_pairs(float(radius.max()), output_type='ndarray')
+    dist = np.hypot(*(tree.data[pairs[:, 0]] - tree.data[pairs[:, 1]]).T)
+    return pairs[dist <= COMBINE_FUNCS[combine](radius[pairs[:, 0]], radius[pairs[:, 1]])]
@@ -0,0 +1,199 @@
+import numpy as np
+from scipy.spatial import KDTree
+
+
+# 估计对齐参数时最多使用的点数（均匀抽样），避免大数据量时候选点对过多
+MAX_ALIGN_POINTS = 20000
+
+
+def identity_alignment():
+    """不做变换的对齐参数"""
+    return {
+        'matrix': np.eye(2),
+        'translation': np.zeros(2),
+        'rotation_deg': 0.0,
+        'scale': 1.0,
+        'n_pairs_before': 0,
+        'n_pairs': 0,
+        'residual_before': np.nan,
+        'residual': np.nan,
+        'iterations': 0,
+        'applied': False,
+    }
+
+
+def apply_alignment(points, alignment):
+    """
+    对坐标应用对齐变换 p' = s·R·p + t
+
+    Args:
+        points: 坐标 (N, 2)
+        alignment: estimate_alignment 的返回值
+
+    Returns:
+        ndarray: 变换后的坐标 (N, 2)
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    return points @ alignment['matrix'].T + alignment['translation']
+
+
+def fit_similarity(src, dst, with_scale=True):
+    """
+    最小二乘估计二维相似变换（Umeyama方法），使 s·R·src + t ≈ dst
+
+    Args:
+        src, dst: 一一对应的坐标 (N, 2)
+        with_scale: 是否估计缩放，为False时缩放固定为1
+
+    Returns:
+        tuple: (矩阵 s·R (2, 2), 平移 (2,), 旋转角度(°), 缩放)
+    """
+    mu_src = src.mean(axis=0)
+    mu_dst = dst.mean(axis=0)
+    src_c = src - mu_src
+    dst_c = dst - mu_dst
+
+    cov = dst_c.T @ src_c / len(src)
+    u, sing, vt = np.linalg.svd(cov)
+    d = np.diag([1.0, np.sign(np.linalg.det(u) * np.linalg.det(vt))])
+    rotation = u @ d @ vt
+
+    scale = 1.0
+    if with_scale:
+        var_src = (src_c ** 2).sum() / len(src)
+        if var_src > 0:
+            scale = float(np.trace(np.diag(sing) @ d) / var_src)
+
+    matrix = scale * rotation
+    translation = mu_dst - matrix @ mu_src
+    rotation_deg = float(np.degrees(np.arctan2(rotation[1, 0], rotation[0, 0])))
+    return matrix, translation, rotation_deg, scale
+
+
+def _sample(points, max_points=MAX_ALIGN_POINTS):
+    """均匀抽样（结果可复现）"""
+    if len(points) <= max_points:
+        return points
+    return points[np.linspace(0, len(points) - 1, max_points).astype(np.intp)]
+
+
+def _nearest_pairs(tree, points, radius):
+    """points中每个点在tree中半径内（含半径，与匹配一致）的最近点，返回 (points下标, tree下标, 距离)"""
+    dist, idx = tree.query(points, k=1, distance_upper_bound=np.nextafter(radius, np.inf), workers=-1)
+    valid = idx < tree.n
+    return np.flatnonzero(valid), idx[valid], dist[valid]
+
+
+def _max_shift(corners, matrix_a, translation_a, matrix_b, translation_b):
+    """两个变换对同一组点（外接矩形的四个角）造成的最大位移差；仿射变换下矩形内各点的位移差不超过该值"""
+    return float(np.abs(corners @ (matrix_a - matrix_b).T + (translation_a - translation_b)).max())
+
+
+def _rms(values):
+    return float(np.sqrt(np.mean(values ** 2))) if len(values) > 0 else np.nan
+
+
+def estimate_offset(src, tree, search_radius, bins=40):
+    """
+    偏移直方图：统计搜索半径内所有点对的坐标差，取直方图峰值附近点对偏移的中位数作为粗略平移
+
+    Returns:
+        ndarray: 平移 (2,)，没有点对时为 (0, 0)
+    """
+    pairs = KDTree(src).sparse_distance_matrix(tree, search_radius, output_type='ndarray')
+    if len(pairs) == 0:
+        return np.zeros(2)
+
+    offsets = tree.data[pairs['j']] - src[pairs['i']]
+    edges = np.linspace(-search_radius, search_radius, bins + 1)
+    hist, _, _ = np.histogram2d(offsets[:, 0], offsets[:, 1], bins=[edges, edges])
+    peak_x, peak_y = np.unravel_index(np.argmax(hist), hist.shape)
+
+    # 取峰值所在格及相邻格内的偏移求中位数
+    bin_width = edges[1] - edges[0]
+    center = np.array([edges[peak_x], edges[peak_y]]) + bin_width / 2
+    near_peak = np.all(np.abs(offsets - center) <= 1.5 * bin_width, axis=1)
+    return np.median(offsets[near_peak], axis=0)
+
+
+def estimate_alignment(src_points, dst_points, inlier_radius, search_radius=None,
+                       with_scale=True, max_iter=30, tol=1e-3, dst_tree=None):
+    """
+    估计把 src_points 对齐到 dst_points 的相似变换（平移、旋转、缩放）
+
+    1. 偏移直方图在 search_radius 内求粗略平移；
+    2. ICP：用KDTree找 inlier_radius 内的最近点对，最小二乘拟合相似变换，迭代至收敛。
+    对齐后匹配点对数量不增加时不采用变换（applied=False）。
+
+    Args:
+        src_points: 待对齐坐标 (N, 2)，如CASI坐标
+        dst_points: 参考坐标 (M, 2)，如KLA坐标
+        inlier_radius: ICP中视为同一缺陷的最大距离（一般取匹配距离阈值）
+        search_radius: 粗略平移的搜索半径，默认 5 倍 inlier_radius
+        with_scale: 是否估计缩放
+        max_iter: ICP最大迭代次数
+        tol: 相邻两次迭代的变换使各点位置的变化都小于该值（与坐标同单位）时停止迭代
+        dst_tree: 已建好的 dst_points 的KDTree（可选）
+
+    Returns:
+        dict: matrix, translation, rotation_deg, scale, n_pairs_before, n_pairs,
+              residual_before, residual（点对距离RMS）, iterations, applied
+    """
+    result = identity_alignment()
+    src = _sample(np.asarray(src_points, dtype=float).reshape(-1, 2))
+    dst = np.asarray(dst_points, dtype=float).reshape(-1, 2)
+    if len(src) < 3 or len(dst) < 3:
+        return result
+
+    tree = dst_tree if dst_tree is not None else KDTree(dst)
+    _, _, dist = _nearest_pairs(tree, src, inlier_radius)
+    result['n_pairs_before'] = result['n_pairs'] = len(dist)
+    result['residual_before'] = result['residual'] = _rms(dist)
+
+    search_radius = search_radius or 5 * inlier_radius
+    matrix = np.eye(2)
+    translation = estimate_offset(src, tree, search_radius)
+    rotation_deg, scale = 0.0, 1.0
+    # 收敛判断按点的位移计算，矩阵的变化量乘以坐标大小（约1e5）后才与 tol 可比
+    low, high = src.min(axis=0), src.max(axis=0)
+    corners = np.array([low, [low[0], high[1]], [high[0], low[1]], high])
+
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        moved = src @ matrix.T + translation
+        src_idx, dst_idx, _ = _nearest_pairs(tree, moved, inlier_radius)
+        if len(src_idx) < 3:
+            return result
+
+        new_matrix, new_translation, rotation_deg, scale = fit_similarity(
+            src[src_idx], dst[dst_idx], with_scale)
+        converged = _max_shift(corners, new_matrix, new_translation, matrix, translation) < tol
+        matrix, translation = new_matrix, new_translation
+        if converged:
+            break
+
+    _, _, dist = _nearest_pairs(tree, src @ matrix.T + translation, inlier_radius)
+    if len(dist) < result['n_pairs_before']:
+        return result
+
+    result.update({
+        'matrix': matrix,
+        'translation': translation,
+        'rotation_deg': rotation_deg,
+        'scale': scale,
+        'n_pairs': len(dist),
+        'residual': _rms(dist),
+        'iterations': iterations,
+        'applied': True,
+    })
+    return result
+
+
+def format_alignment(alignment):
+    """对齐结果的简短说明"""
+    if not alignment['applied']:
+        return "未对齐（对齐后匹配点对没有增加）"
+    tx, ty = alignment['translation']
+    return (f"平移({tx:.1f}, {ty:.1f})，旋转 {alignment['rotation_deg']:.4f}°，"
+            f"缩放 {alignment['scale']:.6f}；点对 {alignment['n_pairs_before']} -> {alignment['n_pairs']}，"
+            f"残差RMS {alignment['residual_before']:.1f} -> {alignment['residual']:.1f}")
@@ -0,0 +1,247 @@
+"""
+匹配与聚类的规模基准测试（合成300mm晶圆数据，见 synthetic_wafer）
+
+对每条匹配路径和每个点数记录耗时（多次取最短）、峰值内存（tracemalloc，numpy分配也计入），
+并在点数不超过 --parity-max 时与参考实现对比结果。
+
+示例:
+    python benchmarks/bench_matching.py
+    python benchmarks/bench_matching.py --sizes 10000 100000 1000000 --paths kla common-rate --csv bench.csv
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+# 从仓库根目录导入分析模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import adaptive_radius
+import common_rate
+import condition_match
+import kla_match
+import synthetic_wafer
+
+
+KLA_THRESHOLD = 200.0
+CONDITION_THRESHOLD = 50.0
+COHESION_THRESHOLD = 200.0
+
+# 暴力参考实现每次计算的行数（控制距离矩阵内存）
+BRUTE_CHUNK = 1000
+
+
+def _brute_pairs(points_a, points_b, radius_a, radius_b, combine='max'):
+    """逐块计算全部距离，返回半径内的点对集合 {(i, j)}"""
+    pairs = set()
+    for start in range(0, len(points_a), BRUTE_CHUNK):
+        block = points_a[start:start + BRUTE_CHUNK]
+        dist = np.hypot(block[:, None, 0] - points_b[None, :, 0], block[:, None, 1] - points_b[None, :, 1])
+        limit = adaptive_radius.COMBINE_FUNCS[combine](radius_a[start:start + BRUTE_CHUNK, None], radius_b[None, :])
+        rows, cols = np.nonzero(dist <= limit)
+        pairs.update(zip((rows + start).tolist(), cols.tolist()))
+    return pairs
+
+
+def _brute_nearest(points, targets, threshold):
+    """每个点在阈值内的最近目标点下标，没有时为-1"""
+    nearest = np.full(len(points), -1, dtype=np.int64)
+    for start in range(0, len(points), BRUTE_CHUNK):
+        block = points[start:start + BRUTE_CHUNK]
+        dist = np.hypot(block[:, None, 0] - targets[None, :, 0], block[:, None, 1] - targets[None, :, 1])
+        best = dist.argmin(axis=1)
+        found = dist[np.arange(len(block)), best] <= threshold
+        nearest[start:start + BRUTE_CHUNK] = np.where(found, best, -1)
+    return nearest
+
+
+# ---------------------------------------------------------------------------
+# 各匹配路径：prepare(n, seed) 返回数据，run(data) 为计时部分，check(data, result) 返回是否一致
+# ---------------------------------------------------------------------------
+
+def _prepare_kla(n, seed):
+    casi_df, kla_df = synthetic_wafer.casi_kla_pair(n, seed=seed)
+    casi_df = kla_match.prepare_casi(casi_df)
+    casi_work, kla_work = kla_match.work_frames(casi_df, kla_df)
+    casi_work['DW1O_Size'] = casi_df['DW1O_Size'].to_numpy()
+    kla_work['DSIZE'] = kla_df['DSIZE'].to_numpy()
+    return casi_work, kla_work
+
+
+def _check_kla(data, result):
+    reference = kla_match._match_points_reference(*data, KLA_THRESHOLD)
+    return all(np.array_equal(a, b, equal_nan=True) for a, b in zip(result, reference))
+
+
+def _check_kla_adaptive(data, result):
+    casi_work, kla_work = data
+    rule = adaptive_radius.EXAMPLE_RULE
+    casi_pts = casi_work[['XREL', 'YREL']].to_numpy(dtype=float)
+    kla_pts = kla_work[['XREL', 'YREL']].to_numpy(dtype=float)
+    casi_r = adaptive_radius.point_radius(casi_work, rule, 'casi')
+    kla_r = adaptive_radius.point_radius(kla_work, rule, 'kla')
+    idx_a, idx_b, _ = adaptive_radius.radius_pairs(casi_pts, casi_r, kla_pts, kla_r, rule['combine'])
+    reference = _brute_pairs(casi_pts, kla_pts, casi_r, kla_r, rule['combine'])
+    normal = ~casi_work['is_special_type'].to_numpy(dtype=bool)
+    matched = np.zeros(len(kla_pts), dtype=bool)
+    matched[[j for i, j in reference if normal[i]]] = True
+    return set(zip(idx_a.tolist(), idx_b.tolist())) == reference and np.array_equal(result[1], matched)
+
+
+def _check_condition_nearest(data, result):
+    results_df, sorted_folders = result
+    base = data[sorted_folders[0]][['x', 'y']].to_numpy(dtype=float)
+    for k, folder in enumerate(sorted_folders[1:], 1):
+        other = data[folder][['x', 'y']].to_numpy(dtype=float)
+        tags = results_df[f'{folder}_SNR'].to_numpy()
+        matched_idx = np.where(np.isnan(tags), -1, tags - k * 10 ** 7).astype(np.int64)
+        if not np.array_equal(matched_idx, _brute_nearest(base, other, CONDITION_THRESHOLD)):
+            return False
+    return True
+
+
+def _check_one_to_one(data, result):
+    """一对一分配：其他工况的每个点最多匹配一个基准点，且匹配距离不超过阈值"""
+    results_df, sorted_folders = result
+    base = results_df[['X坐标', 'Y坐标']].to_numpy(dtype=float)
+    for k, folder in enumerate(sorted_folders[1:], 1):
+        tags = results_df[f'{folder}_SNR'].to_numpy()
+        matched = ~np.isnan(tags)
+        rows = (tags[matched] - k * 10 ** 7).astype(np.int64)
+        other = data[folder][['x', 'y']].to_numpy(dtype=float)[rows]
+        if len(np.unique(rows)) != len(rows) or np.any(np.hypot(*(base[matched] - other).T) > CONDITION_THRESHOLD):
+            return False
+    return True
+
+
+def _check_cluster(data, result):
+    """N路聚类：每个工况的每个点恰好出现在一行中（同一簇内同一工况最多一个点）"""
+    results_df, sorted_folders = result
+    for k, folder in enumerate(sorted_folders):
+        tags = results_df[f'{folder}_SNR'].dropna().to_numpy()
+        if not np.array_equal(np.sort(tags), k * 10 ** 7 + np.arange(len(data[folder]))):
+            return False
+    return True
+
+
+def _check_common_rate(data, result):
+    points, members = data[1], result
+    xy = points[['x', 'y']].to_numpy(dtype=float)
+    radius = np.full(len(xy), COHESION_THRESHOLD)
+    pairs = np.array(sorted(_brute_pairs(xy, xy, radius, radius)), dtype=np.int64).reshape(-1, 2)
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(xy), len(xy)))
+    _, labels = connected_components(graph, directed=False)
+    reference = common_rate._assign_groups(points.copy(), labels, 2)
+    return np.array_equal(members['group_id'].to_numpy(), reference['group_id'].to_numpy())
+
+
+def _prepare_common_rate(n, seed):
+    folders = synthetic_wafer.common_rate_points(n, seed=seed)
+    points, _ = common_rate.flatten_points(folders)
+    return folders, points
+
+
+def _prepare_incremental(n, seed):
+    folders = synthetic_wafer.common_rate_points(n, seed=seed)
+    index = common_rate.CommonRateIndex(COHESION_THRESHOLD)
+    index.update(folders)
+    return folders, index
+
+
+def _run_incremental(data):
+    """删除最后一个文件夹再加回（两次增量更新）"""
+    folders, index = data
+    names = list(folders)
+    index.update({name: folders[name] for name in names[:-1]})
+    return index.update(folders)
+
+
+def _check_incremental(data, result):
+    points, _ = common_rate.flatten_points(data[0])
+    return result['group_id'].equals(common_rate.find_common_groups(points, COHESION_THRESHOLD)['group_id'])
+
+
+PATHS = {
+    'kla': (_prepare_kla, lambda d: kla_match.match_points(*d, KLA_THRESHOLD), _check_kla),
+    'kla-adaptive': (_prepare_kla, lambda d: kla_match.match_points(*d, adaptive_radius.EXAMPLE_RULE),
+                     _check_kla_adaptive),
+    'condition-nearest': (lambda n, seed: synthetic_wafer.condition_frames(n, seed=seed),
+                          lambda d: condition_match.match_conditions(d, CONDITION_THRESHOLD, True, 'nearest'),
+                          _check_condition_nearest),
+    'condition-assignment': (lambda n, seed: synthetic_wafer.condition_frames(n, seed=seed),
+                             lambda d: condition_match.match_conditions(d, CONDITION_THRESHOLD, True, 'assignment'),
+                             _check_one_to_one),
+    'condition-cluster': (lambda n, seed: synthetic_wafer.condition_frames(n, seed=seed),
+                          lambda d: condition_match.match_conditions(d, CONDITION_THRESHOLD, True, 'cluster'),
+                          _check_cluster),
+    'common-rate': (_prepare_common_rate,
+                    lambda d: common_rate.find_common_groups(d[1], COHESION_THRESHOLD),
+                    _check_common_rate),
+    'common-rate-incremental': (_prepare_incremental, _run_incremental, _check_incremental),
+}
+
+
+def measure(path, n, repeat, seed, parity_max, memory=True):
+    """
+    对一条路径、一个点数做计时、内存和一致性检查
+
+    Returns:
+        dict: 路径、点数、耗时(s)、峰值内存(MB)、一致性
+    """
+    prepare, run, check = PATHS[path]
+    data = prepare(n, seed)
+
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak_mb = np.nan
+    if memory:
+        tracemalloc.start()
+        run(data)
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        tracemalloc.stop()
+
+    if n > parity_max:
+        parity = '跳过'
+    else:
+        parity = '通过' if check(data, result) else '不一致'
+    return {'路径': path, '点数': n, '耗时(s)': round(best, 4), '峰值内存(MB)': round(peak_mb, 1), '一致性': parity}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="匹配与聚类规模基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='每片晶圆的缺陷数')
+    parser.add_argument('--paths', nargs='+', choices=list(PATHS), default=list(PATHS), help='测试的匹配路径')
+    parser.add_argument('--repeat', type=int, default=3, help='每组重复次数（取最短）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--parity-max', type=int, default=10000,
+                        help='点数不超过该值时与参考实现对比（参考实现为逐点/暴力计算，较慢）')
+    parser.add_argument('--no-memory', action='store_true', help='不测峰值内存（省去一次额外运行）')
+    parser.add_argument('--csv', help='结果另存为CSV')
+    args = parser.parse_args(argv)
+
+    rows = []
+    for path in args.paths:
+        for n in args.sizes:
+            row = measure(path, n, args.repeat, args.seed, args.parity_max, memory=not args.no_memory)
+            rows.append(row)
+            print(f"{row['路径']:<26s}{row['点数']:>10d}{row['耗时(s)']:>10.3f} s"
+                  f"{row['峰值内存(MB)']:>10.1f} MB  {row['一致性']}", flush=True)
+
+    if args.csv:
+        pd.DataFrame(rows).to_csv(args.csv, index=False, encoding='utf-8-sig')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+启动导入耗时对比（每组在新的Python进程中测量，避免模块缓存影响）
+
+示例:
+    python benchmarks/bench_startup.py --repeat 5
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 拆分前主脚本启动时导入的全部模块
+BEFORE = [
+    'streamlit', 'pandas', 'numpy', 'matplotlib.pyplot', 'seaborn',
+    'plotly.express', 'plotly.graph_objects', 'plotly.subplots', 'PIL.Image',
+    'data_loader', 'result_store', 'klarf_tools', 'condition_match',
+    'kla_match', 'common_rate', 'region_filter',
+]
+
+# 拆分后主脚本启动时导入的模块；各页面模块在首次选中时才导入
+AFTER = ['streamlit', 'data_loader', 'result_store', 'ui_common']
+
+PAGES = ['tab_init_tools', 'tab_rule_editor', 'tab_defect_analysis',
+         'tab_image_viewer', 'tab_region_filter']
+
+_MEASURE = r'''
+import sys, time, importlib
+missing = []
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    try:
+        importlib.import_module(name)
+    except ImportError as e:
+        missing.append(getattr(e, 'name', None) or name)
+print(time.perf_counter() - start)
+print(','.join(sorted(set(missing))))
+'''
+
+
+def measure(modules, repeat):
+    """
+    在新进程中导入一组模块，返回最短耗时（秒）和缺失的模块
+
+    Returns:
+        tuple: (耗时, 缺失模块列表)
+    """
+    best = None
+    missing = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', _MEASURE, *modules],
+                             cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+        elapsed, missing_line = (out.stdout.splitlines() + [''])[:2]
+        best = min(best, float(elapsed)) if best is not None else float(elapsed)
+        missing = [m for m in missing_line.split(',') if m]
+    return best, missing
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="启动导入耗时对比")
+    parser.add_argument('--repeat', type=int, default=3, help='每组重复次数（取最短）')
+    args = parser.parse_args(argv)
+
+    rows = [('拆分前（全部导入）', BEFORE), ('拆分后（主脚本）', AFTER)]
+    rows += [(f"  + {page}", AFTER + [page]) for page in PAGES]
+
+    for label, modules in rows:
+        elapsed, missing = measure(modules, args.repeat)
+        note = f"  （未安装: {', '.join(missing)}）" if missing else ''
+        print(f"{label:<32s}{elapsed * 1000:9.1f} ms{note}")
+
+
+if __name__ == '__main__':
+    main()
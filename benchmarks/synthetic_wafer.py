@@ -0,0 +1,175 @@
+"""
+合成300mm晶圆缺陷坐标（用于匹配和聚类的基准测试）
+
+缺陷由四部分组成：均匀分布的随机缺陷、高斯团簇、划痕（带抖动的线段）和边缘环带。
+CASI/KLA 数据由同一组真实缺陷按检出比例、坐标偏移和抖动生成，重叠程度可控。
+需要仓库根目录在 sys.path 中（bench_matching 会自动添加）。
+"""
+import numpy as np
+import pandas as pd
+
+import kla_match
+import wafer_geometry
+
+
+# 各类缺陷的默认占比（其余为均匀分布的随机缺陷）
+DEFAULT_MIX = {'cluster': 0.2, 'scratch': 0.1, 'edge': 0.1}
+
+
+def _inside_wafer(rng, n, radius):
+    """晶圆内均匀分布的点（极坐标采样）"""
+    r = radius * np.sqrt(rng.random(n))
+    theta = rng.uniform(0, 2 * np.pi, n)
+    return np.column_stack([r * np.cos(theta), r * np.sin(theta)])
+
+
+def generate_defects(n_defects, seed=0, mix=None, n_clusters=None, n_scratches=None,
+                     cluster_sigma=2000.0, scratch_width=50.0):
+    """
+    生成一片晶圆上的缺陷坐标
+
+    Args:
+        n_defects: 缺陷总数
+        seed: 随机种子
+        mix: 各类缺陷占比 {'cluster', 'scratch', 'edge'}，默认 DEFAULT_MIX
+        n_clusters, n_scratches: 团簇和划痕数量，默认随缺陷数增加
+        cluster_sigma: 团簇的标准差（um）
+        scratch_width: 划痕的横向抖动（um）
+
+    Returns:
+        DataFrame: x、y（晶圆坐标，um）、pattern（random/cluster/scratch/edge）、size（缺陷尺寸，um）
+    """
+    rng = np.random.default_rng(seed)
+    mix = mix or DEFAULT_MIX
+    radius = wafer_geometry.WAFER_DIAMETER / 2
+    counts = {name: int(n_defects * fraction) for name, fraction in mix.items()}
+    counts['random'] = n_defects - sum(counts.values())
+    n_clusters = n_clusters or max(1, int(np.sqrt(n_defects) / 10))
+    n_scratches = n_scratches or max(1, int(np.log10(max(n_defects, 10))))
+
+    parts = {'random': _inside_wafer(rng, counts['random'], radius)}
+
+    centers = _inside_wafer(rng, n_clusters, radius * 0.9)
+    parts['cluster'] = (centers[rng.integers(0, n_clusters, counts['cluster'])] +
+                        rng.normal(0, cluster_sigma, (counts['cluster'], 2)))
+
+    starts = _inside_wafer(rng, n_scratches, radius * 0.8)
+    angles = rng.uniform(0, np.pi, n_scratches)
+    lengths = rng.uniform(0.1, 0.5, n_scratches) * radius
+    which = rng.integers(0, n_scratches, counts['scratch'])
+    along = rng.random(counts['scratch']) * lengths[which]
+    direction = np.column_stack([np.cos(angles[which]), np.sin(angles[which])])
+    normal = np.column_stack([-direction[:, 1], direction[:, 0]])
+    parts['scratch'] = (starts[which] + direction * along[:, None] +
+                        normal * rng.normal(0, scratch_width, counts['scratch'])[:, None])
+
+    edge_r = rng.uniform(wafer_geometry.edge_radius() - wafer_geometry.EDGE_EXCLUSION, radius, counts['edge'])
+    theta = rng.uniform(0, 2 * np.pi, counts['edge'])
+    parts['edge'] = np.column_stack([edge_r * np.cos(theta), edge_r * np.sin(theta)])
+
+    xy = np.vstack([parts[name] for name in ('random', 'cluster', 'scratch', 'edge')])
+    xy = np.clip(xy, -radius, radius) + np.asarray(wafer_geometry.WAFER_CENTER, dtype=float)
+    pattern = np.repeat(['random', 'cluster', 'scratch', 'edge'],
+                        [len(parts[name]) for name in ('random', 'cluster', 'scratch', 'edge')])
+    order = rng.permutation(len(xy))
+    return pd.DataFrame({
+        'x': xy[order, 0],
+        'y': xy[order, 1],
+        'pattern': pattern[order],
+        'size': rng.lognormal(np.log(0.05), 0.4, len(xy)),
+    })
+
+
+def observe(defects, detect_rate, offset=(0.0, 0.0), jitter=20.0, extra_rate=0.0, seed=0):
+    """
+    按检出比例、坐标偏移和抖动得到某一设备/工况看到的缺陷
+
+    Args:
+        defects: generate_defects 的结果
+        detect_rate: 真实缺陷被检出的比例
+        offset: 系统坐标偏移 (dx, dy)
+        jitter: 坐标抖动的标准差
+        extra_rate: 额外误报点数占真实缺陷数的比例（均匀分布在晶圆内）
+        seed: 随机种子
+
+    Returns:
+        DataFrame: x、y、size、true_id（对应真实缺陷的行号，误报为-1）
+    """
+    rng = np.random.default_rng(seed)
+    seen = np.flatnonzero(rng.random(len(defects)) < detect_rate)
+    xy = defects[['x', 'y']].to_numpy()[seen] + np.asarray(offset) + rng.normal(0, jitter, (len(seen), 2))
+    n_extra = int(len(defects) * extra_rate)
+    extra = _inside_wafer(rng, n_extra, wafer_geometry.WAFER_DIAMETER / 2) + np.asarray(wafer_geometry.WAFER_CENTER)
+    return pd.DataFrame({
+        'x': np.concatenate([xy[:, 0], extra[:, 0]]),
+        'y': np.concatenate([xy[:, 1], extra[:, 1]]),
+        'size': np.concatenate([defects['size'].to_numpy()[seen], rng.lognormal(np.log(0.04), 0.3, n_extra)]),
+        'true_id': np.concatenate([seen, np.full(n_extra, -1)]),
+    })
+
+
+def casi_kla_pair(n_defects, seed=0, kla_rate=0.9, casi_rate=0.8, offset=(30.0, -20.0), jitter=20.0,
+                  overdetect_rate=0.1, special_rate=0.03):
+    """
+    生成一组CASI与KLA数据（列名与实际文件一致，可直接传给 kla_match）
+
+    Returns:
+        tuple: (CASI DataFrame（BlobFeatures格式）, KLA DataFrame（XREL、YREL、DSIZE）)
+    """
+    rng = np.random.default_rng(seed)
+    defects = generate_defects(n_defects, seed=seed)
+    kla = observe(defects, kla_rate, jitter=jitter / 2, seed=seed + 1)
+    casi = observe(defects, casi_rate, offset=offset, jitter=jitter, extra_rate=overdetect_rate, seed=seed + 2)
+
+    casi_df = pd.DataFrame({
+        'nDefectID': np.arange(1, len(casi) + 1),
+        'nDefectType': np.where(rng.random(len(casi)) < special_rate, kla_match.SPECIAL_DEFECT_TYPES[0], 1),
+        'dCenterXCartisian': casi['x'],
+        'dCenterYCartisian': casi['y'],
+    })
+    for feature in kla_match.COORD_FEATURES:
+        casi_df[feature] = rng.normal(100, 20, len(casi))
+    casi_df['DW1O_Size'] = casi['size'].to_numpy() * 1000 / 20
+    kla_df = pd.DataFrame({'XREL': kla['x'], 'YREL': kla['y'], 'DSIZE': kla['size']})
+    return casi_df, kla_df
+
+
+def condition_frames(n_defects, n_conditions=3, seed=0, detect_rate=0.85, jitter=15.0, extra_rate=0.05):
+    """
+    生成多工况数据（condition_match 的 folder_data 格式，x、y、snr、maxorg、bgdev）
+
+    特征列取 工况编号×10^7 + 行号，便于从匹配结果还原对应的点。
+    """
+    defects = generate_defects(n_defects, seed=seed)
+    folder_data = {}
+    for k in range(n_conditions):
+        seen = observe(defects, detect_rate, jitter=jitter, extra_rate=extra_rate, seed=seed + 10 + k)
+        row_tag = k * 10 ** 7 + np.arange(len(seen), dtype=float)
+        folder_data[f'cond{k}'] = pd.DataFrame({
+            'x': seen['x'], 'y': seen['y'], 'snr': row_tag, 'maxorg': row_tag, 'bgdev': row_tag,
+        })
+    return folder_data
+
+
+def common_rate_points(n_defects, n_folders=3, seed=0, detect_rate=0.7, jitter=40.0, extra_rate=0.2):
+    """
+    生成共有率分析的各文件夹点（collect_folder_defects 中单一缺陷类型的DataFrame格式）
+
+    Returns:
+        dict: 文件夹 -> DataFrame（x、y、defect_id、defect_type_value 及 COORD_FEATURES）
+    """
+    rng = np.random.default_rng(seed)
+    defects = generate_defects(n_defects, seed=seed)
+    folders = {}
+    for k in range(n_folders):
+        seen = observe(defects, detect_rate, jitter=jitter, extra_rate=extra_rate, seed=seed + 20 + k)
+        df = pd.DataFrame({
+            'x': seen['x'], 'y': seen['y'],
+            'defect_id': np.arange(1, len(seen) + 1).astype(float),
+            'defect_type_value': 1.0,
+        })
+        for feature in kla_match.COORD_FEATURES:
+            df[feature] = rng.normal(100, 20, len(seen))
+        df['DW1O_Size'] = seen['size'].to_numpy() * 1000 / 20
+        folders[f'folder{k}'] = df
+    return folders
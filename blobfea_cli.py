@@ -0,0 +1,402 @@
+"""
+缺陷数据分析命令行工具（无需启动Streamlit）
+
+示例:
+    python blobfea_cli.py klarf D:/lot1/klarf -o out
+    python blobfea_cli.py merge-csv D:/lot1 --keyword BlobFeatures -o out
+    python blobfea_cli.py condition-match D:/lot1/condA D:/lot1/condB --threshold 50 --jobs 4
+    python blobfea_cli.py kla-match D:/lot1 D:/lot2 --threshold 200 --jobs 4 -o out
+    python blobfea_cli.py kla-match D:/lot1 --trend-db trend.sqlite --condition condA
+    python blobfea_cli.py kla-match D:/lot1 --wafer-diameter 200000 --wafer-center 100000 100000 --zones 5 8
+    python blobfea_cli.py trend --trend-db trend.sqlite --condition condA -o out
+    python blobfea_cli.py kla-sweep D:/lot1 --min 25 --max 500 --step 25 -o out
+    python blobfea_cli.py common-rate D:/lot1 --match-threshold 200 --threshold 200 -o out
+    python blobfea_cli.py region-filter D:/lot1 --config filter_regions_config.json
+    python blobfea_cli.py saturation D:/lot1/crop -o out
+"""
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+def _root_name(root_folder):
+    """用文件夹名作为输出文件名前缀"""
+    return os.path.basename(os.path.normpath(root_folder))
+
+
+def _map_jobs(func, items, jobs):
+    """按 --jobs 并行执行，jobs<=1 时在当前进程顺序执行"""
+    if jobs <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(func, items))
+
+
+def _klarf_job(task):
+    import klarf_tools
+    import data_loader
+
+    folder, output_dir = task
+    parser = klarf_tools.KLARFParser(folder)
+    all_data = parser.parse_all_files()
+    if not all_data:
+        return folder, None
+
+    all_data = data_loader.downcast_frames(all_data)[0]
+    sorted_sheets = sorted(all_data.keys(), key=klarf_tools.get_slot_number)
+    output_path = os.path.join(output_dir, f"{_root_name(folder)}_klarf.xlsx")
+    with open(output_path, 'wb') as f:
+        f.write(klarf_tools.frames_to_excel_bytes(all_data, sorted_sheets, engine='openpyxl'))
+    return folder, output_path
+
+
+def _merge_csv_job(task):
+    import klarf_tools
+
+    root_folder, file_keyword, output_dir = task
+    slot_data = klarf_tools.merge_slot_csv_files(root_folder, file_keyword)
+    if not slot_data:
+        return root_folder, None
+
+    sorted_slots = sorted(slot_data.keys(), key=int)
+    frames = {f"slot{slot}": slot_data[slot] for slot in sorted_slots}
+    output_path = os.path.join(output_dir, f"{_root_name(root_folder)}_merged.xlsx")
+    with open(output_path, 'wb') as f:
+        f.write(klarf_tools.frames_to_excel_bytes(frames))
+    return root_folder, output_path
+
+
+def _condition_match_job(task):
+    import condition_match
+
+    root_folder, threshold, show_unmatched, mode, output_dir = task
+    folder_data = condition_match.load_condition_folders(root_folder)
+    if len(folder_data) < 2:
+        print(f"[warning] {root_folder}: 至少需要2个工况文件夹")
+        return root_folder, None
+
+    results_df, _ = condition_match.match_conditions(folder_data, threshold, show_unmatched, mode)
+    if results_df is None:
+        return root_folder, None
+
+    output_path = os.path.join(output_dir, f"{_root_name(root_folder)}_condition_match.csv")
+    results_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    return root_folder, output_path
+
+
+def _cache_dir(args):
+    """--no-cache 时返回None（不使用匹配结果缓存）"""
+    return None if args.no_cache else args.cache_dir
+
+
+def _geometry(args):
+    """由 --wafer-center/--wafer-diameter/--edge-exclusion 生成晶圆几何参数"""
+    import wafer_geometry
+
+    return wafer_geometry.make_geometry(args.wafer_center, args.wafer_diameter, args.edge_exclusion)
+
+
+def _radius_rule(path, threshold):
+    """读取自适应匹配半径规则(JSON)，未指定 base 时取固定阈值；path为空时返回固定阈值"""
+    if not path:
+        return threshold
+    import json
+
+    with open(path, 'r', encoding='utf-8') as f:
+        rule = json.load(f)
+    rule.setdefault('base', threshold)
+    return rule
+
+
+def _kla_match_job(task):
+    import kla_match
+
+    root_folder, layout, threshold, align, align_radius, geometry, size_range, cache_dir = task
+    casi_sources, kla_sources = kla_match.list_sources(root_folder, layout)
+    return root_folder, kla_match.run_pairs(casi_sources, kla_sources, threshold, align=align,
+                                            align_radius=align_radius, cache_dir=cache_dir, geometry=geometry,
+                                            size_range=size_range)
+
+
+def _saturation_job(task):
+    import saturation_analysis
+
+    folder, = task
+    return folder, saturation_analysis.process_folder(folder)
+
+
+def cmd_klarf(args):
+    tasks = [(folder, args.output_dir) for folder in args.folders]
+    for folder, output_path in _map_jobs(_klarf_job, tasks, args.jobs):
+        print(f"[info] {folder} -> {output_path or '无数据'}")
+
+
+def cmd_merge_csv(args):
+    tasks = [(root, args.keyword, args.output_dir) for root in args.roots]
+    for root, output_path in _map_jobs(_merge_csv_job, tasks, args.jobs):
+        print(f"[info] {root} -> {output_path or '无数据'}")
+
+
+def cmd_condition_match(args):
+    tasks = [(root, args.threshold, args.show_unmatched, args.mode, args.output_dir)
+             for root in args.roots]
+    for root, output_path in _map_jobs(_condition_match_job, tasks, args.jobs):
+        print(f"[info] {root} -> {output_path or '无匹配结果'}")
+
+
+def cmd_kla_match(args):
+    import kla_match
+
+    threshold = _radius_rule(args.radius_rule, args.threshold)
+    geometry = _geometry(args)
+    size_range = (kla_match.SIZE_BIN_MIN if args.size_min is None else args.size_min,
+                  kla_match.SIZE_BIN_MAX if args.size_max is None else args.size_max)
+    tasks = [(root, args.layout, threshold, args.align, args.align_radius, geometry, size_range, _cache_dir(args))
+             for root in args.roots]
+    for root, results in _map_jobs(_kla_match_job, tasks, args.jobs):
+        if not results:
+            print(f"[warning] {root}: 未生成任何匹配结果")
+            continue
+        output_path = os.path.join(args.output_dir, f"{_root_name(root)}_kla_match.csv")
+        kla_match.summary_frame(results).to_csv(output_path, index=False, encoding='utf-8-sig')
+        print(f"[info] {root} -> {output_path}")
+        if args.zones:
+            zone_frames = []
+            for result in results:
+                zones = kla_match.zone_stats(result['coord_data'], args.zones[0], args.zones[1], result['geometry'],
+                                             equal_area=args.zone_equal_area)
+                zones.insert(0, 'KLA文件夹', result['KLA文件夹'])
+                zones.insert(0, 'CASI文件夹', result['CASI文件夹'])
+                zone_frames.append(zones)
+            zone_path = os.path.join(args.output_dir, f"{_root_name(root)}_kla_zones.csv")
+            pd.concat(zone_frames, ignore_index=True).to_csv(zone_path, index=False, encoding='utf-8-sig')
+            print(f"[info] {root} -> {zone_path}")
+        if args.trend_db:
+            import trend_store
+
+            version = args.rule_version or trend_store.rule_version(threshold, args.align, args.align_radius,
+                                                                    geometry, size_range)
+            trend_store.append_results(results, args.lot or _root_name(root), args.condition, version,
+                                       rule_desc=trend_store.describe_rule(threshold, args.align, geometry),
+                                       source=os.path.abspath(root), path=args.trend_db)
+
+
+def cmd_trend(args):
+    import trend_store
+
+    if not os.path.exists(args.trend_db):
+        print(f"[warning] 趋势库不存在: {args.trend_db}")
+        return
+    trend_df = trend_store.lot_trend(args.trend_db, lots=args.lots, conditions=args.condition,
+                                     rule_versions=args.rule_version, since=args.since, until=args.until)
+    if trend_df.empty:
+        print("[warning] 没有符合条件的记录")
+        return
+    output_path = os.path.join(args.output_dir, "lot_trend.csv")
+    trend_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    print(f"[info] {len(trend_df)} 个批次 -> {output_path}")
+
+
+def _kla_sweep_job(task):
+    import numpy as np
+    import kla_match
+
+    root_folder, layout, threshold_range, align, threshold, align_radius, geometry = task
+    thresholds = np.arange(threshold_range[0], threshold_range[1] + threshold_range[2] / 2, threshold_range[2])
+    casi_sources, kla_sources = kla_match.list_sources(root_folder, layout)
+    return root_folder, kla_match.sweep_sources(casi_sources, kla_sources, thresholds, align=align,
+                                                match_threshold=threshold, align_radius=align_radius,
+                                                geometry=geometry)
+
+
+def cmd_kla_sweep(args):
+    tasks = [(root, args.layout, (args.min, args.max, args.step), args.align, args.threshold, args.align_radius,
+              _geometry(args))
+             for root in args.roots]
+    for root, sweep_df in _map_jobs(_kla_sweep_job, tasks, args.jobs):
+        if sweep_df.empty:
+            print(f"[warning] {root}: 未生成任何扫描结果")
+            continue
+        output_path = os.path.join(args.output_dir, f"{_root_name(root)}_kla_sweep.csv")
+        sweep_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+        print(f"[info] {root} -> {output_path}")
+
+
+def cmd_common_rate(args):
+    import common_rate
+
+    match_threshold = _radius_rule(args.match_radius_rule, args.match_threshold)
+    threshold = _radius_rule(args.radius_rule, args.threshold)
+    tasks = [(root, args.layout, match_threshold, args.align, args.align_radius, _geometry(args), None,
+              _cache_dir(args))
+             for root in args.roots]
+    for root, results in _map_jobs(_kla_match_job, tasks, args.jobs):
+        analysis = common_rate.analyze_common_rate(results, threshold, args.min_occurrence)
+        if analysis is None:
+            print(f"[warning] {root}: 至少需要2个CASI文件夹进行共有率分析")
+            continue
+
+        prefix = os.path.join(args.output_dir, _root_name(root))
+        for defect_type, result in analysis.items():
+            result['stats'].to_csv(f"{prefix}_{defect_type}_共有率.csv", index=False, encoding='utf-8-sig')
+            result['correspondence'].to_csv(f"{prefix}_{defect_type}_共有缺陷.csv", index=False, encoding='utf-8-sig')
+            if not result['non_shared'].empty:
+                result['non_shared'].to_csv(f"{prefix}_{defect_type}_不共有缺陷.csv", index=False, encoding='utf-8-sig')
+            print(f"[info] {root} {defect_type}: {len(result['groups'])} 个共有位置")
+
+
+def cmd_region_filter(args):
+    import region_filter
+
+    config_data = region_filter.load_config(args.config)
+    for root in args.roots:
+        results = region_filter.filter_folder(root, config_data)
+        for subfolder_name, (df_working, region_list) in results.items():
+            removed = sum(region['removed'] for region in region_list)
+            output_path = os.path.join(root, subfolder_name, f"{subfolder_name}_filtered.csv")
+            df_working.to_csv(output_path, index=False, encoding='utf-8-sig')
+            print(f"[info] {subfolder_name}: 删除 {removed} 个点 -> {output_path}")
+
+
+def cmd_saturation(args):
+    from pathlib import Path
+
+    tasks = []
+    for root in args.roots:
+        tasks.extend((str(f),) for f in sorted(Path(root).iterdir()) if f.is_dir())
+
+    all_results = []
+    for folder, results in _map_jobs(_saturation_job, tasks, args.jobs):
+        print(f"[info] {folder}: {len(results)} 个缺陷")
+        all_results.extend(results)
+
+    if all_results:
+        df = pd.DataFrame([{k: v for k, v in r.items() if k != 'row_data'} for r in all_results])
+        output_path = os.path.join(args.output_dir, "saturation_analysis.csv")
+        df.to_csv(output_path, index=False, encoding='utf-8-sig')
+        print(f"[info] 结果已保存: {output_path}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="缺陷数据分析命令行工具")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_common(sub, roots_name='roots', roots_help='主文件夹（可多个）'):
+        sub.add_argument(roots_name, nargs='+', help=roots_help)
+        sub.add_argument('-o', '--output-dir', default='.', help='输出文件夹')
+        sub.add_argument('-j', '--jobs', type=int, default=1, help='并行进程数')
+
+    def add_align(sub):
+        sub.add_argument('--align', action='store_true', help='匹配前自动估计并校正CASI坐标的平移/旋转/缩放')
+        sub.add_argument('--align-radius', type=float, default=None, help='对齐搜索半径（默认5倍匹配阈值）')
+
+    def add_geometry(sub):
+        import wafer_geometry
+
+        sub.add_argument('--wafer-center', type=float, nargs=2, metavar=('X', 'Y'),
+                         default=wafer_geometry.WAFER_CENTER, help='晶圆中心坐标')
+        sub.add_argument('--wafer-diameter', type=float, default=wafer_geometry.WAFER_DIAMETER, help='晶圆直径')
+        sub.add_argument('--edge-exclusion', type=float, default=wafer_geometry.EDGE_EXCLUSION,
+                         help='边缘去除宽度（边缘的过检点不计入过检）')
+
+    def add_cache(sub):
+        import match_cache
+
+        sub.add_argument('--cache-dir', default=match_cache.DEFAULT_CACHE_DIR, help='匹配结果缓存目录')
+        sub.add_argument('--no-cache', action='store_true', help='不读取也不写入匹配结果缓存')
+
+    sub = subparsers.add_parser('klarf', help='解析KLARF文件并合并为Excel')
+    add_common(sub, 'folders', 'KLARF文件夹（可多个）')
+    sub.set_defaults(func=cmd_klarf)
+
+    sub = subparsers.add_parser('merge-csv', help='按slot合并CSV文件为Excel')
+    add_common(sub)
+    sub.add_argument('--keyword', default='', help='CSV文件名需包含的关键词')
+    sub.set_defaults(func=cmd_merge_csv)
+
+    sub = subparsers.add_parser('condition-match', help='多工况缺陷匹配')
+    add_common(sub)
+    sub.add_argument('--threshold', type=float, default=50.0, help='匹配距离阈值')
+    sub.add_argument('--show-unmatched', action='store_true', help='保留只在基准文件夹中出现的缺陷')
+    sub.add_argument('--mode', choices=['nearest', 'assignment', 'cluster'], default='nearest',
+                     help='nearest: 各自取最近点；assignment: 一对一分配；cluster: 所有工况N路聚类')
+    sub.set_defaults(func=cmd_condition_match)
+
+    sub = subparsers.add_parser('kla-match', help='CASI与KLA匹配（过漏检统计）')
+    add_common(sub)
+    sub.add_argument('--layout', choices=['folders', 'files'], default='folders',
+                     help='folders: 每个子文件夹一组数据；files: 文件夹内直接存放CSV')
+    sub.add_argument('--threshold', type=float, default=200.0, help='匹配距离阈值')
+    sub.add_argument('--radius-rule', help='自适应匹配半径规则(JSON，见 adaptive_radius)，base 默认取 --threshold')
+    add_align(sub)
+    add_geometry(sub)
+    add_cache(sub)
+    sub.add_argument('--size-min', type=int, help='正确检出/漏检DSIZE统计的尺寸下限(nm)，默认26')
+    sub.add_argument('--size-max', type=int, help='正确检出/漏检DSIZE统计的尺寸上限(nm)，默认100')
+    sub.add_argument('--zones', type=int, nargs=2, metavar=('N_RINGS', 'N_SECTORS'),
+                     help='另外输出按晶圆环带×扇区统计的过检/正确检出/漏检数量')
+    sub.add_argument('--zone-equal-area', action='store_true', help='各环带面积相等（默认宽度相等）')
+    sub.add_argument('--trend-db', help='将各slot汇总结果追加到该趋势库(SQLite)')
+    sub.add_argument('--lot', help='写入趋势库的批次（默认取主文件夹名）')
+    sub.add_argument('--condition', default='', help='写入趋势库的工况')
+    sub.add_argument('--rule-version', help='写入趋势库的规则版本（默认由阈值和对齐设置生成）')
+    sub.set_defaults(func=cmd_kla_match)
+
+    sub = subparsers.add_parser('trend', help='从趋势库导出按批次汇总的趋势（无需重新匹配）')
+    sub.add_argument('--trend-db', required=True, help='趋势库(SQLite)')
+    sub.add_argument('-o', '--output-dir', default='.', help='输出文件夹')
+    sub.add_argument('--lots', nargs='+', help='批次（默认全部）')
+    sub.add_argument('--condition', nargs='+', help='工况（默认全部）')
+    sub.add_argument('--rule-version', nargs='+', help='规则版本（默认全部）')
+    sub.add_argument('--since', help='写入时间起点，如 2024-01-01')
+    sub.add_argument('--until', help='写入时间终点')
+    sub.set_defaults(func=cmd_trend)
+
+    sub = subparsers.add_parser('kla-sweep', help='CASI与KLA匹配阈值扫描（各阈值下的检出/漏检/过检）')
+    add_common(sub)
+    sub.add_argument('--layout', choices=['folders', 'files'], default='folders')
+    sub.add_argument('--min', type=float, default=25.0, help='最小阈值')
+    sub.add_argument('--max', type=float, default=500.0, help='最大阈值')
+    sub.add_argument('--step', type=float, default=25.0, help='步长')
+    sub.add_argument('--threshold', type=float, default=None,
+                     help='对齐时ICP的点对距离上限（默认取扫描阈值的中位数）')
+    add_align(sub)
+    add_geometry(sub)
+    sub.set_defaults(func=cmd_kla_sweep)
+
+    sub = subparsers.add_parser('common-rate', help='CASI缺陷坐标共有率分析')
+    add_common(sub)
+    sub.add_argument('--layout', choices=['folders', 'files'], default='folders')
+    sub.add_argument('--match-threshold', type=float, default=200.0, help='CASI与KLA匹配距离阈值')
+    sub.add_argument('--threshold', type=float, default=200.0, help='共有位置匹配距离阈值')
+    sub.add_argument('--match-radius-rule', help='CASI与KLA匹配的自适应半径规则(JSON)')
+    sub.add_argument('--radius-rule', help='共有位置的自适应半径规则(JSON，只用 casi 尺寸规则)')
+    sub.add_argument('--min-occurrence', type=int, default=2, help='最小出现次数')
+    add_align(sub)
+    add_geometry(sub)
+    add_cache(sub)
+    sub.set_defaults(func=cmd_common_rate)
+
+    sub = subparsers.add_parser('region-filter', help='按配置文件删除区域内的点')
+    sub.add_argument('roots', nargs='+', help='包含子文件夹的根文件夹（可多个）')
+    sub.add_argument('--config', required=True, help='删除区域配置文件(JSON)')
+    sub.set_defaults(func=cmd_region_filter)
+
+    sub = subparsers.add_parser('saturation', help='饱和像素分析')
+    add_common(sub)
+    sub.set_defaults(func=cmd_saturation)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, 'output_dir', None):
+        os.makedirs(args.output_dir, exist_ok=True)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
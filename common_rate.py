@@ -0,0 +1,570 @@
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import KDTree
+
+import adaptive_radius
+import kla_match
+
+
+# 共有率分析的缺陷类型（与 kla_match 结果中的 coord_data 一致）
+DEFECT_TYPES = ['过检', '正确检出', '漏检']
+
+# 对应关系表中展示的特征（按通道和特征组织）
+FEATURE_NAMES = kla_match.COORD_FEATURES
+
+
+def _format_array(values, fmt='%.2f'):
+    """浮点数组按格式转换为字符串数组"""
+    return np.array([fmt % value for value in np.asarray(values, dtype=float).tolist()], dtype=object)
+
+
+def _format_values(values, fmt='%.2f'):
+    """数值按格式转换为字符串数组，无效值为空字符串"""
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    text = np.full(len(values), '', dtype=object)
+    text[valid] = _format_array(values[valid], fmt)
+    return text
+
+
+def _join_runs(keys, texts, sep=', '):
+    """
+    按相邻的相同键拼接字符串（keys需已排序）
+
+    Returns:
+        tuple: (每段的起始下标, 拼接后的字符串数组)
+    """
+    keys = np.asarray(keys)
+    texts = np.asarray(texts, dtype=object)
+    first = np.r_[True, keys[1:] != keys[:-1]] if len(keys) > 0 else np.zeros(0, dtype=bool)
+    starts = np.flatnonzero(first)
+    if len(starts) == 0:
+        return starts, texts
+    return starts, np.add.reduceat(np.where(first, texts, sep + texts), starts)
+
+
+def collect_folder_defects(all_match_results):
+    """
+    从CASI-KLA匹配结果中按CASI文件夹汇总各类型缺陷点（此时才按行号取出特征数据）
+
+    Args:
+        all_match_results: kla_match.analyze_pair/analyze_sheet_pair 的结果列表
+
+    Returns:
+        dict: CASI文件夹 -> {'过检': DataFrame, '正确检出': DataFrame, '漏检': DataFrame}，
+              DataFrame 的列见 kla_match.coord_points
+    """
+    frames = {}
+    for result in all_match_results:
+        # 检查是否有coord_data
+        if 'coord_data' not in result:
+            continue
+        folder_frames = frames.setdefault(kla_match.pair_names(result)[0], {defect_type: [] for defect_type in DEFECT_TYPES})
+        for defect_type in DEFECT_TYPES:
+            folder_frames[defect_type].append(kla_match.coord_points(result['coord_data'], defect_type))
+
+    # 合并同一文件夹的多个结果
+    return {folder: {defect_type: pd.concat(parts, ignore_index=True) for defect_type, parts in folder_frames.items()}
+            for folder, folder_frames in frames.items()}
+
+
+def points_by_folder(folder_defects, defect_type):
+    """取出某一缺陷类型在各文件夹中的点（跳过没有该类型的文件夹）"""
+    return {folder: defects[defect_type] for folder, defects in folder_defects.items()
+            if defect_type in defects and len(defects[defect_type]) > 0}
+
+
+def flatten_points(all_points_by_folder):
+    """
+    合并所有文件夹的点并记录来源，过滤没有nDefectID的点（来自KLA的漏检数据）
+
+    Args:
+        all_points_by_folder: dict(文件夹 -> collect_folder_defects 中的DataFrame)
+
+    Returns:
+        tuple: (DataFrame(folder 列 + coord_points 的列), 被过滤的点数)
+    """
+    if not all_points_by_folder:
+        return pd.DataFrame(columns=['folder', 'x', 'y', 'defect_id', 'defect_type_value'] + FEATURE_NAMES), 0
+
+    points = pd.concat([frame.assign(folder=folder) for folder, frame in all_points_by_folder.items()],
+                       ignore_index=True)
+    points = points[['folder'] + [col for col in points.columns if col != 'folder']]
+    has_id = points['defect_id'].notna().to_numpy()
+    return points[has_id].reset_index(drop=True), int((~has_id).sum())
+
+
+def _combine(cohesion_threshold):
+    return cohesion_threshold.get('combine', 'max') if adaptive_radius.is_adaptive(cohesion_threshold) else 'max'
+
+
+def _pairs_within(tree, radius, cohesion_threshold):
+    """同一组点内距离不超过阈值（或点对半径）的点对 (n, 2)"""
+    if adaptive_radius.is_adaptive(cohesion_threshold):
+        return adaptive_radius.radius_pairs_within(tree.data, radius, _combine(cohesion_threshold), tree=tree)
+    return tree.query_pairs(cohesion_threshold, output_type='ndarray')
+
+
+def _pairs_between(tree_a, radius_a, tree_b, radius_b, cohesion_threshold):
+    """两组点之间距离不超过阈值（或点对半径）的点对，返回 (a中下标, b中下标, 距离)"""
+    if adaptive_radius.is_adaptive(cohesion_threshold):
+        return adaptive_radius.radius_pairs(tree_a.data, radius_a, tree_b.data, radius_b,
+                                            _combine(cohesion_threshold), tree_a=tree_a, tree_b=tree_b)
+    pairs = tree_a.sparse_distance_matrix(tree_b, cohesion_threshold, output_type='ndarray')
+    return pairs['i'], pairs['j'], pairs['v']
+
+
+def component_labels(all_points, cohesion_threshold, radius=None):
+    """
+    把距离不超过阈值的点连成图，返回连通分量编号（与点的顺序无关）
+
+    Args:
+        all_points: 坐标数组(N, 2)
+        cohesion_threshold: 匹配距离阈值，或自适应半径规则（见 adaptive_radius）
+        radius: 每个点的半径（自适应半径规则时使用，见 adaptive_radius.point_radius）
+
+    Returns:
+        tuple: (分量数, 每个点的分量编号(N,))；分量按其中最小的点序号排序
+    """
+    n_points = len(all_points)
+    pairs = _pairs_within(KDTree(all_points), radius, cohesion_threshold)
+    graph = coo_matrix((np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])),
+                       shape=(n_points, n_points))
+    return connected_components(graph, directed=False)
+
+
+def find_common_groups(points, cohesion_threshold, min_occurrence=2):
+    """
+    查找在多个文件夹中出现的共有位置
+
+    距离不超过阈值的点连通为同一位置（连通分量），包含至少 min_occurrence 个
+    文件夹的位置为共有位置。
+
+    Args:
+        points: flatten_points 返回的点表
+        cohesion_threshold: 匹配距离阈值，或自适应半径规则（按 'casi' 规则的尺寸列计算每个点的半径）
+        min_occurrence: 至少出现在多少个文件夹中才算共有位置
+
+    Returns:
+        DataFrame: 点表加上 group_id（共有位置ID，从1开始，不属于共有位置为0）
+                   和 folder_id（文件夹按名称排序的编号）两列
+    """
+    members = points.reset_index(drop=True).copy()
+    if len(members) == 0:
+        return _assign_groups(members, np.zeros(0, dtype=np.int64), min_occurrence)
+
+    radius = adaptive_radius.point_radius(members, cohesion_threshold, 'casi')
+    _, labels = component_labels(members[['x', 'y']].to_numpy(dtype=float), cohesion_threshold, radius)
+    return _assign_groups(members, labels, min_occurrence)
+
+
+def _assign_groups(members, labels, min_occurrence):
+    """
+    按连通分量编号给点表添加 folder_id、group_id 列（原地修改并返回）
+
+    共有位置按分量中第一个点的顺序从1开始编号，与 component_labels 的分量顺序一致。
+    """
+    folder_codes, folder_names = pd.factorize(members['folder'], sort=True)
+    members['folder_id'] = folder_codes
+    members['group_id'] = 0
+    if len(members) == 0:
+        return members
+
+    labels, _ = pd.factorize(labels)
+    n_components = labels.max() + 1
+
+    # 每个分量中不同文件夹的数量
+    component_folder = np.unique(labels.astype(np.int64) * len(folder_names) + folder_codes)
+    folder_counts = np.bincount(component_folder // len(folder_names), minlength=n_components)
+
+    # 共有位置按分量顺序编号
+    shared = folder_counts >= min_occurrence
+    group_ids = np.zeros(n_components, dtype=np.int64)
+    group_ids[shared] = np.arange(1, shared.sum() + 1)
+    members['group_id'] = group_ids[labels]
+    return members
+
+
+class CommonRateIndex:
+    """
+    可增量更新的共有位置索引（用于交互式增减文件夹）
+
+    每个文件夹保存一棵KDTree、文件夹内及与其他文件夹间阈值内的点对和每个点的分量编号。
+    增加文件夹时只用新文件夹的点查询已有的树并合并相连的分量；删除文件夹时只对
+    包含其点的分量重新计算连通性。结果与 find_common_groups 从头计算一致。
+    """
+
+    def __init__(self, cohesion_threshold):
+        self.cohesion_threshold = cohesion_threshold
+        self._points = {}       # 文件夹 -> 有nDefectID的点表
+        self._trees = {}        # 文件夹 -> KDTree
+        self._radius = {}       # 文件夹 -> 每个点的半径（自适应半径规则时使用）
+        self._pairs = {}        # (文件夹a, 文件夹b) -> 点对下标 (n, 2)；a == b 时为文件夹内点对
+        self._labels = {}       # 文件夹 -> 每个点的分量编号
+        self._next_label = 0
+
+    @property
+    def folders(self):
+        """已加入索引的文件夹"""
+        return list(self._points)
+
+    def _new_labels(self, n):
+        labels = np.arange(self._next_label, self._next_label + n)
+        self._next_label += n
+        return labels
+
+    def add_folder(self, folder, points):
+        """
+        加入一个文件夹的点（已存在时先删除）
+
+        Args:
+            folder: 文件夹名称
+            points: collect_folder_defects 中该文件夹某一缺陷类型的DataFrame
+        """
+        if folder in self._points:
+            self.remove_folder(folder)
+
+        points, _ = flatten_points({folder: points})
+        xy = points[['x', 'y']].to_numpy(dtype=float)
+        tree = KDTree(xy)
+        radius = adaptive_radius.point_radius(points, self.cohesion_threshold, 'casi')
+        n_new = len(xy)
+
+        # 新点之间、新点与已有分量之间的连接（每个已有分量作为一个节点）
+        self._pairs[(folder, folder)] = _pairs_within(tree, radius, self.cohesion_threshold)
+        cross_points, cross_labels = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        for other, other_tree in self._trees.items():
+            idx_new, idx_other, _ = _pairs_between(tree, radius, other_tree, self._radius[other],
+                                                   self.cohesion_threshold)
+            self._pairs[(folder, other)] = np.column_stack([idx_new, idx_other])
+            cross_points.append(idx_new)
+            cross_labels.append(self._labels[other][idx_other])
+
+        old_labels, old_codes = np.unique(np.concatenate(cross_labels), return_inverse=True)
+        edges = np.concatenate([self._pairs[(folder, folder)],
+                                np.column_stack([np.concatenate(cross_points), n_new + old_codes])])
+        n_nodes = n_new + len(old_labels)
+        graph = coo_matrix((np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])), shape=(n_nodes, n_nodes))
+        n_components, components = connected_components(graph, directed=False)
+        labels = self._new_labels(n_components)[components]
+
+        # 与新点相连的已有分量合并为新分量
+        if len(old_labels) > 0:
+            remap = np.arange(self._next_label)
+            remap[old_labels] = labels[n_new:]
+            for other in self._labels:
+                self._labels[other] = remap[self._labels[other]]
+
+        self._points[folder] = points
+        self._trees[folder] = tree
+        self._radius[folder] = radius
+        self._labels[folder] = labels[:n_new]
+
+    def remove_folder(self, folder):
+        """删除一个文件夹的点，并对受影响的分量重新计算连通性"""
+        if folder not in self._points:
+            return
+        removed_labels = np.unique(self._labels[folder])
+        for key in [key for key in self._pairs if folder in key]:
+            del self._pairs[key]
+        del self._points[folder], self._trees[folder], self._radius[folder], self._labels[folder]
+
+        # 受影响的点在子图中的编号
+        positions = {}
+        n_nodes = 0
+        for other, labels in self._labels.items():
+            affected = np.isin(labels, removed_labels)
+            position = np.full(len(labels), -1, dtype=np.int64)
+            position[affected] = np.arange(n_nodes, n_nodes + affected.sum())
+            positions[other] = position
+            n_nodes += int(affected.sum())
+        if n_nodes == 0:
+            return
+
+        edges = []
+        for (folder_a, folder_b), pairs in self._pairs.items():
+            pair_pos = np.column_stack([positions[folder_a][pairs[:, 0]], positions[folder_b][pairs[:, 1]]])
+            edges.append(pair_pos[pair_pos[:, 0] >= 0])
+        edges = np.concatenate(edges)
+        graph = coo_matrix((np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])), shape=(n_nodes, n_nodes))
+        n_components, components = connected_components(graph, directed=False)
+        labels = self._new_labels(n_components)[components]
+        for other, position in positions.items():
+            affected = position >= 0
+            self._labels[other][affected] = labels[position[affected]]
+
+    def update(self, all_points_by_folder, min_occurrence=2):
+        """
+        同步索引中的文件夹（删除未选中的，加入新的），返回共有位置点表
+
+        已在索引中的文件夹视为数据未变；数据或阈值变化时应新建索引。
+
+        Args:
+            all_points_by_folder: 当前选中的文件夹 -> 点DataFrame（points_by_folder 的结果）
+            min_occurrence: 至少出现在多少个文件夹中才算共有位置
+
+        Returns:
+            DataFrame: 与 find_common_groups 相同
+        """
+        for folder in self.folders:
+            if folder not in all_points_by_folder:
+                self.remove_folder(folder)
+        for folder, points in all_points_by_folder.items():
+            if folder not in self._points:
+                self.add_folder(folder, points)
+        return self.members(list(all_points_by_folder), min_occurrence)
+
+    def members(self, folders=None, min_occurrence=2):
+        """
+        按给定的文件夹顺序合并点表并编号共有位置
+
+        Returns:
+            DataFrame: 与 find_common_groups 相同
+        """
+        folders = self.folders if folders is None else folders
+        if not folders:
+            members, _ = flatten_points({})
+            return _assign_groups(members, np.zeros(0, dtype=np.int64), min_occurrence)
+        members = pd.concat([self._points[folder] for folder in folders], ignore_index=True)
+        labels = np.concatenate([self._labels[folder] for folder in folders])
+        return _assign_groups(members, labels, min_occurrence)
+
+
+def group_summary(members):
+    """
+    汇总每个共有位置
+
+    Args:
+        members: find_common_groups 的结果
+
+    Returns:
+        DataFrame: 以 group_id 为索引，列为 x、y（位置中心）、count（出现的文件夹数）、
+                   folders（按名称排序、逗号分隔的文件夹列表）
+    """
+    shared = members[members['group_id'] > 0]
+    groups = shared.groupby('group_id')[['x', 'y']].mean()
+    folders = shared.drop_duplicates(['group_id', 'folder']).sort_values(['group_id', 'folder'])
+    groups['count'] = folders.groupby('group_id').size()
+    _, groups['folders'] = _join_runs(folders['group_id'].to_numpy(), folders['folder'].astype(str).to_numpy())
+    return groups
+
+
+def folder_share_stats(all_points_by_folder, members, defect_type):
+    """
+    统计每个文件夹的缺陷总数、共有位置数和共有率
+
+    Returns:
+        DataFrame: 列为 文件夹、{defect_type}总数、共有位置数、共有率
+    """
+    folders = sorted(all_points_by_folder.keys())
+    total_counts = pd.Series({folder: len(all_points_by_folder[folder]) for folder in folders}, dtype=np.int64)
+    shared = members[members['group_id'] > 0]
+    shared_counts = shared.groupby('folder')['group_id'].nunique().reindex(folders, fill_value=0)
+
+    ratios = np.where(total_counts > 0, shared_counts / total_counts.where(total_counts > 0, 1) * 100, 0)
+    return pd.DataFrame({
+        '文件夹': folders,
+        f'{defect_type}总数': total_counts.to_numpy(),
+        '共有位置数': shared_counts.to_numpy(),
+        '共有率': [f"{ratio:.2f}%" for ratio in ratios]
+    })
+
+
+def occurrence_distribution(groups):
+    """按出现次数统计共有位置数量，返回 dict(出现次数 -> 位置数)"""
+    return {int(count): int(n) for count, n in groups['count'].value_counts().items()}
+
+
+def build_correspondence_table(members, groups, sorted_folders, feature_names=FEATURE_NAMES):
+    """
+    生成共有位置的nDefectID对应关系及特征数据表
+
+    列结构：基础信息 → nDefectID(所有文件夹) → 特征(每个特征对应所有文件夹)，
+    同一文件夹有多个缺陷时特征取平均值并标注 (avg)。
+
+    Returns:
+        DataFrame
+    """
+    if groups.empty:
+        return pd.DataFrame()
+
+    shared = members[members['group_id'] > 0]
+    keys = ['group_id', 'folder']
+    table = pd.DataFrame({
+        '共有位置ID': groups.index.to_numpy(),
+        'X坐标': _format_array(groups['x']),
+        'Y坐标': _format_array(groups['y']),
+        '出现次数': groups['count'].to_numpy()
+    }, index=groups.index)
+
+    # nDefectID：同一文件夹去重后按编号排序
+    ids = shared.drop_duplicates(keys + ['defect_id']).sort_values(keys + ['defect_id'])
+    n_folders = int(members['folder_id'].max()) + 1
+    starts, id_text = _join_runs(ids['group_id'].to_numpy() * n_folders + ids['folder_id'].to_numpy(),
+                                 ids['defect_id'].map(str).to_numpy())
+    id_text = pd.Series(id_text, index=pd.MultiIndex.from_arrays(
+        [ids['group_id'].to_numpy()[starts], ids['folder'].to_numpy()[starts]], names=keys))
+    id_table = id_text.unstack('folder').reindex(index=groups.index, columns=sorted_folders).fillna('')
+    id_table.columns = [f'nDefectID_{folder}' for folder in sorted_folders]
+
+    # 特征：按 (位置, 文件夹) 求有效值的个数和均值
+    values = shared.reindex(columns=feature_names).apply(pd.to_numeric, errors='coerce')
+    grouped = values.groupby([shared['group_id'], shared['folder']])
+    mean_frame = grouped.mean()
+    means = mean_frame.to_numpy(dtype=float)
+    counts = grouped.count().to_numpy()
+    text = np.full(means.shape, '', dtype=object)
+    text[counts == 1] = _format_array(means[counts == 1])
+    text[counts > 1] = _format_array(means[counts > 1], '%.2f (avg)')
+    feature_table = pd.DataFrame(text, index=mean_frame.index, columns=feature_names).unstack('folder')
+    feature_table = feature_table.reindex(
+        index=groups.index, columns=pd.MultiIndex.from_product([feature_names, sorted_folders])).fillna('')
+    feature_table.columns = [f'{feat_name}_{folder}' for feat_name, folder in feature_table.columns]
+
+    return pd.concat([table, id_table, feature_table], axis=1).reset_index(drop=True)
+
+
+def _nearest_within(src_xy, src_radius, dst_xy, dst_radius, cohesion_threshold):
+    """
+    src中每个点在dst中阈值内的最近点（距离相同时取dst中靠前的点）
+
+    Returns:
+        tuple: (src下标, dst下标, 距离)
+    """
+    pair_src, pair_dst, dist = _pairs_between(KDTree(src_xy), src_radius, KDTree(dst_xy), dst_radius,
+                                              cohesion_threshold)
+    order = np.lexsort((pair_dst, dist, pair_src))
+    src_idx, first = np.unique(pair_src[order], return_index=True)
+    nearest = order[first]
+    return src_idx, pair_dst[nearest], dist[nearest]
+
+
+def find_non_shared(defect_type, all_points_by_folder, members, folder_defects,
+                    sorted_folders, cohesion_threshold, feature_names=FEATURE_NAMES):
+    """
+    找出未归入共有位置的缺陷，并查找其他文件夹中相同位置（任意缺陷类型）的最近缺陷
+
+    Args:
+        defect_type: 当前分析的缺陷类型
+        all_points_by_folder: 当前类型在各文件夹中的点
+        members: find_common_groups 的结果
+        folder_defects: collect_folder_defects 的结果（用于查找其他文件夹的所有类型缺陷）
+        sorted_folders: 文件夹顺序
+        cohesion_threshold: 匹配距离阈值，或自适应半径规则
+
+    Returns:
+        DataFrame: 列顺序为 基础信息 → 源文件夹特征 → 其他文件夹信息和特征；无数据时为空DataFrame
+    """
+    # 收集所有文件夹的所有点数据（不限于当前缺陷类型）
+    all_folders_all_points = {}
+    for dt in DEFECT_TYPES:
+        for folder, points in points_by_folder(folder_defects, dt).items():
+            all_folders_all_points.setdefault(folder, []).append(points.assign(defect_type=dt))
+    all_folders_all_points = {folder: pd.concat(parts, ignore_index=True)
+                              for folder, parts in all_folders_all_points.items()}
+
+    # 不属于共有位置、且有nDefectID的点
+    source = [all_points_by_folder[folder].assign(folder=folder)
+              for folder in sorted_folders if folder in all_points_by_folder]
+    if not source:
+        return pd.DataFrame()
+    source = pd.concat(source, ignore_index=True)
+    shared = members.loc[members['group_id'] > 0, ['folder', 'defect_id']]
+    is_shared = pd.MultiIndex.from_frame(source[['folder', 'defect_id']]).isin(pd.MultiIndex.from_frame(shared))
+    source = source[~is_shared & source['defect_id'].notna().to_numpy()].reset_index(drop=True)
+    if source.empty:
+        return pd.DataFrame()
+
+    columns = {
+        '源文件夹': source['folder'],
+        '源nDefectID': source['defect_id'],
+        '源nDefectType': source['defect_type_value'].astype(object).where(source['defect_type_value'].notna(), ''),
+        '源X坐标': _format_values(source['x']),
+        '源Y坐标': _format_values(source['y']),
+        '源缺陷类型': defect_type
+    }
+    for feat_name in feature_names:
+        columns[f'源_{feat_name}'] = _format_values(source.get(feat_name, np.nan))
+    non_shared_df = pd.DataFrame(columns)
+
+    # 在其他文件夹中查找相同位置的缺陷（源文件夹自身的列为空值NaN）
+    source_xy = source[['x', 'y']].to_numpy(dtype=float)
+    source_radius = adaptive_radius.point_radius(source, cohesion_threshold, 'casi')
+    source_folders = source['folder'].to_numpy()
+    for other_folder in sorted_folders:
+        rows = np.flatnonzero(source_folders != other_folder)
+        if len(rows) == 0:
+            continue
+
+        other_columns = [f'{other_folder}_nDefectID', f'{other_folder}_nDefectType',
+                         f'{other_folder}_缺陷类型', f'{other_folder}_距离']
+        other_columns += [f'{other_folder}_{feat_name}' for feat_name in feature_names]
+        values = {col: np.full(len(source), np.nan, dtype=object) for col in other_columns}
+        for col in other_columns:
+            values[col][rows] = ''
+
+        other_points = all_folders_all_points.get(other_folder)
+        if other_points is not None:
+            src_idx, dst_idx, dist = _nearest_within(
+                source_xy[rows], source_radius[rows], other_points[['x', 'y']].to_numpy(dtype=float),
+                adaptive_radius.point_radius(other_points, cohesion_threshold, 'casi'), cohesion_threshold)
+            matched_rows = rows[src_idx]
+            matched = other_points.iloc[dst_idx]
+
+            other_ids = matched['defect_id'].to_numpy(dtype=object)
+            valid_ids = matched['defect_id'].notna().to_numpy()
+            valid_ids[valid_ids] = other_ids[valid_ids].astype(bool)
+            values[other_columns[0]][matched_rows] = np.where(valid_ids, other_ids, '')
+            other_types = matched['defect_type_value'].to_numpy(dtype=object)
+            values[other_columns[1]][matched_rows] = np.where(matched['defect_type_value'].notna(), other_types, '')
+            values[other_columns[2]][matched_rows] = matched['defect_type'].to_numpy(dtype=object)
+            values[other_columns[3]][matched_rows] = _format_array(dist)
+            for col, feat_name in zip(other_columns[4:], feature_names):
+                values[col][matched_rows] = _format_values(matched.get(feat_name, pd.Series(np.nan, index=matched.index)))
+
+        non_shared_df = pd.concat([non_shared_df, pd.DataFrame(values)], axis=1)
+
+    return non_shared_df
+
+
+def analyze_common_rate(all_match_results, cohesion_threshold, min_occurrence=2):
+    """
+    对CASI-KLA匹配结果进行多文件夹共有率分析（命令行/批处理入口）
+
+    Args:
+        all_match_results: kla_match.analyze_pair/analyze_sheet_pair 的结果列表
+        cohesion_threshold: 匹配距离阈值，或自适应半径规则
+        min_occurrence: 最小出现次数
+
+    Returns:
+        dict: 缺陷类型 -> {'groups', 'members', 'stats', 'occurrence', 'correspondence', 'non_shared'}；
+              文件夹不足2个时返回None
+    """
+    folder_defects = collect_folder_defects(all_match_results)
+    if len(folder_defects) < 2:
+        return None
+
+    results = {}
+    for defect_type in DEFECT_TYPES:
+        all_points_by_folder = points_by_folder(folder_defects, defect_type)
+        if len(all_points_by_folder) < 2:
+            continue
+
+        points, _ = flatten_points(all_points_by_folder)
+        if len(points) == 0:
+            continue
+        members = find_common_groups(points, cohesion_threshold, min_occurrence)
+        groups = group_summary(members)
+        sorted_folders = sorted(all_points_by_folder.keys())
+        results[defect_type] = {
+            'groups': groups,
+            'members': members,
+            'stats': folder_share_stats(all_points_by_folder, members, defect_type),
+            'occurrence': occurrence_distribution(groups),
+            'correspondence': build_correspondence_table(members, groups, sorted_folders),
+            'non_shared': find_non_shared(defect_type, all_points_by_folder, members, folder_defects,
+                                          sorted_folders, cohesion_threshold)
+        }
+    return results
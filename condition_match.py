@@ -0,0 +1,479 @@
+import os
+import glob
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+import data_loader
+import spatial_index
+
+
+# 多工况匹配时排除的缺陷类型
+EXCLUDED_DEFECT_TYPES = [1000, 10001, 10002]
+
+# 匹配方式：nearest 每个基准缺陷独立取最近点（其他工况的缺陷可被多次匹配）；
+# assignment 一对一分配（先互为最近，再对剩余候选做最小总距离分配）；
+# cluster 所有工况的缺陷一起按距离聚类，每个簇每个工况最多一个点，结果每行一个簇（没有基准工况）
+MATCH_MODES = {
+    'nearest': '最近邻（允许一对多）',
+    'assignment': '一对一分配',
+    'cluster': 'N路聚类（不依赖基准工况）',
+}
+
+# 一对一分配时，超过此规模的连通分量改用按距离贪心分配，避免稠密矩阵过大
+MAX_ASSIGNMENT_COMPONENT = 2000
+
+
+def _print_log(level, message):
+    """默认日志输出（命令行模式）"""
+    print(f"[{level}] {message}")
+
+
+def split_condition_folders(root_folder):
+    """
+    获取主文件夹下的子文件夹，并区分普通工况文件夹和KLA文件夹
+
+    Returns:
+        tuple: (工况文件夹列表, KLA文件夹列表)
+    """
+    all_subfolders = [f for f in os.listdir(root_folder)
+                      if os.path.isdir(os.path.join(root_folder, f))]
+
+    subfolders = [f for f in all_subfolders if 'KLA' not in f.upper()]
+    kla_folders = [f for f in all_subfolders if 'KLA' in f.upper()]
+    return subfolders, kla_folders
+
+
+def sort_folders_kla_last(folders):
+    """文件夹排序：将包含KLA的文件夹排到最后"""
+    non_kla = sorted([f for f in folders if 'KLA' not in f.upper()])
+    kla = sorted([f for f in folders if 'KLA' in f.upper()])
+    return non_kla + kla
+
+
+def load_condition_csv(csv_path, log=None):
+    """
+    读取单个工况的CSV，过滤特殊缺陷类型，提取坐标（第4、5列）和DW1O特征
+
+    Args:
+        csv_path: CSV文件路径
+        log: 日志回调 log(level, message)
+
+    Returns:
+        DataFrame: 列为 x, y, snr, maxorg, bgdev；列数不足时返回None
+    """
+    log = log or _print_log
+    name = os.path.basename(os.path.dirname(csv_path))
+
+    # 第4列和第5列为坐标，其余只读取需要的特征列
+    header = data_loader.read_header(csv_path)
+    df = data_loader.read_blob_features(csv_path, 'condition_match', extra_columns=header[3:5])
+
+    # 过滤nDefectType为1000、10001、10002的数据
+    original_count = len(df)
+    if 'nDefectType' in df.columns:
+        df = df[~df['nDefectType'].isin(EXCLUDED_DEFECT_TYPES)]
+        filtered_count = len(df)
+        log('info', f"{name}: 原始 {original_count} 条，过滤后 {filtered_count} 条")
+
+    # 获取第4列和第5列作为坐标
+    if len(header) < 5:
+        return None
+
+    x_col = header[3]
+    y_col = header[4]
+
+    # 创建数据字典，缺少的特征列置为None
+    data_dict = {
+        'x': pd.to_numeric(df[x_col], errors='coerce'),
+        'y': pd.to_numeric(df[y_col], errors='coerce'),
+    }
+    for key, col in [('snr', 'DW1O_TotalSNR'), ('maxorg', 'DW1O_MaxOrg'), ('bgdev', 'DW1O_BGDev')]:
+        data_dict[key] = pd.to_numeric(df[col], errors='coerce') if col in df.columns else None
+
+    # 创建DataFrame并过滤有效数据
+    temp_df = pd.DataFrame(data_dict)
+    temp_df = temp_df.dropna(subset=['x', 'y'])
+    return temp_df
+
+
+def load_condition_folders(root_folder, subfolders=None, log=None):
+    """
+    读取各工况子文件夹中的第一个CSV文件
+
+    Args:
+        root_folder: 主文件夹路径
+        subfolders: 要读取的子文件夹列表，默认为所有非KLA子文件夹
+        log: 日志回调 log(level, message)
+
+    Returns:
+        dict: 文件夹名称 -> DataFrame(x, y, snr, maxorg, bgdev)
+    """
+    log = log or _print_log
+    if subfolders is None:
+        subfolders = split_condition_folders(root_folder)[0]
+
+    folder_data = {}
+    for subfolder in sorted(subfolders):
+        # 查找子文件夹中的所有CSV文件
+        subfolder_path = os.path.join(root_folder, subfolder)
+        csv_files = glob.glob(os.path.join(subfolder_path, '*.csv'))
+
+        if not csv_files:
+            log('warning', f"未找到 {subfolder} 文件夹中的CSV文件")
+            continue
+
+        # 使用找到的第一个CSV文件
+        temp_df = load_condition_csv(csv_files[0], log=log)
+        if temp_df is not None:
+            folder_data[subfolder] = temp_df
+            log('success', f"✓ {subfolder}: {len(temp_df)} 个有效缺陷")
+
+    return folder_data
+
+
+FEATURE_SUFFIXES = {'snr': '_SNR', 'maxorg': '_MaxOrg', 'bgdev': '_BGDev'}
+
+
+def nearest_within(tree, points, match_threshold):
+    """
+    批量查询每个点在KDTree中距离阈值内（含阈值）的最近点
+
+    Args:
+        tree: 目标文件夹坐标构建的KDTree，为None表示没有点
+        points: 查询坐标 (N, 2)
+        match_threshold: 匹配距离阈值
+
+    Returns:
+        tuple: (最近点下标数组, 是否匹配的布尔数组)
+    """
+    if tree is None or len(points) == 0:
+        return np.zeros(len(points), dtype=np.intp), np.zeros(len(points), dtype=bool)
+
+    # distance_upper_bound 是严格小于，取阈值的下一个浮点数以保留等于阈值的匹配
+    upper_bound = np.nextafter(float(match_threshold), np.inf)
+    _, nearest_idx = tree.query(points, k=1, distance_upper_bound=upper_bound, workers=-1)
+    matched = nearest_idx < tree.n
+    return np.where(matched, nearest_idx, 0), matched
+
+
+def candidate_pairs(base_tree, tree, match_threshold):
+    """
+    找出两组点之间距离不超过阈值的全部候选对（稀疏，不构建稠密距离矩阵）
+
+    Returns:
+        tuple: (基准下标数组, 目标下标数组, 距离数组)
+    """
+    pairs = base_tree.sparse_distance_matrix(tree, float(match_threshold), output_type='ndarray')
+    return pairs['i'].astype(np.intp), pairs['j'].astype(np.intp), pairs['v'].astype(float)
+
+
+def _assign_component(rows, cols, dists):
+    """对一个连通分量做最小总距离分配，先保证匹配数最多，再使总距离最小"""
+    row_ids, row_pos = np.unique(rows, return_inverse=True)
+    col_ids, col_pos = np.unique(cols, return_inverse=True)
+
+    if len(row_ids) > MAX_ASSIGNMENT_COMPONENT or len(col_ids) > MAX_ASSIGNMENT_COMPONENT:
+        # 规模过大时按距离从小到大贪心分配
+        used_rows, used_cols, assigned = set(), set(), []
+        for k in np.argsort(dists, kind='stable'):
+            if rows[k] not in used_rows and cols[k] not in used_cols:
+                used_rows.add(rows[k])
+                used_cols.add(cols[k])
+                assigned.append((rows[k], cols[k]))
+        return assigned
+
+    # 非候选对的代价大于所有候选距离之和，因此优先增加匹配数
+    missing_cost = dists.sum() + 1.0
+    cost = np.full((len(row_ids), len(col_ids)), missing_cost)
+    cost[row_pos, col_pos] = dists
+    is_candidate = np.zeros(cost.shape, dtype=bool)
+    is_candidate[row_pos, col_pos] = True
+
+    assigned_rows, assigned_cols = linear_sum_assignment(cost)
+    keep = is_candidate[assigned_rows, assigned_cols]
+    return list(zip(row_ids[assigned_rows[keep]], col_ids[assigned_cols[keep]]))
+
+
+def assign_within(base_tree, tree, match_threshold):
+    """
+    一对一分配：每个缺陷最多与另一工况中的一个缺陷匹配
+
+    1. 互为最近（双方在阈值内的最近点都是对方）的点对直接确定；
+    2. 剩余候选对按二分图连通分量拆分，每个分量单独做最小总距离分配。
+
+    Args:
+        base_tree: 基准文件夹坐标的KDTree
+        tree: 目标文件夹坐标的KDTree，为None表示没有点
+        match_threshold: 匹配距离阈值
+
+    Returns:
+        tuple: (匹配点下标数组, 是否匹配的布尔数组)，格式与 nearest_within 相同
+    """
+    n_base = base_tree.n
+    nearest_idx = np.zeros(n_base, dtype=np.intp)
+    matched = np.zeros(n_base, dtype=bool)
+    if tree is None or n_base == 0:
+        return nearest_idx, matched
+
+    rows, cols, dists = candidate_pairs(base_tree, tree, match_threshold)
+    if len(rows) == 0:
+        return nearest_idx, matched
+
+    # 第一步：互为最近的点对（距离相同时取下标较小者，与逐行idxmin一致）
+    order = np.lexsort((cols, dists, rows))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = rows[order][1:] != rows[order][:-1]
+    best_col_of_row = np.full(n_base, -1, dtype=np.intp)
+    best_col_of_row[rows[order][first]] = cols[order][first]
+
+    order = np.lexsort((rows, dists, cols))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = cols[order][1:] != cols[order][:-1]
+    best_row_of_col = np.full(tree.n, -1, dtype=np.intp)
+    best_row_of_col[cols[order][first]] = rows[order][first]
+
+    mutual_rows = np.flatnonzero(best_col_of_row >= 0)
+    mutual_rows = mutual_rows[best_row_of_col[best_col_of_row[mutual_rows]] == mutual_rows]
+    nearest_idx[mutual_rows] = best_col_of_row[mutual_rows]
+    matched[mutual_rows] = True
+
+    used_cols = np.zeros(tree.n, dtype=bool)
+    used_cols[nearest_idx[mutual_rows]] = True
+    remaining = ~matched[rows] & ~used_cols[cols]
+    rows, cols, dists = rows[remaining], cols[remaining], dists[remaining]
+    if len(rows) == 0:
+        return nearest_idx, matched
+
+    # 第二步：剩余候选对按连通分量做最小总距离分配
+    graph = coo_matrix((np.ones(len(rows)), (rows, n_base + cols)),
+                       shape=(n_base + tree.n, n_base + tree.n))
+    _, labels = connected_components(graph, directed=False)
+    component = labels[rows]
+    order = np.argsort(component, kind='stable')
+    bounds = np.flatnonzero(np.diff(component[order])) + 1
+    for group in np.split(order, bounds):
+        for row, col in _assign_component(rows[group], cols[group], dists[group]):
+            nearest_idx[row] = col
+            matched[row] = True
+
+    return nearest_idx, matched
+
+
+def _find_root(parent, node):
+    """并查集查找（带路径压缩）"""
+    root = node
+    while parent[root] != root:
+        root = parent[root]
+    while parent[node] != root:
+        parent[node], node = root, parent[node]
+    return root
+
+
+def _cross_folder_pairs(frames, match_threshold):
+    """
+    不同工况之间距离阈值内（含阈值）的点对
+
+    每个工况的KDTree取自 spatial_index（随工况数据缓存），每两个工况之间做一次批量查询。
+
+    Args:
+        frames: 各工况的DataFrame（x、y列），点按此顺序合并编号
+        match_threshold: 匹配距离阈值
+
+    Returns:
+        tuple: (点对 (M, 2)，合并后的点下标，第一列小于第二列, 距离 (M,))
+    """
+    offsets = np.concatenate([[0], np.cumsum([len(df) for df in frames])])
+    trees = [spatial_index.frame_index(df, 'x', 'y').tree if len(df) > 0 else None for df in frames]
+    pair_parts, dist_parts = [np.zeros((0, 2), dtype=np.intp)], [np.zeros(0)]
+    for i in range(len(frames)):
+        for j in range(i + 1, len(frames)):
+            if trees[i] is None or trees[j] is None:
+                continue
+            found = trees[i].sparse_distance_matrix(trees[j], float(match_threshold), output_type='ndarray')
+            pair_parts.append(np.column_stack([found['i'] + offsets[i], found['j'] + offsets[j]]).astype(np.intp))
+            dist_parts.append(found['v'])
+    return np.vstack(pair_parts), np.concatenate(dist_parts)
+
+
+def cluster_labels(frames, match_threshold):
+    """
+    将所有工况的点合并后做单链接聚类，每个簇中每个工况最多一个点
+
+    距离阈值内（含阈值）的点对按距离从小到大依次合并，若两个簇已包含同一工况的点则不合并。
+    先对所有跨工况点对求连通分量：不含重复工况的分量即为最终的簇；
+    只有含重复工况的分量，才对其中的点对按上述顺序逐一合并。
+
+    Args:
+        frames: 各工况的DataFrame（x、y列），点按此顺序合并编号
+        match_threshold: 匹配距离阈值
+
+    Returns:
+        ndarray: 合并后每个点的簇编号（0..簇数-1，按簇中最小点下标排序）
+    """
+    folder_ids = np.repeat(np.arange(len(frames)), [len(df) for df in frames])
+    n = len(folder_ids)
+    if n == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    pairs, dists = _cross_folder_pairs(frames, match_threshold)
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    n_components, components = connected_components(graph, directed=False)
+
+    # 每个分量以最小点下标为根
+    roots = np.full(n_components, n, dtype=np.intp)
+    np.minimum.at(roots, components, np.arange(n))
+    roots = roots[components]
+
+    # 含重复工况的分量：(分量, 工况) 出现多于一次
+    member_counts = np.bincount(components * len(frames) + folder_ids, minlength=n_components * len(frames))
+    conflicted = np.zeros(n_components, dtype=bool)
+    conflicted[np.flatnonzero(member_counts > 1) // len(frames)] = True
+
+    # 只对冲突分量中的点对按距离（相同时按点下标）从小到大合并
+    in_conflict = conflicted[components[pairs[:, 0]]]
+    pairs, dists = pairs[in_conflict], dists[in_conflict]
+    pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0], dists))]
+    nodes = np.flatnonzero(conflicted[components])
+    parent = dict(zip(nodes.tolist(), nodes.tolist()))
+    folder_mask = {node: 1 << int(folder_ids[node]) for node in parent}
+    for a, b in pairs.tolist():
+        root_a = _find_root(parent, a)
+        root_b = _find_root(parent, b)
+        if root_a == root_b or folder_mask[root_a] & folder_mask[root_b]:
+            continue
+        if root_b < root_a:
+            root_a, root_b = root_b, root_a
+        parent[root_b] = root_a
+        folder_mask[root_a] |= folder_mask[root_b]
+    roots[nodes] = [_find_root(parent, node) for node in nodes.tolist()]
+
+    return np.unique(roots, return_inverse=True)[1]
+
+
+def cluster_conditions(folder_data, match_threshold, show_unmatched=False):
+    """
+    N路匹配：合并所有工况的点做聚类，每个簇视为同一个物理缺陷，输出一行
+
+    与以基准文件夹为锚点的匹配不同，只出现在非基准工况中的缺陷也会出现在结果中。
+    X坐标、Y坐标为簇内各点坐标的平均值。
+
+    Args:
+        folder_data: dict(文件夹名称 -> DataFrame(x, y, snr, maxorg, bgdev))
+        match_threshold: 匹配距离阈值
+        show_unmatched: 是否保留只在一个工况中出现的缺陷
+
+    Returns:
+        tuple: (结果DataFrame或None, 排序后的文件夹列表)
+    """
+    sorted_folders = sort_folders_kla_last(folder_data.keys())
+    frames = [folder_data[folder] for folder in sorted_folders]
+    points = np.vstack([df[['x', 'y']].to_numpy(dtype=float).reshape(-1, 2) for df in frames])
+    folder_ids = np.repeat(np.arange(len(frames)), [len(df) for df in frames])
+
+    labels = cluster_labels(frames, match_threshold)
+    n_clusters = int(labels.max()) + 1 if len(labels) else 0
+
+    sizes = np.bincount(labels, minlength=n_clusters)
+    columns = {
+        'X坐标': np.bincount(labels, weights=points[:, 0], minlength=n_clusters) / np.maximum(sizes, 1),
+        'Y坐标': np.bincount(labels, weights=points[:, 1], minlength=n_clusters) / np.maximum(sizes, 1),
+        '匹配数量': sizes,
+    }
+
+    for folder_id, (folder, df) in enumerate(zip(sorted_folders, frames)):
+        folder_labels = labels[folder_ids == folder_id]
+        for key, suffix in FEATURE_SUFFIXES.items():
+            values = np.full(n_clusters, np.nan)
+            values[folder_labels] = df[key].to_numpy(dtype=float)
+            columns[f'{folder}{suffix}'] = values
+
+    results_df = pd.DataFrame(columns)
+    if not show_unmatched:
+        results_df = results_df[results_df['匹配数量'] > 1].reset_index(drop=True)
+
+    if results_df.empty:
+        return None, sorted_folders
+    return results_df[_ordered_columns(sorted_folders)], sorted_folders
+
+
+def _ordered_columns(sorted_folders):
+    """结果列顺序：坐标、匹配数量，然后按文件夹顺序（KLA文件夹在最后）排列特征列"""
+    cols = ['X坐标', 'Y坐标', '匹配数量']
+    for folder in sorted_folders:
+        for suffix in FEATURE_SUFFIXES.values():
+            cols.append(f'{folder}{suffix}')
+    return cols
+
+
+def match_conditions(folder_data, match_threshold, show_unmatched=False, mode='nearest'):
+    """
+    以第一个（非KLA）文件夹为基准，在其他文件夹中查找距离阈值内的最近缺陷
+    （cluster 方式不使用基准，见 cluster_conditions）
+
+    每个文件夹构建一棵KDTree，基准缺陷一次性批量查询，结果按列组装。
+
+    Args:
+        folder_data: dict(文件夹名称 -> DataFrame(x, y, snr, maxorg, bgdev))
+        match_threshold: 匹配距离阈值
+        show_unmatched: 是否保留只在基准文件夹中出现的缺陷
+        mode: 匹配方式，见 MATCH_MODES
+
+    Returns:
+        tuple: (结果DataFrame或None, 排序后的文件夹列表)
+    """
+    if mode == 'cluster':
+        return cluster_conditions(folder_data, match_threshold, show_unmatched)
+
+    # 使用第一个文件夹作为基准（非KLA）
+    sorted_folders = sort_folders_kla_last(folder_data.keys())
+    base_folder = sorted_folders[0]
+    base_data = folder_data[base_folder]
+    base_points = base_data[['x', 'y']].to_numpy(dtype=float)
+    # KDTree 随工况数据缓存（spatial_index），更换阈值或方式重新匹配时不再重建
+    base_tree = (spatial_index.frame_index(base_data, 'x', 'y').tree
+                 if mode == 'assignment' and len(base_points) > 0 else None)
+
+    columns = {
+        'X坐标': base_points[:, 0],
+        'Y坐标': base_points[:, 1],
+    }
+    for key, suffix in FEATURE_SUFFIXES.items():
+        columns[f'{base_folder}{suffix}'] = base_data[key].to_numpy(dtype=float)
+
+    matched_count = np.ones(len(base_data), dtype=int)  # 至少匹配到基准文件夹本身
+
+    # 在其他文件夹中查找匹配的缺陷
+    for other_folder in sorted_folders[1:]:
+        other_data = folder_data[other_folder]
+        other_points = other_data[['x', 'y']].to_numpy(dtype=float)
+        tree = spatial_index.frame_index(other_data, 'x', 'y').tree if len(other_points) > 0 else None
+
+        if base_tree is not None:
+            nearest_idx, matched = assign_within(base_tree, tree, match_threshold)
+        else:
+            nearest_idx, matched = nearest_within(tree, base_points, match_threshold)
+        matched_count += matched
+
+        for key, suffix in FEATURE_SUFFIXES.items():
+            values = other_data[key].to_numpy(dtype=float)
+            if len(values) == 0:
+                columns[f'{other_folder}{suffix}'] = np.full(len(base_points), np.nan)
+            else:
+                columns[f'{other_folder}{suffix}'] = np.where(matched, values[nearest_idx], np.nan)
+
+    columns['匹配数量'] = matched_count
+    results_df = pd.DataFrame(columns)
+
+    # 根据设置决定是否保留只在基准文件夹中出现的缺陷
+    if not show_unmatched:
+        results_df = results_df[results_df['匹配数量'] > 1].reset_index(drop=True)
+
+    if results_df.empty:
+        return None, sorted_folders
+
+    # 重新排列列的顺序（KLA文件夹列在最后）
+    return results_df[_ordered_columns(sorted_folders)], sorted_folders
@@ -0,0 +1,296 @@
+import io
+import os
+import importlib.util
+import numpy as np
+import pandas as pd
+
+
+# CASI / KLA 坐标列候选（按优先级）
+COORD_COLUMNS = [
+    'dCenterXCartisian_Calib', 'dCenterYCartisian_Calib',
+    'dCenterXCartisian', 'dCenterYCartisian',
+    'dCenterXCartesian', 'dCenterYCartesian',
+    'XREL', 'YREL', 'cx', 'cy'
+]
+
+# 各分析所需的列：columns为精确列名，suffixes为通道特征列后缀（如 DW1O_MaxOrg）
+ANALYSIS_COLUMNS = {
+    # 多文件夹分布图：坐标、缺陷类型、背景统计
+    'map': {
+        'columns': COORD_COLUMNS + ['nDefectType'],
+        'suffixes': ['_BGMean', '_BGDev']
+    },
+    # 多工况间匹配：坐标（第4、5列另行指定）、缺陷类型、DW1O特征
+    'condition_match': {
+        'columns': COORD_COLUMNS + ['nDefectType', 'DW1O_TotalSNR', 'DW1O_MaxOrg', 'DW1O_BGDev'],
+        'suffixes': []
+    },
+    # CASI与KLA匹配：坐标、缺陷ID/类型、各通道特征
+    'kla_match': {
+        'columns': COORD_COLUMNS + ['nDefectType', 'nDefectID'],
+        'suffixes': ['_MaxOrg', '_BGMean', '_BGDev', '_Size', '_TotalSNR', '_MapSNR',
+                     '_MainRowMax', '_SubRow1Max', '_SubRow2Max']
+    },
+    # KLA结果：坐标与尺寸
+    'kla': {
+        'columns': ['XREL', 'YREL', 'DSIZE'],
+        'suffixes': []
+    }
+}
+
+
+# 可以安全转换为uint16的非负特征列后缀（如 DW1O_MaxOrg 最大值65535）
+UNSIGNED_SUFFIXES = ('_MaxOrg',)
+
+# 字符串列唯一值占比低于该值时转换为category
+CATEGORY_RATIO = 0.5
+
+
+def get_column_selector(analysis, extra_columns=None):
+    """
+    生成列筛选函数，用于 read_csv/read_excel 的 usecols 参数
+
+    Args:
+        analysis: 分析名称（ANALYSIS_COLUMNS 的键）
+        extra_columns: 额外需要的列名列表
+
+    Returns:
+        callable: 接收列名，返回是否需要读取该列
+    """
+    spec = ANALYSIS_COLUMNS[analysis]
+    wanted = set(spec['columns'])
+    if extra_columns:
+        wanted.update(str(c).strip() for c in extra_columns)
+    suffixes = tuple(spec['suffixes'])
+
+    def selector(column):
+        name = str(column).strip()
+        return name in wanted or (bool(suffixes) and name.endswith(suffixes))
+
+    return selector
+
+
+def read_header(source):
+    """读取CSV文件的表头（列名列表），不读取数据行"""
+    header = pd.read_csv(source, nrows=0).columns.tolist()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return header
+
+
+def memory_usage_bytes(df):
+    """计算DataFrame占用的内存（字节，包含字符串对象）"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def format_bytes(n_bytes):
+    """将字节数格式化为易读的字符串"""
+    for unit in ['B', 'KB', 'MB']:
+        if abs(n_bytes) < 1024:
+            return f"{n_bytes:.1f} {unit}"
+        n_bytes /= 1024
+    return f"{n_bytes:.1f} GB"
+
+
+def _downcast_column(col, name):
+    """对单列做无损降精度，无法无损转换时原样返回"""
+    dtype = col.dtype
+
+    if pd.api.types.is_bool_dtype(dtype):
+        return col
+
+    if pd.api.types.is_integer_dtype(dtype):
+        if len(col) == 0 or not isinstance(dtype, np.dtype):
+            return col
+        col_min, col_max = col.min(), col.max()
+        if str(name).endswith(UNSIGNED_SUFFIXES) and col_min >= 0 and col_max <= np.iinfo(np.uint16).max:
+            return col.astype(np.uint16)
+        # 有符号整数最小降到int32，避免后续运算溢出
+        if np.iinfo(np.int32).min <= col_min and col_max <= np.iinfo(np.int32).max and dtype != np.int32:
+            return col.astype(np.int32)
+        return col
+
+    if pd.api.types.is_float_dtype(dtype):
+        if dtype == np.float32 or not isinstance(dtype, np.dtype):
+            return col
+        values = col.to_numpy()
+        as_float32 = values.astype(np.float32)
+        # 只有往返转换完全一致（含NaN位置）时才降为float32
+        if np.array_equal(as_float32.astype(np.float64), values, equal_nan=True):
+            return pd.Series(as_float32, index=col.index, name=col.name)
+        return col
+
+    if dtype == object or pd.api.types.is_string_dtype(dtype):
+        n_rows = len(col)
+        if n_rows > 0 and col.nunique(dropna=False) / n_rows < CATEGORY_RATIO:
+            return col.astype('category')
+    return col
+
+
+def downcast_frame(df, exclude_columns=None):
+    """
+    数值列无损降精度（float32/int32/uint16），重复字符串列转为category
+
+    坐标列默认不处理，保证距离计算精度和带符号运算不受影响。
+
+    Args:
+        df: 输入DataFrame
+        exclude_columns: 不做转换的列名列表，默认为坐标列
+
+    Returns:
+        tuple: (转换后的DataFrame, 转换前字节数, 转换后字节数)
+    """
+    if exclude_columns is None:
+        exclude_columns = COORD_COLUMNS
+    exclude = set(exclude_columns)
+
+    before = memory_usage_bytes(df)
+    converted = {}
+    for col_name in df.columns:
+        if str(col_name).strip() in exclude:
+            continue
+        col = df[col_name]
+        if isinstance(col, pd.DataFrame):
+            # 重复列名，跳过
+            continue
+        new_col = _downcast_column(col, str(col_name).strip())
+        if new_col is not col:
+            converted[col_name] = new_col
+
+    if converted:
+        df = df.copy(deep=False)
+        for col_name, new_col in converted.items():
+            df[col_name] = new_col
+    after = memory_usage_bytes(df)
+    return df, before, after
+
+
+def downcast_frames(frames):
+    """
+    对 dict 中的所有DataFrame做降精度
+
+    Args:
+        frames: dict(键 -> DataFrame)
+
+    Returns:
+        tuple: (转换后的dict, 转换前总字节数, 转换后总字节数)
+    """
+    result = {}
+    total_before = 0
+    total_after = 0
+    for key, df in frames.items():
+        result[key], before, after = downcast_frame(df)
+        total_before += before
+        total_after += after
+    return result, total_before, total_after
+
+
+def format_memory_report(before, after):
+    """生成降精度前后的内存对比说明"""
+    ratio = after / before * 100 if before else 100.0
+    return f"内存占用：{format_bytes(before)} → {format_bytes(after)}（{ratio:.0f}%）"
+
+
+def read_blob_features(source, analysis, extra_columns=None, downcast=True):
+    """
+    按分析需求读取BlobFeatures数据，只加载需要的列
+
+    Args:
+        source: 文件路径或上传的文件对象（CSV/Parquet）
+        analysis: 分析名称（ANALYSIS_COLUMNS 的键）
+        extra_columns: 额外需要的列名列表
+        downcast: 是否对数值列做无损降精度
+
+    Returns:
+        DataFrame: 仅包含所需列的数据
+    """
+    selector = get_column_selector(analysis, extra_columns)
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+
+    if str(name).lower().endswith('.parquet'):
+        # Parquet按列投影读取（需要pyarrow）
+        import pyarrow.parquet as pq
+        all_columns = pq.ParquetFile(source).schema_arrow.names
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        df = pd.read_parquet(source, columns=[c for c in all_columns if selector(c)])
+    else:
+        df = pd.read_csv(source, usecols=selector)
+
+    if downcast:
+        df = downcast_frame(df)[0]
+    return df
+
+
+def read_kla_file(source, sheet_name=0, analysis='kla', downcast=True):
+    """
+    读取KLA结果文件（CSV或Excel），只加载需要的列
+
+    Args:
+        source: 文件路径
+        sheet_name: Excel的sheet名称或序号，None表示读取全部sheet
+        analysis: 分析名称，默认为 'kla'
+        downcast: 是否对数值列做无损降精度
+
+    Returns:
+        DataFrame 或 dict(sheet名称 -> DataFrame)
+    """
+    selector = get_column_selector(analysis)
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    if os.path.splitext(str(name))[1].lower() == '.csv':
+        data = pd.read_csv(source, usecols=selector)
+    else:
+        data = pd.read_excel(source, sheet_name=sheet_name, usecols=selector, engine=excel_engine())
+
+    if downcast:
+        if isinstance(data, dict):
+            data = downcast_frames(data)[0]
+        else:
+            data = downcast_frame(data)[0]
+    return data
+
+
+def excel_engine():
+    """
+    读取Excel使用的解析器：已安装 python-calamine 时使用calamine（只读、速度快），
+    否则为None（pandas默认的openpyxl/xlrd）
+    """
+    return 'calamine' if importlib.util.find_spec('python_calamine') is not None else None
+
+
+def open_workbook(source):
+    """
+    打开Excel文件，只解析sheet目录，数据在 read_excel_sheets 时才读取
+
+    Args:
+        source: 文件路径或上传的文件对象
+
+    Returns:
+        pd.ExcelFile（sheet_names 为所有sheet名称）
+    """
+    if hasattr(source, 'read'):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        source = io.BytesIO(source.read())
+    return pd.ExcelFile(source, engine=excel_engine())
+
+
+def read_excel_sheets(workbook, sheet_names, analysis, downcast=True):
+    """
+    只读取指定sheet中分析所需的列
+
+    Args:
+        workbook: open_workbook 的返回值
+        sheet_names: 需要读取的sheet名称列表
+        analysis: 分析名称（ANALYSIS_COLUMNS 的键）
+        downcast: 是否对数值列做无损降精度
+
+    Returns:
+        dict: sheet名称 -> DataFrame（顺序与 sheet_names 相同）
+    """
+    if not sheet_names:
+        return {}
+    frames = pd.read_excel(workbook, sheet_name=list(sheet_names), usecols=get_column_selector(analysis))
+    if downcast:
+        frames = downcast_frames(frames)[0]
+    return frames
@@ -0,0 +1,1678 @@
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import KDTree
+
+import adaptive_radius
+import alignment
+import data_loader
+import match_cache
+import spatial_index
+import wafer_geometry
+
+
+# 特殊缺陷类型：参与匹配判断漏检类型，但不计入正常检出
+SPECIAL_DEFECT_TYPES = [1000, 10001]
+
+# CASI点匹配编码
+MATCH_CODES = {
+    -2: '特殊类型',
+    0: '过检',
+    1: '一对一',
+    3: '多CASI对一KLA',
+    4: '一CASI对多KLA',
+    5: '多CASI对多KLA',
+}
+
+# 计为正确检出的匹配编码
+CORRECT_CODES = [1, 3, 4, 5]
+
+# KLA点漏检类型
+MISS_TYPES = {
+    0: '正确检出',
+    1: '基础漏检',
+    2: '分类漏检',
+}
+
+# coord_data 中保存的CASI特征列（三个通道）
+COORD_FEATURES = [
+    'DW1O_MaxOrg', 'DW1O_BGMean', 'DW1O_BGDev', 'DW1O_Size', 'DW1O_TotalSNR', 'DW1O_MapSNR',
+    'DW2O_MaxOrg', 'DW2O_BGMean', 'DW2O_BGDev', 'DW2O_Size', 'DW2O_TotalSNR', 'DW2O_MapSNR',
+    'DN1O_MaxOrg', 'DN1O_BGMean', 'DN1O_BGDev', 'DN1O_Size', 'DN1O_TotalSNR', 'DN1O_MapSNR'
+]
+
+# 尺寸检出率统计的默认范围（nm，DSIZE×1000取整）
+SIZE_BIN_MIN = 26
+SIZE_BIN_MAX = 100
+
+
+def _print_log(level, message):
+    """默认日志输出（命令行模式）"""
+    print(f"[{level}] {message}")
+
+
+def find_casi_coord_columns(casi_df):
+    """
+    获取CASI坐标列（优先使用带Calib后缀的）
+
+    Returns:
+        tuple: (x列名, y列名)，未找到时为 (None, None)
+    """
+    if 'dCenterXCartisian_Calib' in casi_df.columns and 'dCenterYCartisian_Calib' in casi_df.columns:
+        return 'dCenterXCartisian_Calib', 'dCenterYCartisian_Calib'
+    if 'dCenterXCartisian' in casi_df.columns and 'dCenterYCartisian' in casi_df.columns:
+        return 'dCenterXCartisian', 'dCenterYCartisian'
+
+    # 备选：其他坐标列
+    cas_x_col = None
+    cas_y_col = None
+    for x_candidate in ['dCenterXCartesian', 'XREL', 'cx']:
+        if x_candidate in casi_df.columns:
+            cas_x_col = x_candidate
+            break
+    for y_candidate in ['dCenterYCartesian', 'YREL', 'cy']:
+        if y_candidate in casi_df.columns:
+            cas_y_col = y_candidate
+            break
+    return cas_x_col, cas_y_col
+
+
+def prepare_casi(casi_df, geometry=None):
+    """
+    标记CASI数据中的特殊类型（1000、10001）和边缘点（默认到晶圆中心距离>=147mm）
+
+    Args:
+        casi_df: BlobFeatures数据
+        geometry: 晶圆中心、直径和边缘去除宽度（见 wafer_geometry.make_geometry），默认 DEFAULT_GEOMETRY
+
+    Returns:
+        DataFrame: 增加 is_special_type、distance_to_center、angle_to_center、is_edge_point 列；未找到坐标列时返回None
+    """
+    casi_df = casi_df.copy()
+    casi_df.columns = casi_df.columns.str.strip()
+
+    if 'nDefectType' in casi_df.columns:
+        casi_df['is_special_type'] = casi_df['nDefectType'].isin(SPECIAL_DEFECT_TYPES)
+    else:
+        casi_df['is_special_type'] = False
+
+    cas_x_col, cas_y_col = find_casi_coord_columns(casi_df)
+    if cas_x_col is None or cas_y_col is None:
+        return None
+
+    geometry = geometry or wafer_geometry.DEFAULT_GEOMETRY
+    wafer_geometry.add_polar_columns(casi_df, cas_x_col, cas_y_col, geometry['center'])
+    casi_df['is_edge_point'] = wafer_geometry.edge_mask(casi_df[wafer_geometry.RADIUS_COLUMN],
+                                                        geometry['diameter'], geometry['edge_exclusion'])
+    return casi_df
+
+
+def match_points(casi_work, kla_work, match_threshold):
+    """
+    CASI与KLA点匹配，给出每个CASI点的匹配编码和每个KLA点的漏检类型
+
+    匹配编码（见 MATCH_CODES）：-2=特殊类型，0=过检，1=一对一，3=多CASI对一KLA，
+    4=一CASI对多KLA（由1细化），5=多对多（由3细化）。
+    漏检类型（见 MISS_TYPES）：0=正确检出，1=基础漏检（附近没有CASI），2=分类漏检（附近只有特殊类型CASI）。
+
+    Args:
+        casi_work: CASI数据，需包含 XREL、YREL、is_special_type 列，索引为0..N-1
+        kla_work: KLA数据，需包含 XREL、YREL 列，索引为0..M-1
+        match_threshold: 匹配距离阈值（含阈值），或自适应半径规则（见 adaptive_radius，
+                         按CASI/KLA尺寸列计算每个点的半径）
+
+    Returns:
+        tuple: (casi_match_result(N,), kla_matched(M,) bool, kla_miss_type(M,) int)
+    """
+    n_casi = len(casi_work)
+    n_kla = len(kla_work)
+    casi_match_result = np.full(n_casi, np.nan)
+    kla_matched = np.zeros(n_kla, dtype=bool)  # KLA是否被非特殊CASI匹配
+    kla_miss_type = np.zeros(n_kla, dtype=int)  # 0=正确检出, 1=基础漏检, 2=分类漏检
+    if n_casi == 0 or n_kla == 0:
+        # 没有KLA时非特殊CASI全部为过检，没有CASI时KLA全部为基础漏检
+        if n_casi > 0:
+            casi_match_result = np.where(casi_work['is_special_type'].to_numpy(dtype=bool), -2.0, 0.0)
+        kla_miss_type[:] = 1
+        return casi_match_result, kla_matched, kla_miss_type
+
+    casi_index = spatial_index.frame_index(casi_work, 'XREL', 'YREL')
+    kla_index = spatial_index.frame_index(kla_work, 'XREL', 'YREL')
+    is_special = casi_work['is_special_type'].to_numpy(dtype=bool)
+
+    # 一次性求出距离阈值内的全部 (CASI, KLA) 点对
+    if adaptive_radius.is_adaptive(match_threshold):
+        pair_casi, pair_kla, _ = adaptive_radius.radius_pairs(
+            casi_index.points, adaptive_radius.point_radius(casi_work, match_threshold, 'casi'),
+            kla_index.points, adaptive_radius.point_radius(kla_work, match_threshold, 'kla'),
+            match_threshold.get('combine', 'max'), tree_a=casi_index.tree, tree_b=kla_index.tree)
+    else:
+        pairs = casi_index.tree.sparse_distance_matrix(kla_index.tree, match_threshold, output_type='ndarray')
+        pair_casi = pairs['i'].astype(np.intp)
+        pair_kla = pairs['j'].astype(np.intp)
+
+    # 特殊类型的CASI标记为-2
+    casi_match_result[is_special] = -2
+
+    # 第一步：KLA的漏检类型——附近有非特殊CASI为正确检出，只有特殊CASI为分类漏检，没有CASI为基础漏检
+    normal_pair = ~is_special[pair_casi]
+    casi_per_kla = np.bincount(pair_kla[normal_pair], minlength=n_kla)
+    any_casi_per_kla = np.bincount(pair_kla, minlength=n_kla)
+    kla_matched = casi_per_kla > 0
+    kla_miss_type = np.where(kla_matched, 0, np.where(any_casi_per_kla > 0, 2, 1))
+
+    # CASI的初始编码由其邻近KLA中下标最大的一个决定（与逐个KLA覆盖写入的结果一致）：
+    # 该KLA附近只有这一个非特殊CASI为1（一对一），否则为3（多对一）
+    normal_casi = pair_casi[normal_pair]
+    last_kla = np.full(n_casi, -1, dtype=np.intp)
+    np.maximum.at(last_kla, normal_casi, pair_kla[normal_pair])
+    has_kla = last_kla >= 0
+    casi_match_result[has_kla] = np.where(casi_per_kla[last_kla[has_kla]] == 1, 1, 3)
+
+    # 第二步：附近有多个KLA的CASI细化 1->4、3->5（一CASI对多KLA）
+    kla_per_casi = np.bincount(normal_casi, minlength=n_casi)
+    multi_kla = kla_per_casi > 1
+    casi_match_result[multi_kla & (casi_match_result == 1)] = 4
+    casi_match_result[multi_kla & (casi_match_result == 3)] = 5
+
+    # 附近没有KLA的非特殊CASI -> 过检
+    casi_match_result[~is_special & ~has_kla] = 0
+
+    return casi_match_result, kla_matched, kla_miss_type
+
+
+def _match_points_reference(casi_work, kla_work, match_threshold):
+    """match_points 的逐点循环实现，仅用于核对向量化结果和性能对比"""
+    casi_match_result = np.full(len(casi_work), np.nan)
+    kla_matched = np.zeros(len(kla_work), dtype=bool)  # KLA是否被非特殊CASI匹配
+    kla_miss_type = np.zeros(len(kla_work), dtype=int)  # 0=正确检出, 1=基础漏检, 2=分类漏检
+
+    # 辅助函数：判断是否为特殊类型
+    def _cas_is_special(idx: int) -> bool:
+        if idx >= len(casi_work):
+            return False
+        return bool(casi_work.at[idx, 'is_special_type'])
+
+    # 构建两个KDTree：一个包含所有CASI，一个只包含非特殊CASI
+    if len(casi_work) > 0 and len(kla_work) > 0:
+        # 所有CASI的坐标（用于判断基础漏检 vs 分类漏检）
+        casi_pts_all = casi_work[['XREL', 'YREL']].to_numpy()
+        tree_casi_all = KDTree(casi_pts_all)
+
+        # 只包含非特殊类型的CASI（用于正常匹配）
+        non_special_mask = ~casi_work['is_special_type'].values
+        non_special_indices = np.where(non_special_mask)[0]
+
+        kla_pts = kla_work[['XREL', 'YREL']].to_numpy()
+        tree_kla = KDTree(kla_pts)
+
+        # 先标记特殊类型的CASI为-2
+        for casi_idx in range(len(casi_work)):
+            if _cas_is_special(casi_idx):
+                casi_match_result[casi_idx] = -2
+
+        if len(non_special_indices) > 0:
+            casi_pts_non_special = casi_work.loc[non_special_indices, ['XREL', 'YREL']].to_numpy()
+            tree_casi_non_special = KDTree(casi_pts_non_special)
+
+            # ===== 第一步：遍历KLA，判断漏检类型 =====
+            for kla_idx in range(len(kla_pts)):
+                kla_pt = kla_pts[kla_idx]
+
+                # 在非特殊CASI中查找匹配
+                casi_non_special_indices_in_tree = tree_casi_non_special.query_ball_point(kla_pt, r=match_threshold)
+
+                if len(casi_non_special_indices_in_tree) == 0:
+                    # KLA附近没有非特殊CASI
+                    kla_matched[kla_idx] = False
+
+                    # 进一步判断：附近是否有特殊类型的CASI
+                    casi_all_indices = tree_casi_all.query_ball_point(kla_pt, r=match_threshold)
+
+                    if len(casi_all_indices) == 0:
+                        # 附近完全没有CASI -> 基础漏检
+                        kla_miss_type[kla_idx] = 1
+                    else:
+                        # 附近有CASI，但都是特殊类型 -> 分类漏检
+                        kla_miss_type[kla_idx] = 2
+                    continue
+
+                # 有非特殊CASI匹配 -> 正确检出
+                kla_matched[kla_idx] = True
+                kla_miss_type[kla_idx] = 0
+
+                # 映射回原始索引
+                casi_idx_list = [non_special_indices[i] for i in casi_non_special_indices_in_tree]
+
+                if len(casi_idx_list) == 1:
+                    # 一对一匹配
+                    ci = casi_idx_list[0]
+                    casi_match_result[ci] = 1
+                else:
+                    # 多CASI对一KLA
+                    for ci in casi_idx_list:
+                        casi_match_result[ci] = 3
+
+            # ===== 第二步：遍历非特殊CASI，识别过检 =====
+            for tree_idx, casi_idx in enumerate(non_special_indices):
+                casi_pt = casi_pts_non_special[tree_idx]
+                kla_idx_list = tree_kla.query_ball_point(casi_pt, r=match_threshold)
+
+                cur = casi_match_result[casi_idx]
+
+                if len(kla_idx_list) == 0:
+                    # CASI附近没有KLA -> 过检
+                    casi_match_result[casi_idx] = 0
+                    continue
+
+                # 细化1->4, 3->5（一CASI对多KLA）
+                if pd.notna(cur):
+                    cur_int = int(cur)
+                    if cur_int == 1 and len(kla_idx_list) > 1:
+                        casi_match_result[casi_idx] = 4
+                    elif cur_int == 3 and len(kla_idx_list) > 1:
+                        casi_match_result[casi_idx] = 5
+                elif len(kla_idx_list) > 1:
+                    casi_match_result[casi_idx] = 4
+
+            # 处理未匹配的非特殊CASI -> 过检
+            for casi_idx in non_special_indices:
+                if np.isnan(casi_match_result[casi_idx]):
+                    casi_match_result[casi_idx] = 0
+        else:
+            # 全部为特殊类型：KLA附近有CASI为分类漏检，否则为基础漏检
+            for kla_idx in range(len(kla_pts)):
+                casi_all_indices = tree_casi_all.query_ball_point(kla_pts[kla_idx], r=match_threshold)
+                kla_miss_type[kla_idx] = 2 if len(casi_all_indices) > 0 else 1
+    else:
+        # 没有KLA时非特殊CASI全部为过检，没有CASI时KLA全部为基础漏检
+        for casi_idx in range(len(casi_work)):
+            casi_match_result[casi_idx] = -2 if _cas_is_special(casi_idx) else 0
+        kla_miss_type[:] = 1
+
+    return casi_match_result, kla_matched, kla_miss_type
+
+
+def align_casi(casi_work, kla_work, match_threshold, search_radius=None):
+    """
+    估计CASI到KLA坐标的相似变换（平移、旋转、缩放）并应用到CASI坐标
+
+    只用非特殊类型的CASI点估计变换，变换应用到全部CASI点。
+
+    Args:
+        casi_work: CASI数据（XREL、YREL、is_special_type 列）
+        kla_work: KLA数据（XREL、YREL 列）
+        match_threshold: 匹配距离阈值，作为ICP的点对距离上限（自适应半径规则取基础半径）
+        search_radius: 估计平移的搜索半径，默认 5 倍匹配距离阈值
+
+    Returns:
+        tuple: (坐标变换后的CASI数据, alignment.estimate_alignment 的结果)
+    """
+    normal = ~casi_work['is_special_type'].to_numpy(dtype=bool)
+    casi_pts = casi_work[['XREL', 'YREL']].to_numpy(dtype=float)
+    kla_pts = kla_work[['XREL', 'YREL']].to_numpy(dtype=float)
+
+    kla_tree = spatial_index.frame_index(kla_work, 'XREL', 'YREL').tree if len(kla_pts) else None
+    result = alignment.estimate_alignment(casi_pts[normal], kla_pts, adaptive_radius.base_radius(match_threshold),
+                                          search_radius, dst_tree=kla_tree)
+    if result['applied']:
+        casi_work = casi_work.copy()
+        casi_work[['XREL', 'YREL']] = alignment.apply_alignment(casi_pts, result)
+    return casi_work, result
+
+
+def alignment_fields(result):
+    """对齐结果在汇总表中的列；未启用对齐时为空"""
+    if result is None:
+        return {}
+    return {
+        '对齐平移X': round(float(result['translation'][0]), 2),
+        '对齐平移Y': round(float(result['translation'][1]), 2),
+        '对齐旋转(°)': round(result['rotation_deg'], 5),
+        '对齐缩放': round(result['scale'], 6),
+        '对齐残差RMS': round(result['residual'], 2),
+        '对齐前残差RMS': round(result['residual_before'], 2),
+    }
+
+
+def size_bin_stats(dsize, matched, bin_min=SIZE_BIN_MIN, bin_max=SIZE_BIN_MAX, bin_width=1):
+    """
+    按KLA缺陷尺寸区间统计检出率（尺寸为 DSIZE×1000 四舍五入后的nm值）
+
+    Args:
+        dsize: 每个KLA缺陷的DSIZE（NaN不参与统计）
+        matched: 每个KLA缺陷是否被正确检出（bool）
+        bin_min, bin_max: 统计的尺寸范围（nm，含两端）
+        bin_width: 区间宽度（nm）
+
+    Returns:
+        DataFrame: 每个区间一行，列为 尺寸区间(nm)、尺寸下限(nm)、KLA总数、正确检出、漏检、检出率(%)
+    """
+    bin_min, bin_max, bin_width = int(bin_min), int(bin_max), max(int(bin_width), 1)
+    size_nm = np.rint(np.asarray(dsize, dtype=float) * 1000)
+    in_range = (size_nm >= bin_min) & (size_nm <= bin_max)
+    bin_idx = ((size_nm[in_range] - bin_min) // bin_width).astype(np.intp)
+
+    n_bins = (bin_max - bin_min) // bin_width + 1
+    total = np.bincount(bin_idx, minlength=n_bins)
+    correct = np.bincount(bin_idx[np.asarray(matched, dtype=bool)[in_range]], minlength=n_bins)
+    lower = bin_min + np.arange(n_bins) * bin_width
+    upper = np.minimum(lower + bin_width - 1, bin_max)
+
+    if bin_width == 1:
+        labels = [f"{lo}nm" for lo in lower]
+    else:
+        labels = [f"{lo}-{hi}nm" for lo, hi in zip(lower, upper)]
+    return pd.DataFrame({
+        '尺寸区间(nm)': labels,
+        '尺寸下限(nm)': lower,
+        'KLA总数': total,
+        '正确检出': correct,
+        '漏检': total - correct,
+        '检出率(%)': np.round(np.divide(correct * 100, total, out=np.zeros(n_bins), where=total > 0), 2),
+    })
+
+
+# MaxOrg=65532 的情况 -> (DW1O, DW2O, DN1O) 是否为65532
+MAXORG_65532_CASES = {
+    '三个都是65532': (True, True, True),
+    'DW1O和DW2O是65532但DN1O不是': (True, True, False),
+    'DW1O是65532但DW2O和DN1O不是': (True, False, False),
+    'DW2O是65532但DW1O和DN1O不是': (False, True, False),
+    'DN1O是65532但DW1O和DW2O不是': (False, False, True),
+    'DW1O和DN1O是65532但DW2O不是': (True, False, True),
+    'DW2O和DN1O是65532但DW1O不是': (False, True, True),
+    '都不是65532': (False, False, False),
+}
+
+
+def _fill_stats(stats, values, key='values', median=True):
+    """把一组数值及其均值/最小/最大/标准差（和中位数）写入统计字典，数值为空时保留默认值"""
+    if len(values) > 0:
+        stats[key] = values.tolist()
+        stats['mean'] = np.mean(values)
+        stats['min'] = np.min(values)
+        stats['max'] = np.max(values)
+        stats['std'] = np.std(values)
+        if median:
+            stats['median'] = np.median(values)
+
+
+def _coord_data(casi_df, casi_work, kla_work, is_overdetect, is_correct, kla_missed, geometry, aligned=False):
+    """
+    按类型提取缺陷点坐标（过检、正确检出来自CASI，漏检来自KLA）
+
+    按列存储，特征数据只保存一份，由 coord_points 按行号按需取用；同时保存各点的极坐标，
+    CASI点直接使用 prepare_casi 缓存的极坐标列（坐标经过对齐时按对齐后的坐标重新计算）。
+
+    Args:
+        casi_df: 经 prepare_casi 处理的CASI数据
+        casi_work: 匹配用的CASI数据（casi_df 中坐标有效的行）
+        kla_work: 匹配用的KLA数据
+        is_overdetect, is_correct: casi_work 中计入过检/正确检出的点
+        kla_missed: kla_work 中的漏检点
+        geometry: 匹配时使用的晶圆几何参数
+        aligned: casi_work 的坐标是否经过 align_casi 校正
+
+    Returns:
+        dict: '过检'、'正确检出'、'漏检' -> DataFrame（x、y、defect_id、defect_type_value、row 及极坐标列），
+              'features' -> 特征数据（索引为行号）
+    """
+    cas_x_col, cas_y_col = find_casi_coord_columns(casi_df)
+    casi_rows = np.flatnonzero(casi_df[[cas_x_col, cas_y_col]].notna().all(axis=1).to_numpy())
+    casi_x = casi_work['XREL'].to_numpy(dtype=float)
+    casi_y = casi_work['YREL'].to_numpy(dtype=float)
+    if aligned:
+        casi_radius, casi_angle = wafer_geometry.polar_coordinates(casi_x, casi_y, geometry['center'])
+    else:
+        casi_radius = casi_df[wafer_geometry.RADIUS_COLUMN].to_numpy(dtype=float)[casi_rows]
+        casi_angle = casi_df[wafer_geometry.ANGLE_COLUMN].to_numpy(dtype=float)[casi_rows]
+    casi_points = pd.DataFrame({
+        'x': casi_x,
+        'y': casi_y,
+        'defect_id': casi_df['nDefectID'].to_numpy()[casi_rows] if 'nDefectID' in casi_df.columns else None,
+        'defect_type_value': (casi_df['nDefectType'].to_numpy()[casi_rows]
+                              if 'nDefectType' in casi_df.columns else None),
+        'row': casi_rows,
+        wafer_geometry.RADIUS_COLUMN: casi_radius,
+        wafer_geometry.ANGLE_COLUMN: casi_angle,
+    })
+
+    kla_x = kla_work['XREL'].to_numpy(dtype=float)[kla_missed]
+    kla_y = kla_work['YREL'].to_numpy(dtype=float)[kla_missed]
+    kla_radius, kla_angle = wafer_geometry.polar_coordinates(kla_x, kla_y, geometry['center'])
+    return {
+        '过检': casi_points[is_overdetect].reset_index(drop=True),
+        '正确检出': casi_points[is_correct].reset_index(drop=True),
+        # KLA数据没有nDefectID和特征数据
+        '漏检': pd.DataFrame({
+            'x': kla_x,
+            'y': kla_y,
+            'defect_id': None,
+            'defect_type_value': None,
+            'row': -1,
+            wafer_geometry.RADIUS_COLUMN: kla_radius,
+            wafer_geometry.ANGLE_COLUMN: kla_angle,
+        }),
+        'features': casi_df[[col for col in COORD_FEATURES if col in casi_df.columns]].reset_index(drop=True),
+    }
+
+
+def analyze_pair(casi_df, kla_df, casi_name, kla_name, match_threshold, log=None,
+                 align=False, align_radius=None, bin_min=SIZE_BIN_MIN, bin_max=SIZE_BIN_MAX, geometry=None):
+    """
+    对一组CASI与KLA数据进行匹配，统计过检、漏检、尺寸分布及各类特征分布
+
+    匹配编码：-2=特殊类型，0=过检，1=一对一，3=多CASI对一KLA，4/5=一CASI对多KLA
+
+    Args:
+        casi_df: 经 prepare_casi 处理的CASI数据（边缘点按 prepare_casi 的晶圆几何参数标记）
+        kla_df: KLA数据（需包含XREL、YREL列，DSIZE可选）
+        casi_name: CASI文件夹/文件名称
+        kla_name: KLA文件夹/文件名称
+        match_threshold: 匹配距离阈值，或自适应半径规则（见 adaptive_radius）
+        log: 日志回调 log(level, message)
+        align: 是否在匹配前自动估计并校正CASI坐标的平移/旋转/缩放（见 align_casi）
+        align_radius: 估计平移的搜索半径，默认 5 倍匹配距离阈值
+        bin_min, bin_max: 正确检出/漏检DSIZE统计的尺寸范围（nm，与 size_bin_stats 一致）
+        geometry: casi_df 经 prepare_casi 处理时使用的晶圆几何参数，默认 DEFAULT_GEOMETRY（随结果保存，
+                  供 zone_stats 使用）
+
+    Returns:
+        dict: 匹配统计结果（与界面结果表一致）；数据无效时返回None
+    """
+    log = log or _print_log
+    geometry = geometry or wafer_geometry.DEFAULT_GEOMETRY
+    cas_x_col, cas_y_col = find_casi_coord_columns(casi_df)
+    if cas_x_col is None or cas_y_col is None:
+        log('warning', f"{casi_name}: 未找到坐标列")
+        return None
+
+    kla_df = kla_df.copy()
+    kla_df.columns = kla_df.columns.str.strip()
+    if not {'XREL', 'YREL'}.issubset(kla_df.columns):
+        log('warning', f"{kla_name}: 缺少XREL/YREL列")
+        return None
+
+    # 准备匹配数据（包含多个MaxOrg列用于识别污染）
+    # 检查是否有DW1O_MaxOrg、DW2O_MaxOrg、DN1O_MaxOrg列
+    maxorg_cols = []
+    if 'DW1O_MaxOrg' in casi_df.columns:
+        maxorg_cols.append('DW1O_MaxOrg')
+    if 'DW2O_MaxOrg' in casi_df.columns:
+        maxorg_cols.append('DW2O_MaxOrg')
+    if 'DN1O_MaxOrg' in casi_df.columns:
+        maxorg_cols.append('DN1O_MaxOrg')
+
+    has_maxorg = len(maxorg_cols) > 0
+
+    # 检查是否有DW1O_Size和DW2O_Size列（用于过检尺寸分布统计）
+    size_cols = []
+    if 'DW1O_Size' in casi_df.columns:
+        size_cols.append('DW1O_Size')
+    if 'DW2O_Size' in casi_df.columns:
+        size_cols.append('DW2O_Size')
+    if 'DN1O_Size' in casi_df.columns:
+        size_cols.append('DN1O_Size')
+    has_size_cols = len(size_cols) > 0
+
+    # 检查是否有DW1O通道的SubRow和MainRow列（用于通道比值分析）
+    dw1o_channel_cols = []
+    if 'DW1O_SubRow1Max' in casi_df.columns:
+        dw1o_channel_cols.append('DW1O_SubRow1Max')
+    if 'DW1O_SubRow2Max' in casi_df.columns:
+        dw1o_channel_cols.append('DW1O_SubRow2Max')
+    if 'DW1O_MainRowMax' in casi_df.columns:
+        dw1o_channel_cols.append('DW1O_MainRowMax')
+    has_dw1o_channels = len(dw1o_channel_cols) == 3  # 需要三个列都存在
+
+    # 检查是否有BGMean列（用于背景均值分析）
+    bgmean_cols = []
+    if 'DW1O_BGMean' in casi_df.columns:
+        bgmean_cols.append('DW1O_BGMean')
+    if 'DW2O_BGMean' in casi_df.columns:
+        bgmean_cols.append('DW2O_BGMean')
+    if 'DN1O_BGMean' in casi_df.columns:
+        bgmean_cols.append('DN1O_BGMean')
+    if 'DW1O_BGDev' in casi_df.columns:
+        bgmean_cols.append('DW1O_BGDev')
+    if 'DW2O_BGDev' in casi_df.columns:
+        bgmean_cols.append('DW2O_BGDev')
+    if 'DN1O_BGDev' in casi_df.columns:
+        bgmean_cols.append('DN1O_BGDev')
+    has_bgmean_cols = len(bgmean_cols) > 0
+
+    # 检查是否有TotalSNR列（用于SNR分析）
+    totalsnr_cols = []
+    if 'DW1O_TotalSNR' in casi_df.columns:
+        totalsnr_cols.append('DW1O_TotalSNR')
+    if 'DW2O_TotalSNR' in casi_df.columns:
+        totalsnr_cols.append('DW2O_TotalSNR')
+    if 'DN1O_TotalSNR' in casi_df.columns:
+        totalsnr_cols.append('DN1O_TotalSNR')
+    has_totalsnr_cols = len(totalsnr_cols) > 0
+
+    # 准备CASI工作数据，包含is_special_type列和尺寸列
+    cols_to_read = [cas_x_col, cas_y_col, 'is_special_type', 'is_edge_point']
+    if has_maxorg:
+        cols_to_read += maxorg_cols
+    if has_size_cols:
+        cols_to_read += size_cols
+    if has_dw1o_channels:
+        cols_to_read += dw1o_channel_cols
+    if has_bgmean_cols:
+        cols_to_read += bgmean_cols
+    if has_totalsnr_cols:
+        cols_to_read += totalsnr_cols
+    # 自适应半径规则用到的CASI尺寸列
+    cols_to_read += [col for col in adaptive_radius.rule_columns(match_threshold, 'casi')
+                     if col in casi_df.columns and col not in cols_to_read]
+
+    casi_work = casi_df[cols_to_read].copy()
+    # 重命名坐标列
+    casi_work.rename(columns={cas_x_col: 'XREL', cas_y_col: 'YREL'}, inplace=True)
+
+    # 转换MaxOrg列为数值
+    if has_maxorg:
+        for col in maxorg_cols:
+            casi_work[col] = pd.to_numeric(casi_work[col], errors='coerce')
+
+    # 转换Size列为数值
+    if has_size_cols:
+        for col in size_cols:
+            casi_work[col] = pd.to_numeric(casi_work[col], errors='coerce')
+
+    # 转换DW1O通道列为数值
+    if has_dw1o_channels:
+        for col in dw1o_channel_cols:
+            casi_work[col] = pd.to_numeric(casi_work[col], errors='coerce')
+
+    # 转换BGMean列为数值
+    if has_bgmean_cols:
+        for col in bgmean_cols:
+            casi_work[col] = pd.to_numeric(casi_work[col], errors='coerce')
+
+    # 转换TotalSNR列为数值
+    if has_totalsnr_cols:
+        for col in totalsnr_cols:
+            casi_work[col] = pd.to_numeric(casi_work[col], errors='coerce')
+
+    casi_work = casi_work.dropna(subset=['XREL', 'YREL']).reset_index(drop=True)
+
+    # 确保is_special_type列存在
+    if 'is_special_type' not in casi_work.columns:
+        casi_work['is_special_type'] = False
+
+    # 确保is_edge_point列存在
+    if 'is_edge_point' not in casi_work.columns:
+        casi_work['is_edge_point'] = False
+
+    # 读取KLA数据，包含DSIZE列用于尺寸统计
+    if 'DSIZE' in kla_df.columns:
+        kla_work = kla_df[['XREL', 'YREL', 'DSIZE']].copy()
+        kla_work['DSIZE'] = pd.to_numeric(kla_work['DSIZE'], errors='coerce')
+    else:
+        kla_work = kla_df[['XREL', 'YREL']].copy()
+        kla_work['DSIZE'] = np.nan
+    kla_work = kla_work.dropna(subset=['XREL', 'YREL']).reset_index(drop=True)
+
+    casi_alignment = None
+    if align:
+        casi_work, casi_alignment = align_casi(casi_work, kla_work, match_threshold, align_radius)
+        log('info', f"{casi_name} -> {kla_name}: {alignment.format_alignment(casi_alignment)}")
+
+    casi_match_result, kla_matched, kla_miss_type = match_points(casi_work, kla_work, match_threshold)
+
+    # 统计结果
+    n_overdetect_true = np.sum(casi_match_result == 0)  # 真过检（CASI附近真的没有KLA）
+    n_miss_basic = np.sum(kla_miss_type == 1)  # 基础漏检
+    n_miss_classified = np.sum(kla_miss_type == 2)  # 分类漏检
+    n_miss = n_miss_basic + n_miss_classified  # 总漏检
+
+    # 统计DSIZE尺寸信息（正确检出和漏检的缺陷，默认26nm-100nm）
+    dsize = kla_work['DSIZE'].to_numpy(dtype=float)
+    size_nm = np.rint(dsize * 1000)
+    in_size_range = (size_nm >= bin_min) & (size_nm <= bin_max)
+    dsize_correct_list = dsize[in_size_range & kla_matched]
+    dsize_miss_list = dsize[in_size_range & ~kla_matched]
+
+    # 保存逐点的DSIZE和检出标记，按尺寸区间的统计由 size_bin_stats 按需计算
+    size_stats = {'dsize': dsize, 'matched': kla_matched}
+
+    # 计算DSIZE统计值
+    dsize_correct_avg = np.mean(dsize_correct_list) if len(dsize_correct_list) > 0 else 0
+    dsize_correct_min = np.min(dsize_correct_list) if len(dsize_correct_list) > 0 else 0
+    dsize_correct_max = np.max(dsize_correct_list) if len(dsize_correct_list) > 0 else 0
+
+    dsize_miss_avg = np.mean(dsize_miss_list) if len(dsize_miss_list) > 0 else 0
+    dsize_miss_min = np.min(dsize_miss_list) if len(dsize_miss_list) > 0 else 0
+    dsize_miss_max = np.max(dsize_miss_list) if len(dsize_miss_list) > 0 else 0
+
+    # 过检/正确检出的掩码，以下各项统计都按掩码一次取出
+    is_overdetect = casi_match_result == 0
+    is_correct = np.isin(casi_match_result, CORRECT_CODES)
+    is_edge = casi_work['is_edge_point'].to_numpy(dtype=bool)
+
+    def column(col):
+        return casi_work[col].to_numpy(dtype=float) if col in casi_work.columns else np.full(len(casi_work), np.nan)
+
+    # 统计过检中污染的数量（DW1O_MaxOrg或DW2O_MaxOrg或DN1O_MaxOrg == 65532）
+    n_contamination = 0
+    if has_maxorg:
+        is_65532 = np.column_stack([column(col) == 65532 for col in maxorg_cols]).any(axis=1)
+        n_contamination = int(np.sum(is_65532 & is_overdetect))  # 只要有一个为65532就算污染
+
+    # 计算去除污染后的真过检数量
+    n_overdetect_true_clean = n_overdetect_true - n_contamination
+
+    # 统计过检数据的DW1O_Size和DW2O_Size尺寸分布
+    overdetect_size_stats = {
+        'has_size_data': has_size_cols,
+        'dw1o_size': {'values': [], 'mean': 0, 'min': 0, 'max': 0, 'std': 0, 'count_200000': 0},
+        'dw2o_size': {'values': [], 'mean': 0, 'min': 0, 'max': 0, 'std': 0, 'count_200000': 0}
+    }
+
+    if has_size_cols and n_overdetect_true > 0:
+        for size_col, key in (('DW1O_Size', 'dw1o_size'), ('DW2O_Size', 'dw2o_size')):
+            if size_col not in casi_work.columns:
+                continue
+            values = column(size_col)[is_overdetect]
+            values = values[values > 0]  # 排除无效值和0
+            # 200000单独统计，其他值正常统计
+            overdetect_size_stats[key]['count_200000'] = int(np.sum(values == 200000.00))
+            _fill_stats(overdetect_size_stats[key], values[values != 200000.00], median=False)
+
+    total_casi = len(casi_work)
+    total_kla = len(kla_work)
+
+    # 新增：统计边缘点数量（距离>=147mm的过检点）
+    # 找出所有过检点（match_result == 0）中的边缘点
+    overdetect_edge_count = int(np.sum(casi_work['is_edge_point'].to_numpy(dtype=bool)[casi_match_result == 0]))
+
+    # 计算CASI分类后检出数（不包含1000和10001的特殊类型，也不包含距离>=147的边缘过检点）
+    # 原始分类后检出数
+    casi_detected_count_raw = np.sum(~casi_work['is_special_type']) if 'is_special_type' in casi_work.columns else total_casi
+    # 去除边缘过检点后的分类后检出数
+    casi_detected_count = casi_detected_count_raw - overdetect_edge_count
+
+    # **正确的统计逻辑**：
+    # 1. 正确检出 = KLA总数 - 漏检总数
+    # 2. 过检(0) = CASI分类后检出数 - 正确检出（总过检）
+    # 3. 真过检 = CASI附近真的没有KLA的（casi_match_result == 0）
+    # 4. 去除污染过检 = 真过检 - 污染数量
+    # 5. 去除边缘点后的真过检 = 真过检 - 边缘过检点数量
+    # 6. 漏检分为：基础漏检 和 分类漏检
+    # 验证：CASI分类后检出数 = 过检(0) + 正确检出
+
+    n_correct = total_kla - n_miss  # 正确检出数 = KLA总数 - 漏检总数
+    n_overdetect = casi_detected_count - n_correct  # 过检(0) = CASI分类后检出数 - 正确检出
+    # 真过检需要减去边缘点
+    n_overdetect_true_filtered = n_overdetect_true - overdetect_edge_count
+    n_overdetect_clean = n_overdetect_true_clean - overdetect_edge_count  # 去除污染和边缘点的过检
+    n_miss_total = n_miss  # 漏检总数
+
+    # 验证：CASI分类后检出数应该等于过检(0)+正确检出
+    expected_casi = n_overdetect + n_correct
+    if abs(expected_casi - casi_detected_count) > 1:
+        log('warning', f"⚠️ 验证失败：CASI分类后检出数({casi_detected_count}) ≠ 过检({n_overdetect}) + 正检({n_correct}) = {expected_casi}")
+
+    # 新增：统计DW1O_MaxOrg和DW2O_MaxOrg比值分布（去除0值）
+    maxorg_ratio_stats = {
+        'has_maxorg_data': False,
+        '过检': {'ratios': [], 'mean': 0, 'min': 0, 'max': 0, 'std': 0, 'median': 0},
+        '正确检出': {'ratios': [], 'mean': 0, 'min': 0, 'max': 0, 'std': 0, 'median': 0}
+    }
+
+    if 'DW1O_MaxOrg' in casi_work.columns and 'DW2O_MaxOrg' in casi_work.columns:
+        maxorg_ratio_stats['has_maxorg_data'] = True
+
+        dw1o_val = column('DW1O_MaxOrg')
+        dw2o_val = column('DW2O_MaxOrg')
+        # 跳过0值和无效值
+        valid = ~np.isnan(dw1o_val) & ~np.isnan(dw2o_val) & (dw1o_val != 0) & (dw2o_val != 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = dw1o_val / dw2o_val
+        # 只统计过检（排除边缘点）和正确检出
+        _fill_stats(maxorg_ratio_stats['过检'], ratio[valid & is_overdetect & ~is_edge], key='ratios')
+        _fill_stats(maxorg_ratio_stats['正确检出'], ratio[valid & is_correct], key='ratios')
+
+    # 新增：统计过检和正确检出中MaxOrg=65532的情况
+    maxorg_65532_stats = {
+        'has_maxorg_cols': False,
+        '过检': dict.fromkeys(['总数'] + list(MAXORG_65532_CASES), 0),
+        '正确检出': dict.fromkeys(['总数'] + list(MAXORG_65532_CASES), 0)
+    }
+
+    if all(col in casi_work.columns for col in ('DW1O_MaxOrg', 'DW2O_MaxOrg', 'DN1O_MaxOrg')):
+        maxorg_65532_stats['has_maxorg_cols'] = True
+
+        flags = (column('DW1O_MaxOrg') == 65532, column('DW2O_MaxOrg') == 65532, column('DN1O_MaxOrg') == 65532)
+        # 只分析过检(0)（排除边缘点）和正确检出(1,3,4,5)
+        for defect_type, mask in (('过检', is_overdetect & ~is_edge), ('正确检出', is_correct)):
+            maxorg_65532_stats[defect_type]['总数'] = int(np.sum(mask))
+            for case, pattern in MAXORG_65532_CASES.items():
+                case_mask = mask.copy()
+                for flag, expected in zip(flags, pattern):
+                    case_mask &= flag if expected else ~flag
+                maxorg_65532_stats[defect_type][case] = int(np.sum(case_mask))
+
+    # 新增：统计DW1O通道的三个比值分布（去除0值）
+    ratio_names = ['SubRow1/SubRow2', 'MainRow/SubRow1', 'MainRow/SubRow2']
+    dw1o_ratio_stats = {'has_dw1o_data': False}
+    for defect_type in ['过检', '正确检出', 'KLA检出']:
+        dw1o_ratio_stats[defect_type] = {
+            name: {'ratios': [], 'mean': 0, 'min': 0, 'max': 0, 'std': 0, 'median': 0} for name in ratio_names
+        }
+
+    if all(col in casi_work.columns for col in ('DW1O_SubRow1Max', 'DW1O_SubRow2Max', 'DW1O_MainRowMax')):
+        dw1o_ratio_stats['has_dw1o_data'] = True
+
+        subrow1_val = column('DW1O_SubRow1Max')
+        subrow2_val = column('DW1O_SubRow2Max')
+        mainrow_val = column('DW1O_MainRowMax')
+        # 跳过无效值，比值去除0值
+        valid = ~np.isnan(subrow1_val) & ~np.isnan(subrow2_val) & ~np.isnan(mainrow_val)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = {
+                'SubRow1/SubRow2': (subrow1_val / subrow2_val, (subrow1_val != 0) & (subrow2_val != 0)),
+                'MainRow/SubRow1': (mainrow_val / subrow1_val, (mainrow_val != 0) & (subrow1_val != 0)),
+                'MainRow/SubRow2': (mainrow_val / subrow2_val, (mainrow_val != 0) & (subrow2_val != 0)),
+            }
+        # KLA检出 = 正确检出（CASI匹配结果中没有漏检）
+        for defect_type, mask in (('过检', is_overdetect), ('正确检出', is_correct), ('KLA检出', is_correct)):
+            for ratio_name, (ratio, nonzero) in ratios.items():
+                _fill_stats(dw1o_ratio_stats[defect_type][ratio_name], ratio[valid & nonzero & mask], key='ratios')
+
+    # 提取每个类型的坐标数据（用于共有率分析和环带/扇区统计）
+    coord_data = _coord_data(casi_df, casi_work, kla_work, is_overdetect & ~is_edge, is_correct, ~kla_matched,
+                             geometry, aligned=casi_alignment is not None)
+
+    # 新增：统计BGMean值分布（过检和正确检出，去除0值）
+    bg_names = ['DW1O_BGMean', 'DW2O_BGMean', 'DN1O_BGMean', 'DW1O_BGDev', 'DW2O_BGDev', 'DN1O_BGDev']
+    bgmean_stats = {'has_bgmean_data': False}
+    for defect_type in ['过检', '正确检出']:
+        bgmean_stats[defect_type] = {
+            name: {'values': [], 'mean': 0, 'min': 0, 'max': 0, 'std': 0, 'median': 0} for name in bg_names
+        }
+
+    if any(name in casi_work.columns for name in bg_names):
+        bgmean_stats['has_bgmean_data'] = True
+
+        for bg_name in bg_names:
+            if bg_name not in casi_work.columns:
+                continue
+            values = column(bg_name)
+            valid = ~np.isnan(values) & (values != 0)
+            for defect_type, mask in (('过检', is_overdetect), ('正确检出', is_correct)):
+                _fill_stats(bgmean_stats[defect_type][bg_name], values[valid & mask])
+
+    # 新增：统计TotalSNR值按尺寸分布（过检和正确检出，每2nm一个区间，从26nm开始）
+    totalsnr_size_stats = {
+        'has_snr_data': False,
+        'size_bins': [],  # 尺寸区间列表，如 [26, 28, 30, ...]
+        '过检': {},  # 每个尺寸区间的SNR值字典
+        '正确检出': {}  # 每个尺寸区间的SNR值字典
+    }
+
+    channels = ['DW1O', 'DW2O', 'DN1O']
+    # 需要至少有一组Size和SNR列
+    if any(f'{ch}_Size' in casi_work.columns and f'{ch}_TotalSNR' in casi_work.columns for ch in channels):
+        totalsnr_size_stats['has_snr_data'] = True
+
+        # 定义尺寸区间：从26开始，每2nm一个区间
+        size_bins = list(range(26, 201, 2))  # 26, 28, 30, ..., 200
+        totalsnr_size_stats['size_bins'] = size_bins
+
+        sizes = {ch: column(f'{ch}_Size') for ch in channels}
+        snrs = {ch: column(f'{ch}_TotalSNR') for ch in channels}
+        snr_cols = [f'{ch}_TotalSNR' for ch in channels if f'{ch}_TotalSNR' in casi_work.columns]
+
+        # 使用DW1O_Size作为主要尺寸判断标准（如果没有则用DW2O或DN1O），排除200000的异常值
+        primary_size = np.where(~np.isnan(sizes['DW1O']), sizes['DW1O'],
+                                np.where(~np.isnan(sizes['DW2O']), sizes['DW2O'], sizes['DN1O']))
+        valid = ~np.isnan(primary_size) & (primary_size < 200000)
+        # 向下取整到最近的偶数，只统计 size_bins 范围内的
+        bin_of = np.where(valid, np.floor_divide(np.where(valid, primary_size, 0), 2) * 2, -1)
+        valid &= (bin_of >= size_bins[0]) & (bin_of <= size_bins[-1])
+
+        # 坐标、尺寸和SNR信息（无效值记为0）
+        coords = pd.DataFrame({
+            'x': casi_work['XREL'].to_numpy(dtype=float),
+            'y': casi_work['YREL'].to_numpy(dtype=float),
+            **{f'{ch.lower()}_size': np.nan_to_num(sizes[ch], nan=0) for ch in channels},
+            **{f'{ch.lower()}_snr': np.nan_to_num(snrs[ch], nan=0) for ch in channels},
+        })
+
+        for defect_type, mask in (('过检', is_overdetect), ('正确检出', is_correct)):
+            rows = np.flatnonzero(valid & mask)
+            row_bins = bin_of[rows]
+            for size_bin in size_bins:
+                bin_rows = rows[row_bins == size_bin]
+                totalsnr_size_stats[defect_type][size_bin] = {
+                    'count': len(bin_rows),
+                    'coords': coords.iloc[bin_rows].to_dict('records'),  # (x, y, dw1o_size, dw2o_size, dn1o_size)
+                    **{col: [] for col in ['DW1O_TotalSNR', 'DW2O_TotalSNR', 'DN1O_TotalSNR']},
+                }
+                for col in snr_cols:
+                    values = casi_work[col].to_numpy(dtype=float)[bin_rows]
+                    totalsnr_size_stats[defect_type][size_bin][col] = values[~np.isnan(values)].tolist()
+
+    result = {
+        'CASI文件夹': casi_name,
+        'KLA文件夹': kla_name,
+        # '基础检出个数': int(blob_count),
+        'CASI总数': total_casi,
+        'CASI分类后检出数': int(casi_detected_count),  # 不包含1000和10001，也不包含距离>=147的边缘过检点
+        'KLA总数': total_kla,
+        '过检(0)': int(n_overdetect),  # CASI分类后检出数 - 正确检出
+        '真过检': int(n_overdetect_true_filtered),  # CASI附近真的没有KLA的，去除边缘点
+        '过检（去除污染）': int(n_overdetect_clean),  # 真过检 - 污染 - 边缘点
+        '过检-边缘点数': int(overdetect_edge_count),  # 距离>=147的过检点
+        '正确检出(1,3,4,5)': int(n_correct),
+        '漏检-基础检': int(n_miss_basic),  # KLA附近完全没有CASI
+        '漏检-分类': int(n_miss_classified),  # KLA附近有CASI但都是1000/10001
+        '漏检总数': int(n_miss_total),
+        # '多对一-特殊(-3)': int(n_multi_special),
+        '过检率': f"{n_overdetect/total_kla*100:.2f}%" if total_kla > 0 else "0%",
+        '真过检率': f"{n_overdetect_true_filtered/total_kla*100:.2f}%" if total_kla > 0 else "0%",
+        '过检率（去除污染）': f"{n_overdetect_clean/total_kla*100:.2f}%" if total_kla > 0 else "0%",
+        '检出率': f"{n_correct/total_kla*100:.2f}%" if total_kla > 0 else "0%",
+        '漏检率-基础': f"{n_miss_basic/total_kla*100:.2f}%" if total_kla > 0 else "0%",
+        '漏检率-分类': f"{n_miss_classified/total_kla*100:.2f}%" if total_kla > 0 else "0%",
+        '漏检率（总）': f"{n_miss_total/total_kla*100:.2f}%" if total_kla > 0 else "0%",
+        '正确检出DSIZE均值': f"{dsize_correct_avg:.6f}",
+        '正确检出DSIZE最小': f"{dsize_correct_min:.6f}",
+        '正确检出DSIZE最大': f"{dsize_correct_max:.6f}",
+        '漏检DSIZE均值': f"{dsize_miss_avg:.6f}",
+        '漏检DSIZE最小': f"{dsize_miss_min:.6f}",
+        '漏检DSIZE最大': f"{dsize_miss_max:.6f}",
+        '过检DW1O_Size均值': f"{overdetect_size_stats['dw1o_size']['mean']:.2f}" if overdetect_size_stats['dw1o_size']['mean'] > 0 else "N/A",
+        '过检DW1O_Size最小': f"{overdetect_size_stats['dw1o_size']['min']:.2f}" if overdetect_size_stats['dw1o_size']['min'] > 0 else "N/A",
+        '过检DW1O_Size最大': f"{overdetect_size_stats['dw1o_size']['max']:.2f}" if overdetect_size_stats['dw1o_size']['max'] > 0 else "N/A",
+        '过检DW2O_Size均值': f"{overdetect_size_stats['dw2o_size']['mean']:.2f}" if overdetect_size_stats['dw2o_size']['mean'] > 0 else "N/A",
+        '过检DW2O_Size最小': f"{overdetect_size_stats['dw2o_size']['min']:.2f}" if overdetect_size_stats['dw2o_size']['min'] > 0 else "N/A",
+        '过检DW2O_Size最大': f"{overdetect_size_stats['dw2o_size']['max']:.2f}" if overdetect_size_stats['dw2o_size']['max'] > 0 else "N/A",
+        'DW1O_BGMean': f"{bgmean_stats['过检']['DW1O_BGMean']['mean']:.2f}" if len(bgmean_stats['过检']['DW1O_BGMean']['values']) > 0 else "N/A",
+        'DW1O_BGDev': f"{bgmean_stats['过检']['DW1O_BGDev']['mean']:.2f}" if len(bgmean_stats['过检']['DW1O_BGDev']['values']) > 0 else "N/A",
+        'DW2O_BGMean': f"{bgmean_stats['过检']['DW2O_BGMean']['mean']:.2f}" if len(bgmean_stats['过检']['DW2O_BGMean']['values']) > 0 else "N/A",
+        'DW2O_BGDev': f"{bgmean_stats['过检']['DW2O_BGDev']['mean']:.2f}" if len(bgmean_stats['过检']['DW2O_BGDev']['values']) > 0 else "N/A",
+        'DN1O_BGMean': f"{bgmean_stats['过检']['DN1O_BGMean']['mean']:.2f}" if len(bgmean_stats['过检']['DN1O_BGMean']['values']) > 0 else "N/A",
+        'DN1O_BGDev': f"{bgmean_stats['过检']['DN1O_BGDev']['mean']:.2f}" if len(bgmean_stats['过检']['DN1O_BGDev']['values']) > 0 else "N/A",
+        'size_stats': size_stats,  # 保存尺寸区间统计信息
+        'overdetect_size_stats': overdetect_size_stats,  # 保存过检尺寸统计信息
+        'maxorg_ratio_stats': maxorg_ratio_stats,  # 保存MaxOrg比值统计信息
+        'maxorg_65532_stats': maxorg_65532_stats,  # 保存MaxOrg=65532统计信息
+        'dw1o_ratio_stats': dw1o_ratio_stats,  # 保存DW1O通道比值统计信息
+        'bgmean_stats': bgmean_stats,  # 保存BGMean值统计信息
+        'totalsnr_size_stats': totalsnr_size_stats,  # 保存TotalSNR按尺寸分布统计信息
+        'coord_data': coord_data,  # 保存每种类型的坐标数据，用于共有率分析和环带/扇区统计
+        'geometry': geometry,  # 匹配时使用的晶圆几何参数
+    }
+    result.update(alignment_fields(casi_alignment))
+    return result
+
+
+def pair_names(result):
+    """返回 analyze_pair/analyze_sheet_pair 结果的 (CASI名称, KLA名称)"""
+    if 'CASI文件夹' in result:
+        return result['CASI文件夹'], result['KLA文件夹']
+    return result['casi_name'], result['kla_name']
+
+
+def coord_points(coord_data, defect_type, with_features=True):
+    """
+    取出 analyze_pair 结果中某一类型的缺陷点
+
+    Args:
+        coord_data: 结果中的 coord_data
+        defect_type: '过检'、'正确检出' 或 '漏检'
+        with_features: 是否按行号补充特征列（COORD_FEATURES，缺失为NaN）
+
+    Returns:
+        DataFrame: 列为 x、y、defect_id、defect_type_value（KLA漏检点为None）及特征列
+    """
+    points = coord_data.get(defect_type)
+    if points is None:
+        points = pd.DataFrame(columns=['x', 'y', 'defect_id', 'defect_type_value', 'row'])
+    # 行号和极坐标（环带/扇区统计用）不输出
+    columns = points.columns.difference(['row', wafer_geometry.RADIUS_COLUMN, wafer_geometry.ANGLE_COLUMN],
+                                        sort=False)
+    if not with_features:
+        return points[columns]
+
+    # features 的索引即行号，KLA漏检点的行号为-1，补充后特征为NaN
+    features = coord_data.get('features', pd.DataFrame())
+    gathered = features.reindex(index=points['row'], columns=COORD_FEATURES).reset_index(drop=True)
+    return pd.concat([points[columns].reset_index(drop=True), gathered], axis=1)
+
+
+def zone_stats(coord_data, n_rings, n_sectors, geometry=None, equal_area=False):
+    """
+    按晶圆环带×扇区统计一组匹配结果中的过检、正确检出和漏检数量
+
+    直接使用 coord_data 中保存的极坐标（匹配时按当时的晶圆几何参数计算），不重新计算。
+
+    Args:
+        coord_data: analyze_pair/analyze_sheet_pair 结果中的 coord_data
+        n_rings, n_sectors: 环带数和扇区数（扇区从X正方向开始逆时针）
+        geometry: 匹配时使用的晶圆几何参数（即结果中的 geometry），默认 DEFAULT_GEOMETRY
+        equal_area: True 时各环面积相等，否则各环宽度相等
+
+    Returns:
+        DataFrame: 每个环带×扇区一行，列为 环带、扇区、内半径、外半径、过检、正确检出、漏检、过检占比(%)；
+                   过检占比 = 过检 / (过检 + 正确检出)，均按CASI点计数
+    """
+    geometry = geometry or wafer_geometry.DEFAULT_GEOMETRY
+    counts = {}
+    for defect_type in ['过检', '正确检出', '漏检']:
+        points = coord_data.get(defect_type)
+        if points is None:
+            points = pd.DataFrame({wafer_geometry.RADIUS_COLUMN: [], wafer_geometry.ANGLE_COLUMN: []})
+        zones = wafer_geometry.zone_counts(points[wafer_geometry.RADIUS_COLUMN], points[wafer_geometry.ANGLE_COLUMN],
+                                           n_rings, n_sectors, diameter=geometry['diameter'], equal_area=equal_area)
+        counts[defect_type] = zones.to_numpy().ravel()
+
+    edges = wafer_geometry.ring_edges(n_rings, geometry['diameter'], equal_area)
+    rings = np.repeat(np.arange(n_rings), n_sectors)
+    table = pd.DataFrame({
+        '环带': rings,
+        '扇区': np.tile(np.arange(n_sectors), n_rings),
+        '内半径': np.round(edges[rings], 1),
+        '外半径': np.round(edges[rings + 1], 1),
+        **counts,
+    })
+    casi_total = table['过检'] + table['正确检出']
+    table['过检占比(%)'] = (table['过检'] / casi_total.where(casi_total > 0) * 100).round(2)
+    return table
+
+
+def analyze_sheet_pair(casi_df, kla_df, pair_name, match_threshold, log=None,
+                       align=False, align_radius=None, geometry=None):
+    """
+    方式4（CASI文件夹 + KLA多Sheet文件）中一组数据的匹配与统计
+
+    与 analyze_pair 的区别：正确检出按被匹配的CASI点计数，准确率 = 正确检出 / CASI分类后检出数，
+    结果中保留匹配用的CASI/KLA数据和逐点匹配编码（coord_data 与 analyze_pair 一致）。
+
+    Args:
+        casi_df: BlobFeatures数据
+        kla_df: KLA数据（需包含XREL、YREL列，DSIZE可选）
+        pair_name: 文件夹名/Sheet名
+        match_threshold: 匹配距离阈值，或自适应半径规则（见 adaptive_radius）
+        log: 日志回调 log(level, message)
+        align, align_radius: 坐标对齐参数（见 align_casi）
+        geometry: 晶圆几何参数（见 prepare_casi）
+
+    Returns:
+        dict: 匹配统计结果；数据无效时返回None
+    """
+    log = log or _print_log
+    geometry = geometry or wafer_geometry.DEFAULT_GEOMETRY
+    kla_df = kla_df.copy()
+    kla_df.columns = kla_df.columns.str.strip()
+
+    # 标记特殊类型（1000、10001）和边缘点
+    casi_df = prepare_casi(casi_df, geometry)
+    if casi_df is None:
+        log('warning', f"❌ {pair_name}: CASI数据未找到坐标列")
+        return None
+    cas_x_col, cas_y_col = find_casi_coord_columns(casi_df)
+
+    # 检查KLA坐标列
+    if not {'XREL', 'YREL'}.issubset(kla_df.columns):
+        log('warning', f"❌ {pair_name}: KLA数据缺少XREL/YREL列")
+        return None
+
+    # 准备匹配数据列
+    maxorg_cols = []
+    if 'DW1O_MaxOrg' in casi_df.columns:
+        maxorg_cols.append('DW1O_MaxOrg')
+    if 'DW2O_MaxOrg' in casi_df.columns:
+        maxorg_cols.append('DW2O_MaxOrg')
+    if 'DN1O_MaxOrg' in casi_df.columns:
+        maxorg_cols.append('DN1O_MaxOrg')
+    has_maxorg = len(maxorg_cols) > 0
+
+    size_cols = []
+    if 'DW1O_Size' in casi_df.columns:
+        size_cols.append('DW1O_Size')
+    if 'DW2O_Size' in casi_df.columns:
+        size_cols.append('DW2O_Size')
+    has_size_cols = len(size_cols) > 0
+
+    # 检查BGMean列
+    bgmean_cols = []
+    if 'DW1O_BGMean' in casi_df.columns:
+        bgmean_cols.append('DW1O_BGMean')
+    if 'DW2O_BGMean' in casi_df.columns:
+        bgmean_cols.append('DW2O_BGMean')
+    if 'DN1O_BGMean' in casi_df.columns:
+        bgmean_cols.append('DN1O_BGMean')
+    if 'DW1O_BGDev' in casi_df.columns:
+        bgmean_cols.append('DW1O_BGDev')
+    if 'DW2O_BGDev' in casi_df.columns:
+        bgmean_cols.append('DW2O_BGDev')
+    if 'DN1O_BGDev' in casi_df.columns:
+        bgmean_cols.append('DN1O_BGDev')
+    has_bgmean_cols = len(bgmean_cols) > 0
+
+    # 执行匹配（使用与方式1/2/3相同的高效算法）
+    # 准备CASI工作数据
+    cols_to_read = [cas_x_col, cas_y_col, 'is_special_type', 'is_edge_point']
+    if has_maxorg:
+        cols_to_read += maxorg_cols
+    if has_size_cols:
+        cols_to_read += size_cols
+    if has_bgmean_cols:
+        cols_to_read += bgmean_cols
+    cols_to_read += [col for col in adaptive_radius.rule_columns(match_threshold, 'casi')
+                     if col in casi_df.columns and col not in cols_to_read]
+
+    casi_work = casi_df[cols_to_read].copy()
+    # 重命名坐标列为XREL/YREL（标准化）
+    casi_work.rename(columns={cas_x_col: 'XREL', cas_y_col: 'YREL'}, inplace=True)
+
+    # 转换数值列
+    if has_maxorg:
+        for col in maxorg_cols:
+            casi_work[col] = pd.to_numeric(casi_work[col], errors='coerce')
+    if has_size_cols:
+        for col in size_cols:
+            casi_work[col] = pd.to_numeric(casi_work[col], errors='coerce')
+    if has_bgmean_cols:
+        for col in bgmean_cols:
+            casi_work[col] = pd.to_numeric(casi_work[col], errors='coerce')
+
+    # 过滤NaN坐标
+    original_casi_len = len(casi_work)
+    casi_work = casi_work.dropna(subset=['XREL', 'YREL']).reset_index(drop=True)
+    if len(casi_work) < original_casi_len:
+        log('warning', f"⚠️ {pair_name}: 过滤掉 {original_casi_len - len(casi_work)} 个CASI点（坐标无效）")
+
+    # 确保标记列存在
+    if 'is_special_type' not in casi_work.columns:
+        casi_work['is_special_type'] = False
+    if 'is_edge_point' not in casi_work.columns:
+        casi_work['is_edge_point'] = False
+
+    # 读取KLA数据
+    if 'DSIZE' in kla_df.columns:
+        kla_work = kla_df[['XREL', 'YREL', 'DSIZE']].copy()
+        kla_work['DSIZE'] = pd.to_numeric(kla_work['DSIZE'], errors='coerce')
+    else:
+        kla_work = kla_df[['XREL', 'YREL']].copy()
+        kla_work['DSIZE'] = np.nan
+
+    original_kla_len = len(kla_work)
+    kla_work = kla_work.dropna(subset=['XREL', 'YREL']).reset_index(drop=True)
+    if len(kla_work) < original_kla_len:
+        log('warning', f"⚠️ {pair_name}: 过滤掉 {original_kla_len - len(kla_work)} 个KLA点（坐标无效）")
+
+    casi_alignment = None
+    if align:
+        casi_work, casi_alignment = align_casi(
+            casi_work, kla_work, match_threshold, align_radius
+        )
+        log('info', f"📐 {pair_name}: {alignment.format_alignment(casi_alignment)}")
+
+    casi_match_result, kla_matched, kla_miss_type = match_points(
+        casi_work, kla_work, match_threshold
+    )
+
+    # 统计结果（与方式1/2/3一致）
+    n_overdetect_true = np.sum(casi_match_result == 0)
+    n_correct_casi = np.sum(np.isin(casi_match_result, [1, 3, 4, 5]))
+    n_miss_basic = np.sum(kla_miss_type == 1)
+    n_miss_classified = np.sum(kla_miss_type == 2)
+    n_miss = n_miss_basic + n_miss_classified
+
+    # 为了保持与原有输出格式兼容
+    n_correct = n_correct_casi
+    n_overdetect_all = n_overdetect_true
+    n_overdetect_special = np.sum(casi_match_result == -2)
+    n_missed = n_miss
+
+    is_overdetect = casi_match_result == 0
+    is_correct = np.isin(casi_match_result, CORRECT_CODES)
+
+    # 统计contamination
+    n_contamination = 0
+    if has_maxorg and n_overdetect_true > 0:
+        is_65532 = np.column_stack([casi_work[col].to_numpy(dtype=float) == 65532 for col in maxorg_cols])
+        n_contamination = int(np.sum(is_65532.any(axis=1) & is_overdetect))
+
+    n_overdetect_true_clean = n_overdetect_true - n_contamination
+
+    # 统计过检尺寸
+    overdetect_size_stats = {
+        'dw1o_size': {'mean': 0, 'min': 0, 'max': 0},
+        'dw2o_size': {'mean': 0, 'min': 0, 'max': 0}
+    }
+
+    if has_size_cols and n_overdetect_true > 0:
+        for size_col, key in (('DW1O_Size', 'dw1o_size'), ('DW2O_Size', 'dw2o_size')):
+            if size_col not in casi_work.columns:
+                continue
+            values = casi_work[size_col].to_numpy(dtype=float)[is_overdetect]
+            values = values[(values > 0) & (values != 200000.00)]
+            if len(values) > 0:
+                overdetect_size_stats[key]['mean'] = np.mean(values)
+                overdetect_size_stats[key]['min'] = np.min(values)
+                overdetect_size_stats[key]['max'] = np.max(values)
+
+    # 统计过检和正确检出的BGMean/BGDev
+    bg_names = ['DW1O_BGMean', 'DW1O_BGDev', 'DW2O_BGMean', 'DW2O_BGDev', 'DN1O_BGMean', 'DN1O_BGDev']
+    bgmean_stats = {defect_type: {name: {'values': [], 'mean': 0} for name in bg_names}
+                    for defect_type in ['过检', '正确检出']}
+    for metric in bg_names:
+        if metric not in casi_work.columns:
+            continue
+        values = casi_work[metric].to_numpy(dtype=float)
+        for defect_type, mask in (('过检', is_overdetect), ('正确检出', is_correct)):
+            selected = values[mask & (values > 0)]
+            if len(selected) > 0:
+                bgmean_stats[defect_type][metric]['values'] = selected.tolist()
+                bgmean_stats[defect_type][metric]['mean'] = np.mean(selected)
+
+    # 计算总数和分类后检出数
+    total_casi = len(casi_work)
+    total_kla = len(kla_work)
+
+    # 统计边缘过检点
+    overdetect_edge_count = int(np.sum(casi_work['is_edge_point'].to_numpy(dtype=bool)[casi_match_result == 0]))
+
+    # CASI分类后检出数
+    casi_detected_count_raw = np.sum(~casi_work['is_special_type'])
+    casi_detected_count = casi_detected_count_raw - overdetect_edge_count
+
+    # 计算准确率
+    if casi_detected_count > 0:
+        accuracy = (n_correct / casi_detected_count) * 100
+    else:
+        accuracy = 0
+
+    if total_kla > 0:
+        missed_rate = (n_missed / total_kla) * 100
+    else:
+        missed_rate = 0
+
+    # 保存结果
+    return {
+        'casi_name': pair_name,
+        'kla_name': pair_name,
+        'total_casi': total_casi,
+        'casi_detected_count': casi_detected_count,
+        'total_kla': total_kla,
+        'n_correct': n_correct,
+        'n_overdetect_all': n_overdetect_all,
+        'n_overdetect_special': n_overdetect_special,
+        'n_overdetect_true': n_overdetect_true,
+        'n_contamination': n_contamination,
+        'n_overdetect_true_clean': n_overdetect_true_clean,
+        'n_missed': n_missed,
+        'n_miss_basic': n_miss_basic,
+        'n_miss_classified': n_miss_classified,
+        'overdetect_edge_count': overdetect_edge_count,
+        'accuracy': accuracy,
+        'missed_rate': missed_rate,
+        'overdetect_size_stats': overdetect_size_stats,
+        'bgmean_stats': bgmean_stats,
+        'casi_df': casi_work,
+        'kla_df': kla_work,
+        'casi_match_result': casi_match_result,
+        'kla_matched': kla_matched,
+        'kla_miss_type': kla_miss_type,
+        'alignment': casi_alignment,
+        # 与 analyze_pair 相同的逐类型坐标数据（过检排除边缘点），用于共有率分析和环带/扇区统计
+        'coord_data': _coord_data(casi_df, casi_work, kla_work,
+                                  is_overdetect & ~casi_work['is_edge_point'].to_numpy(dtype=bool), is_correct,
+                                  ~kla_matched, geometry, aligned=casi_alignment is not None),
+        'geometry': geometry,
+    }
+
+
+def _nearest_distance(tree, points, max_distance):
+    """每个点到tree中最近点的距离，超过 max_distance 或tree为空时为inf"""
+    if tree is None or len(points) == 0:
+        return np.full(len(points), np.inf)
+    dist, _ = tree.query(points, k=1, distance_upper_bound=np.nextafter(max_distance, np.inf), workers=-1)
+    return dist
+
+
+def _count_within(distances, thresholds):
+    """累计直方图：每个阈值下距离不超过阈值的个数"""
+    return np.searchsorted(np.sort(distances), thresholds, side='right')
+
+
+def threshold_sweep(casi_work, kla_work, thresholds):
+    """
+    一次性计算多个匹配阈值下的检出、漏检和过检数量
+
+    每个KLA点到最近非特殊CASI/任意CASI的距离、每个非特殊CASI点到最近KLA的距离只计算一次，
+    各阈值下的数量由累计直方图得到，与逐个阈值调用 match_points 的统计一致。
+
+    Args:
+        casi_work: CASI数据（XREL、YREL、is_special_type、is_edge_point 列）
+        kla_work: KLA数据（XREL、YREL 列）
+        thresholds: 匹配阈值序列
+
+    Returns:
+        DataFrame: 每个阈值一行，列为 阈值、正确检出、漏检-基础检、漏检-分类、漏检总数、真过检、检出率(%)、真过检率(%)
+    """
+    thresholds = np.sort(np.asarray(thresholds, dtype=float))
+    max_threshold = thresholds[-1] if len(thresholds) else 0.0
+
+    casi_pts = casi_work[['XREL', 'YREL']].to_numpy(dtype=float)
+    kla_pts = kla_work[['XREL', 'YREL']].to_numpy(dtype=float)
+    is_special = casi_work['is_special_type'].to_numpy(dtype=bool)
+    is_edge = casi_work['is_edge_point'].to_numpy(dtype=bool)
+
+    normal_pts = casi_pts[~is_special]
+    tree_casi_all = spatial_index.frame_index(casi_work, 'XREL', 'YREL').tree if len(casi_pts) else None
+    tree_casi_normal = KDTree(normal_pts) if len(normal_pts) else None
+    tree_kla = spatial_index.frame_index(kla_work, 'XREL', 'YREL').tree if len(kla_pts) else None
+
+    kla_to_normal = _nearest_distance(tree_casi_normal, kla_pts, max_threshold)
+    kla_to_any = _nearest_distance(tree_casi_all, kla_pts, max_threshold)
+    casi_to_kla = _nearest_distance(tree_kla, normal_pts, max_threshold)
+
+    total_kla = len(kla_pts)
+    n_correct = _count_within(kla_to_normal, thresholds)
+    n_near_any = _count_within(kla_to_any, thresholds)
+    # 真过检：附近没有KLA的非特殊CASI，且不在晶圆边缘
+    inner_casi_to_kla = casi_to_kla[~is_edge[~is_special]]
+    n_true_overdetect = len(inner_casi_to_kla) - _count_within(inner_casi_to_kla, thresholds)
+
+    def rate(n):
+        return np.round(n / total_kla * 100, 2) if total_kla > 0 else np.zeros(len(n))
+
+    return pd.DataFrame({
+        '阈值': thresholds,
+        '正确检出': n_correct,
+        '漏检-基础检': total_kla - n_near_any,
+        '漏检-分类': n_near_any - n_correct,
+        '漏检总数': total_kla - n_correct,
+        '真过检': n_true_overdetect,
+        '检出率(%)': rate(n_correct),
+        '真过检率(%)': rate(n_true_overdetect),
+    })
+
+
+def work_frames(casi_df, kla_df):
+    """
+    从 prepare_casi 处理后的CASI数据和KLA数据中取出匹配所需的坐标和标记列
+
+    Returns:
+        tuple: (casi_work, kla_work)，坐标列统一为 XREL、YREL；缺少坐标列时返回 (None, None)
+    """
+    cas_x_col, cas_y_col = find_casi_coord_columns(casi_df)
+    kla_df = kla_df.rename(columns=lambda c: c.strip())
+    if cas_x_col is None or cas_y_col is None or not {'XREL', 'YREL'}.issubset(kla_df.columns):
+        return None, None
+
+    casi_work = pd.DataFrame({
+        'XREL': pd.to_numeric(casi_df[cas_x_col], errors='coerce'),
+        'YREL': pd.to_numeric(casi_df[cas_y_col], errors='coerce'),
+        'is_special_type': casi_df['is_special_type'],
+        'is_edge_point': casi_df['is_edge_point'],
+    }).dropna(subset=['XREL', 'YREL']).reset_index(drop=True)
+    kla_work = pd.DataFrame({
+        'XREL': pd.to_numeric(kla_df['XREL'], errors='coerce'),
+        'YREL': pd.to_numeric(kla_df['YREL'], errors='coerce'),
+    }).dropna().reset_index(drop=True)
+    return casi_work, kla_work
+
+
+def sweep_sources(casi_sources, kla_sources, thresholds, align=False, match_threshold=None,
+                  align_radius=None, geometry=None, log=None):
+    """
+    对所有CASI与KLA数据两两做阈值扫描
+
+    Args:
+        casi_sources: dict(CASI名称 -> BlobFeatures文件路径)
+        kla_sources: dict(KLA名称 -> KLA文件路径)
+        thresholds: 匹配阈值序列
+        align: 是否先对齐CASI坐标再扫描（与 analyze_pair 的 align 一致，对齐只做一次）
+        match_threshold: 对齐时ICP的点对距离上限（数值或自适应半径规则），默认取扫描阈值的中位数
+        align_radius: 对齐搜索半径，默认 5 倍匹配距离阈值
+        geometry: 晶圆几何参数（见 prepare_casi）
+        log: 日志回调 log(level, message)
+
+    Returns:
+        DataFrame: threshold_sweep 的结果，增加 CASI文件夹、KLA文件夹 列
+    """
+    log = log or _print_log
+    if align and match_threshold is None:
+        match_threshold = float(np.median(thresholds))
+    kla_frames = {name: data_loader.read_kla_file(path) for name, path in sorted(kla_sources.items())}
+
+    frames = []
+    for casi_name, casi_path in sorted(casi_sources.items()):
+        casi_df = prepare_casi(data_loader.read_blob_features(casi_path, 'kla_match'), geometry)
+        if casi_df is None:
+            log('warning', f"{casi_name}: 未找到坐标列")
+            continue
+        for kla_name, kla_df in kla_frames.items():
+            casi_work, kla_work = work_frames(casi_df, kla_df)
+            if casi_work is None:
+                log('warning', f"{casi_name} / {kla_name}: 缺少坐标列")
+                continue
+            if align:
+                casi_work, casi_alignment = align_casi(casi_work, kla_work, match_threshold, align_radius)
+                log('info', f"📐 {casi_name} / {kla_name}: {alignment.format_alignment(casi_alignment)}")
+            sweep = threshold_sweep(casi_work, kla_work, thresholds)
+            sweep.insert(0, 'KLA文件夹', kla_name)
+            sweep.insert(0, 'CASI文件夹', casi_name)
+            frames.append(sweep)
+
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def find_blob_features_csv(folder_path):
+    """查找文件夹中的BlobFeatures CSV文件，未找到时返回None"""
+    for fname in sorted(os.listdir(folder_path)):
+        if 'BlobFeatures' in fname and fname.endswith('.csv'):
+            return os.path.join(folder_path, fname)
+    default_path = os.path.join(folder_path, 'BlobFeatures.csv')
+    return default_path if os.path.exists(default_path) else None
+
+
+def find_kla_data_file(folder_path):
+    """查找KLA文件夹中的第一个CSV或Excel文件，未找到时返回None"""
+    all_files = (sorted(glob.glob(os.path.join(folder_path, '*.csv'))) +
+                 sorted(glob.glob(os.path.join(folder_path, '*.xlsx'))) +
+                 sorted(glob.glob(os.path.join(folder_path, '*.xls'))))
+    return all_files[0] if all_files else None
+
+
+def list_sources(root_folder, layout='folders'):
+    """
+    列出主文件夹中的CASI和KLA数据文件
+
+    Args:
+        root_folder: 主文件夹路径
+        layout: 'folders' 表示每个子文件夹一组数据（名称含KLA的为KLA），
+                'files' 表示文件夹内直接存放CSV（文件名含kla的为KLA）
+
+    Returns:
+        tuple: (CASI名称->文件路径, KLA名称->文件路径)
+    """
+    casi_sources = {}
+    kla_sources = {}
+
+    if layout == 'folders':
+        for name in sorted(os.listdir(root_folder)):
+            folder_path = os.path.join(root_folder, name)
+            if not os.path.isdir(folder_path):
+                continue
+            if 'KLA' in name.upper():
+                path = find_kla_data_file(folder_path)
+                if path:
+                    kla_sources[name] = path
+            else:
+                path = find_blob_features_csv(folder_path)
+                if path:
+                    casi_sources[name] = path
+    else:
+        for fname in sorted(os.listdir(root_folder)):
+            path = os.path.join(root_folder, fname)
+            if not (fname.endswith('.csv') and os.path.isfile(path)):
+                continue
+            name = fname.replace('.csv', '')
+            if 'kla' in fname.lower():
+                kla_sources[name] = path
+            else:
+                casi_sources[name] = path
+
+    return casi_sources, kla_sources
+
+
+def map_pairs(job, tasks, jobs=None, progress=None, log=None):
+    """
+    在进程池中并行执行各组匹配任务，每完成一组回调一次进度
+
+    Args:
+        job: 模块顶层的任务函数（可被子进程导入），返回 (名称, 结果, [(level, message), ...])
+        tasks: 任务参数列表
+        jobs: 并行进程数，默认CPU核数；为1或只有一个任务时在当前进程顺序执行
+        progress: 进度回调 progress(已完成数, 总数, 名称)
+        log: 日志回调 log(level, message)，子进程中的日志在该组完成后输出
+
+    Returns:
+        list: 各任务的结果，顺序与 tasks 相同
+    """
+    log = log or _print_log
+    jobs = jobs or os.cpu_count() or 1
+    results = [None] * len(tasks)
+
+    def collect(done, index, output):
+        name, result, messages = output
+        for level, message in messages:
+            log(level, message)
+        results[index] = result
+        if progress:
+            progress(done, len(tasks), name)
+
+    if jobs <= 1 or len(tasks) <= 1:
+        for index, task in enumerate(tasks):
+            collect(index + 1, index, job(task))
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        futures = {executor.submit(job, task): index for index, task in enumerate(tasks)}
+        for done, future in enumerate(as_completed(futures), 1):
+            collect(done, futures[future], future.result())
+    return results
+
+
+def pack_columns(df, analysis, match_threshold=None):
+    """
+    只取匹配用到的列并转为 dict(列名 -> numpy数组)，作为 analyze_pair_job / analyze_sheet_pair_job 的输入，
+    减少传给子进程的数据量
+
+    Args:
+        df: CASI原始数据（analysis='kla_match'）或KLA数据（analysis='kla'）
+        analysis: data_loader.ANALYSIS_COLUMNS 的键
+        match_threshold: 匹配距离阈值或自适应半径规则，规则用到的尺寸列也会保留
+
+    Returns:
+        dict: 列名（去除首尾空格） -> numpy数组
+    """
+    source = 'casi' if analysis == 'kla_match' else 'kla'
+    selector = data_loader.get_column_selector(analysis, adaptive_radius.rule_columns(match_threshold, source))
+    return {str(col).strip(): df[col].to_numpy() for col in df.columns if selector(col)}
+
+
+# 只在子进程内部使用的逐点数据，返回主进程前去掉
+WORK_KEYS = ('casi_df', 'kla_df', 'casi_match_result', 'kla_matched', 'kla_miss_type')
+# 嵌套统计（*_stats）中的逐点列表
+POINT_LIST_KEYS = ('values', 'ratios', 'coords', 'DW1O_TotalSNR', 'DW2O_TotalSNR', 'DN1O_TotalSNR')
+
+
+def _drop_point_lists(stats):
+    return {key: _drop_point_lists(value) if isinstance(value, dict) else value
+            for key, value in stats.items() if key not in POINT_LIST_KEYS}
+
+
+def compact_result(result):
+    """
+    去掉匹配结果中界面不使用的数据（匹配用的CASI/KLA数据、逐点匹配编码、嵌套统计中的逐点列表），
+    保留汇总值、coord_data、geometry、size_stats 和 alignment
+
+    Returns:
+        dict: 精简后的结果；result 为None时返回None
+    """
+    if result is None:
+        return None
+    return {key: _drop_point_lists(value) if key.endswith('_stats') and key != 'size_stats' else value
+            for key, value in result.items() if key not in WORK_KEYS}
+
+
+def _buffered_log():
+    """子进程中使用的日志回调：先记录，由主进程在 map_pairs 中输出"""
+    messages = []
+    return messages, lambda level, message: messages.append((level, message))
+
+
+def _cached(cache_dir, key_parts, compute, log):
+    """
+    带缓存执行 compute(log)：命中时直接返回缓存的结果并输出当时记录的日志
+
+    Args:
+        cache_dir: 缓存目录，为None时不使用缓存
+        key_parts: 输入指纹和参数（另加入影响匹配结果的模块常量生成缓存键）
+        compute: 计算函数 compute(log)，返回None表示数据无效（不缓存）
+        log: 日志回调 log(level, message)
+    """
+    if cache_dir is None:
+        return compute(log)
+
+    key = match_cache.make_key(*key_parts, SPECIAL_DEFECT_TYPES)
+    cached = match_cache.load(cache_dir, key, log=log)
+    if cached is not None:
+        result, messages = cached
+    else:
+        messages, buffer = _buffered_log()
+        result = compute(buffer)
+        if result is not None:
+            match_cache.save(cache_dir, key, (result, messages), log=log)
+    for level, message in messages:
+        log(level, message)
+    return result
+
+
+def analyze_pair_job(task):
+    """
+    map_pairs 任务：对一组CASI/KLA数据调用 analyze_pair，返回 compact_result 精简后的结果
+
+    task: (casi_columns, kla_columns, casi_name, kla_name, match_threshold, align, align_radius, geometry,
+           size_range, cache_dir)，casi_columns/kla_columns 为 pack_columns 取出的原始CASI数据（未经 prepare_casi）
+          和KLA数据的列，geometry 为None时使用默认晶圆几何参数，size_range 为DSIZE统计的 (bin_min, bin_max)，
+          为None时使用 SIZE_BIN_MIN/SIZE_BIN_MAX，cache_dir 为None时不使用缓存
+    """
+    (casi_columns, kla_columns, casi_name, kla_name, match_threshold, align, align_radius, geometry, size_range,
+     cache_dir) = task
+    geometry = geometry or wafer_geometry.DEFAULT_GEOMETRY
+    bin_min, bin_max = size_range or (SIZE_BIN_MIN, SIZE_BIN_MAX)
+    casi_df = pd.DataFrame(casi_columns)
+    kla_df = pd.DataFrame(kla_columns)
+    messages, log = _buffered_log()
+
+    def compute(log):
+        casi_work = prepare_casi(casi_df, geometry)
+        if casi_work is None:
+            log('warning', f"❌ {casi_name}: 未找到CASI坐标列")
+            return None
+        return compact_result(analyze_pair(casi_work, kla_df, casi_name, kla_name, match_threshold, log=log,
+                                           align=align, align_radius=align_radius, bin_min=bin_min, bin_max=bin_max,
+                                           geometry=geometry))
+
+    key_parts = ('analyze_pair', match_cache.frame_fingerprint(casi_df), match_cache.frame_fingerprint(kla_df),
+                 casi_name, kla_name, match_threshold, align, align_radius, geometry,
+                 bin_min, bin_max) if cache_dir else None
+    result = _cached(cache_dir, key_parts, compute, log)
+    return casi_name, result, messages
+
+
+def analyze_sheet_pair_job(task):
+    """
+    map_pairs 任务：对一组CASI/KLA数据调用 analyze_sheet_pair，返回 compact_result 精简后的结果
+
+    task: (casi_columns, kla_columns, pair_name, match_threshold, align, align_radius, geometry, cache_dir)，
+          casi_columns/kla_columns 为 pack_columns 取出的列
+    """
+    casi_columns, kla_columns, pair_name, match_threshold, align, align_radius, geometry, cache_dir = task
+    geometry = geometry or wafer_geometry.DEFAULT_GEOMETRY
+    casi_df = pd.DataFrame(casi_columns)
+    kla_df = pd.DataFrame(kla_columns)
+    messages, log = _buffered_log()
+
+    def compute(log):
+        return compact_result(analyze_sheet_pair(casi_df, kla_df, pair_name, match_threshold, log=log,
+                                                 align=align, align_radius=align_radius, geometry=geometry))
+
+    key_parts = ('analyze_sheet_pair', match_cache.frame_fingerprint(casi_df), match_cache.frame_fingerprint(kla_df),
+                 pair_name, match_threshold, align, align_radius, geometry) if cache_dir else None
+    result = _cached(cache_dir, key_parts, compute, log)
+    return pair_name, result, messages
+
+
+def source_pairs_job(task):
+    """
+    map_pairs 任务：读取一个CASI数据文件，与所有KLA数据文件逐一调用 analyze_pair（结果经 compact_result 精简）
+
+    使用缓存时按文件指纹（路径、大小、修改时间）查找，所有组合都命中时不读取文件。
+
+    task: (casi_name, casi_path, kla_sources, match_threshold, align, align_radius, geometry, size_range, cache_dir)，
+          geometry/size_range 见 analyze_pair_job
+    """
+    casi_name, casi_path, kla_sources, match_threshold, align, align_radius, geometry, size_range, cache_dir = task
+    geometry = geometry or wafer_geometry.DEFAULT_GEOMETRY
+    bin_min, bin_max = size_range or (SIZE_BIN_MIN, SIZE_BIN_MAX)
+    messages, log = _buffered_log()
+    casi_state = {}
+
+    def load_casi():
+        """首次需要计算时读取CASI数据"""
+        if 'df' not in casi_state:
+            casi_state['df'] = prepare_casi(data_loader.read_blob_features(casi_path, 'kla_match'), geometry)
+        return casi_state['df']
+
+    results = []
+    for kla_name, kla_path in sorted(kla_sources.items()):
+        def compute(log, kla_name=kla_name, kla_path=kla_path):
+            casi_df = load_casi()
+            if casi_df is None:
+                return None
+            return compact_result(analyze_pair(casi_df, data_loader.read_kla_file(kla_path), casi_name, kla_name,
+                                               match_threshold, log=log, align=align, align_radius=align_radius,
+                                               bin_min=bin_min, bin_max=bin_max, geometry=geometry))
+
+        key_parts = ('analyze_pair', match_cache.file_fingerprint(casi_path), match_cache.file_fingerprint(kla_path),
+                     casi_name, kla_name, match_threshold, align, align_radius, geometry,
+                     bin_min, bin_max) if cache_dir else None
+        result = _cached(cache_dir, key_parts, compute, log)
+        if 'df' in casi_state and casi_state['df'] is None:
+            log('warning', f"{casi_name}: 未找到坐标列")
+            return casi_name, [], messages
+        if result is not None:
+            results.append(result)
+    return casi_name, results, messages
+
+
+def run_pairs(casi_sources, kla_sources, match_threshold, log=None, align=False, align_radius=None,
+              jobs=1, progress=None, cache_dir=None, geometry=None, size_range=None):
+    """
+    对所有CASI与KLA数据两两匹配（每个CASI数据一个任务，可并行）
+
+    Args:
+        casi_sources: dict(CASI名称 -> BlobFeatures文件路径)
+        kla_sources: dict(KLA名称 -> KLA文件路径)
+        match_threshold: 匹配距离阈值，或自适应半径规则（见 adaptive_radius）
+        log: 日志回调 log(level, message)
+        align, align_radius: 传给 analyze_pair 的坐标对齐参数
+        jobs: 并行进程数（见 map_pairs）
+        progress: 进度回调 progress(已完成数, 总数, CASI名称)
+        cache_dir: 匹配结果缓存目录（见 match_cache），为None时不使用缓存
+        geometry: 晶圆几何参数（见 prepare_casi）
+        size_range: 正确检出/漏检DSIZE统计的尺寸范围 (bin_min, bin_max)，默认 SIZE_BIN_MIN-SIZE_BIN_MAX
+
+    Returns:
+        list: analyze_pair 的结果列表（经 compact_result 精简）
+    """
+    tasks = [(casi_name, casi_path, kla_sources, match_threshold, align, align_radius, geometry, size_range,
+              cache_dir)
+             for casi_name, casi_path in sorted(casi_sources.items())]
+    per_casi = map_pairs(source_pairs_job, tasks, jobs=jobs, progress=progress, log=log)
+    return [result for results in per_casi for result in results]
+
+
+def summary_frame(all_match_results):
+    """将匹配结果转换为汇总表（去除嵌套的统计信息和坐标数据）"""
+    if not all_match_results:
+        return pd.DataFrame()
+    rows = [{k: v for k, v in result.items() if not isinstance(v, dict)} for result in all_match_results]
+    return pd.DataFrame(rows)
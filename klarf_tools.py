@@ -0,0 +1,306 @@
+import io
+import os
+import re
+from pathlib import Path
+
+import pandas as pd
+
+
+def _print_log(level, message):
+    """默认日志输出（命令行模式）"""
+    print(f"[{level}] {message}")
+
+
+class KLARFParser:
+    def __init__(self, folder_path, log=None, progress=None):
+        """
+        初始化解析器
+
+        Args:
+            folder_path: 包含KLARF文件的文件夹路径
+            log: 日志回调 log(level, message)，level为 info/success/warning/error
+            progress: 进度回调 progress(fraction)，fraction取值0~1
+        """
+        self.folder_path = folder_path
+        self.log = log or _print_log
+        self.progress = progress
+        # 默认字段名（17字段格式）
+        self.field_names = [
+            'DEFECTID', 'XREL', 'YREL', 'XINDEX', 'YINDEX',
+            'XSIZE', 'YSIZE', 'DEFECTAREA', 'DSIZE', 'CLASSNUMBER',
+            'TEST', 'CLUSTERNUMBER', 'ROUGHBINNUMBER', 'FINEBINNUMBER',
+            'REVIEWSAMPLE', 'IMAGECOUNT', 'IMAGELIST'
+        ]
+        # 当前文件的字段名（从DefectRecordSpec中读取）
+        self.current_field_names = None
+
+    def extract_slot_from_content(self, file_path):
+        """
+        从KLARF文件内容中提取Slot编号
+
+        Args:
+            file_path: KLARF文件路径
+
+        Returns:
+            Slot编号字符串，如果未找到则返回文件名
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    line = line.strip()
+                    # 查找 Slot 行，格式如: Slot 11;
+                    if line.startswith('Slot'):
+                        parts = line.split()
+                        if len(parts) >= 2:
+                            slot_num = parts[1].rstrip(';')
+                            return slot_num
+        except Exception as e:
+            self.log('warning', f"读取文件 {Path(file_path).name} 的Slot信息时出错: {str(e)}")
+
+        # 如果没有找到Slot信息，使用文件名
+        return Path(file_path).stem
+
+    def parse_klarf_file(self, file_path):
+        """
+        解析单个KLARF文件
+
+        Args:
+            file_path: KLARF文件路径
+
+        Returns:
+            包含解析数据的列表
+        """
+        klarf_data = []
+
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                # 重置当前字段名
+                self.current_field_names = None
+
+                # 查找DefectRecordSpec和DefectList
+                defect_list_found = False
+
+                for line in file:
+                    line = line.strip()
+
+                    # 解析DefectRecordSpec获取字段名
+                    if line.startswith('DefectRecordSpec'):
+                        parts = line.split()
+                        if len(parts) > 2:
+                            # 获取字段名（从第3个元素开始到分号前）
+                            field_names = []
+                            for part in parts[2:]:
+                                if part == ';':
+                                    break
+                                field_names.append(part)
+                            self.current_field_names = field_names
+                        continue
+
+                    # 找到DefectList行，下一行开始是数据
+                    if line == 'DefectList':
+                        defect_list_found = True
+                        continue
+
+                    # 只有在找到DefectList后才开始处理数据
+                    if not defect_list_found:
+                        continue
+
+                    # 跳过空行
+                    if not line:
+                        continue
+
+                    # 检查是否是其他关键字（结束当前DefectList）
+                    if line.startswith('TiffFileName') or line.startswith('ProcessEquipmentIDList'):
+                        defect_list_found = False
+                        continue
+
+                    # 检查是否是数据结束（以分号结尾）
+                    is_last_line = line.endswith(';')
+                    if is_last_line:
+                        # 移除末尾的分号
+                        line = line.rstrip(';')
+                        defect_list_found = False  # 重置标志，准备处理下一个DefectList
+
+                    # 如果移除分号后是空行，跳过
+                    if not line.strip():
+                        continue
+
+                    # 分割数据行（按空格分割）
+                    parts = line.split()
+
+                    # 检查字段数量是否匹配
+                    if len(parts) >= len(self.field_names):
+                        # 创建数据字典（只取前17个标准字段）
+                        data_dict = {}
+                        for i, field_name in enumerate(self.field_names):
+                            value_str = parts[i]
+
+                            # 判断数据类型：如果包含小数点，使用float，否则使用int
+                            if '.' in value_str:
+                                data_dict[field_name] = float(value_str)
+                            else:
+                                data_dict[field_name] = int(value_str)
+
+                        klarf_data.append(data_dict)
+
+        except Exception as e:
+            self.log('error', f"解析文件 {Path(file_path).name} 时出错: {str(e)}")
+
+        return klarf_data
+
+    def find_klarf_files(self):
+        """查找文件夹中所有KLARF文件（包括.001, .002等数字后缀及文件名含klarf/slot的文件）"""
+        klarf_files = []
+
+        # 搜索常见的KLARF文件扩展名
+        for ext in ['*.klarf', '*.KLARF', '*.txt', '*.TXT', '*.001', '*.002', '*.003']:
+            klarf_files.extend(Path(self.folder_path).glob(ext))
+
+        # 搜索文件名包含klarf或slot的所有文件（包括无扩展名的文件）
+        for file in Path(self.folder_path).iterdir():
+            if file.is_file():
+                filename_lower = file.name.lower()
+                # 包含klarf或者slot的文件，且不在已有列表中
+                if ('klarf' in filename_lower or 'slot' in filename_lower) and file not in klarf_files:
+                    klarf_files.append(file)
+
+        return klarf_files
+
+    def parse_all_files(self):
+        """
+        解析文件夹中所有KLARF文件
+
+        Returns:
+            字典，key为sheet名称(Slot编号)，value为DataFrame
+        """
+        all_data = {}
+
+        klarf_files = self.find_klarf_files()
+
+        if not klarf_files:
+            self.log('warning', f"在文件夹 {self.folder_path} 中未找到KLARF文件")
+            return all_data
+
+        self.log('info', f"找到 {len(klarf_files)} 个KLARF文件")
+
+        # 解析每个文件
+        for idx, file_path in enumerate(klarf_files):
+            # 从文件内容中提取Slot编号
+            slot_name = self.extract_slot_from_content(file_path)
+
+            # 解析文件
+            data = self.parse_klarf_file(file_path)
+
+            # 如果有数据，转换为DataFrame
+            if data:
+                df = pd.DataFrame(data)
+                # 使用slot编号作为key（格式：slot1, slot2等），如果有重复，添加文件名后缀
+                key = f"slot{slot_name}"
+                counter = 1
+                original_key = key
+                while key in all_data:
+                    key = f"{original_key}_{counter}"
+                    counter += 1
+
+                all_data[key] = df
+            else:
+                self.log('warning', f"⚠ 文件 {file_path.name} 未读取到数据")
+
+            # 更新进度
+            if self.progress:
+                self.progress((idx + 1) / len(klarf_files))
+
+        return all_data
+
+
+def get_slot_number(sheet_name):
+    """从sheet名称中提取slot编号用于排序"""
+    match = re.search(r'slot(\d+)', sheet_name, re.IGNORECASE)
+    if match:
+        return int(match.group(1))
+    return 999999  # 无法解析的放在最后
+
+
+def extract_slot_number(folder_name):
+    """从文件夹名称中提取slot编号"""
+    match = re.search(r'slot[_\s-]*(\d+)', folder_name.lower())
+    if match:
+        return match.group(1)
+    return None
+
+
+def merge_slot_csv_files(root_folder, file_keyword="", log=None):
+    """
+    读取文件夹中所有包含slot的子文件夹，按slot合并CSV文件
+
+    Args:
+        root_folder: 包含slot子文件夹的根文件夹
+        file_keyword: CSV文件名需包含的关键词，空字符串表示全部CSV
+        log: 日志回调 log(level, message)
+
+    Returns:
+        dict: slot编号字符串 -> 合并后的DataFrame
+    """
+    log = log or _print_log
+    slot_data = {}
+
+    for item in os.listdir(root_folder):
+        item_path = os.path.join(root_folder, item)
+
+        if os.path.isdir(item_path) and 'slot' in item.lower():
+            slot_num = extract_slot_number(item)
+
+            if slot_num is not None:
+                csv_files = []
+                for file in os.listdir(item_path):
+                    if file.lower().endswith('.csv'):
+                        # 如果指定了关键词，则只选择包含关键词的文件
+                        if not file_keyword or file_keyword in file:
+                            csv_files.append(os.path.join(item_path, file))
+
+                if csv_files:
+                    dfs = []
+                    for csv_file in csv_files:
+                        try:
+                            df = pd.read_csv(csv_file)
+                            dfs.append(df)
+                        except Exception as e:
+                            log('warning', f"读取文件 {os.path.basename(csv_file)} 失败: {e}")
+
+                    if dfs:
+                        merged_df = pd.concat(dfs, ignore_index=True)
+                        slot_data[slot_num] = merged_df
+                        log('success', f"✓ Slot {slot_num}: 成功合并 {len(csv_files)} 个CSV文件，共 {len(merged_df)} 条记录")
+                else:
+                    if file_keyword:
+                        log('warning', f"⚠ {item}: 未找到包含'{file_keyword}'的CSV文件")
+                    else:
+                        log('warning', f"⚠ {item}: 未找到CSV文件")
+
+    return slot_data
+
+
+def frames_to_excel_bytes(frames, sheet_names=None, engine='xlsxwriter', progress=None):
+    """
+    将多个DataFrame写入同一个Excel文件（每个一个Sheet）
+
+    Args:
+        frames: dict(sheet名称 -> DataFrame)
+        sheet_names: 写入顺序，默认为 frames 的键顺序
+        engine: Excel写入引擎
+        progress: 进度回调 progress(fraction, sheet_name)
+
+    Returns:
+        bytes: Excel文件内容
+    """
+    if sheet_names is None:
+        sheet_names = list(frames.keys())
+
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine=engine) as writer:
+        for idx, sheet_name in enumerate(sheet_names):
+            if progress:
+                progress((idx + 1) / len(sheet_names), sheet_name)
+            # Excel sheet名称限制为31个字符
+            frames[sheet_name].to_excel(writer, sheet_name=str(sheet_name)[:31], index=False)
+    return output.getvalue()
@@ -0,0 +1,142 @@
+import os
+import pickle
+import hashlib
+import tempfile
+
+import pandas as pd
+
+
+# 缓存目录，可通过环境变量 BLOBFEA_MATCH_CACHE_DIR 调整
+DEFAULT_CACHE_DIR = os.environ.get(
+    'BLOBFEA_MATCH_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.blobfea_cache', 'kla_match'))
+
+# 缓存总大小上限（MB），超出时删除最久未使用的条目
+DEFAULT_CACHE_MB = int(os.environ.get('BLOBFEA_MATCH_CACHE_MB', '2048'))
+
+# 匹配算法或结果格式变化时递增，使旧缓存失效
+CACHE_VERSION = 2
+
+
+def _print_log(level, message):
+    """默认日志输出（命令行模式）"""
+    print(f"[{level}] {message}")
+
+
+def frame_fingerprint(df):
+    """DataFrame内容的指纹（列名、类型和逐行哈希）"""
+    h = hashlib.sha1()
+    h.update(repr((list(map(str, df.columns)), [str(t) for t in df.dtypes], df.shape)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def file_fingerprint(path):
+    """文件指纹（绝对路径、大小和修改时间），无需读取文件内容"""
+    stat = os.stat(path)
+    return hashlib.sha1(repr((os.path.abspath(path), stat.st_size, stat.st_mtime_ns)).encode()).hexdigest()
+
+
+def make_key(*parts):
+    """由输入指纹和参数生成缓存键"""
+    return hashlib.sha1(repr((CACHE_VERSION,) + parts).encode()).hexdigest()
+
+
+def _path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], f"{key}.pkl")
+
+
+def load(cache_dir, key, log=None):
+    """
+    读取缓存
+
+    Args:
+        cache_dir: 缓存目录
+        key: 缓存键（见 make_key）
+        log: 日志回调 log(level, message)，读取失败时输出警告
+
+    Returns:
+        缓存的对象；不存在或读取失败时返回None
+    """
+    path = _path(cache_dir, key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            value = pickle.load(f)
+    except Exception as e:
+        (log or _print_log)('warning', f"读取匹配缓存失败: {str(e)}")
+        return None
+    # 更新访问时间，用于按最久未使用清理
+    os.utime(path)
+    return value
+
+
+def save(cache_dir, key, value, max_mb=DEFAULT_CACHE_MB, log=None):
+    """
+    写入缓存（先写临时文件再替换，避免并行进程读到不完整的文件）
+
+    Args:
+        cache_dir: 缓存目录
+        key: 缓存键（见 make_key）
+        value: 缓存的对象
+        max_mb: 缓存总大小上限（MB），超出时删除最久未使用的条目
+        log: 日志回调 log(level, message)，写入失败时输出警告
+    """
+    path = _path(cache_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        (log or _print_log)('warning', f"写入匹配缓存失败: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+    prune(cache_dir, max_mb)
+
+
+def _entries(cache_dir):
+    """缓存文件列表 [(修改时间, 大小, 路径), ...]"""
+    entries = []
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if name.endswith('.pkl'):
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def prune(cache_dir, max_mb=DEFAULT_CACHE_MB):
+    """总大小超过上限时删除最久未使用的缓存"""
+    entries = _entries(cache_dir)
+    total = sum(size for _, size, _ in entries)
+    limit = max_mb * 1024 * 1024
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def cache_size(cache_dir):
+    """返回 (缓存条目数, 总字节数)"""
+    entries = _entries(cache_dir)
+    return len(entries), sum(size for _, size, _ in entries)
+
+
+def clear(cache_dir):
+    """删除所有缓存"""
+    for _, _, path in _entries(cache_dir):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
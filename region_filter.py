@@ -0,0 +1,182 @@
+import os
+import glob
+import json
+
+import pandas as pd
+
+import spatial_index
+
+
+def _print_log(level, message):
+    """默认日志输出（命令行模式）"""
+    print(f"[{level}] {message}")
+
+
+def find_coord_columns(df):
+    """
+    查找BlobFeatures中的坐标列（dCenterXCartisian/dCenterYCartisian，排除Move列）
+
+    Returns:
+        tuple: (x列名, y列名)，未找到时为None
+    """
+    x_col = None
+    y_col = None
+    for col in df.columns:
+        if 'dCenterXCartisian' in col and 'Move' not in col:
+            x_col = col
+        elif 'dCenterYCartisian' in col and 'Move' not in col:
+            y_col = col
+    return x_col, y_col
+
+
+def region_mask(df, x_col, y_col, region):
+    """
+    判断每个点是否在删除区域内
+
+    Args:
+        df: 数据
+        x_col, y_col: 坐标列名
+        region: 多边形 {'type': 'polygon', 'points': [(x, y), ...]}
+                或矩形 {'type': 'rectangle', 'x_min', 'x_max', 'y_min', 'y_max'}
+
+    Returns:
+        ndarray(bool): 在区域内为True
+    """
+    # 网格分桶索引随DataFrame缓存，同一数据上多次框选只需构建一次
+    index = spatial_index.frame_index(df, x_col, y_col)
+    if region.get('type') == 'polygon':
+        return index.in_polygon(region['points'])
+
+    return index.in_rectangle(region['x_min'], region['x_max'], region['y_min'], region['y_max'])
+
+
+def apply_region(df, x_col, y_col, region):
+    """
+    删除区域内的点
+
+    Returns:
+        tuple: (删除后的DataFrame, 删除点数)
+    """
+    inside = region_mask(df, x_col, y_col, region)
+    removed_count = int(inside.sum())
+    return df[~inside].reset_index(drop=True), removed_count
+
+
+def apply_regions(df, x_col, y_col, regions, only_unapplied=False):
+    """
+    依次应用多个删除区域，并将每个区域的删除点数写回 region['removed']
+
+    Args:
+        df: 数据
+        x_col, y_col: 坐标列名
+        regions: 区域列表
+        only_unapplied: 为True时只应用 removed 为0的区域
+
+    Returns:
+        tuple: (删除后的DataFrame, 总删除点数)
+    """
+    total_removed = 0
+    for region in regions:
+        if only_unapplied and region.get('removed', 0) != 0:
+            continue
+        df, removed_count = apply_region(df, x_col, y_col, region)
+        region['removed'] = removed_count
+        total_removed += removed_count
+    return df, total_removed
+
+
+def regions_from_config(config_regions):
+    """
+    将配置文件中的区域转换为内部区域格式（删除点数重置为0，表示未应用）
+
+    兼容矩形的两种格式：{'bounds': {...}} 和直接包含 x_min 等字段。
+    """
+    region_list = []
+    for region in config_regions:
+        if region['type'] == 'polygon':
+            region_list.append({
+                'type': 'polygon',
+                'points': [tuple(p) for p in region['vertices']],
+                'removed': 0
+            })
+        else:
+            bounds = region.get('bounds', region)
+            region_list.append({
+                'type': 'rectangle',
+                'x_min': bounds.get('x_min'),
+                'x_max': bounds.get('x_max'),
+                'y_min': bounds.get('y_min'),
+                'y_max': bounds.get('y_max'),
+                'removed': 0
+            })
+    return region_list
+
+
+def regions_to_config(regions):
+    """将内部区域格式转换为配置文件格式（全部为Python原生类型，可直接写入JSON）"""
+    config_regions = []
+    for idx, region in enumerate(regions):
+        region_info = {
+            'region_id': int(idx + 1),
+            'type': str(region.get('type', 'rectangle')),
+            'removed_count': int(region.get('removed', 0))
+        }
+        if region.get('type') == 'polygon':
+            region_info['vertices'] = [[float(x), float(y)] for x, y in region.get('points', [])]
+        else:
+            region_info['bounds'] = {
+                'x_min': float(region.get('x_min', 0)),
+                'x_max': float(region.get('x_max', 0)),
+                'y_min': float(region.get('y_min', 0)),
+                'y_max': float(region.get('y_max', 0))
+            }
+        config_regions.append(region_info)
+    return config_regions
+
+
+def load_config(config_path):
+    """读取删除区域配置文件（JSON，子文件夹名 -> 区域列表）"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def filter_folder(root_folder, config_data, log=None, progress=None):
+    """
+    按配置批量删除各子文件夹BlobFeatures中区域内的点
+
+    Args:
+        root_folder: 包含子文件夹的根文件夹
+        config_data: dict(子文件夹名 -> 配置文件格式的区域列表)
+        log: 日志回调 log(level, message)
+        progress: 进度回调 progress(fraction, subfolder_name)
+
+    Returns:
+        dict: 子文件夹名 -> (删除后的DataFrame, 区域列表(含删除点数))
+    """
+    log = log or _print_log
+    subfolders = [f for f in os.listdir(root_folder)
+                  if os.path.isdir(os.path.join(root_folder, f))]
+
+    results = {}
+    for folder_idx, subfolder_name in enumerate(subfolders):
+        if progress:
+            progress((folder_idx + 1) / len(subfolders), subfolder_name)
+        if subfolder_name not in config_data:
+            continue
+
+        blob_files = glob.glob(os.path.join(root_folder, subfolder_name, "BlobFeatures*.csv"))
+        if not blob_files:
+            log('warning', f"{subfolder_name}: 未找到 BlobFeatures*.csv 文件")
+            continue
+
+        df_blob = pd.read_csv(blob_files[0])
+        x_col, y_col = find_coord_columns(df_blob)
+        if not (x_col and y_col):
+            log('warning', f"{subfolder_name}: 未找到坐标列 dCenterXCartisian 和 dCenterYCartisian")
+            continue
+
+        region_list = regions_from_config(config_data[subfolder_name])
+        df_working, _ = apply_regions(df_blob, x_col, y_col, region_list)
+        results[subfolder_name] = (df_working, region_list)
+
+    return results
@@ -0,0 +1,280 @@
+import os
+import sys
+import shutil
+import pickle
+import tempfile
+import weakref
+import itertools
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# 默认每个会话的内存预算（MB），可通过环境变量 BLOBFEA_RESULT_BUDGET_MB 调整
+DEFAULT_BUDGET_MB = int(os.environ.get('BLOBFEA_RESULT_BUDGET_MB', '1024'))
+
+def _print_log(level, message):
+    """默认日志输出（命令行模式）"""
+    print(f"[{level}] {message}")
+
+
+# 小于该字节数的DataFrame/数组直接随pickle写入，不单独落盘
+_MIN_SIDE_FILE_BYTES = 64 * 1024
+
+
+def estimate_size(obj, _seen=None):
+    """
+    估算对象占用的内存（字节）
+
+    DataFrame/Series按 deep memory_usage 计算，numpy数组按 nbytes 计算，
+    dict/list/tuple递归累加。
+
+    Args:
+        obj: 任意对象
+
+    Returns:
+        int: 估算的字节数
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray, str)):
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            estimate_size(k, _seen) + estimate_size(v, _seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(estimate_size(item, _seen) for item in obj)
+    return sys.getsizeof(obj)
+
+
+class _SpillPickler(pickle.Pickler):
+    """将较大的DataFrame写成Parquet、numpy数组写成NPY，其余部分正常pickle"""
+
+    def __init__(self, file, side_dir):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.side_dir = side_dir
+        self.counter = 0
+
+    def persistent_id(self, obj):
+        if isinstance(obj, pd.DataFrame) and estimate_size(obj) >= _MIN_SIDE_FILE_BYTES:
+            path = os.path.join(self.side_dir, f"{self.counter}.parquet")
+            try:
+                obj.to_parquet(path)
+            except Exception:
+                # 未安装pyarrow或列类型不支持时回退为pickle
+                if os.path.exists(path):
+                    os.remove(path)
+                return None
+            self.counter += 1
+            return ('parquet', os.path.basename(path))
+
+        if isinstance(obj, np.ndarray) and obj.dtype != object and obj.nbytes >= _MIN_SIDE_FILE_BYTES:
+            path = os.path.join(self.side_dir, f"{self.counter}.npy")
+            np.save(path, obj)
+            self.counter += 1
+            return ('npy', os.path.basename(path))
+
+        return None
+
+
+class _SpillUnpickler(pickle.Unpickler):
+    """读取 _SpillPickler 写出的结果"""
+
+    def __init__(self, file, side_dir):
+        super().__init__(file)
+        self.side_dir = side_dir
+
+    def persistent_load(self, pid):
+        kind, name = pid
+        path = os.path.join(self.side_dir, name)
+        if kind == 'parquet':
+            return pd.read_parquet(path)
+        if kind == 'npy':
+            return np.load(path)
+        raise pickle.UnpicklingError(f"未知的落盘类型: {kind}")
+
+
+class ResultStore:
+    """
+    会话级分析结果存储
+
+    所有结果按最近使用顺序保存在内存中，总大小超过预算时，把最久未使用的结果
+    写到本地磁盘（DataFrame为Parquet，数组为NPY），再次读取时自动加载回内存。
+
+    各结果的大小在 put 时估算；put 之后被原地修改（如向结果list追加元素）的大小变化
+    在下一次检查预算（put 或加载落盘结果）时重新估算。
+    """
+
+    def __init__(self, budget_mb=DEFAULT_BUDGET_MB, spill_dir=None, log=None):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        # 日志回调 log(level, message)，用于报告落盘/加载失败
+        self.log = log or _print_log
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix='blobfea_results_')
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._memory = OrderedDict()   # key -> 结果对象（按使用顺序）
+        self._sizes = {}               # key -> 估算字节数
+        self._spilled = {}             # key -> 落盘目录
+        self._versions = {}            # key -> put 时分配的版本号（落盘/加载不改变）
+        self._version_counter = itertools.count(1)
+        # 会话结束、对象被回收时删除落盘文件
+        self._finalizer = weakref.finalize(self, shutil.rmtree, self.spill_dir, True)
+
+    def __contains__(self, key):
+        return key in self._memory or key in self._spilled
+
+    def keys(self):
+        """返回所有结果的键（包括已落盘的）"""
+        return list(self._memory.keys()) + list(self._spilled.keys())
+
+    @property
+    def memory_bytes(self):
+        """当前内存中结果的估算总字节数"""
+        return sum(self._sizes.values())
+
+    @property
+    def spilled_count(self):
+        """已落盘的结果数量"""
+        return len(self._spilled)
+
+    def put(self, key, value):
+        """
+        保存结果，并在超出预算时落盘最久未使用的其他结果
+
+        Args:
+            key: 结果名称
+            value: 结果对象（DataFrame、dict、list等）
+        """
+        self._discard_spilled(key)
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        self._sizes[key] = estimate_size(value)
+        self._versions[key] = next(self._version_counter)
+        self._enforce_budget()
+
+    def version(self, key):
+        """
+        返回结果的版本号，每次 put 都会分配新的版本号
+
+        落盘和重新加载不改变版本号（但加载后是新的对象），因此依赖结果内容的缓存
+        应以版本号而不是 id() 作为键。
+
+        Args:
+            key: 结果名称
+
+        Returns:
+            int: 版本号，结果不存在时为0
+        """
+        return self._versions.get(key, 0)
+
+    def get(self, key, default=None):
+        """
+        读取结果，已落盘的结果会自动加载回内存
+
+        Args:
+            key: 结果名称
+            default: 结果不存在时的返回值
+
+        Returns:
+            结果对象或 default
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+
+        if key in self._spilled:
+            try:
+                value = self._load(key)
+            except Exception as e:
+                self.log('warning', f"加载落盘结果失败: {str(e)}")
+                self._discard_spilled(key)
+                return default
+            self._discard_spilled(key)
+            self._memory[key] = value
+            self._sizes[key] = estimate_size(value)
+            self._enforce_budget()
+            return value
+
+        return default
+
+    def delete(self, key):
+        """删除结果（内存和磁盘）"""
+        self._memory.pop(key, None)
+        self._sizes.pop(key, None)
+        self._versions.pop(key, None)
+        self._discard_spilled(key)
+
+    def clear(self):
+        """清空所有结果"""
+        for key in list(self._spilled.keys()):
+            self._discard_spilled(key)
+        self._memory.clear()
+        self._sizes.clear()
+        self._versions.clear()
+
+    def _enforce_budget(self):
+        """超出预算时按LRU顺序落盘，最近使用的结果始终保留在内存中"""
+        # 重新估算各结果的大小（结果可能在 put 之后被原地修改）
+        for key, value in self._memory.items():
+            self._sizes[key] = estimate_size(value)
+        while self.memory_bytes > self.budget_bytes and len(self._memory) > 1:
+            oldest_key = next(iter(self._memory))
+            try:
+                self._spill(oldest_key)
+            except Exception as e:
+                # 落盘失败时保留在内存中，避免丢失结果
+                self.log('warning', f"结果落盘失败: {str(e)}")
+                break
+
+    def _spill(self, key):
+        """将单个结果写入磁盘并从内存中移除"""
+        key_dir = tempfile.mkdtemp(prefix='item_', dir=self.spill_dir)
+        try:
+            with open(os.path.join(key_dir, 'result.pkl'), 'wb') as f:
+                _SpillPickler(f, key_dir).dump(self._memory[key])
+        except Exception:
+            shutil.rmtree(key_dir, ignore_errors=True)
+            raise
+        self._spilled[key] = key_dir
+        del self._memory[key]
+        del self._sizes[key]
+
+    def _load(self, key):
+        """从磁盘读取单个结果"""
+        key_dir = self._spilled[key]
+        with open(os.path.join(key_dir, 'result.pkl'), 'rb') as f:
+            return _SpillUnpickler(f, key_dir).load()
+
+    def _discard_spilled(self, key):
+        """删除已落盘的结果文件"""
+        key_dir = self._spilled.pop(key, None)
+        if key_dir:
+            shutil.rmtree(key_dir, ignore_errors=True)
+
+
+def get_session_store(session_state, log=None):
+    """
+    获取当前会话的结果存储，不存在时创建
+
+    Args:
+        session_state: st.session_state
+        log: 日志回调 log(level, message)（如 ui_common.st_log），为None时保留原有回调
+
+    Returns:
+        ResultStore
+    """
+    if 'result_store' not in session_state:
+        session_state['result_store'] = ResultStore(log=log)
+    elif log is not None:
+        session_state['result_store'].log = log
+    return session_state['result_store']
@@ -0,0 +1,171 @@
+from pathlib import Path
+
+import cv2
+import numpy as np
+from scipy.signal import find_peaks
+
+
+# 16位图像的饱和像素值
+SATURATED_VALUE = 65532
+
+
+def find_peaks_in_row(row_values, height_threshold=None):
+    """找到一行像素值中的波峰个数"""
+    if len(row_values) < 3:
+        return 0
+
+    if height_threshold is None:
+        std_val = np.std(row_values)
+        prominence = std_val * 0.5
+    else:
+        prominence = height_threshold
+
+    peaks, _ = find_peaks(row_values, prominence=prominence)
+    return len(peaks)
+
+
+def count_saturated_pixels(row_values, saturated_value=SATURATED_VALUE):
+    """计算一行中等于饱和值的像素个数"""
+    return np.sum(row_values == saturated_value)
+
+
+def analyze_defect_from_mask(mask_img, original_img):
+    """
+    根据mask图分析原图中的缺陷
+
+    取mask中最大的连通区域，逐行统计缺陷像素的波峰数和饱和像素数，
+    像素个数最多的行为主行，其上下相邻行为次行1、次行2。
+
+    Args:
+        mask_img: mask图像（灰度或BGR）
+        original_img: 原图（16位）
+
+    Returns:
+        list: 每行的统计结果；mask中没有缺陷区域时返回None
+    """
+    # 确保mask是二值图
+    if len(mask_img.shape) == 3:
+        mask_img = cv2.cvtColor(mask_img, cv2.COLOR_BGR2GRAY)
+
+    _, binary_mask = cv2.threshold(mask_img, 127, 255, cv2.THRESH_BINARY)
+
+    # 找到mask中的连通区域
+    contours, _ = cv2.findContours(binary_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if len(contours) == 0:
+        return None
+
+    # 获取最大的连通区域
+    main_contour = max(contours, key=cv2.contourArea)
+    x, y, w, h = cv2.boundingRect(main_contour)
+
+    defect_region = original_img[y:y+h, x:x+w]
+    defect_mask = binary_mask[y:y+h, x:x+w]
+
+    # 分析每一行（只分析mask中标记为缺陷的像素）
+    row_results = []
+    for row_idx in range(h):
+        valid_pixels = defect_region[row_idx, :][defect_mask[row_idx, :] > 0]
+
+        if len(valid_pixels) > 0:
+            saturated_count = count_saturated_pixels(valid_pixels)
+            total_pixels = len(valid_pixels)
+            row_results.append({
+                'row_index': row_idx,
+                'pixels': valid_pixels,
+                'peak_count': find_peaks_in_row(valid_pixels),
+                'saturated_count': saturated_count,
+                'total_pixels': total_pixels,
+                'saturated_ratio': (saturated_count / total_pixels * 100) if total_pixels > 0 else 0
+            })
+
+    # 找到像素个数最多的行作为主行，标记主行、次行1和次行2
+    if len(row_results) > 0:
+        main_row_idx = max(range(len(row_results)), key=lambda i: row_results[i]['total_pixels'])
+        for i, row in enumerate(row_results):
+            if i == main_row_idx:
+                row['row_type'] = '主行'
+            elif i == main_row_idx - 1:
+                row['row_type'] = '次行1'
+            elif i == main_row_idx + 1:
+                row['row_type'] = '次行2'
+            else:
+                row['row_type'] = '其他'
+
+    return row_results
+
+
+def summarize_defect(defect_id, folder_name, channel, row_analysis):
+    """汇总单个缺陷主行、次行1、次行2的像素数和饱和占比"""
+    main_row = next((r for r in row_analysis if r.get('row_type') == '主行'), None)
+    sub_row1 = next((r for r in row_analysis if r.get('row_type') == '次行1'), None)
+    sub_row2 = next((r for r in row_analysis if r.get('row_type') == '次行2'), None)
+
+    return {
+        '缺陷ID': defect_id,
+        '子文件夹': folder_name,
+        '通道': channel,
+        '缺陷行数': len(row_analysis),
+        '主行像素数': main_row['total_pixels'] if main_row else 0,
+        '主行饱和像素数': main_row['saturated_count'] if main_row else 0,
+        '主行饱和占比(%)': round(main_row['saturated_ratio'], 2) if main_row else 0,
+        '次行1像素数': sub_row1['total_pixels'] if sub_row1 else 0,
+        '次行1饱和像素数': sub_row1['saturated_count'] if sub_row1 else 0,
+        '次行1饱和占比(%)': round(sub_row1['saturated_ratio'], 2) if sub_row1 else 0,
+        '次行2像素数': sub_row2['total_pixels'] if sub_row2 else 0,
+        '次行2饱和像素数': sub_row2['saturated_count'] if sub_row2 else 0,
+        '次行2饱和占比(%)': round(sub_row2['saturated_ratio'], 2) if sub_row2 else 0,
+        'row_data': row_analysis
+    }
+
+
+def process_folder(folder_path, progress=None):
+    """
+    处理单个文件夹中的所有缺陷图像
+
+    mask文件命名为 {缺陷ID}-defect-{通道}.bmp，对应原图为 {缺陷ID}-{通道}.tiff。
+
+    Args:
+        folder_path: 文件夹路径
+        progress: 进度回调 progress(已处理数, 总数)
+
+    Returns:
+        list: 每个缺陷的汇总结果（summarize_defect）
+    """
+    folder_path = Path(folder_path)
+    results = []
+
+    mask_files = list(folder_path.glob('*-defect-*.bmp'))
+    for idx, mask_file in enumerate(mask_files):
+        parts = mask_file.stem.split('-')
+
+        if len(parts) >= 3:
+            defect_id = parts[0]
+            channel = parts[2]
+            original_file = folder_path / f"{defect_id}-{channel}.tiff"
+
+            if original_file.exists():
+                mask_img = cv2.imread(str(mask_file))
+                original_img = cv2.imread(str(original_file), cv2.IMREAD_UNCHANGED)
+
+                if mask_img is not None and original_img is not None:
+                    row_analysis = analyze_defect_from_mask(mask_img, original_img)
+                    if row_analysis:
+                        results.append(summarize_defect(defect_id, folder_path.name, channel, row_analysis))
+
+        if progress:
+            progress(idx + 1, len(mask_files))
+
+    return results
+
+
+def process_root_folder(root_folder, progress=None):
+    """
+    处理根文件夹下所有子文件夹
+
+    Returns:
+        list: 所有子文件夹的缺陷汇总结果
+    """
+    all_results = []
+    for subfolder in sorted(f for f in Path(root_folder).iterdir() if f.is_dir()):
+        all_results.extend(process_folder(subfolder, progress=progress))
+    return all_results
@@ -0,0 +1,144 @@
+import weakref
+
+import numpy as np
+from scipy.spatial import KDTree
+
+
+# 网格分桶时每个格子的平均点数（决定默认格子边长）
+GRID_POINTS_PER_CELL = 16
+
+
+class SpatialIndex:
+    """
+    一组XY坐标的空间索引
+
+    KDTree 用于邻域/最近点查询，均匀网格分桶用于矩形、多边形区域查询；
+    两者都在第一次使用时构建，之后复用。
+    """
+
+    def __init__(self, points, cell_size=None):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        self.cell_size = cell_size
+        self._tree = None
+        self._grid = None
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def tree(self):
+        """KDTree（按需构建）"""
+        if self._tree is None:
+            self._tree = KDTree(self.points)
+        return self._tree
+
+    def _build_grid(self):
+        """按格子编号排序的点下标和每个格子的起止位置"""
+        valid = np.flatnonzero(~np.isnan(self.points).any(axis=1))
+        points = self.points[valid]
+        if len(points) == 0:
+            origin, extent = np.zeros(2), np.zeros(2)
+        else:
+            origin, extent = points.min(axis=0), np.ptp(points, axis=0)
+        cell_size = self.cell_size
+        if not cell_size:
+            area = max(extent[0], 1.0) * max(extent[1], 1.0)
+            cell_size = np.sqrt(area * GRID_POINTS_PER_CELL / max(len(points), 1))
+        shape = (extent // cell_size).astype(np.int64) + 1
+
+        cells = ((points - origin) // cell_size).astype(np.int64)
+        cell_ids = cells[:, 1] * shape[0] + cells[:, 0]
+        order = np.argsort(cell_ids, kind='stable')
+        starts = np.searchsorted(cell_ids[order], np.arange(shape[0] * shape[1] + 1))
+        self._grid = {'origin': origin, 'cell_size': cell_size, 'shape': shape,
+                      'order': valid[order], 'starts': starts}
+        return self._grid
+
+    @property
+    def grid(self):
+        """均匀网格分桶（按需构建）"""
+        return self._grid if self._grid is not None else self._build_grid()
+
+    def bbox_candidates(self, x_min, x_max, y_min, y_max):
+        """与矩形相交的格子中的点下标（候选点，需再做精确判断）"""
+        grid = self.grid
+        nx, ny = grid['shape']
+        low = np.floor((np.array([x_min, y_min]) - grid['origin']) / grid['cell_size']).astype(np.int64)
+        high = np.floor((np.array([x_max, y_max]) - grid['origin']) / grid['cell_size']).astype(np.int64)
+        x0, y0 = max(low[0], 0), max(low[1], 0)
+        x1, y1 = min(high[0], nx - 1), min(high[1], ny - 1)
+        if x0 > x1 or y0 > y1:
+            return np.zeros(0, dtype=np.int64)
+
+        # 每一行格子在排序后是连续的一段
+        rows = np.arange(y0, y1 + 1) * nx
+        starts = grid['starts'][rows + x0]
+        ends = grid['starts'][rows + x1 + 1]
+        return np.concatenate([grid['order'][start:end] for start, end in zip(starts, ends)])
+
+    def in_rectangle(self, x_min, x_max, y_min, y_max):
+        """在矩形内（含边界）的点，返回bool数组"""
+        mask = np.zeros(len(self.points), dtype=bool)
+        candidates = self.bbox_candidates(x_min, x_max, y_min, y_max)
+        x, y = self.points[candidates].T
+        mask[candidates] = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        return mask
+
+    def in_polygon(self, vertices):
+        """在多边形内的点（只对外接矩形内的候选点做多边形判断），返回bool数组"""
+        from matplotlib.path import Path
+
+        vertices = np.asarray(vertices, dtype=float)
+        mask = np.zeros(len(self.points), dtype=bool)
+        (x_min, y_min), (x_max, y_max) = vertices.min(axis=0), vertices.max(axis=0)
+        candidates = self.bbox_candidates(x_min, x_max, y_min, y_max)
+        if len(candidates) > 0:
+            mask[candidates] = Path(vertices).contains_points(self.points[candidates])
+        return mask
+
+    def within(self, x, y, radius):
+        """距离 (x, y) 不超过 radius 的点下标（按距离排序）"""
+        idx = np.asarray(self.tree.query_ball_point([x, y], radius), dtype=np.intp)
+        return idx[np.argsort(np.hypot(*(self.points[idx] - (x, y)).T), kind='stable')]
+
+    def nearest(self, points, max_distance=np.inf):
+        """
+        每个查询点在 max_distance 内（含）的最近点
+
+        Returns:
+            tuple: (距离, 下标)；超出范围时距离为inf、下标为 len(self)
+        """
+        if len(self.points) == 0:
+            n = len(points)
+            return np.full(n, np.inf), np.full(n, 0, dtype=np.intp)
+        return self.tree.query(points, k=1, distance_upper_bound=np.nextafter(max_distance, np.inf), workers=-1)
+
+
+# 按DataFrame缓存的索引：id(df) -> (x列, y列, SpatialIndex)
+_frame_indexes = {}
+
+
+def frame_index(df, x_col, y_col):
+    """
+    DataFrame坐标列的空间索引，同一DataFrame（坐标未变）多次调用返回同一个索引
+
+    DataFrame被回收时缓存自动删除；坐标被原地修改时重新构建。
+
+    Args:
+        df: 数据
+        x_col, y_col: 坐标列名
+
+    Returns:
+        SpatialIndex
+    """
+    points = df[[x_col, y_col]].to_numpy(dtype=float)
+    key = id(df)
+    cached = _frame_indexes.get(key)
+    if cached is not None and cached[:2] == (x_col, y_col) and np.array_equal(cached[2].points, points, equal_nan=True):
+        return cached[2]
+
+    index = SpatialIndex(points)
+    if cached is None:
+        weakref.finalize(df, _frame_indexes.pop, key, None)
+    _frame_indexes[key] = (x_col, y_col, index)
+    return index
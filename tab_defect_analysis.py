@@ -0,0 +1,3273 @@
+import os
+import glob
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+
+import data_loader
+import result_store
+import condition_match
+import kla_match
+import match_cache
+import wafer_geometry
+import adaptive_radius
+import common_rate
+import trend_store
+from ui_common import st_log, radius_rule_input
+
+
+def render():
+    """过漏检分析页面：多文件夹晶圆图、多工况匹配、KLA匹配、共有率分析"""
+    session_results = result_store.get_session_store(st.session_state)
+
+    st.markdown('<a name="多工况对比"></a>', unsafe_allow_html=True)
+    st.header("📁 map图显示")
+    
+    with st.expander("ℹ️ 功能说明", expanded=False):
+        st.markdown("""
+        选择一个包含多个子文件夹的主文件夹，绘制每个文件内的颗粒map图，及统计三个通道的BGMean及BGDev
+        
+        **文件夹结构要求：**
+        ```
+        主文件夹/
+        ├── 20251111200019.509_slot1/
+        │   └── BlobFeatures.csv          (CASI数据)
+        ├── 20251111200502.133_slot2/
+        │   └── BlobFeatures.csv          (CASI数据)
+        ├── kla1/
+        │   └── *.csv 或 *.xlsx           (KLA数据，任意文件名)
+        └── kla2/
+            └── *.csv 或 *.xlsx           (KLA数据，任意文件名)
+        ```
+        
+        **文件读取规则：**
+        - **CASI子文件夹**（不含"kla"）：读取 `BlobFeatures.csv` 文件
+          - 坐标列：优先使用 `dCenterXCartisian_Calib`、`dCenterYCartisian_Calib`
+          - 若无则使用 `dCenterXCartisian`、`dCenterYCartisian`
+        - **KLA子文件夹**（含"kla"）：读取文件夹内任意CSV或Excel文件
+          - 坐标列：使用 `XREL`、`YREL`
+        - **数据过滤**：可选择是否过滤 nDefectType=1000/10001（仅对CASI数据有效）
+        
+        **显示方式：**
+        - 以坐标(150000, 150000)为中心绘制晶圆图
+        - 不同子文件夹的数据用不同颜色显示
+        - 支持交互式查看和统计分析
+        """)
+    
+    # 文件夹选择
+    st.subheader("选择主文件夹")
+    
+    # 输入文件夹路径
+    folder_path = st.text_input("输入主文件夹路径", placeholder=r"例如: D:\data\wafer_folders")
+    
+    # 或者使用文件上传作为备选方案
+    st.write("或者")
+    use_upload = st.checkbox("通过上传CSV文件（如果无法选择文件夹）")
+    
+    if use_upload:
+        uploaded_files = st.file_uploader(
+            "上传多个BlobFeatures.csv文件",
+            type=['csv'],
+            accept_multiple_files=True,
+            key="multi_folder_uploader"
+        )
+        
+        if uploaded_files and len(uploaded_files) > 0:
+            try:
+                # 绘图参数
+                st.subheader("绘图参数")
+                col1, col2 = st.columns(2)
+                with col1:
+                    center_x = st.number_input("中心X坐标", value=float(wafer_geometry.WAFER_CENTER[0]), key="mf_center_x")
+                    center_y = st.number_input("中心Y坐标", value=float(wafer_geometry.WAFER_CENTER[1]), key="mf_center_y")
+                with col2:
+                    plot_range = st.number_input("绘图范围（半径）", value=wafer_geometry.WAFER_DIAMETER / 2, min_value=1000.0, key="mf_range")
+                    point_size = st.slider("点的大小", min_value=3, max_value=15, value=6, key="mf_size")
+                
+                # 网格显示选项
+                show_grid_upload = st.checkbox("显示背景网格", value=True, key="show_grid_upload", help="控制图表中是否显示背景网格线")
+                
+                # 数据过滤选项
+                st.subheader("数据过滤选项")
+                filter_special_types_upload = st.checkbox(
+                    "过滤特殊类型缺陷（nDefectType=1000/10001）", 
+                    value=True,
+                    key="filter_special_types_upload",
+                    help="仅对CASI数据有效"
+                )
+                
+                if st.button("生成对比图", type="primary", key="mf_plot_btn"):
+                    # 准备颜色列表
+                    colors = [
+                        '#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8',
+                        '#F7DC6F', '#BB8FCE', '#85C1E2', '#F8B88B', '#AED6F1',
+                        '#A9DFBF', '#F9E79F', '#D7BDE2', '#A2D9CE', '#FAD7A0'
+                    ]
+                    
+                    # 创建图形
+                    fig = go.Figure()
+                    
+                    # 用于存储所有数据
+                    all_data = []
+                    
+                    # 读取每个文件
+                    for idx, uploaded_file in enumerate(uploaded_files):
+                        # 使用文件名作为标签，如果文件名包含文件夹信息
+                        folder_name = f"P{idx + 1}"
+                        if hasattr(uploaded_file, 'name'):
+                            # 尝试从文件名提取文件夹信息
+                            file_name = uploaded_file.name
+                            folder_name = file_name.replace('BlobFeatures.csv', '').replace('.csv', '').strip('_-') or f"P{idx + 1}"
+                        
+                        # 读取CSV
+                        df = data_loader.read_blob_features(uploaded_file, 'map')
+                        
+                        # 保存原始数据用于统计计算（包含所有nDefectType）
+                        df_original = df.copy()
+                        
+                        # 根据用户选择过滤nDefectType为1000和10001的数据（仅用于绘图）
+                        if filter_special_types_upload and 'nDefectType' in df.columns:
+                            df = df[(df['nDefectType'] != 1000) & (df['nDefectType'] != 10001)]
+                        
+                        # 优先使用dCenterXCartisian_Calib和dCenterYCartisian_Calib列
+                        if 'dCenterXCartisian_Calib' in df.columns and 'dCenterYCartisian_Calib' in df.columns:
+                            x_col = 'dCenterXCartisian_Calib'
+                            y_col = 'dCenterYCartisian_Calib'
+                        elif 'dCenterXCartisian' in df.columns and 'dCenterYCartisian' in df.columns:
+                            x_col = 'dCenterXCartisian'
+                            y_col = 'dCenterYCartisian'
+                        else:
+                            st.warning(f"文件 {uploaded_file.name} 缺少坐标列")
+                            continue
+                        
+                        x_data = pd.to_numeric(df[x_col], errors='coerce')
+                        y_data = pd.to_numeric(df[y_col], errors='coerce')
+                        
+                        # 过滤有效数据
+                        valid_mask = pd.notna(x_data) & pd.notna(y_data)
+                        x_valid = x_data[valid_mask]
+                        y_valid = y_data[valid_mask]
+                        
+                        if len(x_valid) > 0:
+                            # 计算三个通道的BGMean和BGDev均值（使用原始数据，包含1000和10001，排除0值）
+                            bgmean_bgdev_stats = {}
+                            
+                            # DW1O通道
+                            if 'DW1O_BGMean' in df_original.columns:
+                                dw1o_bgmean_all = pd.to_numeric(df_original['DW1O_BGMean'], errors='coerce').dropna()
+                                dw1o_bgmean_all = dw1o_bgmean_all[dw1o_bgmean_all != 0]
+                                if len(dw1o_bgmean_all) > 0:
+                                    bgmean_bgdev_stats['DW1O_BGMean'] = dw1o_bgmean_all.mean()
+                            
+                            if 'DW1O_BGDev' in df_original.columns:
+                                dw1o_bgdev_all = pd.to_numeric(df_original['DW1O_BGDev'], errors='coerce').dropna()
+                                dw1o_bgdev_all = dw1o_bgdev_all[dw1o_bgdev_all != 0]
+                                if len(dw1o_bgdev_all) > 0:
+                                    bgmean_bgdev_stats['DW1O_BGDev'] = dw1o_bgdev_all.mean()
+                            
+                            # DW2O通道
+                            if 'DW2O_BGMean' in df_original.columns:
+                                dw2o_bgmean_all = pd.to_numeric(df_original['DW2O_BGMean'], errors='coerce').dropna()
+                                dw2o_bgmean_all = dw2o_bgmean_all[dw2o_bgmean_all != 0]
+                                if len(dw2o_bgmean_all) > 0:
+                                    bgmean_bgdev_stats['DW2O_BGMean'] = dw2o_bgmean_all.mean()
+                            
+                            if 'DW2O_BGDev' in df_original.columns:
+                                dw2o_bgdev_all = pd.to_numeric(df_original['DW2O_BGDev'], errors='coerce').dropna()
+                                dw2o_bgdev_all = dw2o_bgdev_all[dw2o_bgdev_all != 0]
+                                if len(dw2o_bgdev_all) > 0:
+                                    bgmean_bgdev_stats['DW2O_BGDev'] = dw2o_bgdev_all.mean()
+                            
+                            # DN1O通道
+                            if 'DN1O_BGMean' in df_original.columns:
+                                dn1o_bgmean_all = pd.to_numeric(df_original['DN1O_BGMean'], errors='coerce').dropna()
+                                dn1o_bgmean_all = dn1o_bgmean_all[dn1o_bgmean_all != 0]
+                                if len(dn1o_bgmean_all) > 0:
+                                    bgmean_bgdev_stats['DN1O_BGMean'] = dn1o_bgmean_all.mean()
+                            
+                            if 'DN1O_BGDev' in df_original.columns:
+                                dn1o_bgdev_all = pd.to_numeric(df_original['DN1O_BGDev'], errors='coerce').dropna()
+                                dn1o_bgdev_all = dn1o_bgdev_all[dn1o_bgdev_all != 0]
+                                if len(dn1o_bgdev_all) > 0:
+                                    bgmean_bgdev_stats['DN1O_BGDev'] = dn1o_bgdev_all.mean()
+                            
+                            # 存储数据用于统计
+                            all_data.append({
+                                'folder': folder_name,
+                                'count': len(x_valid),
+                                'x_data': x_valid,
+                                'y_data': y_valid,
+                                'bgmean_bgdev_stats': bgmean_bgdev_stats
+                            })
+                            
+                            # 创建悬浮文本
+                            hover_text = [
+                                f"<b>{folder_name}</b><br>X: {x:.2f}<br>Y: {y:.2f}"
+                                for x, y in zip(x_valid, y_valid)
+                            ]
+                            
+                            # 添加散点图
+                            color = colors[idx % len(colors)]
+                            fig.add_trace(go.Scatter(
+                                x=x_valid,
+                                y=y_valid,
+                                mode='markers',
+                                name=f'{folder_name} ({len(x_valid)})',
+                                marker=dict(
+                                    size=point_size,
+                                    color=color,
+                                    line=dict(width=0.5, color='white'),
+                                    opacity=0.7
+                                ),
+                                hovertext=hover_text,
+                                hoverinfo='text'
+                            ))
+                    
+                    # 添加晶圆边界圆
+                    circle_x, circle_y = wafer_geometry.boundary_circle((center_x, center_y), plot_range)
+                    
+                    fig.add_trace(go.Scatter(
+                        x=circle_x,
+                        y=circle_y,
+                        mode='lines',
+                        name='晶圆边界',
+                        line=dict(color='gray', width=2, dash='dash'),
+                        showlegend=True,
+                        hoverinfo='skip'
+                    ))
+                    
+                    # 设置布局
+                    fig.update_layout(
+                        title=dict(
+                            text='多文件夹缺陷对比图',
+                            x=0.5,
+                            xanchor='center',
+                            font=dict(size=20)
+                        ),
+                        xaxis=dict(
+                            title='X坐标',
+                            range=[center_x - plot_range - 10000, center_x + plot_range + 10000],
+                            scaleanchor="y",
+                            scaleratio=1,
+                            showgrid=show_grid_upload,
+                            gridcolor='lightgray'
+                        ),
+                        yaxis=dict(
+                            title='Y坐标',
+                            range=[center_y - plot_range - 10000, center_y + plot_range + 10000],
+                            showgrid=show_grid_upload,
+                            gridcolor='lightgray'
+                        ),
+                        plot_bgcolor='white',
+                        hovermode='closest',
+                        width=900,
+                        height=900,
+                        legend=dict(
+                            orientation="v",
+                            yanchor="top",
+                            y=1,
+                            xanchor="left",
+                            x=1.02,
+                            bgcolor='rgba(255,255,255,0.9)',
+                            bordercolor='gray',
+                            borderwidth=1
+                        )
+                    )
+                    
+                    # 显示图形
+                    st.plotly_chart(fig, use_container_width=True)
+                    
+                    # 显示统计信息
+                    st.subheader("统计信息")
+                    
+                    # 创建统计表格
+                    if all_data:
+                        stats_data = []
+                        total_defects = sum(d['count'] for d in all_data)
+                        
+                        for data in all_data:
+                            row = {
+                                '文件夹': data['folder'],
+                                '缺陷数量': data['count'],
+                                '占比': f"{(data['count'] / total_defects * 100):.2f}%"
+                            }
+                            
+                            # 添加三个通道的BGMean和BGDev均值
+                            stats = data.get('bgmean_bgdev_stats', {})
+                            row['DW1O_BGMean均值'] = f"{stats.get('DW1O_BGMean', 0):.2f}" if 'DW1O_BGMean' in stats else 'N/A'
+                            row['DW1O_BGDev均值'] = f"{stats.get('DW1O_BGDev', 0):.2f}" if 'DW1O_BGDev' in stats else 'N/A'
+                            row['DW2O_BGMean均值'] = f"{stats.get('DW2O_BGMean', 0):.2f}" if 'DW2O_BGMean' in stats else 'N/A'
+                            row['DW2O_BGDev均值'] = f"{stats.get('DW2O_BGDev', 0):.2f}" if 'DW2O_BGDev' in stats else 'N/A'
+                            row['DN1O_BGMean均值'] = f"{stats.get('DN1O_BGMean', 0):.2f}" if 'DN1O_BGMean' in stats else 'N/A'
+                            row['DN1O_BGDev均值'] = f"{stats.get('DN1O_BGDev', 0):.2f}" if 'DN1O_BGDev' in stats else 'N/A'
+                            
+                            stats_data.append(row)
+                        
+                        stats_df = pd.DataFrame(stats_data)
+                        
+                        # 显示指标卡片
+                        cols = st.columns(min(len(all_data) + 1, 5))
+                        for i, data in enumerate(all_data):
+                            with cols[i % 5]:
+                                st.metric(data['folder'], data['count'])
+                        
+                        if len(all_data) % 5 == 4 or len(all_data) < 5:
+                            with cols[len(all_data) % 5 if len(all_data) < 5 else 4]:
+                                st.metric("总计", total_defects)
+                        else:
+                            st.metric("总计", total_defects)
+                        
+                        # 显示详细统计表
+                        st.write("### 详细统计")
+                        st.dataframe(stats_df, use_container_width=True)
+                        
+                        # 柱状图对比
+                        st.write("### 缺陷数量对比")
+                        fig_bar = go.Figure(data=[
+                            go.Bar(
+                                x=[d['folder'] for d in all_data],
+                                y=[d['count'] for d in all_data],
+                                marker_color=[colors[i % len(colors)] for i in range(len(all_data))],
+                                text=[d['count'] for d in all_data],
+                                textposition='auto',
+                            )
+                        ])
+                        fig_bar.update_layout(
+                            title='各文件夹缺陷数量对比',
+                            xaxis_title='文件夹',
+                            yaxis_title='缺陷数量',
+                            showlegend=False,
+                            height=400
+                        )
+                        st.plotly_chart(fig_bar, use_container_width=True)
+                        
+                        # 单独显示每个文件夹 - 每行5个
+                        st.write("---")
+                        st.subheader("各文件夹单独显示")
+                        
+                        # 每行显示5个文件夹
+                        num_per_row = 5
+                        for row_start in range(0, len(all_data), num_per_row):
+                            cols = st.columns(num_per_row)
+                            row_end = min(row_start + num_per_row, len(all_data))
+                            
+                            for col_idx, data_idx in enumerate(range(row_start, row_end)):
+                                data = all_data[data_idx]
+                                
+                                with cols[col_idx]:
+                                    with st.expander(f"📊 {data['folder']}", expanded=False):
+                                        st.write(f"**缺陷数量: {data['count']}**")
+                                        
+                                        # 创建单独的图形
+                                        fig_single = go.Figure()
+                                        
+                                        # 创建悬浮文本
+                                        hover_text = [
+                                            f"<b>{data['folder']}</b><br>X: {x:.2f}<br>Y: {y:.2f}"
+                                            for x, y in zip(data['x_data'], data['y_data'])
+                                        ]
+                                        
+                                        # 添加散点图
+                                        color = colors[data_idx % len(colors)]
+                                        fig_single.add_trace(go.Scatter(
+                                            x=data['x_data'],
+                                            y=data['y_data'],
+                                            mode='markers',
+                                            name=f"{data['folder']}",
+                                            marker=dict(
+                                                size=point_size + 2,  # 单独显示时点稍微大一点
+                                                color=color,
+                                                line=dict(width=0.5, color='white'),
+                                                opacity=0.8
+                                            ),
+                                            hovertext=hover_text,
+                                            hoverinfo='text'
+                                        ))
+                                        
+                                        # 添加晶圆边界圆
+                                        circle_x, circle_y = wafer_geometry.boundary_circle((center_x, center_y), plot_range)
+                                        
+                                        fig_single.add_trace(go.Scatter(
+                                            x=circle_x,
+                                            y=circle_y,
+                                            mode='lines',
+                                            name='晶圆边界',
+                                            line=dict(color='gray', width=2, dash='dash'),
+                                            showlegend=False,
+                                            hoverinfo='skip'
+                                        ))
+                                        
+                                        # 设置布局
+                                        fig_single.update_layout(
+                                            title=dict(
+                                                text=f'{data["folder"]}',
+                                                x=0.5,
+                                                xanchor='center',
+                                                font=dict(size=14)
+                                            ),
+                                            xaxis=dict(
+                                                title='',
+                                                range=[center_x - plot_range - 10000, center_x + plot_range + 10000],
+                                                scaleanchor="y",
+                                                scaleratio=1,
+                                                showgrid=show_grid_upload,
+                                                gridcolor='lightgray',
+                                                showticklabels=False
+                                            ),
+                                            yaxis=dict(
+                                                title='',
+                                                range=[center_y - plot_range - 10000, center_y + plot_range + 10000],
+                                                showgrid=show_grid_upload,
+                                                gridcolor='lightgray',
+                                                showticklabels=False
+                                            ),
+                                            plot_bgcolor='white',
+                                            hovermode='closest',
+                                            height=300,
+                                            showlegend=False,
+                                            margin=dict(l=20, r=20, t=40, b=20)
+                                        )
+                                        
+                                        # 显示图形
+                                        st.plotly_chart(fig_single, use_container_width=True)
+                                        
+                                        # 显示该文件夹的统计信息
+                                        st.metric("缺陷数", data['count'])
+                                        st.caption(f"X: {data['x_data'].min():.0f}~{data['x_data'].max():.0f}")
+                                        st.caption(f"Y: {data['y_data'].min():.0f}~{data['y_data'].max():.0f}")
+                                        
+                                        # 显示三个通道的BGMean和BGDev均值
+                                        stats = data.get('bgmean_bgdev_stats', {})
+                                        if stats:
+                                            st.write("**通道统计（均值）：**")
+                                            if 'DW1O_BGMean' in stats:
+                                                st.caption(f"DW1O_BGMean: {stats['DW1O_BGMean']:.2f}")
+                                            if 'DW1O_BGDev' in stats:
+                                                st.caption(f"DW1O_BGDev: {stats['DW1O_BGDev']:.2f}")
+                                            if 'DW2O_BGMean' in stats:
+                                                st.caption(f"DW2O_BGMean: {stats['DW2O_BGMean']:.2f}")
+                                            if 'DW2O_BGDev' in stats:
+                                                st.caption(f"DW2O_BGDev: {stats['DW2O_BGDev']:.2f}")
+                                            if 'DN1O_BGMean' in stats:
+                                                st.caption(f"DN1O_BGMean: {stats['DN1O_BGMean']:.2f}")
+                                            if 'DN1O_BGDev' in stats:
+                                                st.caption(f"DN1O_BGDev: {stats['DN1O_BGDev']:.2f}")
+                    
+            except Exception as e:
+                st.error(f"处理文件时出错: {str(e)}")
+                st.exception(e)
+    
+    elif folder_path and os.path.exists(folder_path):
+        try:
+            # 获取所有子文件夹（不再排除kla文件夹）
+            subfolders = [f for f in os.listdir(folder_path) 
+                         if os.path.isdir(os.path.join(folder_path, f))]
+            
+            if not subfolders:
+                st.warning("未找到子文件夹")
+            else:
+                st.success(f"找到 {len(subfolders)} 个子文件夹")
+                
+                # 显示找到的文件夹
+                with st.expander("子文件夹列表"):
+                    st.write(subfolders)
+                
+                # 绘图参数
+                st.subheader("绘图参数")
+                col1, col2 = st.columns(2)
+                with col1:
+                    center_x = st.number_input("中心X坐标", value=float(wafer_geometry.WAFER_CENTER[0]), key="folder_center_x")
+                    center_y = st.number_input("中心Y坐标", value=float(wafer_geometry.WAFER_CENTER[1]), key="folder_center_y")
+                with col2:
+                    plot_range = st.number_input("绘图范围（半径）", value=wafer_geometry.WAFER_DIAMETER / 2, min_value=1000.0, key="folder_range")
+                    point_size = st.slider("点的大小", min_value=3, max_value=15, value=6, key="folder_size")
+                
+                # 网格显示选项
+                show_grid_folder = st.checkbox("显示背景网格", value=True, key="show_grid_folder", help="控制图表中是否显示背景网格线")
+                
+                # 数据过滤选项
+                st.subheader("数据过滤选项")
+                filter_special_types = st.checkbox(
+                    "过滤特殊类型缺陷（nDefectType=1000/10001）", 
+                    value=True,
+                    key="filter_special_types_folder",
+                    help="仅对CASI数据（BlobFeatures.csv）有效，KLA数据不受影响"
+                )
+                
+                if st.button("生成对比图", type="primary", key="folder_plot_btn"):
+                    # 准备颜色列表
+                    colors = [
+                        '#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8',
+                        '#F7DC6F', '#BB8FCE', '#85C1E2', '#F8B88B', '#AED6F1',
+                        '#A9DFBF', '#F9E79F', '#D7BDE2', '#A2D9CE', '#FAD7A0'
+                    ]
+                    
+                    # 创建图形
+                    fig = go.Figure()
+                    
+                    # 用于存储所有数据
+                    all_data = []
+                    
+                    # 读取每个子文件夹
+                    for idx, subfolder in enumerate(sorted(subfolders)):
+                        # 判断是否为KLA文件夹
+                        is_kla_folder = 'kla' in subfolder.lower()
+                        
+                        if is_kla_folder:
+                            # KLA文件夹：读取文件夹内任意CSV或Excel文件
+                            subfolder_path = os.path.join(folder_path, subfolder)
+                            
+                            # 查找CSV文件
+                            csv_files = glob.glob(os.path.join(subfolder_path, '*.csv'))
+                            # 查找Excel文件
+                            excel_files = glob.glob(os.path.join(subfolder_path, '*.xlsx')) + glob.glob(os.path.join(subfolder_path, '*.xls'))
+                            
+                            all_files = csv_files + excel_files
+                            
+                            if not all_files:
+                                st.warning(f"未找到 {subfolder} 文件夹中的CSV或Excel文件")
+                                continue
+                            
+                            # 使用找到的第一个文件
+                            data_file = all_files[0]
+                            
+                            # 根据文件类型读取
+                            df = data_loader.read_kla_file(data_file)
+                            
+                            # KLA数据不过滤nDefectType
+                            # 使用XREL和YREL作为坐标列
+                            if 'XREL' in df.columns and 'YREL' in df.columns:
+                                x_col = 'XREL'
+                                y_col = 'YREL'
+                                
+                                x_data = pd.to_numeric(df[x_col], errors='coerce')
+                                y_data = pd.to_numeric(df[y_col], errors='coerce')
+                                
+                                # KLA数据没有DW1O_BGMean
+                                dw1o_bgmean = None
+                            else:
+                                st.warning(f"{subfolder}: 文件缺少XREL/YREL列")
+                                continue
+                        else:
+                            # 普通文件夹：查找BlobFeatures.csv或BlobFeatures*.csv文件
+                            csv_files = glob.glob(os.path.join(folder_path, subfolder, 'BlobFeatures*.csv'))
+                            
+                            if not csv_files:
+                                st.warning(f"未找到 {subfolder}/BlobFeatures*.csv")
+                                continue
+                            
+                            csv_path = csv_files[0]  # 使用找到的第一个文件
+                            # 读取CSV（只读取分布图需要的列）
+                            df = data_loader.read_blob_features(csv_path, 'map')
+                            
+                            # 保存原始数据用于统计计算（包含所有nDefectType）
+                            df_original = df.copy()
+                            
+                            # 根据用户选择过滤nDefectType为1000和10001的数据（仅用于绘图）
+                            if filter_special_types and 'nDefectType' in df.columns:
+                                df = df[(df['nDefectType'] != 1000) & (df['nDefectType'] != 10001)]
+                            
+                            # 优先使用dCenterXCartisian_Calib和dCenterYCartisian_Calib列
+                            if 'dCenterXCartisian_Calib' in df.columns and 'dCenterYCartisian_Calib' in df.columns:
+                                x_col = 'dCenterXCartisian_Calib'
+                                y_col = 'dCenterYCartisian_Calib'
+                            elif 'dCenterXCartisian' in df.columns and 'dCenterYCartisian' in df.columns:
+                                x_col = 'dCenterXCartisian'
+                                y_col = 'dCenterYCartisian'
+                            else:
+                                st.warning(f"{subfolder}: BlobFeatures.csv缺少坐标列")
+                                continue
+                            
+                            x_data = pd.to_numeric(df[x_col], errors='coerce')
+                            y_data = pd.to_numeric(df[y_col], errors='coerce')
+                        
+                        # 过滤有效数据（对KLA和CASI数据都适用）
+                        valid_mask = pd.notna(x_data) & pd.notna(y_data)
+                        x_valid = x_data[valid_mask]
+                        y_valid = y_data[valid_mask]
+                        
+                        if len(x_valid) > 0:
+                            # 计算三个通道的BGMean和BGDev均值（使用原始数据，包含1000和10001，排除0值）
+                            bgmean_bgdev_stats = {}
+                            
+                            # 只对非KLA文件夹计算统计值
+                            if not is_kla_folder and 'df_original' in locals():
+                                # DW1O通道
+                                if 'DW1O_BGMean' in df_original.columns:
+                                    dw1o_bgmean_all = pd.to_numeric(df_original['DW1O_BGMean'], errors='coerce').dropna()
+                                    dw1o_bgmean_all = dw1o_bgmean_all[dw1o_bgmean_all != 0]
+                                    if len(dw1o_bgmean_all) > 0:
+                                        bgmean_bgdev_stats['DW1O_BGMean'] = dw1o_bgmean_all.mean()
+                                
+                                if 'DW1O_BGDev' in df_original.columns:
+                                    dw1o_bgdev_all = pd.to_numeric(df_original['DW1O_BGDev'], errors='coerce').dropna()
+                                    dw1o_bgdev_all = dw1o_bgdev_all[dw1o_bgdev_all != 0]
+                                    if len(dw1o_bgdev_all) > 0:
+                                        bgmean_bgdev_stats['DW1O_BGDev'] = dw1o_bgdev_all.mean()
+                                
+                                # DW2O通道
+                                if 'DW2O_BGMean' in df_original.columns:
+                                    dw2o_bgmean_all = pd.to_numeric(df_original['DW2O_BGMean'], errors='coerce').dropna()
+                                    dw2o_bgmean_all = dw2o_bgmean_all[dw2o_bgmean_all != 0]
+                                    if len(dw2o_bgmean_all) > 0:
+                                        bgmean_bgdev_stats['DW2O_BGMean'] = dw2o_bgmean_all.mean()
+                                
+                                if 'DW2O_BGDev' in df_original.columns:
+                                    dw2o_bgdev_all = pd.to_numeric(df_original['DW2O_BGDev'], errors='coerce').dropna()
+                                    dw2o_bgdev_all = dw2o_bgdev_all[dw2o_bgdev_all != 0]
+                                    if len(dw2o_bgdev_all) > 0:
+                                        bgmean_bgdev_stats['DW2O_BGDev'] = dw2o_bgdev_all.mean()
+                                
+                                # DN1O通道
+                                if 'DN1O_BGMean' in df_original.columns:
+                                    dn1o_bgmean_all = pd.to_numeric(df_original['DN1O_BGMean'], errors='coerce').dropna()
+                                    dn1o_bgmean_all = dn1o_bgmean_all[dn1o_bgmean_all != 0]
+                                    if len(dn1o_bgmean_all) > 0:
+                                        bgmean_bgdev_stats['DN1O_BGMean'] = dn1o_bgmean_all.mean()
+                                
+                                if 'DN1O_BGDev' in df_original.columns:
+                                    dn1o_bgdev_all = pd.to_numeric(df_original['DN1O_BGDev'], errors='coerce').dropna()
+                                    dn1o_bgdev_all = dn1o_bgdev_all[dn1o_bgdev_all != 0]
+                                    if len(dn1o_bgdev_all) > 0:
+                                        bgmean_bgdev_stats['DN1O_BGDev'] = dn1o_bgdev_all.mean()
+                            
+                            # 存储数据用于统计
+                            all_data.append({
+                                'folder': subfolder,
+                                'count': len(x_valid),
+                                'x_data': x_valid,
+                                'y_data': y_valid,
+                                'bgmean_bgdev_stats': bgmean_bgdev_stats
+                            })
+                            
+                            # 创建悬浮文本
+                            hover_text = [
+                                f"<b>{subfolder}</b><br>X: {x:.2f}<br>Y: {y:.2f}"
+                                for x, y in zip(x_valid, y_valid)
+                            ]
+                            
+                            # 添加散点图
+                            color = colors[idx % len(colors)]
+                            fig.add_trace(go.Scatter(
+                                x=x_valid,
+                                y=y_valid,
+                                mode='markers',
+                                name=f'{subfolder} ({len(x_valid)})',
+                                marker=dict(
+                                    size=point_size,
+                                    color=color,
+                                    line=dict(width=0.5, color='white'),
+                                    opacity=0.7
+                                ),
+                                hovertext=hover_text,
+                                hoverinfo='text'
+                            ))
+                    
+                    if not all_data:
+                        st.error("未找到有效的数据文件")
+                    else:
+                        # 添加晶圆边界圆
+                        circle_x, circle_y = wafer_geometry.boundary_circle((center_x, center_y), plot_range)
+                        
+                        fig.add_trace(go.Scatter(
+                            x=circle_x,
+                            y=circle_y,
+                            mode='lines',
+                            name='晶圆边界',
+                            line=dict(color='gray', width=2, dash='dash'),
+                            showlegend=True,
+                            hoverinfo='skip'
+                        ))
+                        
+                        # 设置布局
+                        fig.update_layout(
+                            title=dict(
+                                text='多文件夹缺陷对比图',
+                                x=0.5,
+                                xanchor='center',
+                                font=dict(size=20)
+                            ),
+                            xaxis=dict(
+                                title='X坐标',
+                                range=[center_x - plot_range - 10000, center_x + plot_range + 10000],
+                                scaleanchor="y",
+                                scaleratio=1,
+                                showgrid=show_grid_folder,
+                                gridcolor='lightgray'
+                            ),
+                            yaxis=dict(
+                                title='Y坐标',
+                                range=[center_y - plot_range - 10000, center_y + plot_range + 10000],
+                                showgrid=show_grid_folder,
+                                gridcolor='lightgray'
+                            ),
+                            plot_bgcolor='white',
+                            hovermode='closest',
+                            width=900,
+                            height=900,
+                            legend=dict(
+                                orientation="v",
+                                yanchor="top",
+                                y=1,
+                                xanchor="left",
+                                x=1.02,
+                                bgcolor='rgba(255,255,255,0.9)',
+                                bordercolor='gray',
+                                borderwidth=1
+                            )
+                        )
+                        
+                        # 显示图形
+                        st.plotly_chart(fig, use_container_width=True)
+                        
+                        # 显示统计信息
+                        st.subheader("统计信息")
+                        
+                        # 创建统计表格
+                        stats_data = []
+                        total_defects = sum(d['count'] for d in all_data)
+                        
+                        for data in all_data:
+                            row = {
+                                '文件夹': data['folder'],
+                                '缺陷数量': data['count'],
+                                '占比': f"{(data['count'] / total_defects * 100):.2f}%"
+                            }
+                            
+                            # 添加三个通道的BGMean和BGDev均值
+                            stats = data.get('bgmean_bgdev_stats', {})
+                            row['DW1O_BGMean均值'] = f"{stats.get('DW1O_BGMean', 0):.2f}" if 'DW1O_BGMean' in stats else 'N/A'
+                            row['DW1O_BGDev均值'] = f"{stats.get('DW1O_BGDev', 0):.2f}" if 'DW1O_BGDev' in stats else 'N/A'
+                            row['DW2O_BGMean均值'] = f"{stats.get('DW2O_BGMean', 0):.2f}" if 'DW2O_BGMean' in stats else 'N/A'
+                            row['DW2O_BGDev均值'] = f"{stats.get('DW2O_BGDev', 0):.2f}" if 'DW2O_BGDev' in stats else 'N/A'
+                            row['DN1O_BGMean均值'] = f"{stats.get('DN1O_BGMean', 0):.2f}" if 'DN1O_BGMean' in stats else 'N/A'
+                            row['DN1O_BGDev均值'] = f"{stats.get('DN1O_BGDev', 0):.2f}" if 'DN1O_BGDev' in stats else 'N/A'
+                            
+                            stats_data.append(row)
+                        
+                        stats_df = pd.DataFrame(stats_data)
+                        
+                        # 显示指标卡片
+                        cols = st.columns(min(len(all_data) + 1, 5))
+                        for i, data in enumerate(all_data):
+                            with cols[i % 5]:
+                                st.metric(data['folder'], data['count'])
+                        
+                        if len(all_data) % 5 == 4 or len(all_data) < 5:
+                            with cols[len(all_data) % 5 if len(all_data) < 5 else 4]:
+                                st.metric("总计", total_defects)
+                        else:
+                            st.metric("总计", total_defects)
+                        
+                        # 显示详细统计表
+                        st.write("### 详细统计")
+                        st.dataframe(stats_df, use_container_width=True)
+                        
+                        # 柱状图对比
+                        st.write("### 缺陷数量对比")
+                        fig_bar = go.Figure(data=[
+                            go.Bar(
+                                x=[d['folder'] for d in all_data],
+                                y=[d['count'] for d in all_data],
+                                marker_color=[colors[i % len(colors)] for i in range(len(all_data))],
+                                text=[d['count'] for d in all_data],
+                                textposition='auto',
+                            )
+                        ])
+                        fig_bar.update_layout(
+                            title='各文件夹缺陷数量对比',
+                            xaxis_title='文件夹',
+                            yaxis_title='缺陷数量',
+                            showlegend=False,
+                            height=400
+                        )
+                        st.plotly_chart(fig_bar, use_container_width=True)
+                        
+                        # 单独显示每个文件夹 - 每行5个
+                        st.write("---")
+                        st.subheader("各文件夹单独显示")
+                        
+                        # 每行显示5个文件夹
+                        num_per_row = 5
+                        for row_start in range(0, len(all_data), num_per_row):
+                            cols = st.columns(num_per_row)
+                            row_end = min(row_start + num_per_row, len(all_data))
+                            
+                            for col_idx, data_idx in enumerate(range(row_start, row_end)):
+                                data = all_data[data_idx]
+                                
+                                with cols[col_idx]:
+                                    with st.expander(f"📊 {data['folder']}", expanded=False):
+                                        st.write(f"**缺陷数量: {data['count']}**")
+                                        
+                                        # 创建单独的图形
+                                        fig_single = go.Figure()
+                                        
+                                        # 创建悬浮文本
+                                        hover_text = [
+                                            f"<b>{data['folder']}</b><br>X: {x:.2f}<br>Y: {y:.2f}"
+                                            for x, y in zip(data['x_data'], data['y_data'])
+                                        ]
+                                        
+                                        # 添加散点图
+                                        color = colors[data_idx % len(colors)]
+                                        fig_single.add_trace(go.Scatter(
+                                            x=data['x_data'],
+                                            y=data['y_data'],
+                                            mode='markers',
+                                            name=f"{data['folder']}",
+                                            marker=dict(
+                                                size=point_size + 2,  # 单独显示时点稍微大一点
+                                                color=color,
+                                                line=dict(width=0.5, color='white'),
+                                                opacity=0.8
+                                            ),
+                                            hovertext=hover_text,
+                                            hoverinfo='text'
+                                        ))
+                                        
+                                        # 添加晶圆边界圆
+                                        circle_x_single, circle_y_single = wafer_geometry.boundary_circle((center_x, center_y), plot_range)
+                                        
+                                        fig_single.add_trace(go.Scatter(
+                                            x=circle_x_single,
+                                            y=circle_y_single,
+                                            mode='lines',
+                                            name='晶圆边界',
+                                            line=dict(color='gray', width=2, dash='dash'),
+                                            showlegend=False,
+                                            hoverinfo='skip'
+                                        ))
+                                        
+                                        # 设置布局
+                                        fig_single.update_layout(
+                                            title=dict(
+                                                text=f'{data["folder"]}',
+                                                x=0.5,
+                                                xanchor='center',
+                                                font=dict(size=14)
+                                            ),
+                                            xaxis=dict(
+                                                title='',
+                                                range=[center_x - plot_range - 10000, center_x + plot_range + 10000],
+                                                scaleanchor="y",
+                                                scaleratio=1,
+                                                showgrid=show_grid_folder,
+                                                gridcolor='lightgray',
+                                                showticklabels=False
+                                            ),
+                                            yaxis=dict(
+                                                title='',
+                                                range=[center_y - plot_range - 10000, center_y + plot_range + 10000],
+                                                showgrid=show_grid_folder,
+                                                gridcolor='lightgray',
+                                                showticklabels=False
+                                            ),
+                                            plot_bgcolor='white',
+                                            hovermode='closest',
+                                            height=300,
+                                            showlegend=False,
+                                            margin=dict(l=20, r=20, t=40, b=20)
+                                        )
+                                        
+                                        # 显示图形
+                                        st.plotly_chart(fig_single, use_container_width=True)
+                                        
+                                        # 显示该文件夹的统计信息
+                                        st.metric("缺陷数", data['count'])
+                                        st.caption(f"X: {data['x_data'].min():.0f}~{data['x_data'].max():.0f}")
+                                        st.caption(f"Y: {data['y_data'].min():.0f}~{data['y_data'].max():.0f}")
+                                        
+                                        # 显示三个通道的BGMean和BGDev均值
+                                        stats = data.get('bgmean_bgdev_stats', {})
+                                        if stats:
+                                            st.write("**通道统计（均值）：**")
+                                            if 'DW1O_BGMean' in stats:
+                                                st.caption(f"DW1O_BGMean: {stats['DW1O_BGMean']:.2f}")
+                                            if 'DW1O_BGDev' in stats:
+                                                st.caption(f"DW1O_BGDev: {stats['DW1O_BGDev']:.2f}")
+                                            if 'DW2O_BGMean' in stats:
+                                                st.caption(f"DW2O_BGMean: {stats['DW2O_BGMean']:.2f}")
+                                            if 'DW2O_BGDev' in stats:
+                                                st.caption(f"DW2O_BGDev: {stats['DW2O_BGDev']:.2f}")
+                                            if 'DN1O_BGMean' in stats:
+                                                st.caption(f"DN1O_BGMean: {stats['DN1O_BGMean']:.2f}")
+                                            if 'DN1O_BGDev' in stats:
+                                                st.caption(f"DN1O_BGDev: {stats['DN1O_BGDev']:.2f}")
+                
+        except Exception as e:
+            st.error(f"处理文件夹时出错: {str(e)}")
+            st.exception(e)
+    
+    elif folder_path:
+        st.error("文件夹路径不存在，请检查路径是否正确")
+
+    # 新增：缺陷坐标匹配和SNR对比分析
+    st.write("---")
+    st.header("📍 多工况间匹配上的缺陷特征对比")
+    
+    with st.expander("ℹ️ 功能说明", expanded=False):
+        st.markdown("""
+        对多个子文件夹中的CSV文件进行坐标匹配，比较相同缺陷在不同工况下的特征值，包括snr,bgmean,bgdev等。
+        
+        **功能特点：**
+        - 自动读取子文件夹中的任意CSV文件（不限文件名）
+        - 自动过滤nDefectType为1000、10001、10002的数据
+        - 匹配范围：50个单位（可调整）
+        - 匹配方式：最近邻，或一对一分配（先互为最近，再按最小总距离分配剩余缺陷）
+        - N路聚类：合并所有工况的缺陷聚类，每个簇一行，只在非基准工况出现的缺陷也会输出
+        - 自动排除文件夹名称包含"KLA"的文件
+        - 输出匹配结果表格，包含坐标、各工况SNR值
+        - 支持导出为CSV文件
+        """)
+    
+    # 输入文件夹路径
+    match_folder_path = st.text_input("输入主文件夹路径（用于匹配分析）", 
+                                      placeholder=r"例如: D:\hazemap\ClassifyData",
+                                      key="match_folder_path")
+    
+    # 匹配参数
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        match_threshold = st.number_input("匹配距离阈值", value=50.0, min_value=1.0, max_value=500.0, 
+                                         help="两个缺陷之间的最大距离，超过此距离则不视为同一缺陷")
+    with col2:
+        match_mode = st.selectbox("匹配方式", list(condition_match.MATCH_MODES.keys()),
+                                  format_func=condition_match.MATCH_MODES.get,
+                                  key="condition_match_mode",
+                                  help="一对一分配：其他工况中的每个缺陷最多被一个基准缺陷匹配，避免重复计数；"
+                                       "N路聚类：不以基准工况为锚点，每个簇内每个工况最多一个缺陷")
+    with col3:
+        show_unmatched = st.checkbox("显示未匹配的缺陷", value=False,
+                                     help="是否在结果中包含只在单个工况中出现的缺陷")
+    
+    if match_folder_path and os.path.exists(match_folder_path):
+        if st.button("开始匹配分析", type="primary", key="match_analysis_btn"):
+            try:
+                # 获取所有子文件夹，排除包含"KLA"的文件夹
+                subfolders, kla_folders = condition_match.split_condition_folders(match_folder_path)
+                
+                if not subfolders:
+                    st.warning("未找到有效的子文件夹（排除KLA文件夹后）")
+                else:
+                    st.info(f"找到 {len(subfolders)} 个有效文件夹，已排除 {len(kla_folders)} 个KLA文件夹")
+                    
+                    if kla_folders:
+                        with st.expander("已排除的KLA文件夹"):
+                            st.write(kla_folders)
+                    
+                    # 读取所有文件夹的数据
+                    with st.spinner("正在读取数据..."):
+                        folder_data = condition_match.load_condition_folders(
+                            match_folder_path, subfolders,
+                            log=st_log
+                        )
+                    
+                    if len(folder_data) < 2:
+                        st.warning("需要至少2个文件夹的数据才能进行匹配")
+                    else:
+                        # 执行匹配
+                        with st.spinner("正在匹配缺陷..."):
+                            results_df, sorted_folders = condition_match.match_conditions(
+                                folder_data, match_threshold, show_unmatched, mode=match_mode
+                            )
+                            
+                            # 创建结果DataFrame
+                            if results_df is not None:
+                                
+                                # 显示统计信息
+                                st.subheader("匹配统计")
+                                col1, col2, col3, col4 = st.columns(4)
+                                
+                                with col1:
+                                    if match_mode == 'cluster':
+                                        # N路聚类没有基准工况，统计全部工况的缺陷和聚类数
+                                        st.metric("总缺陷数（全部工况）", sum(len(df) for df in folder_data.values()))
+                                    else:
+                                        st.metric("总缺陷数（基准）", len(folder_data[sorted_folders[0]]))
+                                with col2:
+                                    st.metric("聚类数" if match_mode == 'cluster' else "匹配结果数", len(results_df))
+                                with col3:
+                                    fully_matched = len(results_df[results_df['匹配数量'] == len(folder_data)])
+                                    st.metric("完全匹配", fully_matched)
+                                with col4:
+                                    partial_matched = len(results_df[results_df['匹配数量'] > 1]) - fully_matched
+                                    st.metric("部分匹配", partial_matched)
+                                
+                                # 显示结果表格
+                                st.subheader("匹配结果详细表格")
+                                st.dataframe(results_df, use_container_width=True, height=400)
+                                
+                                # 提供CSV下载
+                                csv = results_df.to_csv(index=False, encoding='utf-8-sig')
+                                st.download_button(
+                                    label="📥 下载匹配结果（CSV）",
+                                    data=csv,
+                                    file_name=f"defect_match_results_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                    mime="text/csv",
+                                    key="download_original_csv"
+                                )
+                                
+                                # SNR对比分析
+                                st.subheader("SNR对比分析")
+                                
+                                # 只分析完全匹配的缺陷
+                                fully_matched_df = results_df[results_df['匹配数量'] == len(folder_data)].copy()
+                                
+                                if len(fully_matched_df) > 0:
+                                    st.write(f"完全匹配的缺陷数量: {len(fully_matched_df)}")
+                                    
+                                    # 创建SNR对比箱线图
+                                    snr_columns = [col for col in results_df.columns if col.endswith('_SNR')]
+                                    
+                                    if snr_columns:
+                                        # 准备绘图数据
+                                        plot_data = []
+                                        for col in snr_columns:
+                                            folder_name = col.replace('_SNR', '')
+                                            snr_values = fully_matched_df[col].dropna()
+                                            for val in snr_values:
+                                                plot_data.append({
+                                                    '工况': folder_name,
+                                                    'SNR': val
+                                                })
+                                        
+                                        if plot_data:
+                                            plot_df = pd.DataFrame(plot_data)
+                                            
+                                            # 箱线图（KLA文件夹在最后）
+                                            fig_box = go.Figure()
+                                            for folder in sorted_folders:
+                                                folder_snr = plot_df[plot_df['工况'] == folder]['SNR']
+                                                fig_box.add_trace(go.Box(
+                                                    y=folder_snr,
+                                                    name=folder,
+                                                    boxmean='sd'
+                                                ))
+                                            
+                                            fig_box.update_layout(
+                                                title='各工况SNR分布对比（完全匹配缺陷）',
+                                                yaxis_title='DW1O_TotalSNR',
+                                                xaxis_title='工况',
+                                                showlegend=False,
+                                                height=500
+                                            )
+                                            
+                                            st.plotly_chart(fig_box, use_container_width=True)
+                                            
+                                            # 统计摘要 - SNR（KLA文件夹在最后）
+                                            st.write("### SNR统计摘要")
+                                            summary_data = []
+                                            for folder in sorted_folders:
+                                                folder_snr = plot_df[plot_df['工况'] == folder]['SNR']
+                                                if len(folder_snr) > 0:
+                                                    summary_data.append({
+                                                        '工况': folder,
+                                                        '平均值': folder_snr.mean(),
+                                                        '中位数': folder_snr.median(),
+                                                        '标准差': folder_snr.std(),
+                                                        '最小值': folder_snr.min(),
+                                                        '最大值': folder_snr.max()
+                                                    })
+                                            
+                                            summary_df = pd.DataFrame(summary_data)
+                                            st.dataframe(summary_df.round(2), use_container_width=True)
+                                    
+                                    # MaxOrg对比分析
+                                    maxorg_columns = [col for col in results_df.columns if col.endswith('_MaxOrg')]
+                                    
+                                    if maxorg_columns:
+                                        st.write("### DW1O_MaxOrg对比分析")
+                                        
+                                        # 准备绘图数据
+                                        plot_data_maxorg = []
+                                        for col in maxorg_columns:
+                                            folder_name = col.replace('_MaxOrg', '')
+                                            maxorg_values = fully_matched_df[col].dropna()
+                                            for val in maxorg_values:
+                                                plot_data_maxorg.append({
+                                                    '工况': folder_name,
+                                                    'MaxOrg': val
+                                                })
+                                        
+                                        if plot_data_maxorg:
+                                            plot_df_maxorg = pd.DataFrame(plot_data_maxorg)
+                                            
+                                            # 箱线图（KLA文件夹在最后）
+                                            fig_maxorg = go.Figure()
+                                            for folder in sorted_folders:
+                                                folder_maxorg = plot_df_maxorg[plot_df_maxorg['工况'] == folder]['MaxOrg']
+                                                fig_maxorg.add_trace(go.Box(
+                                                    y=folder_maxorg,
+                                                    name=folder,
+                                                    boxmean='sd'
+                                                ))
+                                            
+                                            fig_maxorg.update_layout(
+                                                title='各工况MaxOrg分布对比（完全匹配缺陷）',
+                                                yaxis_title='DW1O_MaxOrg',
+                                                xaxis_title='工况',
+                                                showlegend=False,
+                                                height=500
+                                            )
+                                            
+                                            st.plotly_chart(fig_maxorg, use_container_width=True)
+                                            
+                                            # 统计摘要（KLA文件夹在最后）
+                                            summary_maxorg = []
+                                            for folder in sorted_folders:
+                                                folder_maxorg = plot_df_maxorg[plot_df_maxorg['工况'] == folder]['MaxOrg']
+                                                if len(folder_maxorg) > 0:
+                                                    summary_maxorg.append({
+                                                        '工况': folder,
+                                                        '平均值': folder_maxorg.mean(),
+                                                        '中位数': folder_maxorg.median(),
+                                                        '标准差': folder_maxorg.std(),
+                                                        '最小值': folder_maxorg.min(),
+                                                        '最大值': folder_maxorg.max()
+                                                    })
+                                            
+                                            summary_maxorg_df = pd.DataFrame(summary_maxorg)
+                                            st.dataframe(summary_maxorg_df.round(2), use_container_width=True)
+                                    
+                                    # BGDev对比分析
+                                    bgdev_columns = [col for col in results_df.columns if col.endswith('_BGDev')]
+                                    
+                                    if bgdev_columns:
+                                        st.write("### DW1O_BGDev对比分析")
+                                        
+                                        # 准备绘图数据
+                                        plot_data_bgdev = []
+                                        for col in bgdev_columns:
+                                            folder_name = col.replace('_BGDev', '')
+                                            bgdev_values = fully_matched_df[col].dropna()
+                                            for val in bgdev_values:
+                                                plot_data_bgdev.append({
+                                                    '工况': folder_name,
+                                                    'BGDev': val
+                                                })
+                                        
+                                        if plot_data_bgdev:
+                                            plot_df_bgdev = pd.DataFrame(plot_data_bgdev)
+                                            
+                                            # 箱线图（KLA文件夹在最后）
+                                            fig_bgdev = go.Figure()
+                                            for folder in sorted_folders:
+                                                folder_bgdev = plot_df_bgdev[plot_df_bgdev['工况'] == folder]['BGDev']
+                                                fig_bgdev.add_trace(go.Box(
+                                                    y=folder_bgdev,
+                                                    name=folder,
+                                                    boxmean='sd'
+                                                ))
+                                            
+                                            fig_bgdev.update_layout(
+                                                title='各工况BGDev分布对比（完全匹配缺陷）',
+                                                yaxis_title='DW1O_BGDev',
+                                                xaxis_title='工况',
+                                                showlegend=False,
+                                                height=500
+                                            )
+                                            
+                                            st.plotly_chart(fig_bgdev, use_container_width=True)
+                                            
+                                            # 统计摘要（KLA文件夹在最后）
+                                            summary_bgdev = []
+                                            for folder in sorted_folders:
+                                                folder_bgdev = plot_df_bgdev[plot_df_bgdev['工况'] == folder]['BGDev']
+                                                if len(folder_bgdev) > 0:
+                                                    summary_bgdev.append({
+                                                        '工况': folder,
+                                                        '平均值': folder_bgdev.mean(),
+                                                        '中位数': folder_bgdev.median(),
+                                                        '标准差': folder_bgdev.std(),
+                                                        '最小值': folder_bgdev.min(),
+                                                        '最大值': folder_bgdev.max()
+                                                    })
+                                            
+                                            summary_bgdev_df = pd.DataFrame(summary_bgdev)
+                                            st.dataframe(summary_bgdev_df.round(2), use_container_width=True)
+                                else:
+                                    st.info("没有在所有工况中都匹配到的缺陷")
+                            else:
+                                st.warning("未找到匹配的缺陷")
+                
+            except Exception as e:
+                st.error(f"匹配分析时出错: {str(e)}")
+                st.exception(e)
+    
+    elif match_folder_path:
+        st.error("文件夹路径不存在，请检查路径是否正确")
+
+    # 新增：CASI与KLA匹配分析（基于您的match函数逻辑）
+    st.write("---")
+    st.header("🔍 CASI与KLA匹配分析")
+    
+    with st.expander("ℹ️ 功能说明", expanded=False):
+        st.markdown("""
+        对多个子文件夹进行CASI与KLA的匹配分析，统计过检、漏检和正确检出。
+        
+        **四种数据输入方式：**
+        
+        **方式1：主文件夹模式**
+        - **方式适用范围**：多个casi文件为不同工况，对应的用一个kla文件，分别在不同文件夹内
+        ```
+        主文件夹/
+        ├── CASI_inspection_1/
+        │   └── BlobFeatures.csv          (CASI数据)
+        ├── CASI_inspection_2/
+        │   └── BlobFeatures.csv          (CASI数据)
+        ├── KLA_1/
+        │   └── *.csv 或 *.xlsx           (KLA数据，任意文件名)
+        └── KLA_2/
+            └── *.csv 或 *.xlsx           (KLA数据，任意文件名)
+        ```
+        - **CASI子文件夹**（不含"KLA"）：读取 `BlobFeatures.csv`
+          - 坐标列：`dCenterXCartisian_Calib`、`dCenterYCartisian_Calib`（或无_Calib版本）
+        - **KLA子文件夹**（含"KLA"）：读取任意CSV或Excel文件
+          - 坐标列：`XREL`、`YREL`
+        
+        **方式2：单文件夹模式**
+        - **方式适用范围**：多个casi文件为不同工况，对应的同一个kla文件，且都在一个文件夹内
+        ```
+        数据文件夹/
+        ├── casi_data_1.csv               (CASI数据)
+        ├── BlobFeatures.csv               (CASI数据)
+        ├── kla_data_1.csv                (KLA数据，文件名含"kla")
+        └── kla_data_2.csv                (KLA数据，文件名含"kla")
+        ```
+        - 名称中包含"kla"的CSV文件为KLA数据
+        - 其他CSV文件为CASI数据
+        
+        **方式3：手动选择文件模式（多Sheet匹配）**
+        - **方式适用范围**：一个CASI文件和一个KLA文件，各包含多个Sheet，按Sheet名称配对匹配
+        ```
+        手动上传：
+        - CASI文件：casi_data.xlsx (包含多个Sheet: Sheet1, Sheet2, Sheet3...)
+        - KLA文件：kla_data.xlsx (包含多个Sheet: Sheet1, Sheet2, Sheet3...)
+        
+        匹配方式：
+        CASI[Sheet1] ←→ KLA[Sheet1]
+        CASI[Sheet2] ←→ KLA[Sheet2]
+        CASI[Sheet3] ←→ KLA[Sheet3]
+        ```
+        - 通过文件上传控件选择CASI和KLA文件
+        - 支持CSV或Excel格式（Excel支持多Sheet）
+        - 自动按Sheet名称配对进行匹配
+        - 每个Sheet单独输出结果 + 总汇总结果
+        
+        **方式4：CASI文件夹 + KLA多Sheet文件匹配**
+        - **方式适用范围**：CASI为文件夹包含多个子文件夹，KLA为单个Excel/CSV文件包含多个Sheet，按文件夹名与Sheet名对应匹配
+        ```
+        CASI主文件夹/
+        ├── slot15/
+        │   └── *.csv                     (CASI数据，任意CSV文件)
+        ├── slot16/
+        │   └── *.csv                     (CASI数据，任意CSV文件)
+        └── slot17/
+            └── *.csv                     (CASI数据，任意CSV文件)
+        
+        KLA文件：kla_data.xlsx
+        ├── slot15                         (KLA数据 Sheet)
+        ├── slot16                         (KLA数据 Sheet)
+        └── slot17                         (KLA数据 Sheet)
+        
+        匹配方式：
+        CASI[slot15/*.csv] ←→ KLA[Sheet: slot15]
+        CASI[slot16/*.csv] ←→ KLA[Sheet: slot16]
+        CASI[slot17/*.csv] ←→ KLA[Sheet: slot17]
+        ```
+        - CASI：选择包含多个子文件夹的主文件夹路径，每个子文件夹包含至少一个CSV文件
+        - CSV文件选择：优先选择文件名包含"BlobFeatures"的文件，否则选择第一个CSV文件
+        - 坐标列：优先使用 dCenterXCartisian_Calib/dCenterYCartisian_Calib，否则使用 dCenterXCartisian/dCenterYCartisian
+        - KLA：手动上传Excel或CSV文件（Excel支持多Sheet）
+        - 按子文件夹名与Sheet名自动匹配
+        - 每个配对单独输出结果 + 总汇总结果
+        
+        **匹配逻辑：**
+        - CASI数据自动过滤nDefectType=1000和10001
+        - 与KLA数据进行坐标匹配
+        - 匹配结果分类：
+          - 0 = 过检（CASI有但KLA无，且为非特殊类型）
+          - -2 = 过检（CASI有但KLA无，但为特殊类型nDefectType=1000/10001）
+          - 1 = 正确检出（一对一）
+          - 3 = 正确检出（多CASI对一KLA，非特殊类型）
+          - 4, 5 = 正确检出（一对多、多对多）
+          - 2 = 漏检（KLA有但CASI无，或CASI为特殊类型）
+          - -3 = 多CASI对一KLA中的特殊类型
+        """)
+    
+    # 选择输入方式
+    st.subheader("选择数据输入方式")
+    input_mode = st.radio(
+        "选择输入方式",
+        ["方式1：选择主文件夹", "方式2：选择单个文件夹（包含所有CSV）", "方式3：手动上传文件（多Sheet匹配）", "方式4：CASI文件夹 + KLA多Sheet文件"],
+        key="kla_input_mode"
+    )
+    
+    # 输入文件夹路径或文件上传
+    if input_mode == "方式1：选择主文件夹":
+        kla_match_folder = st.text_input("输入主文件夹路径（用于KLA匹配）", 
+                                         placeholder=r"例如: D:\data\wafer_folders",
+                                         key="kla_match_folder")
+        st.info("📁 方式1：主文件夹包含多个子文件夹，CASI文件夹中读取BlobFeatures.csv，KLA文件夹中读取任意CSV/Excel文件")
+    elif input_mode == "方式2：选择单个文件夹（包含所有CSV）":
+        kla_match_folder = st.text_input("输入包含所有CSV文件的文件夹路径", 
+                                         placeholder=r"例如: D:\data\csv_files",
+                                         key="kla_match_folder_single")
+        st.info("📁 方式2：文件夹内包含多个CSV文件，其中名称包含'kla'的为KLA数据，其他CSV为CASI数据")
+    elif input_mode == "方式3：手动上传文件（多Sheet匹配）":
+        st.info("📤 方式3：手动上传CASI和KLA文件，支持CSV或Excel格式（Excel可包含多个Sheet）")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            casi_uploaded_file = st.file_uploader(
+                "上传CASI文件",
+                type=['csv', 'xlsx', 'xls'],
+                key="casi_upload_file",
+                help="上传CASI数据文件，支持CSV或Excel格式"
+            )
+        with col2:
+            kla_uploaded_file = st.file_uploader(
+                "上传KLA文件",
+                type=['csv', 'xlsx', 'xls'],
+                key="kla_upload_file",
+                help="上传KLA数据文件，支持CSV或Excel格式"
+            )
+        
+        kla_match_folder = None  # 方式3不需要文件夹路径
+    else:  # 方式4：CASI文件夹 + KLA多Sheet文件
+        st.info("📁📤 方式4：CASI为包含多个子文件夹的主文件夹，KLA为Excel/CSV文件（包含多个Sheet），按文件夹名与Sheet名匹配")
+        
+        kla_match_folder = st.text_input("输入CASI主文件夹路径", 
+                                         placeholder=r"例如: D:\data\casi_folders",
+                                         key="kla_match_folder_mode4")
+        
+        kla_uploaded_file = st.file_uploader(
+            "上传KLA文件（Excel或CSV）",
+            type=['csv', 'xlsx', 'xls'],
+            key="kla_upload_file_mode4",
+            help="上传包含多个Sheet的KLA数据文件"
+        )
+    
+    # 匹配参数
+    col1, col2 = st.columns(2)
+    with col1:
+        kla_match_threshold = st.number_input("KLA匹配距离阈值", value=200.0, min_value=1.0, max_value=10000.0,
+                                             help="CASI和KLA之间的最大匹配距离")
+    with col2:
+        kla_auto_align = st.checkbox("匹配前自动对齐坐标", value=False, key="kla_auto_align",
+                                     help="估计CASI与KLA坐标之间的平移/旋转/缩放并校正后再匹配，"
+                                          "避免为补偿系统偏移而放大匹配阈值")
+        kla_align_radius = st.number_input("对齐搜索半径", value=5 * kla_match_threshold, min_value=1.0,
+                                           max_value=100000.0, key="kla_align_radius",
+                                           disabled=not kla_auto_align,
+                                           help="估计平移时允许的最大偏移量")
+    kla_match_threshold = radius_rule_input(kla_match_threshold, "kla_radius")
+    with st.expander("晶圆几何参数", expanded=False):
+        geo_col1, geo_col2, geo_col3, geo_col4 = st.columns(4)
+        with geo_col1:
+            wafer_center_x = st.number_input("晶圆中心X", value=float(wafer_geometry.WAFER_CENTER[0]),
+                                             key="kla_wafer_center_x")
+        with geo_col2:
+            wafer_center_y = st.number_input("晶圆中心Y", value=float(wafer_geometry.WAFER_CENTER[1]),
+                                             key="kla_wafer_center_y")
+        with geo_col3:
+            wafer_diameter = st.number_input("晶圆直径", value=float(wafer_geometry.WAFER_DIAMETER), min_value=1.0,
+                                             key="kla_wafer_diameter")
+        with geo_col4:
+            edge_exclusion = st.number_input("边缘去除宽度", value=float(wafer_geometry.EDGE_EXCLUSION), min_value=0.0,
+                                             key="kla_edge_exclusion",
+                                             help="到中心距离 >= 直径/2 - 边缘去除宽度 的过检点记为边缘点，不计入过检")
+    kla_geometry = wafer_geometry.make_geometry((wafer_center_x, wafer_center_y), wafer_diameter, edge_exclusion)
+    jobs_col, cache_col = st.columns(2)
+    with jobs_col:
+        kla_match_jobs = st.number_input("并行进程数", value=min(os.cpu_count() or 1, 8), min_value=1,
+                                         max_value=os.cpu_count() or 1, key="kla_match_jobs",
+                                         help="各组CASI/KLA数据在多个进程中并行匹配，为1时顺序执行")
+    with cache_col:
+        use_match_cache = st.checkbox("使用匹配结果缓存", value=True, key="kla_use_match_cache",
+                                      help="输入数据和匹配参数都未变化的组合直接读取上次的结果")
+        n_cached, cached_bytes = match_cache.cache_size(match_cache.DEFAULT_CACHE_DIR)
+        st.caption(f"缓存：{n_cached} 项，{data_loader.format_bytes(cached_bytes)}")
+        if st.button("清除匹配缓存", key="kla_clear_match_cache", disabled=n_cached == 0):
+            match_cache.clear(match_cache.DEFAULT_CACHE_DIR)
+            st.rerun()
+    match_cache_dir = match_cache.DEFAULT_CACHE_DIR if use_match_cache else None
+
+    size_col1, size_col2, size_col3 = st.columns(3)
+    with size_col1:
+        size_bin_min = st.number_input("尺寸统计起点(nm)", value=kla_match.SIZE_BIN_MIN, min_value=0, step=1,
+                                       key="kla_size_bin_min",
+                                       help="起点/终点同时用于汇总表中正确检出/漏检的DSIZE统计（方式1/2/3，修改后需重新匹配）")
+    with size_col2:
+        size_bin_max = st.number_input("尺寸统计终点(nm)", value=kla_match.SIZE_BIN_MAX, min_value=1, step=1,
+                                       key="kla_size_bin_max")
+    with size_col3:
+        size_bin_width = st.number_input("尺寸区间宽度(nm)", value=1, min_value=1, step=1, key="kla_size_bin_width",
+                                         help="尺寸检出率统计表的区间宽度")
+
+    def pair_progress():
+        """创建进度条，返回 map_pairs 的进度回调"""
+        progress_bar = st.progress(0.0)
+        status_text = st.empty()
+
+        def on_progress(done, total, name):
+            progress_bar.progress(done / total)
+            status_text.text(f"已完成 {done}/{total}：{name}")
+        return on_progress
+
+    def run_pair_jobs(job, tasks):
+        """在进程池中并行执行各组匹配，逐组显示进度，返回有效结果（保持任务顺序）"""
+        results = kla_match.map_pairs(job, tasks, jobs=kla_match_jobs, progress=pair_progress(), log=st_log)
+        return [result for result in results if result is not None]
+
+    # with col2:
+    #     block_size_param = st.number_input("分块大小", value=10000.0, min_value=1000.0,
+    #                                       help="用于坐标分块处理（如果需要）")
+    
+    # 方式3：处理手动上传的文件
+    if input_mode == "方式3：手动上传文件（多Sheet匹配）" and casi_uploaded_file and kla_uploaded_file:
+        if st.button("开始KLA匹配分析", type="primary", key="kla_match_btn_upload"):
+            try:
+                with st.spinner("正在读取上传的文件..."):
+                    # 先只读取sheet名称，找到匹配的sheet后再读取数据
+                    if casi_uploaded_file.name.endswith('.csv'):
+                        # CSV文件只有一个"sheet"
+                        casi_workbook = None
+                        casi_sheet_names = ['Data']
+                        st.info(f"✅ CASI文件：{casi_uploaded_file.name} (CSV格式)")
+                    elif casi_uploaded_file.name.endswith(('.xlsx', '.xls')):
+                        # Excel文件可能有多个sheet
+                        casi_workbook = data_loader.open_workbook(casi_uploaded_file)
+                        casi_sheet_names = casi_workbook.sheet_names
+                        st.info(f"✅ CASI文件：{casi_uploaded_file.name} (Excel格式，包含 {len(casi_sheet_names)} 个Sheet)")
+                    else:
+                        st.error("不支持的CASI文件格式，请上传CSV或Excel文件")
+                        st.stop()
+                    
+                    if kla_uploaded_file.name.endswith('.csv'):
+                        kla_workbook = None
+                        kla_sheet_names = ['Data']
+                        st.info(f"✅ KLA文件：{kla_uploaded_file.name} (CSV格式)")
+                    elif kla_uploaded_file.name.endswith(('.xlsx', '.xls')):
+                        kla_workbook = data_loader.open_workbook(kla_uploaded_file)
+                        kla_sheet_names = kla_workbook.sheet_names
+                        st.info(f"✅ KLA文件：{kla_uploaded_file.name} (Excel格式，包含 {len(kla_sheet_names)} 个Sheet)")
+                    else:
+                        st.error("不支持的KLA文件格式，请上传CSV或Excel文件")
+                        st.stop()
+                    
+                    # 找到匹配的sheet名称
+                    matching_sheets = [name for name in casi_sheet_names if name in kla_sheet_names]
+                    
+                    if not matching_sheets:
+                        st.warning("⚠️ 未找到匹配的Sheet名称")
+                        st.write("**CASI Sheets:**", list(casi_sheet_names))
+                        st.write("**KLA Sheets:**", list(kla_sheet_names))
+                        st.stop()
+                    
+                    st.success(f"🎯 找到 {len(matching_sheets)} 个匹配的Sheet：{', '.join(matching_sheets)}")
+                    
+                    # 只读取匹配的sheet
+                    if casi_workbook is None:
+                        casi_sheets = {'Data': data_loader.read_blob_features(casi_uploaded_file, 'kla_match')}
+                    else:
+                        casi_sheets = data_loader.read_excel_sheets(casi_workbook, matching_sheets, 'kla_match')
+                    if kla_workbook is None:
+                        kla_sheets = {'Data': data_loader.read_kla_file(kla_uploaded_file)}
+                    else:
+                        kla_sheets = data_loader.read_excel_sheets(kla_workbook, matching_sheets, 'kla')
+                
+                # 各Sheet在进程池中并行匹配
+                all_match_results = run_pair_jobs(
+                    kla_match.analyze_pair_job,
+                    [(kla_match.pack_columns(casi_sheets[sheet_name], 'kla_match', kla_match_threshold),
+                      kla_match.pack_columns(kla_sheets[sheet_name], 'kla', kla_match_threshold),
+                      sheet_name, sheet_name, kla_match_threshold, kla_auto_align, kla_align_radius, kla_geometry,
+                      (size_bin_min, size_bin_max), match_cache_dir)
+                     for sheet_name in matching_sheets]
+                )
+                
+                # 显示详细统计表
+                if all_match_results:
+                    session_results.put('kla_match_results', all_match_results)
+                    
+                    # 显示详细表格
+                    st.markdown('<a name="过漏检统计"></a>', unsafe_allow_html=True)
+                    st.subheader("� KLA匹配结果汇总（过漏检统计）")
+                    
+                    results_df = pd.DataFrame(all_match_results)
+                    st.dataframe(results_df, use_container_width=True, height=400)
+                    
+                    # 提供下载
+                    export_columns = [
+                        'CASI文件夹', 'KLA文件夹', 'CASI总数', 'CASI分类后检出数', 'KLA总数',
+                        '过检(0)', '真过检', '过检（去除污染）', '正确检出(1,3,4,5)', 
+                        '漏检-基础检', '漏检-分类', '漏检总数',
+                        '过检率', '真过检率', '过检率（去除污染）', '检出率', 
+                        '漏检率-基础', '漏检率-分类', '漏检率（总）',
+                        '正确检出DSIZE均值', '正确检出DSIZE最小', '正确检出DSIZE最大',
+                        '漏检DSIZE均值', '漏检DSIZE最小', '漏检DSIZE最大',
+                        '过检DW1O_Size均值', '过检DW1O_Size最小', '过检DW1O_Size最大',
+                        '过检DW2O_Size均值', '过检DW2O_Size最小', '过检DW2O_Size最大',
+                        'DW1O_BGMean', 'DW1O_BGDev', 'DW2O_BGMean', 'DW2O_BGDev', 'DN1O_BGMean', 'DN1O_BGDev'
+                    ]
+                    export_cols_available = [col for col in export_columns if col in results_df.columns]
+                    results_df_export = results_df[export_cols_available].copy()
+                    
+                    for col in results_df_export.columns:
+                        if results_df_export[col].dtype == 'object':
+                            results_df_export[col] = results_df_export[col].astype(str)
+                    
+                    csv_output = results_df_export.to_csv(index=False, encoding='utf-8-sig')
+                    st.download_button(
+                        label="📥 下载匹配结果（CSV）",
+                        data=csv_output,
+                        file_name=f"kla_match_results_method3_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        mime="text/csv",
+                        key="download_method3_detailed_csv"
+                    )
+                    
+                    # 简化版汇总表
+                    st.write("---")
+                    st.subheader("📊 KLA匹配结果汇总（简化版）")
+                    
+                    st.info("""
+                    **过检分类说明：**
+                    - **过检(0)**：CASI分类后检出数 - 正确检出数（总过检）
+                    - **真过检**：CASI附近真的没有KLA的缺陷
+                    - **去除污染过检**：真过检 - 污染数量（MaxOrg=65532）
+                    
+                    **漏检分类说明：**
+                    - **基础漏检**：KLA附近完全没有CASI检出（任何类型都没有）
+                    - **分类漏检**：KLA附近有CASI检出，但都是特殊类型（nDefectType=1000或10001）
+                    - **漏检总数** = 基础漏检 + 分类漏检
+                    """)
+                    
+                    results_df_simplified = results_df.copy()
+                    simplified_columns = [
+                        'CASI文件夹', 'KLA文件夹', 'CASI总数', 'CASI分类后检出数', 'KLA总数',
+                        '过检(0)', '正确检出(1,3,4,5)', '漏检总数',
+                        '过检率', '检出率', '漏检率（总）'
+                    ]
+                    
+                    simplified_cols_available = [col for col in simplified_columns if col in results_df_simplified.columns]
+                    results_df_simplified = results_df_simplified[simplified_cols_available].copy()
+                    
+                    st.dataframe(results_df_simplified, use_container_width=True, height=400)
+                    
+                    # # 数据验证
+                    # st.write("**📊 数据验证：**")
+                    # all_checks_pass = True
+                    # for idx, row in results_df_simplified.iterrows():
+                    #     casi_detected = row['CASI分类后检出数']
+                    #     overdetect = row['过检(0)']
+                    #     correct = row['正确检出(1,3,4,5)']
+                    #     miss = row['漏检总数']
+                    #     kla_total = row['KLA总数']
+                        
+                    #     expected_correct = casi_detected - overdetect
+                    #     check1_pass = abs(expected_correct - correct) < 0.01
+                        
+                    #     sum_check = correct + miss
+                    #     check2_pass = abs(sum_check - kla_total) < 0.01
+                        
+                    #     status1 = "✅" if check1_pass else "❌"
+                    #     status2 = "✅" if check2_pass else "❌"
+                        
+                    #     if not (check1_pass and check2_pass):
+                    #         all_checks_pass = False
+                        
+                    #     st.write(f"{row['CASI文件夹']} vs {row['KLA文件夹']}: "
+                    #            f"{status1} 正检={casi_detected}-{overdetect}={expected_correct}(实际:{correct}) | "
+                    #            f"{status2} 正检({correct})+漏检({miss})={sum_check}(KLA:{kla_total})")
+                    
+                    # if all_checks_pass:
+                    #     st.success("✅ 所有数据验证通过！")
+                    # else:
+                    #     st.error("❌ 部分数据验证失败，请检查！")
+                    
+                    # 简化版下载
+                    csv_simplified = results_df_simplified.to_csv(index=False, encoding='utf-8-sig')
+                    st.download_button(
+                        label="📥 下载简化版匹配结果（CSV）",
+                        data=csv_simplified,
+                        file_name=f"kla_match_results_simplified_method3_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        mime="text/csv",
+                        key="download_method3_simplified_csv"
+                    )
+                    
+                    # 可视化分析
+                    st.write("### 📈 可视化分析")
+                    
+                    fig_stack = go.Figure()
+                    
+                    # 创建组合标签（与方式一、二一致）
+                    results_df['组合'] = results_df['CASI文件夹'] + '\nvs\n' + results_df['KLA文件夹']
+                    
+                    fig_stack.add_trace(go.Bar(
+                        name='过检',
+                        x=results_df['组合'],
+                        y=results_df['过检(0)'],
+                        marker_color="#F5BC02"
+                    ))
+                    fig_stack.add_trace(go.Bar(
+                        name='正确检出',
+                        x=results_df['组合'],
+                        y=results_df['正确检出(1,3,4,5)'],
+                        marker_color="#09A84C"
+                    ))
+                    fig_stack.add_trace(go.Bar(
+                        name='漏检',
+                        x=results_df['组合'],
+                        y=results_df['漏检总数'],
+                        marker_color="#E8384F"
+                    ))
+                    
+                    fig_stack.update_layout(
+                        barmode='stack',
+                        title='过检、正确检出、漏检堆叠图',
+                        xaxis_title='CASI vs KLA',
+                        yaxis_title='数量',
+                        height=500
+                    )
+                    st.plotly_chart(fig_stack, use_container_width=True)
+                    
+                    # === 以下为方式一、二相同的高级分析功能 ===
+                    # 添加晶圆图等高级可视化，与方式一、二保持一致
+                    
+                    # 过漏检缺陷分布图（晶圆图）
+                    st.write("### 🗺️ 过漏检缺陷分布map图")
+                    st.markdown("""
+                    晶圆图显示缺陷的分类情况：
+                    - 🟢 **绿色**：正确检出的缺陷
+                    - 🔵 **蓝色**：漏检的缺陷
+                    - 🔴 **红色**：过检的缺陷
+                    """)
+                    
+                    # 网格显示选项
+                    show_grid_wafer = st.checkbox("显示背景网格", value=False, key="show_grid_wafer_method3", help="控制晶圆图中是否显示背景网格线")
+                    
+                    # 为每个组合创建晶圆图
+                    for idx, row in results_df.iterrows():
+                        with st.expander(f"📊 {row['组合']} - 缺陷分布图", expanded=False):
+                            # 获取该组合的坐标数据
+                            coord_data = row['coord_data']
+                            
+                            # 创建晶圆图
+                            fig_wafer = go.Figure()
+                            
+                            # 添加正确检出的点（绿色）
+                            if '正确检出' in coord_data and len(coord_data['正确检出']) > 0:
+                                correct_coords = coord_data['正确检出']
+                                x_coords = correct_coords['x']
+                                y_coords = correct_coords['y']
+                                
+                                fig_wafer.add_trace(go.Scatter(
+                                    x=x_coords,
+                                    y=y_coords,
+                                    mode='markers',
+                                    name=f'正确检出 ({len(correct_coords)})',
+                                    marker=dict(
+                                        size=6,
+                                        color="#06AC4B",
+                                        opacity=0.6
+                                    ),
+                                    hovertemplate='<b>正确检出</b><br>X: %{x:.2f}<br>Y: %{y:.2f}<extra></extra>'
+                                ))
+                            
+                            # 添加漏检的点（蓝色）
+                            if '漏检' in coord_data and len(coord_data['漏检']) > 0:
+                                miss_coords = coord_data['漏检']
+                                x_coords = miss_coords['x']
+                                y_coords = miss_coords['y']
+                                
+                                fig_wafer.add_trace(go.Scatter(
+                                    x=x_coords,
+                                    y=y_coords,
+                                    mode='markers',
+                                    name=f'漏检 ({len(miss_coords)})',
+                                    marker=dict(
+                                        size=6,
+                                        color="#3508FF",
+                                        opacity=0.6
+                                    ),
+                                    hovertemplate='<b>漏检</b><br>X: %{x:.2f}<br>Y: %{y:.2f}<extra></extra>'
+                                ))
+                            
+                            # 添加过检的点（红色）
+                            if '过检' in coord_data and len(coord_data['过检']) > 0:
+                                over_coords = coord_data['过检']
+                                x_coords = over_coords['x']
+                                y_coords = over_coords['y']
+                                
+                                fig_wafer.add_trace(go.Scatter(
+                                    x=x_coords,
+                                    y=y_coords,
+                                    mode='markers',
+                                    name=f'过检 ({len(over_coords)})',
+                                    marker=dict(
+                                        size=6,
+                                        color="#F50202",
+                                        opacity=0.6
+                                    ),
+                                    hovertemplate='<b>过检</b><br>X: %{x:.2f}<br>Y: %{y:.2f}<extra></extra>'
+                                ))
+                            
+                            # 添加晶圆边界圆
+                            circle_x, circle_y = wafer_geometry.boundary_circle(kla_geometry['center'], kla_geometry['diameter'] / 2)
+                            
+                            fig_wafer.add_trace(go.Scatter(
+                                x=circle_x,
+                                y=circle_y,
+                                mode='lines',
+                                name='晶圆边界',
+                                line=dict(color='black', width=2),
+                                showlegend=True,
+                                hoverinfo='skip'
+                            ))
+                            
+                            # 设置布局
+                            fig_wafer.update_layout(
+                                title=dict(
+                                    text=f'{row["组合"]} - 缺陷分布',
+                                    x=0.5,
+                                    xanchor='center',
+                                    font=dict(size=16)
+                                ),
+                                xaxis=dict(
+                                    title='X坐标',
+                                    range=[0, 300000],
+                                    scaleanchor="y",
+                                    scaleratio=1,
+                                    showgrid=show_grid_wafer,
+                                    gridcolor='lightgray'
+                                ),
+                                yaxis=dict(
+                                    title='Y坐标',
+                                    range=[0, 300000],
+                                    showgrid=show_grid_wafer,
+                                    gridcolor='lightgray'
+                                ),
+                                plot_bgcolor='white',
+                                hovermode='closest',
+                                width=800,
+                                height=800,
+                                legend=dict(
+                                    orientation="v",
+                                    yanchor="top",
+                                    y=1,
+                                    xanchor="left",
+                                    x=1.02,
+                                    bgcolor='rgba(255,255,255,0.9)',
+                                    bordercolor='gray',
+                                    borderwidth=1
+                                )
+                            )
+                            
+                            st.plotly_chart(fig_wafer, use_container_width=True)
+                            
+                            # 添加保存图表功能
+                            col_save1, col_save2 = st.columns(2)
+                            with col_save1:
+                                # 保存为HTML
+                                html_buffer = fig_wafer.to_html(include_plotlyjs='cdn')
+                                st.download_button(
+                                    label="📥 下载为HTML",
+                                    data=html_buffer,
+                                    file_name=f"缺陷分布_{row['CASI文件夹']}_vs_{row['KLA文件夹']}.html",
+                                    mime="text/html",
+                                    key=f"download_html_method3_{idx}"
+                                )
+                            with col_save2:
+                                # 保存为PNG（需要安装kaleido）- 不带坐标系
+                                # 创建一个用于导出的图表副本，隐藏坐标轴
+                                fig_export = go.Figure(fig_wafer)
+                                fig_export.update_layout(
+                                    xaxis=dict(
+                                        visible=False,
+                                        range=[0, 300000],
+                                        scaleanchor="y",
+                                        scaleratio=1
+                                    ),
+                                    yaxis=dict(
+                                        visible=False,
+                                        range=[0, 300000]
+                                    ),
+                                    showlegend=False,
+                                    title=None,
+                                    plot_bgcolor='white',
+                                    paper_bgcolor='white',
+                                    margin=dict(l=50, r=50, t=50, b=50)  # 增加白色边距
+                                )
+                                
+                                # 尝试导出PNG（高清：1200x1200基础尺寸，scale=3输出3600x3600）
+                                try:
+                                    img_bytes = fig_export.to_image(
+                                        format="png", 
+                                        width=1200,      # 宽度增加到1200
+                                        height=1200,     # 高度增加到1200
+                                        scale=3          # 3倍缩放，输出3600x3600的高清图
+                                    )
+                                    st.download_button(
+                                        label="📥 下载为PNG（高清）",
+                                        data=img_bytes,
+                                        file_name=f"缺陷分布_{row['CASI文件夹']}_vs_{row['KLA文件夹']}_HD.png",
+                                        mime="image/png",
+                                        key=f"download_png_method3_{idx}"
+                                    )
+                                except Exception as e:
+                                    # 如果kaleido未安装，显示安装提示
+                                    st.button(
+                                        "📥 下载为PNG（无坐标）",
+                                        disabled=True,
+                                        key=f"download_png_disabled_method3_{idx}",
+                                        help="需要安装 kaleido"
+                                    )
+                                    st.caption("💡 需要安装: `pip install kaleido`")
+                            
+                            # 显示该组合的统计信息
+                            col_a, col_b, col_c = st.columns(3)
+                            with col_a:
+                                st.metric("正确检出", len(coord_data.get('正确检出', [])))
+                            with col_b:
+                                st.metric("漏检", len(coord_data.get('漏检', [])))
+                            with col_c:
+                                st.metric("过检", len(coord_data.get('过检', [])))
+                    
+                    # === 方式三的高级分析功能 ===
+                    # 由于方式三已保存了必要的统计数据，可以复用方式一/二的展示代码
+                    
+                    #  按尺寸区间统计（已有数据）
+                    st.write("---")
+                    st.markdown('<a name="按尺寸区间统计_method3"></a>', unsafe_allow_html=True)
+                    st.subheader(f"🔢 尺寸检出率统计（{size_bin_min}nm-{size_bin_max}nm）")
+                    
+                    with st.expander("📊 查看按尺寸区间统计详情", expanded=False):
+                        st.markdown(f"""
+                        按每{size_bin_width}nm为一个区间，统计{size_bin_min}nm到{size_bin_max}nm范围内各尺寸的检出情况。
+                        - **总数**：该尺寸区间的KLA缺陷总数
+                        - **正确检出**：该尺寸区间被正确检出的缺陷数
+                        - **漏检**：该尺寸区间未被检出的缺陷数
+                        - **检出率**：正确检出数 / 总数 × 100%
+                        """)
+                    
+                    # 为每个Sheet生成详细统计表
+                    for idx, result in enumerate(all_match_results):
+                        sheet_name = result['CASI文件夹']
+                        size_stats = result.get('size_stats', None)
+                        
+                        if size_stats is None:
+                            continue
+                        
+                        st.write(f"#### {sheet_name}")
+                        
+                        # 构建详细统计表（只显示有数据的区间）
+                        detail_df = kla_match.size_bin_stats(size_stats['dsize'], size_stats['matched'],
+                                                              size_bin_min, size_bin_max, size_bin_width)
+                        detail_df = detail_df[detail_df['KLA总数'] > 0].drop(columns='尺寸下限(nm)')
+                        
+                        if len(detail_df) > 0:
+                            st.dataframe(detail_df, use_container_width=True, height=400)
+                            
+                            # 提供CSV下载
+                            csv_detail = detail_df.to_csv(index=False, encoding='utf-8-sig')
+                            st.download_button(
+                                label=f"📥 下载 {sheet_name} 详细统计（CSV）",
+                                data=csv_detail,
+                                file_name=f"size_detail_{sheet_name}_method3_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                mime="text/csv",
+                                key=f"download_detail_method3_{idx}"
+                            )
+                            
+                            # 绘制检出率曲线图
+                            fig_detect_rate = go.Figure()
+                            
+                            fig_detect_rate.add_trace(go.Scatter(
+                                x=detail_df['尺寸区间(nm)'],
+                                y=detail_df['检出率(%)'],
+                                mode='lines+markers',
+                                name='检出率',
+                                line=dict(color='#4ECDC4', width=2),
+                                marker=dict(size=6),
+                                text=[f"总数:{total}<br>正确:{correct}<br>漏检:{miss}"
+                                      for total, correct, miss in zip(detail_df['KLA总数'], detail_df['正确检出'], detail_df['漏检'])],
+                                hovertemplate='<b>%{x}</b><br>检出率: %{y:.2f}%<br>%{text}<extra></extra>'
+                            ))
+                            
+                            fig_detect_rate.update_layout(
+                                title=f'{sheet_name} - 各尺寸区间检出率',
+                                xaxis_title='尺寸区间',
+                                yaxis_title='检出率 (%)',
+                                yaxis=dict(range=[0, 105]),
+                                height=500,
+                                hovermode='closest'
+                            )
+                            
+                            st.plotly_chart(fig_detect_rate, use_container_width=True)
+                        else:
+                            st.info(f"{sheet_name}: {size_bin_min}nm-{size_bin_max}nm范围内无数据")
+                        
+                        st.write("---")
+                    
+                    # 💡 BGMean值分布（已有数据）
+                    # 提示：方式三功能说明
+                    st.write("---")
+                    with st.expander("ℹ️ 方式三功能说明", expanded=False):
+                        st.markdown("""
+                        **方式三当前支持的分析：**
+                        - ✅ 过漏检统计表（详细版和简化版）
+                        - ✅ 可视化堆叠图
+                        - ✅ 过漏检缺陷分布图（晶圆图）
+                        - ✅ 按尺寸区间统计（26nm-100nm）
+                        
+                        **方式三暂不支持的高级分析：**
+                        - ❌ DSIZE与DW1O_Size对比分析（需要重新读取原始文件进行坐标匹配）
+                        
+                        **如需完整的高级分析功能，请使用方式一或方式二。**
+                        """)
+                    
+                    st.success("✅ 匹配分析完成！")
+                else:
+                    st.warning("未生成任何匹配结果")
+                    
+            except Exception as e:
+                st.error(f"处理上传文件时出错：{str(e)}")
+                import traceback
+                st.code(traceback.format_exc())
+    
+    # 方式4：CASI文件夹 + KLA多Sheet文件
+    elif input_mode == "方式4：CASI文件夹 + KLA多Sheet文件" and kla_match_folder and os.path.exists(kla_match_folder) and kla_uploaded_file:
+        if st.button("开始KLA匹配分析", type="primary", key="kla_match_btn_mode4"):
+            try:
+                with st.spinner("正在读取CASI文件夹和KLA文件..."):
+                    # 读取CASI文件夹中的所有子文件夹
+                    casi_subfolders = [f for f in os.listdir(kla_match_folder) 
+                                      if os.path.isdir(os.path.join(kla_match_folder, f))]
+                    
+                    if not casi_subfolders:
+                        st.error("❌ CASI主文件夹中未找到任何子文件夹")
+                        st.stop()
+                    
+                    st.info(f"✅ 找到 {len(casi_subfolders)} 个CASI子文件夹：{', '.join(casi_subfolders)}")
+                    
+                    # 读取KLA文件（先只读取sheet名称，只加载与子文件夹同名的sheet）
+                    if kla_uploaded_file.name.endswith('.csv'):
+                        kla_workbook = None
+                        kla_sheet_names = ['Data']
+                        st.info(f"✅ KLA文件：{kla_uploaded_file.name} (CSV格式)")
+                    elif kla_uploaded_file.name.endswith(('.xlsx', '.xls')):
+                        kla_workbook = data_loader.open_workbook(kla_uploaded_file)
+                        kla_sheet_names = kla_workbook.sheet_names
+                        st.info(f"✅ KLA文件：{kla_uploaded_file.name} (Excel格式，包含 {len(kla_sheet_names)} 个Sheet)")
+                    else:
+                        st.error("不支持的KLA文件格式，请上传CSV或Excel文件")
+                        st.stop()
+                    
+                    # 找到匹配的文件夹名和Sheet名
+                    matching_pairs = [name for name in casi_subfolders if name in kla_sheet_names]
+                    
+                    if not matching_pairs:
+                        st.warning("⚠️ 未找到匹配的文件夹名与Sheet名")
+                        st.write("**CASI子文件夹：**", casi_subfolders)
+                        st.write("**KLA Sheets：**", list(kla_sheet_names))
+                        st.stop()
+                    
+                    st.success(f"🎯 找到 {len(matching_pairs)} 个匹配对：{', '.join(matching_pairs)}")
+                    
+                    if kla_workbook is None:
+                        kla_sheets = {'Data': data_loader.read_kla_file(kla_uploaded_file)}
+                    else:
+                        kla_sheets = data_loader.read_excel_sheets(kla_workbook, matching_pairs, 'kla')
+                
+                # 读取每个匹配对的数据，匹配在进程池中并行执行
+                pair_tasks = []
+                
+                with st.spinner("正在读取数据..."):
+                    # 对每个匹配对进行处理
+                    for pair_name in matching_pairs:
+                        # 读取CASI数据
+                        casi_folder_path = os.path.join(kla_match_folder, pair_name)
+                        casi_csv_path = None
+                        
+                        # 查找任意CSV文件
+                        csv_files = [f for f in os.listdir(casi_folder_path) if f.endswith('.csv')]
+                        
+                        if not csv_files:
+                            st.warning(f"❌ {pair_name}: 未找到任何CSV文件")
+                            continue
+                        
+                        # 如果有多个CSV文件，优先选择BlobFeatures，否则选择第一个
+                        if len(csv_files) == 1:
+                            casi_csv_path = os.path.join(casi_folder_path, csv_files[0])
+                        else:
+                            # 优先查找BlobFeatures
+                            blob_files = [f for f in csv_files if 'BlobFeatures' in f]
+                            if blob_files:
+                                casi_csv_path = os.path.join(casi_folder_path, blob_files[0])
+                            else:
+                                casi_csv_path = os.path.join(casi_folder_path, csv_files[0])
+                        
+                        casi_df = data_loader.read_blob_features(casi_csv_path, 'kla_match')
+                        st.info(f"📄 {pair_name}: 读取文件 {os.path.basename(casi_csv_path)}")
+                        casi_df.columns = casi_df.columns.str.strip()
+                        
+                        # 获取对应的KLA Sheet数据
+                        kla_df = kla_sheets[pair_name].copy()
+                        kla_df.columns = kla_df.columns.str.strip()
+                        
+                        pair_tasks.append((casi_df, kla_df, pair_name))
+                
+                all_match_results = run_pair_jobs(
+                    kla_match.analyze_sheet_pair_job,
+                    [(kla_match.pack_columns(casi_df, 'kla_match', kla_match_threshold),
+                      kla_match.pack_columns(kla_df, 'kla', kla_match_threshold),
+                      pair_name, kla_match_threshold, kla_auto_align, kla_align_radius, kla_geometry,
+                      match_cache_dir)
+                     for casi_df, kla_df, pair_name in pair_tasks]
+                )
+                
+                # 显示结果（使用与方式3相同的显示逻辑）
+                if all_match_results:
+                    session_results.put('kla_match_results', all_match_results)
+                    
+                    st.markdown("---")
+                    st.subheader("📊 匹配结果汇总")
+                    
+                    # 创建汇总表
+                    summary_data = []
+                    for result in all_match_results:
+                        summary_data.append({
+                            'CASI文件夹': result['casi_name'],
+                            'KLA Sheet': result['kla_name'],
+                            'CASI总数': result['total_casi'],
+                            'CASI分类后检出数': result['casi_detected_count'],
+                            'KLA总数': result['total_kla'],
+                            '正确检出': result['n_correct'],
+                            '过检(全部)': result['n_overdetect_all'],
+                            '过检(特殊类型)': result['n_overdetect_special'],
+                            '过检(真实)': result['n_overdetect_true'],
+                            '过检(污染)': result['n_contamination'],
+                            '过检(真实-去污染)': result['n_overdetect_true_clean'],
+                            '边缘过检点': result['overdetect_edge_count'],
+                            '漏检': result['n_missed'],
+                            '准确率(%)': f"{result['accuracy']:.2f}",
+                            '漏检率(%)': f"{result['missed_rate']:.2f}",
+                            **kla_match.alignment_fields(result['alignment'])
+                        })
+                    
+                    summary_df = pd.DataFrame(summary_data)
+                    st.dataframe(summary_df, use_container_width=True)
+                    
+                    # 下载汇总结果
+                    csv_summary = summary_df.to_csv(index=False).encode('utf-8-sig')
+                    st.download_button(
+                        label="📥 下载汇总结果 (CSV)",
+                        data=csv_summary,
+                        file_name="kla_match_summary_mode4.csv",
+                        mime="text/csv"
+                    )
+                    
+                    # 总体统计
+                    st.markdown("---")
+                    st.subheader("📈 总体统计")
+                    
+                    total_casi_all = sum([r['total_casi'] for r in all_match_results])
+                    total_casi_detected = sum([r['casi_detected_count'] for r in all_match_results])
+                    total_kla_all = sum([r['total_kla'] for r in all_match_results])
+                    total_correct = sum([r['n_correct'] for r in all_match_results])
+                    total_overdetect_all = sum([r['n_overdetect_all'] for r in all_match_results])
+                    total_overdetect_special = sum([r['n_overdetect_special'] for r in all_match_results])
+                    total_overdetect_true = sum([r['n_overdetect_true'] for r in all_match_results])
+                    total_contamination = sum([r['n_contamination'] for r in all_match_results])
+                    total_overdetect_true_clean = sum([r['n_overdetect_true_clean'] for r in all_match_results])
+                    total_edge_overdetect = sum([r['overdetect_edge_count'] for r in all_match_results])
+                    total_missed = sum([r['n_missed'] for r in all_match_results])
+                    
+                    overall_accuracy = (total_correct / total_casi_detected * 100) if total_casi_detected > 0 else 0
+                    overall_missed_rate = (total_missed / total_kla_all * 100) if total_kla_all > 0 else 0
+                    
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("总CASI数", total_casi_all)
+                        st.metric("总CASI分类后检出数", total_casi_detected)
+                    with col2:
+                        st.metric("总KLA数", total_kla_all)
+                        st.metric("总正确检出", total_correct)
+                    with col3:
+                        st.metric("总过检(全部)", total_overdetect_all)
+                        st.metric("总过检(真实)", total_overdetect_true)
+                        st.metric("总过检(真实-去污染)", total_overdetect_true_clean)
+                    with col4:
+                        st.metric("总漏检", total_missed)
+                        st.metric("总体准确率", f"{overall_accuracy:.2f}%")
+                        st.metric("总体漏检率", f"{overall_missed_rate:.2f}%")
+                    
+                    st.markdown(f"""
+                    **说明：**
+                    - 总过检(全部) = {total_overdetect_all}（包含边缘过检点 {total_edge_overdetect}）
+                    - 总过检(特殊类型) = {total_overdetect_special}
+                    - 总过检(真实) = {total_overdetect_true}
+                    - 总过检(污染) = {total_contamination}
+                    - 总过检(真实-去污染) = {total_overdetect_true_clean}
+                    """)
+                    
+                    st.success("✅ 匹配分析完成！")
+                else:
+                    st.warning("未生成任何匹配结果")
+                    
+            except Exception as e:
+                st.error(f"处理方式4时出错：{str(e)}")
+                import traceback
+                st.code(traceback.format_exc())
+    
+    elif kla_match_folder and os.path.exists(kla_match_folder):
+        if st.button("开始KLA匹配分析", type="primary", key="kla_match_btn"):
+            try:
+                # 方式1：每个子文件夹一组数据（名称含KLA的为KLA）；方式2：文件夹内直接存放CSV（文件名含kla的为KLA）
+                layout = 'folders' if input_mode == "方式1：选择主文件夹" else 'files'
+                casi_sources, kla_sources = kla_match.list_sources(kla_match_folder, layout)
+                casi_folders = list(casi_sources)
+                kla_folders = list(kla_sources)
+                
+                if not casi_folders:
+                    st.warning("未找到CASI数据")
+                elif not kla_folders:
+                    st.warning("未找到KLA数据")
+                else:
+                    if input_mode == "方式1：选择主文件夹":
+                        st.info(f"找到 {len(casi_folders)} 个CASI文件夹，{len(kla_folders)} 个KLA文件夹")
+                    else:
+                        st.info(f"找到 {len(casi_folders)} 个CASI CSV文件，{len(kla_folders)} 个KLA CSV文件")
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if input_mode == "方式1：选择主文件夹":
+                            st.write("**CASI文件夹：**")
+                        else:
+                            st.write("**CASI CSV文件：**")
+                        st.write(casi_folders)
+                    with col2:
+                        if input_mode == "方式1：选择主文件夹":
+                            st.write("**KLA文件夹：**")
+                        else:
+                            st.write("**KLA CSV文件：**")
+                        st.write(kla_folders)
+                    
+                    all_match_results = kla_match.run_pairs(casi_sources, kla_sources, kla_match_threshold,
+                                                            log=st_log, align=kla_auto_align,
+                                                            align_radius=kla_align_radius,
+                                                            jobs=kla_match_jobs, progress=pair_progress(),
+                                                            cache_dir=match_cache_dir, geometry=kla_geometry,
+                                                            size_range=(size_bin_min, size_bin_max))
+                    
+                    if all_match_results:
+                        # 保存到 session_state 供共有率分析使用
+                        session_results.put('kla_match_results', all_match_results)
+                        
+                        # 显示结果表格
+                        st.markdown('<a name="过漏检统计"></a>', unsafe_allow_html=True)
+                        st.subheader("📊 KLA匹配结果汇总（过漏检统计）")
+                        
+                        results_df = pd.DataFrame(all_match_results)
+                        st.dataframe(results_df, use_container_width=True, height=400)
+                        
+                        # 提供下载 - 需要清理数据以避免numpy对象和复杂结构
+                        # 创建仅用于导出的DataFrame，排除复杂的嵌套数据
+                        export_columns = [
+                            'CASI文件夹', 'KLA文件夹', 'CASI总数', 'CASI分类后检出数', 'KLA总数',
+                            '过检(0)', '真过检', '过检（去除污染）', '正确检出(1,3,4,5)', 
+                            '漏检-基础检', '漏检-分类', '漏检总数',
+                            '过检率', '真过检率', '过检率（去除污染）', '检出率', 
+                            '漏检率-基础', '漏检率-分类', '漏检率（总）',
+                            '正确检出DSIZE均值', '正确检出DSIZE最小', '正确检出DSIZE最大',
+                            '漏检DSIZE均值', '漏检DSIZE最小', '漏检DSIZE最大',
+                            '过检DW1O_Size均值', '过检DW1O_Size最小', '过检DW1O_Size最大',
+                            '过检DW2O_Size均值', '过检DW2O_Size最小', '过检DW2O_Size最大',
+                            'DW1O_BGMean', 'DW1O_BGDev', 'DW2O_BGMean', 'DW2O_BGDev', 'DN1O_BGMean', 'DN1O_BGDev'
+                        ]
+                        # 只导出存在的列
+                        export_cols_available = [col for col in export_columns if col in results_df.columns]
+                        results_df_export = results_df[export_cols_available].copy()
+                        
+                        # 确保所有数据都是基本类型（字符串或数值）
+                        for col in results_df_export.columns:
+                            if results_df_export[col].dtype == 'object':
+                                results_df_export[col] = results_df_export[col].astype(str)
+                        
+                        csv_output = results_df_export.to_csv(index=False, encoding='utf-8-sig')
+                        st.download_button(
+                            label="📥 下载匹配结果（CSV）",
+                            data=csv_output,
+                            file_name=f"kla_match_results_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            mime="text/csv",
+                            key="download_method1_detailed_csv"
+                        )
+                        
+                        # 新增：简化版汇总表
+                        st.write("---")
+                        st.subheader("📊 KLA匹配结果汇总（简化版）")
+                        
+                        # 添加说明
+                        st.info("""
+                        **过检分类说明：**
+                        - **过检(0)**：CASI分类后检出数 - 正确检出数（总过检）
+                        - **真过检**：CASI附近真的没有KLA的缺陷
+                        - **去除污染过检**：真过检 - 污染数量（MaxOrg=65532）
+                        
+                        **漏检分类说明：**
+                        - **基础漏检**：KLA附近完全没有CASI检出（任何类型都没有）
+                        - **分类漏检**：KLA附近有CASI检出，但都是特殊类型（nDefectType=1000或10001）
+                        - **漏检总数** = 基础漏检 + 分类漏检
+                        """)
+                        
+                        # 说明：CASI分类后检出数已经在数据中正确计算（不包含1000和10001）
+                        results_df_simplified = results_df.copy()
+                        # 验证：过检(0) + 正确检出 = CASI分类后检出数
+                        # 验证：正确检出 + 漏检总数 = KLA总数
+                        
+                        # 只保留指定的列
+                        simplified_columns = [
+                            'CASI文件夹', 'KLA文件夹', 'CASI总数', 'CASI分类后检出数', 'KLA总数',
+                            '过检(0)', '正确检出(1,3,4,5)', 
+                             '漏检总数',
+                            '过检率', '检出率', '漏检率（总）'
+                        ]
+                        
+                        # 只选择存在的列
+                        simplified_cols_available = [col for col in simplified_columns if col in results_df_simplified.columns]
+                        results_df_simplified = results_df_simplified[simplified_cols_available].copy()
+                        
+                        # 显示简化表格
+                        st.dataframe(results_df_simplified, use_container_width=True, height=400)
+                        
+                        # # 添加数据验证
+                        # st.write("**📊 数据验证：**")
+                        # all_checks_pass = True
+                        # for idx, row in results_df_simplified.iterrows():
+                        #     casi_detected = row['CASI分类后检出数']
+                        #     overdetect = row['过检(0)']
+                        #     correct = row['正确检出(1,3,4,5)']
+                        #     miss = row['漏检总数']
+                        #     kla_total = row['KLA总数']
+                            
+                        #     # 验证1：正确检出 = CASI分类后检出数 - 过检
+                        #     expected_correct = casi_detected - overdetect
+                        #     check1_pass = abs(expected_correct - correct) < 0.01
+                            
+                        #     # 验证2：正确检出 + 漏检 = KLA总数
+                        #     sum_check = correct + miss
+                        #     check2_pass = abs(sum_check - kla_total) < 0.01
+                            
+                        #     status1 = "✅" if check1_pass else "❌"
+                        #     status2 = "✅" if check2_pass else "❌"
+                            
+                        #     if not (check1_pass and check2_pass):
+                        #         all_checks_pass = False
+                            
+                        #     st.write(f"{row['CASI文件夹']} vs {row['KLA文件夹']}: "
+                        #            f"{status1} 正检={casi_detected}-{overdetect}={expected_correct}(实际:{correct}) | "
+                        #            f"{status2} 正检({correct})+漏检({miss})={sum_check}(KLA:{kla_total})")
+                        
+                        # if all_checks_pass:
+                        #     st.success("✅ 所有数据验证通过！")
+                        # else:
+                        #     st.error("❌ 部分数据验证失败，请检查！")
+                        
+                        # 提供简化版下载
+                        csv_simplified = results_df_simplified.to_csv(index=False, encoding='utf-8-sig')
+                        st.download_button(
+                            label="📥 下载简化版匹配结果（CSV）",
+                            data=csv_simplified,
+                            file_name=f"kla_match_results_simplified_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                            mime="text/csv",
+                            key="download_method1_simplified_csv"
+                        )
+                        
+                        # 可视化分析
+                        st.write("### 📈 可视化分析")
+                        
+                        # 堆叠柱状图
+                        fig_stack = go.Figure()
+                        
+                        results_df['组合'] = results_df['CASI文件夹'] + '\nvs\n' + results_df['KLA文件夹']
+                        
+                        fig_stack.add_trace(go.Bar(
+                            name='过检',
+                            x=results_df['组合'],
+                            y=results_df['过检(0)'],
+                            marker_color="#F5BC02"
+                        ))
+                        fig_stack.add_trace(go.Bar(
+                            name='正确检出',
+                            x=results_df['组合'],
+                            y=results_df['正确检出(1,3,4,5)'],
+                            marker_color="#09A84C"
+                        ))
+                        fig_stack.add_trace(go.Bar(
+                            name='漏检',
+                            x=results_df['组合'],
+                            y=results_df['漏检总数'],
+                            marker_color="#3508FF"
+                        ))
+                        
+                        fig_stack.update_layout(
+                            title='KLA匹配结果对比',
+                            barmode='stack',
+                            xaxis_title='CASI vs KLA',
+                            yaxis_title='缺陷数量',
+                            height=500,
+                            showlegend=True
+                        )
+                        
+                        st.plotly_chart(fig_stack, use_container_width=True)
+                        
+                        # 新增：过漏检缺陷分布图
+                        st.write("### 🗺️ 过漏检缺陷分布map图")
+                        st.markdown("""
+                        晶圆图显示缺陷的分类情况：
+                        - 🟢 **绿色**：正确检出的缺陷
+                        - 🔵 **蓝色**：漏检的缺陷
+                        - 🔴 **红色**：过检的缺陷
+                        """)
+                        
+                        # 网格显示选项
+                        show_grid_wafer = st.checkbox("显示背景网格", value=False, key="show_grid_wafer_defect", help="控制晶圆图中是否显示背景网格线")
+                        
+                        # 为每个组合创建晶圆图
+                        for idx, row in results_df.iterrows():
+                            with st.expander(f"📊 {row['组合']} - 缺陷分布图", expanded=False):
+                                # 获取该组合的坐标数据
+                                coord_data = row['coord_data']
+                                
+                                # 创建晶圆图
+                                fig_wafer = go.Figure()
+                                
+                                # 添加正确检出的点（绿色）
+                                if '正确检出' in coord_data and len(coord_data['正确检出']) > 0:
+                                    correct_coords = coord_data['正确检出']
+                                    x_coords = correct_coords['x']
+                                    y_coords = correct_coords['y']
+                                    
+                                    fig_wafer.add_trace(go.Scatter(
+                                        x=x_coords,
+                                        y=y_coords,
+                                        mode='markers',
+                                        name=f'正确检出 ({len(correct_coords)})',
+                                        marker=dict(
+                                            size=6,
+                                            color="#06AC4B",
+                                            opacity=0.6,
+                                            # line=dict(width=0.5, color='white')
+                                        ),
+                                        hovertemplate='<b>正确检出</b><br>X: %{x:.2f}<br>Y: %{y:.2f}<extra></extra>'
+                                    ))
+                                
+                                # 添加漏检的点（红色）
+                                if '漏检' in coord_data and len(coord_data['漏检']) > 0:
+                                    miss_coords = coord_data['漏检']
+                                    x_coords = miss_coords['x']
+                                    y_coords = miss_coords['y']
+                                    
+                                    fig_wafer.add_trace(go.Scatter(
+                                        x=x_coords,
+                                        y=y_coords,
+                                        mode='markers',
+                                        name=f'漏检 ({len(miss_coords)})',
+                                        marker=dict(
+                                            size=6,
+                                            color="#3508FF",
+                                            opacity=0.6,
+                                            # line=dict(width=0.5, color='white')
+                                        ),
+                                        hovertemplate='<b>漏检</b><br>X: %{x:.2f}<br>Y: %{y:.2f}<extra></extra>'
+                                    ))
+                                
+                                # 添加过检的点（黄色）
+                                if '过检' in coord_data and len(coord_data['过检']) > 0:
+                                    over_coords = coord_data['过检']
+                                    x_coords = over_coords['x']
+                                    y_coords = over_coords['y']
+                                    
+                                    fig_wafer.add_trace(go.Scatter(
+                                        x=x_coords,
+                                        y=y_coords,
+                                        mode='markers',
+                                        name=f'过检 ({len(over_coords)})',
+                                        marker=dict(
+                                            size=6,
+                                            color="#F50202",
+                                            opacity=0.6,
+                                            # line=dict(width=0.5, color='darkgoldenrod')
+                                        ),
+                                        hovertemplate='<b>过检</b><br>X: %{x:.2f}<br>Y: %{y:.2f}<extra></extra>'
+                                    ))
+                                
+                                # 添加晶圆边界圆
+                                circle_x, circle_y = wafer_geometry.boundary_circle(kla_geometry['center'], kla_geometry['diameter'] / 2)
+                                
+                                fig_wafer.add_trace(go.Scatter(
+                                    x=circle_x,
+                                    y=circle_y,
+                                    mode='lines',
+                                    name='晶圆边界',
+                                    line=dict(color='black', width=2),
+                                    showlegend=True,
+                                    hoverinfo='skip'
+                                ))
+                                
+                                # 设置布局
+                                fig_wafer.update_layout(
+                                    title=dict(
+                                        text=f'{row["组合"]} - 缺陷分布',
+                                        x=0.5,
+                                        xanchor='center',
+                                        font=dict(size=16)
+                                    ),
+                                    xaxis=dict(
+                                        title='X坐标',
+                                        range=[0, 300000],
+                                        scaleanchor="y",
+                                        scaleratio=1,
+                                        showgrid=show_grid_wafer,
+                                        gridcolor='lightgray'
+                                    ),
+                                    yaxis=dict(
+                                        title='Y坐标',
+                                        range=[0, 300000],
+                                        showgrid=show_grid_wafer,
+                                        gridcolor='lightgray'
+                                    ),
+                                    plot_bgcolor='white',
+                                    hovermode='closest',
+                                    width=800,
+                                    height=800,
+                                    legend=dict(
+                                        orientation="v",
+                                        yanchor="top",
+                                        y=1,
+                                        xanchor="left",
+                                        x=1.02,
+                                        bgcolor='rgba(255,255,255,0.9)',
+                                        bordercolor='gray',
+                                        borderwidth=1
+                                    )
+                                )
+                                
+                                st.plotly_chart(fig_wafer, use_container_width=True)
+                                
+                                # 添加保存图表功能
+                                col_save1, col_save2 = st.columns(2)
+                                with col_save1:
+                                    # 保存为HTML
+                                    html_buffer = fig_wafer.to_html(include_plotlyjs='cdn')
+                                    st.download_button(
+                                        label="📥 下载为HTML",
+                                        data=html_buffer,
+                                        file_name=f"缺陷分布_{row['CASI文件夹']}_vs_{row['KLA文件夹']}.html",
+                                        mime="text/html",
+                                        key=f"download_html_{idx}"
+                                    )
+                                with col_save2:
+                                    # 保存为PNG（需要安装kaleido）- 不带坐标系
+                                    # 创建一个用于导出的图表副本，隐藏坐标轴
+                                    fig_export = go.Figure(fig_wafer)
+                                    fig_export.update_layout(
+                                        xaxis=dict(
+                                            visible=False,
+                                            range=[0, 300000],
+                                            scaleanchor="y",
+                                            scaleratio=1
+                                        ),
+                                        yaxis=dict(
+                                            visible=False,
+                                            range=[0, 300000]
+                                        ),
+                                        showlegend=False,
+                                        title=None,
+                                        plot_bgcolor='white',
+                                        paper_bgcolor='white',
+                                        margin=dict(l=50, r=50, t=50, b=50)  # 增加白色边距
+                                    )
+                                    
+                                    # 尝试导出PNG（高清：1200x1200基础尺寸，scale=3输出3600x3600）
+                                    try:
+                                        img_bytes = fig_export.to_image(
+                                            format="png", 
+                                            width=1200,      # 宽度增加到1200
+                                            height=1200,     # 高度增加到1200
+                                            scale=3          # 3倍缩放，输出3600x3600的高清图
+                                        )
+                                        st.download_button(
+                                            label="📥 下载为PNG（高清）",
+                                            data=img_bytes,
+                                            file_name=f"缺陷分布_{row['CASI文件夹']}_vs_{row['KLA文件夹']}_HD.png",
+                                            mime="image/png",
+                                            key=f"download_png_{idx}"
+                                        )
+                                    except Exception as e:
+                                        # 如果kaleido未安装，显示安装提示
+                                        st.button(
+                                            "� 下载为PNG（无坐标）",
+                                            disabled=True,
+                                            key=f"download_png_disabled_{idx}",
+                                            help="需要安装 kaleido"
+                                        )
+                                        st.caption("💡 需要安装: `pip install kaleido`")
+                                
+                                # 显示该组合的统计信息
+                                col_a, col_b, col_c = st.columns(3)
+                                with col_a:
+                                    st.metric("正确检出", len(coord_data.get('正确检出', [])))
+                                with col_b:
+                                    st.metric("漏检", len(coord_data.get('漏检', [])))
+                                with col_c:
+                                    st.metric("过检", len(coord_data.get('过检', [])))
+                        
+                        # 统计摘要
+                        # st.write("### 📋 统计摘要")
+                        
+                        # col1, col2, col3, col4, col5 = st.columns(5)
+                        # with col1:
+                        #     total_overdetect = results_df['过检(0)'].sum()
+                        #     st.metric("总过检数", total_overdetect)
+                        # with col2:
+                        #     total_overdetect_clean = results_df['过检（去除污染）'].sum()
+                        #     st.metric("总过检数（去污染）", total_overdetect_clean)
+                        # with col3:
+                        #     total_correct = results_df['正确检出(1,3,4,5)'].sum()
+                        #     st.metric("总正确检出", total_correct)
+                        # with col4:
+                        #     total_miss_total = results_df['漏检总数'].sum()
+                        #     st.metric("漏检总数", total_miss_total)
+                        # with col5:
+                        #     avg_detect_rate = results_df['正确检出(1,3,4,5)'].sum() / results_df['CASI总数'].sum() * 100 if results_df['CASI总数'].sum() > 0 else 0
+                        #     st.metric("平均检出率", f"{avg_detect_rate:.2f}%")
+                        
+                        # 添加去除污染后的对比图
+                        # st.write("### 📊 去除污染后的匹配结果对比")
+                        # fig_stack_clean = go.Figure()
+                        
+                        # fig_stack_clean.add_trace(go.Bar(
+                        #     name='过检（去污染）',
+                        #     x=results_df['组合'],
+                        #     y=results_df['过检（去除污染）'],
+                        #     marker_color='#FF6B6B'
+                        # ))
+                        # fig_stack_clean.add_trace(go.Bar(
+                        #     name='正确检出',
+                        #     x=results_df['组合'],
+                        #     y=results_df['正确检出(1,3,4,5)'],
+                        #     marker_color='#4ECDC4'
+                        # ))
+                        # fig_stack_clean.add_trace(go.Bar(
+                        #     name='漏检',
+                        #     x=results_df['组合'],
+                        #     y=results_df['漏检总数'],
+                        #     marker_color='#FFE66D'
+                        # ))
+                        
+                        # fig_stack_clean.update_layout(
+                        #     title='KLA匹配结果对比（去除污染后）',
+                        #     barmode='stack',
+                        #     xaxis_title='CASI vs KLA',
+                        #     yaxis_title='缺陷数量',
+                        #     height=500,
+                        #     showlegend=True
+                        # )
+                        
+                        # st.plotly_chart(fig_stack_clean, use_container_width=True)
+                        
+                        # 新增：按尺寸区间的详细检出统计
+                        st.write("---")
+                        st.markdown('<a name="按尺寸区间统计"></a>', unsafe_allow_html=True)
+                        st.subheader(f"📊 尺寸检出率统计（{size_bin_min}nm-{size_bin_max}nm）")
+                        
+                        with st.expander("📊 查看按尺寸区间统计详情", expanded=False):
+                            st.markdown(f"""
+                            按每{size_bin_width}nm为一个区间，统计{size_bin_min}nm到{size_bin_max}nm范围内各尺寸的检出情况。
+                            - **总数**：该尺寸区间的KLA缺陷总数
+                            - **正确检出**：该尺寸区间被正确检出的缺陷数
+                            - **漏检**：该尺寸区间未被检出的缺陷数
+                            - **检出率**：正确检出数 / 总数 × 100%
+                            """)
+                        
+                        # 为每个CASI-KLA组合生成详细统计表
+                        for idx, result in enumerate(all_match_results):
+                            casi_name = result['CASI文件夹']
+                            kla_name = result['KLA文件夹']
+                            size_stats = result.get('size_stats', None)
+                            
+                            if size_stats is None:
+                                continue
+                            
+                            st.write(f"#### {casi_name} vs {kla_name}")
+                            
+                            # 构建详细统计表（只显示有数据的区间）
+                            detail_df = kla_match.size_bin_stats(size_stats['dsize'], size_stats['matched'],
+                                                                  size_bin_min, size_bin_max, size_bin_width)
+                            detail_df = detail_df[detail_df['KLA总数'] > 0].drop(columns='尺寸下限(nm)')
+                            
+                            if len(detail_df) > 0:
+                                st.dataframe(detail_df, use_container_width=True, height=400)
+                                
+                                # 提供CSV下载
+                                csv_detail = detail_df.to_csv(index=False, encoding='utf-8-sig')
+                                st.download_button(
+                                    label=f"📥 下载 {casi_name}-{kla_name} 详细统计（CSV）",
+                                    data=csv_detail,
+                                    file_name=f"size_detail_{casi_name}_{kla_name}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                    mime="text/csv",
+                                    key=f"download_detail_{idx}"
+                                )
+                                
+                                # 绘制检出率曲线图
+                                fig_detect_rate = go.Figure()
+                                
+                                fig_detect_rate.add_trace(go.Scatter(
+                                    x=detail_df['尺寸区间(nm)'],
+                                    y=detail_df['检出率(%)'],
+                                    mode='lines+markers',
+                                    name='检出率',
+                                    line=dict(color='#4ECDC4', width=2),
+                                    marker=dict(size=6),
+                                    text=[f"总数:{total}<br>正确:{correct}<br>漏检:{miss}"
+                                          for total, correct, miss in zip(detail_df['KLA总数'], detail_df['正确检出'], detail_df['漏检'])],
+                                    hovertemplate='<b>%{x}</b><br>检出率: %{y:.2f}%<br>%{text}<extra></extra>'
+                                ))
+                                
+                                fig_detect_rate.update_layout(
+                                    title=f'{casi_name} vs {kla_name} - 各尺寸区间检出率',
+                                    xaxis_title='尺寸区间',
+                                    yaxis_title='检出率 (%)',
+                                    yaxis=dict(range=[0, 105]),
+                                    height=500,
+                                    hovermode='closest'
+                                )
+                                
+                                st.plotly_chart(fig_detect_rate, use_container_width=True)
+                                
+                                # 绘制堆叠柱状图：正确检出 vs 漏检
+                                fig_stack_size = go.Figure()
+                                
+                                fig_stack_size.add_trace(go.Bar(
+                                    x=detail_df['尺寸区间(nm)'],
+                                    y=detail_df['正确检出'],
+                                    name='正确检出',
+                                    marker_color='#4ECDC4',
+                                    text=detail_df['正确检出'],
+                                    textposition='inside'
+                                ))
+                                
+                                fig_stack_size.add_trace(go.Bar(
+                                    x=detail_df['尺寸区间(nm)'],
+                                    y=detail_df['漏检'],
+                                    name='漏检',
+                                    marker_color='#FFE66D',
+                                    text=detail_df['漏检'],
+                                    textposition='inside'
+                                ))
+                                
+                                # fig_stack_size.update_layout(
+                                #     title=f'{casi_name} vs {kla_name} - 各尺寸区间缺陷分布',
+                                #     xaxis_title='尺寸区间',
+                                #     yaxis_title='缺陷数量',
+                                #     barmode='stack',
+                                #     height=500,
+                                #     showlegend=True
+                                # )
+                                
+                                # st.plotly_chart(fig_stack_size, use_container_width=True)
+                            else:
+                                st.info(f"{casi_name} vs {kla_name}: {size_bin_min}nm-{size_bin_max}nm范围内无数据")
+                                                                            
+            except Exception as e:
+                st.error(f"KLA匹配分析时出错: {str(e)}")
+                st.exception(e)
+    
+    elif kla_match_folder:
+        st.error("文件夹路径不存在，请检查路径是否正确")
+    
+    # 匹配阈值扫描（方式1/2）：一次计算最近距离，得到多个阈值下的检出率曲线
+    if input_mode in ("方式1：选择主文件夹", "方式2：选择单个文件夹（包含所有CSV）") and \
+            kla_match_folder and os.path.exists(kla_match_folder):
+        with st.expander("📈 匹配阈值扫描（检出率/过检随阈值变化）", expanded=False):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                sweep_min = st.number_input("最小阈值", value=25.0, min_value=1.0, key="kla_sweep_min")
+            with col2:
+                sweep_max = st.number_input("最大阈值", value=500.0, min_value=1.0, key="kla_sweep_max")
+            with col3:
+                sweep_step = st.number_input("步长", value=25.0, min_value=1.0, key="kla_sweep_step")
+            
+            if st.button("开始阈值扫描", key="kla_sweep_btn"):
+                thresholds = np.arange(sweep_min, sweep_max + sweep_step / 2, sweep_step)
+                layout = 'folders' if input_mode == "方式1：选择主文件夹" else 'files'
+                casi_sources, kla_sources = kla_match.list_sources(kla_match_folder, layout)
+                with st.spinner("正在计算最近距离..."):
+                    sweep_df = kla_match.sweep_sources(casi_sources, kla_sources, thresholds,
+                                                       align=kla_auto_align, match_threshold=kla_match_threshold,
+                                                       align_radius=kla_align_radius, geometry=kla_geometry,
+                                                       log=st_log)
+                
+                if sweep_df.empty:
+                    st.warning("未生成任何扫描结果")
+                else:
+                    fig_sweep = go.Figure()
+                    for (casi_name, kla_name), group in sweep_df.groupby(['CASI文件夹', 'KLA文件夹'], sort=False):
+                        fig_sweep.add_trace(go.Scatter(
+                            x=group['阈值'], y=group['检出率(%)'], mode='lines+markers',
+                            name=f"{casi_name} vs {kla_name}"
+                        ))
+                    fig_sweep.add_vline(x=adaptive_radius.base_radius(kla_match_threshold), line_dash='dash', line_color='gray',
+                                        annotation_text='当前阈值')
+                    fig_sweep.update_layout(
+                        title='检出率随匹配阈值变化',
+                        xaxis_title='匹配距离阈值',
+                        yaxis_title='检出率(%)',
+                        height=450
+                    )
+                    st.plotly_chart(fig_sweep, use_container_width=True)
+                    st.dataframe(sweep_df, use_container_width=True, height=300)
+                    st.download_button(
+                        label="📥 下载阈值扫描结果 (CSV)",
+                        data=sweep_df.to_csv(index=False).encode('utf-8-sig'),
+                        file_name="kla_threshold_sweep.csv",
+                        mime="text/csv",
+                        key="download_kla_sweep"
+                    )
+    
+    # 按晶圆环带×扇区统计各组匹配结果的过检/正确检出/漏检分布
+    if session_results.get('kla_match_results'):
+        with st.expander("🎯 按晶圆环带/扇区统计", expanded=False):
+            zone_col1, zone_col2, zone_col3, zone_col4 = st.columns(4)
+            with zone_col1:
+                n_rings = st.number_input("环带数", value=5, min_value=1, max_value=50, step=1, key="kla_zone_rings")
+            with zone_col2:
+                n_sectors = st.number_input("扇区数", value=8, min_value=1, max_value=72, step=1,
+                                            key="kla_zone_sectors", help="扇区从X正方向开始逆时针编号")
+            with zone_col3:
+                zone_equal_area = st.checkbox("各环带面积相等", value=False, key="kla_zone_equal_area",
+                                              help="默认各环带宽度相等")
+            with zone_col4:
+                zone_metric = st.selectbox("热力图指标", ['过检', '正确检出', '漏检', '过检占比(%)'],
+                                           key="kla_zone_metric")
+
+            # 按各结果匹配时的晶圆几何参数分环带（与当前界面设置无关）
+            zone_frames = []
+            zone_geometries = []
+            for result in session_results.get('kla_match_results'):
+                if 'coord_data' not in result:
+                    continue
+                zones = kla_match.zone_stats(result['coord_data'], int(n_rings), int(n_sectors), result.get('geometry'),
+                                             equal_area=zone_equal_area)
+                casi_name, kla_name = kla_match.pair_names(result)
+                zones.insert(0, '组合', f"{casi_name} vs {kla_name}")
+                zone_frames.append(zones)
+                geometry_text = wafer_geometry.describe(result.get('geometry') or wafer_geometry.DEFAULT_GEOMETRY)
+                if geometry_text not in zone_geometries:
+                    zone_geometries.append(geometry_text)
+
+            if zone_frames:
+                zone_df = pd.concat(zone_frames, ignore_index=True)
+                # 所有组合合计后按环带×扇区绘制热力图
+                zone_total = zone_df.groupby(['环带', '扇区'])[['过检', '正确检出', '漏检']].sum()
+                casi_total = zone_total['过检'] + zone_total['正确检出']
+                zone_total['过检占比(%)'] = (zone_total['过检'] / casi_total.where(casi_total > 0) * 100).round(2)
+                zone_grid = zone_total[zone_metric].unstack('扇区')
+                fig_zone = go.Figure(go.Heatmap(
+                    z=zone_grid.to_numpy(), x=[f"扇区{s}" for s in zone_grid.columns],
+                    y=[f"环带{r}" for r in zone_grid.index], colorscale='Reds',
+                    hovertemplate='%{y} %{x}: %{z}<extra></extra>'
+                ))
+                fig_zone.update_layout(title=f"{zone_metric}（所有组合合计）", height=400)
+                st.plotly_chart(fig_zone, use_container_width=True)
+                st.caption(f"晶圆几何（匹配时使用）：{'；'.join(zone_geometries)}；过检不含边缘点")
+                if len(zone_geometries) > 1:
+                    st.warning("⚠️ 各组结果的晶圆几何参数不同，合计热力图中同一环带的半径范围并不一致")
+                st.dataframe(zone_df, use_container_width=True, height=300)
+                st.download_button(
+                    label="📥 下载环带/扇区统计 (CSV)",
+                    data=zone_df.to_csv(index=False).encode('utf-8-sig'),
+                    file_name="kla_zone_stats.csv",
+                    mime="text/csv",
+                    key="download_kla_zones"
+                )
+
+    # 多批次趋势库：各slot汇总结果追加到本地SQLite，趋势图直接查询，无需重新匹配
+    st.write("---")
+    st.markdown('<a name="趋势库"></a>', unsafe_allow_html=True)
+    st.header("📈 多批次检出/过检趋势")
+
+    trend_db = st.text_input("趋势库文件", value=trend_store.DEFAULT_STORE_PATH, key="trend_db_path",
+                             help="本地SQLite文件，只追加不修改；可通过环境变量 BLOBFEA_TREND_DB 修改默认位置")
+    if session_results.get('kla_match_results'):
+        trend_col1, trend_col2, trend_col3 = st.columns(3)
+        with trend_col1:
+            trend_lot = st.text_input("批次(Lot)", key="trend_lot")
+        with trend_col2:
+            trend_condition = st.text_input("工况", key="trend_condition")
+        with trend_col3:
+            trend_version = st.text_input(
+                "规则版本", value=trend_store.rule_version(kla_match_threshold, kla_auto_align, kla_align_radius,
+                                                       kla_geometry, (size_bin_min, size_bin_max)),
+                key="trend_rule_version", help="默认由当前匹配阈值/自适应规则和对齐设置生成")
+        if st.button("💾 写入趋势库", key="trend_append_btn"):
+            if not trend_lot.strip():
+                st.warning("⚠️ 请填写批次")
+            else:
+                try:
+                    trend_store.append_results(session_results.get('kla_match_results'), trend_lot.strip(),
+                                               trend_condition.strip(), trend_version.strip(),
+                                               rule_desc=trend_store.describe_rule(kla_match_threshold, kla_auto_align,
+                                                                                   kla_geometry),
+                                               path=trend_db, log=st_log)
+                except Exception as e:
+                    st.error(f"写入趋势库失败: {str(e)}")
+
+    if os.path.exists(trend_db):
+        trend_values = trend_store.list_values(trend_db)
+        filter_col1, filter_col2, filter_col3 = st.columns(3)
+        with filter_col1:
+            trend_conditions = st.multiselect("工况", trend_values['condition'], default=trend_values['condition'],
+                                              key="trend_filter_conditions")
+        with filter_col2:
+            version_labels = {version: f"{version}（{desc}）" if desc else version
+                              for version, desc in trend_values['rule_version']}
+            trend_versions = st.multiselect("规则版本", list(version_labels), default=list(version_labels)[:1],
+                                            format_func=version_labels.get, key="trend_filter_versions")
+        with filter_col3:
+            trend_metric = st.selectbox("指标", list(trend_store.LABELS), format_func=trend_store.LABELS.get,
+                                        key="trend_metric")
+
+        trend_df = trend_store.lot_trend(trend_db, conditions=trend_conditions, rule_versions=trend_versions)
+        if trend_df.empty:
+            st.info("没有符合条件的记录")
+        else:
+            fig_trend = go.Figure()
+            for (condition, version), group in trend_df.groupby(['condition', 'rule_version'], sort=False):
+                fig_trend.add_trace(go.Scatter(
+                    x=group['lot'], y=group[trend_metric], mode='lines+markers',
+                    name=f"{condition or '-'} / {version}",
+                    customdata=group[['n_slots', 'n_pairs', 'first_recorded']],
+                    hovertemplate="%{x}<br>%{y:.3f}<br>slot数: %{customdata[0]}（组合数: %{customdata[1]}）"
+                                  "<br>%{customdata[2]}<extra></extra>"
+                ))
+            fig_trend.update_layout(
+                title=f"{trend_store.LABELS[trend_metric]}（按批次）",
+                xaxis_title='批次',
+                yaxis_title=trend_store.LABELS[trend_metric],
+                height=450
+            )
+            st.plotly_chart(fig_trend, use_container_width=True)
+            st.dataframe(trend_df, use_container_width=True, height=300)
+            st.download_button(
+                label="📥 下载批次趋势 (CSV)",
+                data=trend_df.to_csv(index=False).encode('utf-8-sig'),
+                file_name="lot_trend.csv",
+                mime="text/csv",
+                key="download_lot_trend"
+            )
+
+    # 新增：CASI坐标共有率分析（基于匹配结果）
+    st.write("---")
+    st.markdown('<a name="共有率分析"></a>', unsafe_allow_html=True)
+    st.header("🔍 CASI缺陷坐标共有率分析")
+    
+    with st.expander("ℹ️ 功能说明", expanded=False):
+        st.markdown("""
+        基于CASI与KLA匹配分析结果，分析多个子文件夹间CASI缺陷的位置一致性（共有率）。
+        
+        **重要说明：**
+        - **前置条件：** 需要先执行"CASI与KLA匹配分析"
+        - **分析对象：** 仅分析CASI数据（有nDefectID），不包括KLA漏检数据
+        - **匹配范围：** 200nm（可调整）
+        - **匹配类型：** 按过检、正确检出、漏检分别统计
+        - **统计方式：** 计算每个位置在多个文件夹中的出现次数
+        
+        **分析内容：**
+        1. 各子文件夹过检/正确检出/漏检的位置重叠情况（CASI数据）
+        2. 共有的位置占各子文件夹的百分比
+        3. 可视化展示共有位置分布
+        4. 导出nDefectID对应关系及完整特征数据
+        
+        **数据过滤：**
+        - ✅ 包含：所有有nDefectID的CASI缺陷数据
+        - ❌ 排除：KLA漏检数据（无nDefectID，无法进行特征对比）
+        """)
+    
+    # 检查是否有匹配结果数据
+    if not session_results.get('kla_match_results'):
+        st.warning("⚠️ 请先执行上方的 '🔍 CASI与KLA匹配分析' 以生成匹配数据")
+    else:
+        # 分析参数
+        col_param1, col_param2 = st.columns(2)
+        with col_param1:
+            cohesion_threshold = st.number_input("匹配距离阈值（nm）", value=200.0, min_value=10.0, max_value=1000.0,
+                                                help="两个缺陷之间的最大距离，小于此距离视为同一位置")
+        with col_param2:
+            min_occurrence = st.number_input("最小出现次数", value=2, min_value=2, max_value=10,
+                                            help="至少在N个文件夹中出现才统计为共有位置")
+        cohesion_threshold = radius_rule_input(cohesion_threshold, "cohesion_radius", sources=('casi',))
+        
+        all_match_results = session_results.get('kla_match_results')
+        folder_options = list(dict.fromkeys(kla_match.pair_names(result)[0] for result in all_match_results
+                                            if 'coord_data' in result))
+        selected_folders = st.multiselect("参与分析的CASI文件夹", folder_options, default=folder_options,
+                                          key="cohesion_folders",
+                                          help="增减文件夹后再次分析时只更新变化的文件夹，不重新计算全部共有位置")
+        
+        if st.button("🔍 开始共有率分析", type="primary", key="cohesion_analysis_btn"):
+            try:
+                st.info(f"基于 {len(all_match_results)} 个匹配结果进行分析")
+                
+                # 匹配结果（按存储版本号判断，落盘重载后对象会变）和阈值不变时复用已提取的数据和共有位置索引
+                cache_token = (session_results.version('kla_match_results'), repr(cohesion_threshold))
+                cohesion_cache = st.session_state.get('common_rate_cache')
+                if cohesion_cache is None or cohesion_cache['token'] != cache_token:
+                    cohesion_cache = {
+                        'token': cache_token,
+                        'folder_defects': common_rate.collect_folder_defects(all_match_results),
+                        'indexes': {}
+                    }
+                    st.session_state['common_rate_cache'] = cohesion_cache
+                
+                # 从all_match_results中提取数据
+                folder_defects = {folder: cohesion_cache['folder_defects'][folder] for folder in selected_folders
+                                  if folder in cohesion_cache['folder_defects']}
+                
+                if len(folder_defects) < 2:
+                    st.error("至少需要2个CASI文件夹进行共有率分析")
+                else:
+                    st.success(f"成功读取 {len(folder_defects)} 个文件夹的数据")
+                    
+                    # 定义颜色列表（用于可视化）
+                    colors = [
+                        '#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8',
+                        '#F7DC6F', '#BB8FCE', '#85C1E2', '#F8B88B', '#AED6F1',
+                        '#A9DFBF', '#F9E79F', '#D7BDE2', '#A2D9CE', '#FAD7A0'
+                    ]
+                    
+                    # 对每种类型进行共有率分析
+                    for defect_type in common_rate.DEFECT_TYPES:
+                        st.write("---")
+                        st.subheader(f"📊 {defect_type} 共有率分析")
+                        
+                        # 收集所有点
+                        all_points_by_folder = common_rate.points_by_folder(folder_defects, defect_type)
+                        
+                        if len(all_points_by_folder) < 2:
+                            st.info(f"{defect_type}：数据不足，至少需要2个文件夹有此类型缺陷")
+                            continue
+                        
+                        # 合并所有点并记录来源，过滤掉没有 nDefectID 的数据（来自KLA的漏检数据）
+                        points, filtered_kla_points = common_rate.flatten_points(all_points_by_folder)
+                        
+                        # 显示过滤信息
+                        if filtered_kla_points > 0:
+                            st.info(f"已过滤 {filtered_kla_points} 个来自KLA的{defect_type}数据（无nDefectID），保留 {len(points)} 个CASI数据用于共有率分析")
+                        
+                        if len(points) == 0:
+                            st.warning(f"{defect_type}：过滤后无有效数据，跳过分析")
+                            continue
+                        
+                        # 查找在多个文件夹中出现的共有位置
+                        cohesion_index = cohesion_cache['indexes'].setdefault(
+                            defect_type, common_rate.CommonRateIndex(cohesion_threshold))
+                        members = cohesion_index.update(all_points_by_folder, min_occurrence)
+                        matched_groups = common_rate.group_summary(members)
+                        
+                        # 显示统计结果
+                        if not matched_groups.empty:
+                            st.write(f"### 📈 {defect_type} 共有位置统计")
+                            
+                            # 统计每个文件夹的数据
+                            stats_df = common_rate.folder_share_stats(all_points_by_folder, members, defect_type)
+                            st.dataframe(stats_df, use_container_width=True)
+                            
+                            # 共有位置统计
+                            st.write(f"**共有位置总数：** {len(matched_groups)}")
+                            
+                            # 按出现次数统计
+                            occurrence_counts = common_rate.occurrence_distribution(matched_groups)
+                            
+                            st.write("**按出现次数分布：**")
+                            for count in sorted(occurrence_counts.keys(), reverse=True):
+                                st.write(f"  - 出现在 {count} 个文件夹：{occurrence_counts[count]} 个位置")
+                            
+                            # 新增：显示nDefectID对应关系表格
+                            st.write("---")
+                            st.write(f"### 📋 {defect_type} nDefectID对应关系及特征数据表")
+                            
+                            # 准备对应关系数据
+                            sorted_folders = sorted(all_points_by_folder.keys())
+                            correspondence_df = common_rate.build_correspondence_table(members, matched_groups, sorted_folders)
+                            
+                            if not correspondence_df.empty:
+                                # 显示表格（由于列数较多，使用可滚动视图）
+                                st.write(f"**数据说明：** 表格包含 {len(correspondence_df)} 个共有位置")
+                                st.write(f"**列结构：** 基础信息 → nDefectID(所有文件夹) → 特征(每个特征对应所有文件夹)")
+                                st.write(f"**特征顺序：** DW1O(MaxOrg→BGMean→BGDev→Size→TotalSNR→MapSNR) → DW2O(...) → DN1O(...)")
+                                st.dataframe(correspondence_df, use_container_width=True, height=400)
+                                
+                                # 导出nDefectID对应关系及特征数据表
+                                csv_correspondence = correspondence_df.to_csv(index=False, encoding='utf-8-sig')
+                                st.download_button(
+                                    label=f"📥 导出{defect_type} 共有缺陷完整特征数据表(CSV)",
+                                    data=csv_correspondence,
+                                    file_name=f"{defect_type}_共有缺陷_nDefectID及特征数据_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                    mime="text/csv",
+                                    key=f"download_correspondence_{defect_type}",
+                                    help=f"下载包含{len(correspondence_df)}行数据和{len(correspondence_df.columns)}列的完整特征数据表"
+                                )
+                            else:
+                                st.info("没有可显示的nDefectID对应关系数据")
+                            
+                            # 新增：不共有缺陷分析
+                            st.write("---")
+                            st.write(f"### 📋 {defect_type} 不共有缺陷分析")
+                            st.write("""
+                            **说明：** 仅在部分文件夹中出现的缺陷（未达到最小出现次数要求），同时查找其他文件夹中相同位置的缺陷特征
+                            
+                            **匹配说明：**
+                            - ✅ **找到匹配**：在其他文件夹的相同位置（匹配距离阈值内）找到缺陷，显示其nDefectID、缺陷类型、nDefectType和特征值
+                            - ❌ **空白**：在该位置没有找到任何缺陷（包括已被nDefectType=1000/10001筛掉的）
+                            - 🔍 **nDefectType标识**：
+                              - 1000/10001：表示该缺陷被筛选规则过滤掉
+                              - 其他值：正常缺陷
+                            - 💡 **无nDefectID的情况**：可能是KLA漏检数据（KLA源数据没有nDefectID字段）
+                            """)
+                            
+                            # 找出所有未被匹配成共有位置的点，并查找其他文件夹中相同位置的缺陷
+                            non_shared_df = common_rate.find_non_shared(
+                                defect_type, all_points_by_folder, members, folder_defects,
+                                sorted_folders, cohesion_threshold
+                            )
+                            
+                            if not non_shared_df.empty:
+                                # 按源文件夹分组统计
+                                st.write(f"**不共有缺陷统计：**")
+                                non_shared_counts = non_shared_df['源文件夹'].value_counts()
+                                
+                                cols_stat = st.columns(min(len(non_shared_counts), 4))
+                                for idx, (folder, count) in enumerate(non_shared_counts.items()):
+                                    with cols_stat[idx % 4]:
+                                        st.metric(f"{folder}", count)
+                                
+                                st.write(f"**总计：** {len(non_shared_df)} 个不共有{defect_type}缺陷")
+                                
+                                # 显示表格（带提示信息）
+                                st.info("""
+                                💡 **表格说明：** 
+                                - **每行**：一个不共有缺陷及其在其他文件夹中对应位置的特征值
+                                - **源nDefectType**：源缺陷的类型标识（1000/10001表示被筛选规则过滤）
+                                - **其他文件夹列**：
+                                  - ✅ **有数据**：在该位置找到缺陷（显示nDefectID、nDefectType、缺陷类型、距离和特征）
+                                  - ❌ **空白**：在该位置没有找到任何缺陷
+                                - **nDefectType解读**：
+                                  - **1000/10001**：被nDefectType筛选规则过滤掉的缺陷
+                                  - **其他数值**：正常检出的缺陷
+                                  - **空白**：可能是KLA数据（无nDefectType字段）或该位置无缺陷
+                                """)
+                                st.dataframe(non_shared_df, use_container_width=True, height=400)
+                                
+                                # 导出不共有缺陷数据
+                                csv_non_shared = non_shared_df.to_csv(index=False, encoding='utf-8-sig')
+                                st.download_button(
+                                    label=f"📥 导出{defect_type} 不共有缺陷跨文件夹对比数据(CSV)",
+                                    data=csv_non_shared,
+                                    file_name=f"{defect_type}_不共有缺陷_跨文件夹对比_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                    mime="text/csv",
+                                    key=f"download_non_shared_{defect_type}",
+                                    help=f"下载包含{len(non_shared_df)}个不共有缺陷及其在其他文件夹中对应位置的完整特征数据"
+                                )
+                                
+                                # 统计信息：在其他文件夹中找到对应位置的比例
+                                st.write("---")
+                                st.write(f"### 📊 跨文件夹匹配统计")
+                                
+                                match_stats = []
+                                for other_folder in sorted_folders:
+                                    if f'{other_folder}_nDefectID' in non_shared_df.columns:
+                                        # 排除源文件夹自身
+                                        non_self_df = non_shared_df[non_shared_df['源文件夹'] != other_folder]
+                                        if len(non_self_df) > 0:
+                                            matched_count = non_self_df[f'{other_folder}_nDefectID'].notna().sum()
+                                            match_ratio = (matched_count / len(non_self_df) * 100) if len(non_self_df) > 0 else 0
+                                            match_stats.append({
+                                                '目标文件夹': other_folder,
+                                                '找到对应位置': matched_count,
+                                                '总不共有数': len(non_self_df),
+                                                '匹配率': f"{match_ratio:.2f}%"
+                                            })
+                                
+                                if match_stats:
+                                    match_stats_df = pd.DataFrame(match_stats)
+                                    st.dataframe(match_stats_df, use_container_width=True)
+                                
+                                # 可视化不共有缺陷分布
+                                st.write(f"### 🗺️ {defect_type} 不共有缺陷分布图")
+                                
+                                fig_non_shared = go.Figure()
+                                
+                                # 为每个文件夹的不共有缺陷使用不同颜色
+                                folder_colors = {
+                                    folder: colors[idx % len(colors)] 
+                                    for idx, folder in enumerate(sorted_folders)
+                                }
+                                
+                                for folder in sorted_folders:
+                                    folder_data = non_shared_df[non_shared_df['源文件夹'] == folder]
+                                    if len(folder_data) > 0:
+                                        x_coords = [float(x) for x in folder_data['源X坐标']]
+                                        y_coords = [float(y) for y in folder_data['源Y坐标']]
+                                        
+                                        hover_texts = [
+                                            f"源文件夹: {row['源文件夹']}<br>源nDefectID: {row['源nDefectID']}<br>X: {row['源X坐标']}<br>Y: {row['源Y坐标']}"
+                                            for _, row in folder_data.iterrows()
+                                        ]
+                                        
+                                        fig_non_shared.add_trace(go.Scatter(
+                                            x=x_coords,
+                                            y=y_coords,
+                                            mode='markers',
+                                            name=f'{folder} ({len(folder_data)})',
+                                            marker=dict(
+                                                size=8,
+                                                color=folder_colors[folder],
+                                                line=dict(width=1, color='white')
+                                            ),
+                                            hovertext=hover_texts,
+                                            hoverinfo='text'
+                                        ))
+                                
+                                # 添加晶圆边界
+                                circle_x, circle_y = wafer_geometry.boundary_circle(kla_geometry['center'], kla_geometry['diameter'] / 2)
+                                
+                                fig_non_shared.add_trace(go.Scatter(
+                                    x=circle_x,
+                                    y=circle_y,
+                                    mode='lines',
+                                    name='晶圆边界',
+                                    line=dict(color='gray', width=2, dash='dash'),
+                                    showlegend=True,
+                                    hoverinfo='skip'
+                                ))
+                                
+                                fig_non_shared.update_layout(
+                                    title=f'{defect_type} 不共有缺陷分布',
+                                    xaxis=dict(
+                                        title='X坐标',
+                                        range=[0, 300000],
+                                        scaleanchor="y",
+                                        scaleratio=1
+                                    ),
+                                    yaxis=dict(
+                                        title='Y坐标',
+                                        range=[0, 300000]
+                                    ),
+                                    width=800,
+                                    height=800,
+                                    hovermode='closest'
+                                )
+                                
+                                st.plotly_chart(fig_non_shared, use_container_width=True)
+                            else:
+                                st.info(f"{defect_type}：所有缺陷都是共有的，没有不共有缺陷")
+                            
+                            # 可视化共有位置
+                            st.write(f"### 🗺️ {defect_type} 共有位置分布图")
+                            
+                            fig_cohesion = go.Figure()
+                            
+                            # 创建颜色映射（按出现次数）
+                            max_count = matched_groups['count'].max()
+                            
+                            # 按出现次数分组显示
+                            for occurrence in sorted(matched_groups['count'].unique(), reverse=True):
+                                groups_with_occurrence = matched_groups[matched_groups['count'] == occurrence]
+                                
+                                x_coords = groups_with_occurrence['x']
+                                y_coords = groups_with_occurrence['y']
+                                
+                                hover_texts = [
+                                    f"出现次数: {occurrence}<br>X: {x:.2f}<br>Y: {y:.2f}<br>文件夹: {folders}"
+                                    for x, y, folders in zip(x_coords, y_coords, groups_with_occurrence['folders'])
+                                ]
+                                
+                                # 颜色渐变：次数越多颜色越深
+                                intensity = occurrence / max_count
+                                color = f'rgba(255, {int(100 * (1-intensity))}, {int(100 * (1-intensity))}, 0.7)'
+                                
+                                fig_cohesion.add_trace(go.Scatter(
+                                    x=x_coords,
+                                    y=y_coords,
+                                    mode='markers',
+                                    name=f'出现{occurrence}次 ({len(groups_with_occurrence)})',
+                                    marker=dict(
+                                        size=8 + 4 * (occurrence / max_count),
+                                        color=color,
+                                        line=dict(width=1, color='white')
+                                    ),
+                                    hovertext=hover_texts,
+                                    hoverinfo='text'
+                                ))
+                            
+                            # 添加晶圆边界
+                            circle_x, circle_y = wafer_geometry.boundary_circle(kla_geometry['center'], kla_geometry['diameter'] / 2)
+                            
+                            fig_cohesion.add_trace(go.Scatter(
+                                x=circle_x,
+                                y=circle_y,
+                                mode='lines',
+                                name='晶圆边界',
+                                line=dict(color='gray', width=2, dash='dash'),
+                                showlegend=True,
+                                hoverinfo='skip'
+                            ))
+                            
+                            fig_cohesion.update_layout(
+                                title=f'{defect_type} 共有位置分布',
+                                xaxis=dict(
+                                    title='X坐标',
+                                    range=[0, 300000],
+                                    scaleanchor="y",
+                                    scaleratio=1
+                                ),
+                                yaxis=dict(
+                                    title='Y坐标',
+                                    range=[0, 300000]
+                                ),
+                                width=800,
+                                height=800,
+                                hovermode='closest'
+                            )
+                            
+                            st.plotly_chart(fig_cohesion, use_container_width=True)
+                            
+                            # 导出共有位置基础数据（坐标和出现次数）
+                            export_df = pd.DataFrame({
+                                '位置ID': matched_groups.index,
+                                'X坐标': matched_groups['x'],
+                                'Y坐标': matched_groups['y'],
+                                '出现次数': matched_groups['count'],
+                                '文件夹列表': matched_groups['folders']
+                            })
+                            csv_export = export_df.to_csv(index=False, encoding='utf-8-sig')
+                            
+                            st.download_button(
+                                label=f"📥 导出{defect_type}共有位置基础数据(CSV)",
+                                data=csv_export,
+                                file_name=f"{defect_type}_共有位置基础数据_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                mime="text/csv",
+                                key=f"download_shared_base_{defect_type}",
+                                help=f"下载包含位置坐标和出现次数的基础数据（不含详细特征）"
+                            )
+                        else:
+                            st.info(f"{defect_type}：未找到满足条件的共有位置（至少出现{min_occurrence}次）")
+            
+            except Exception as e:
+                st.error(f"共有率分析时出错: {str(e)}")
+                st.exception(e)
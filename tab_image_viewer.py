@@ -0,0 +1,404 @@
+import os
+import glob
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def render():
+    """TIFF图像查看页面"""
+    st.markdown('<a name="图像查看"></a>', unsafe_allow_html=True)
+    st.header("🖼️ TIFF图像查看器")
+    
+    # 文件夹选择
+    folder_path = st.text_input("请输入包含TIFF图像的文件夹路径", 
+                               placeholder="例如: D:/images/tiff_folder")
+    
+    if folder_path:
+        try:
+            if Image is None:
+                st.error("请安装PIL库: pip install Pillow")
+                st.stop()
+            
+            # 检查文件夹是否存在
+            if not os.path.exists(folder_path):
+                st.error("文件夹路径不存在，请检查路径是否正确")
+            else:
+                # 搜索TIFF文件
+                tiff_patterns = [
+                    os.path.join(folder_path, "*-DN1O.tiff"),
+                    os.path.join(folder_path, "*-DN1O.TIFF"),
+                    os.path.join(folder_path, "*-DW1O.tiff"), 
+                    os.path.join(folder_path, "*-DW1O.TIFF"),
+                    os.path.join(folder_path, "*-DW2O.tiff"),
+                    os.path.join(folder_path, "*-DW2O.TIFF")
+                ]
+                
+                all_files = []
+                for pattern in tiff_patterns:
+                    all_files.extend(glob.glob(pattern))
+                
+                if not all_files:
+                    st.warning("在指定文件夹中未找到符合格式的TIFF文件")
+                    st.info("文件格式应为: ID-DN1O.tiff, ID-DW1O.tiff, ID-DW2O.tiff")
+                else:
+                    st.success(f"找到 {len(all_files)} 个TIFF文件")
+                    
+                    # 解析文件并按ID分组
+                    @st.cache_data
+                    def parse_tiff_files(file_list):
+                        file_groups = {}
+                        
+                        for file_path in file_list:
+                            filename = os.path.basename(file_path)
+                            
+                            # 解析文件名格式：ID-通道.tiff
+                            if '-DN1O.' in filename.upper():
+                                channel = 'DN1O'
+                                file_id = filename.split('-DN1O.')[0]
+                            elif '-DW1O.' in filename.upper():
+                                channel = 'DW1O'
+                                file_id = filename.split('-DW1O.')[0]
+                            elif '-DW2O.' in filename.upper():
+                                channel = 'DW2O'
+                                file_id = filename.split('-DW2O.')[0]
+                            else:
+                                continue
+                            
+                            if file_id not in file_groups:
+                                file_groups[file_id] = {}
+                            
+                            file_groups[file_id][channel] = file_path
+                        
+                        return file_groups
+                    
+                    file_groups = parse_tiff_files(all_files)
+                    
+                    # 显示文件统计
+                    st.subheader("文件统计")
+                    col1, col2, col3, col4 = st.columns(4)
+                    
+                    with col1:
+                        st.metric("总ID数量", len(file_groups))
+                    with col2:
+                        dn1o_count = sum(1 for group in file_groups.values() if 'DN1O' in group)
+                        st.metric("DN1O图像", dn1o_count)
+                    with col3:
+                        dw1o_count = sum(1 for group in file_groups.values() if 'DW1O' in group)
+                        st.metric("DW1O图像", dw1o_count)
+                    with col4:
+                        dw2o_count = sum(1 for group in file_groups.values() if 'DW2O' in group)
+                        st.metric("DW2O图像", dw2o_count)
+                    
+                    # 按ID排序（数字排序）
+                    sorted_ids = sorted(file_groups.keys(), key=lambda x: int(x) if x.isdigit() else float('inf'))
+                    
+                    # 初始化session state
+                    if 'current_id_index' not in st.session_state:
+                        st.session_state.current_id_index = 0
+                    if 'folder_path' not in st.session_state:
+                        st.session_state.folder_path = folder_path
+                    
+                    # 如果文件夹路径改变，重置索引
+                    if st.session_state.folder_path != folder_path:
+                        st.session_state.current_id_index = 0
+                        st.session_state.folder_path = folder_path
+                    
+                    # 确保索引在有效范围内
+                    if st.session_state.current_id_index >= len(sorted_ids):
+                        st.session_state.current_id_index = len(sorted_ids) - 1 if sorted_ids else 0
+                    elif st.session_state.current_id_index < 0:
+                        st.session_state.current_id_index = 0
+                    
+                    # ID选择和导航
+                    st.subheader("批量浏览控制")
+                    
+                    # 导航按钮 - 使用表单来确保按钮点击被正确处理
+                    with st.form("navigation_form", clear_on_submit=False):
+                        col1, col2, col3, col4, col5 = st.columns([1, 1, 1, 1, 2])
+                        
+                        with col1:
+                            first_btn = st.form_submit_button("⏮️ 第一个")
+                        
+                        with col2:
+                            prev_disabled = st.session_state.current_id_index <= 0
+                            prev_btn = st.form_submit_button("⬅️ 上一个", disabled=prev_disabled)
+                        
+                        with col3:
+                            next_disabled = st.session_state.current_id_index >= len(sorted_ids) - 1
+                            next_btn = st.form_submit_button("➡️ 下一个", disabled=next_disabled)
+                        
+                        with col4:
+                            last_btn = st.form_submit_button("⏭️ 最后一个")
+                        
+                        with col5:
+                            # 进度条和当前状态
+                            if sorted_ids:
+                                progress = (st.session_state.current_id_index + 1) / len(sorted_ids)
+                                st.progress(progress)
+                                current_id = sorted_ids[st.session_state.current_id_index]
+                                st.write(f"**{st.session_state.current_id_index + 1} / {len(sorted_ids)}** (ID: {current_id})")
+                    
+                    # 处理按钮点击
+                    if first_btn:
+                        st.session_state.current_id_index = 0
+                        st.rerun()
+                    elif prev_btn and not prev_disabled:
+                        st.session_state.current_id_index = max(0, st.session_state.current_id_index - 1)
+                        st.rerun()
+                    elif next_btn and not next_disabled:
+                        st.session_state.current_id_index = min(len(sorted_ids) - 1, st.session_state.current_id_index + 1)
+                        st.rerun()
+                    elif last_btn:
+                        st.session_state.current_id_index = len(sorted_ids) - 1
+                        st.rerun()
+                    
+                    
+                    # ID选择下拉框
+                    # st.subheader("选择特定ID")
+                    # col1, col2 = st.columns([3, 1])
+                    # with col1:
+                    #     # 创建ID选择框
+                    #     selected_index = st.selectbox(
+                    #         "跳转到特定ID", 
+                    #         range(len(sorted_ids)),
+                    #         index=st.session_state.current_id_index,
+                    #         format_func=lambda x: f"ID: {sorted_ids[x]}",
+                    #         key="id_selectbox",
+                    #         help="直接选择要查看的ID"
+                    #     )
+                        
+                        # 如果选择框的值改变了，更新session state
+                        # if selected_index != st.session_state.current_id_index:
+                        #     st.session_state.current_id_index = selected_index
+                        #     st.rerun()
+                    
+                    with col2:
+                        auto_enhance = st.checkbox("自动增强显示", value=True, help="自动调整16位图像的显示对比度")
+                    
+                    # 当前选择的ID
+                    selected_id = sorted_ids[st.session_state.current_id_index] if sorted_ids else None
+                    
+                    # 高级显示选项
+                    with st.expander("高级显示选项"):
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            percentile_low = st.slider("对比度下限百分位", 0.0, 5.0, 1.0, 0.1, help="用于对比度拉伸的下限百分位")
+                        with col2:
+                            percentile_high = st.slider("对比度上限百分位", 95.0, 100.0, 100.0, 0.1, help="用于对比度拉伸的上限百分位")
+                        with col3:
+                            gamma_value = st.slider("伽马校正", 0.1, 3.0, 1.1, 0.1, help="调整图像亮度和对比度")
+                    
+                    if selected_id and selected_id in file_groups:
+                        st.subheader(f"ID: {selected_id} 的图像")
+                        
+                        # 获取该ID的所有通道图像
+                        channels = ['DN1O', 'DW1O', 'DW2O']
+                        available_channels = [ch for ch in channels if ch in file_groups[selected_id]]
+                        
+                        if available_channels:
+                            # 显示图像信息
+                            with st.expander("图像信息"):
+                                for channel in available_channels:
+                                    file_path = file_groups[selected_id][channel]
+                                    st.write(f"**{channel}**: {os.path.basename(file_path)}")
+                            
+                            # 读取和显示图像
+                            def load_and_process_16bit_tiff(file_path, enhance=True, p_low=1.0, p_high=99.0, gamma=1.0):
+                                """加载16位TIFF图像并处理为可显示的格式（类似ImageJ）"""
+                                try:
+                                    # 使用PIL读取16位TIFF
+                                    img = Image.open(file_path)
+                                    
+                                    # 转换为numpy数组
+                                    img_array = np.array(img, dtype=np.float64)  # 使用float64保持精度
+                                    
+                                    if enhance:
+                                        # 使用用户指定的百分位数进行对比度调整
+                                        p_low_val, p_high_val = np.percentile(img_array, (p_low, p_high))
+                                        
+                                        # 如果上下限相同，使用min和max
+                                        if p_high_val - p_low_val == 0:
+                                            p_low_val, p_high_val = img_array.min(), img_array.max()
+                                        
+                                        if p_high_val - p_low_val > 0:
+                                            # 对比度拉伸
+                                            img_normalized = (img_array - p_low_val) / (p_high_val - p_low_val)
+                                            img_normalized = np.clip(img_normalized, 0, 1)
+                                        else:
+                                            img_normalized = img_array / img_array.max() if img_array.max() > 0 else img_array
+                                        
+                                        # 应用用户指定的伽马校正
+                                        if gamma != 1.0:
+                                            img_normalized = np.power(img_normalized, 1.0/gamma)  # 注意伽马的倒数
+                                        
+                                        # 转换为8位
+                                        img_enhanced = (img_normalized * 255).astype(np.uint8)
+                                    else:
+                                        # 简单的线性缩放，保持16位到8位的线性关系
+                                        max_val = img_array.max()
+                                        if max_val > 0:
+                                            if max_val <= 255:
+                                                img_enhanced = img_array.astype(np.uint8)
+                                            else:
+                                                # 16位到8位的线性映射
+                                                img_enhanced = (img_array / 65535.0 * 255).astype(np.uint8)
+                                        else:
+                                            img_enhanced = img_array.astype(np.uint8)
+                                    
+                                    # 返回处理后的图像、原始数组（用于统计）、形状和统计信息
+                                    return img_enhanced, img_array.shape, (img_array.min(), img_array.max(), img_array.mean()), p_low_val if enhance else None, p_high_val if enhance else None
+                                
+                                except Exception as e:
+                                    st.error(f"读取图像失败: {str(e)}")
+                                    return None, None, None, None, None
+                            
+                            # 创建列布局显示图像
+                            if len(available_channels) == 1:
+                                # 单张图像
+                                channel = available_channels[0]
+                                file_path = file_groups[selected_id][channel]
+                                
+                                result = load_and_process_16bit_tiff(file_path, auto_enhance, percentile_low, percentile_high, gamma_value)
+                                img_processed, img_shape, img_stats, p_low_val, p_high_val = result
+                                
+                                if img_processed is not None:
+                                    st.write(f"**{channel} 通道**")
+                                    caption = f"{channel} - 形状: {img_shape}"
+                                    if auto_enhance and p_low_val is not None:
+                                        caption += f", 显示范围: {p_low_val:.0f}-{p_high_val:.0f}"
+                                    caption += f", 原始范围: {img_stats[0]:.0f}-{img_stats[1]:.0f}, 平均值: {img_stats[2]:.1f}"
+                                    st.image(img_processed, caption=caption)
+                            
+                            elif len(available_channels) == 2:
+                                # 两张图像
+                                col1, col2 = st.columns(2)
+                                
+                                for i, channel in enumerate(available_channels):
+                                    file_path = file_groups[selected_id][channel]
+                                    result = load_and_process_16bit_tiff(file_path, auto_enhance, percentile_low, percentile_high, gamma_value)
+                                    img_processed, img_shape, img_stats, p_low_val, p_high_val = result
+                                    
+                                    if img_processed is not None:
+                                        with [col1, col2][i]:
+                                            st.write(f"**{channel} 通道**")
+                                            st.image(img_processed, caption=f"{channel}")
+                                            with st.expander(f"{channel} 详细信息"):
+                                                st.write(f"图像尺寸: {img_shape}")
+                                                st.write(f"原始值范围: {img_stats[0]:.0f} - {img_stats[1]:.0f}")
+                                                st.write(f"平均值: {img_stats[2]:.1f}")
+                                                if auto_enhance and p_low_val is not None:
+                                                    st.write(f"显示范围: {p_low_val:.0f} - {p_high_val:.0f}")
+                                                    st.write(f"对比度拉伸: {percentile_low}% - {percentile_high}%")
+                            
+                            else:
+                                # 三张图像（标准情况）
+                                col1, col2, col3 = st.columns(3)
+                                columns = [col1, col2, col3]
+                                
+                                for i, channel in enumerate(available_channels):
+                                    file_path = file_groups[selected_id][channel]
+                                    result = load_and_process_16bit_tiff(file_path, auto_enhance, percentile_low, percentile_high, gamma_value)
+                                    img_processed, img_shape, img_stats, p_low_val, p_high_val = result
+                                    
+                                    if img_processed is not None:
+                                        with columns[i]:
+                                            st.write(f"**{channel} 通道**")
+                                            st.image(img_processed, caption=f"{channel}")
+                                            with st.expander(f"{channel} 详细信息"):
+                                                st.write(f"图像尺寸: {img_shape}")
+                                                st.write(f"原始值范围: {img_stats[0]:.0f} - {img_stats[1]:.0f}")
+                                                st.write(f"平均值: {img_stats[2]:.1f}")
+                                                if auto_enhance and p_low_val is not None:
+                                                    st.write(f"显示范围: {p_low_val:.0f} - {p_high_val:.0f}")
+                                                    st.write(f"伽马校正: {gamma_value}")
+                                                    st.write(f"对比度百分位: {percentile_low}% - {percentile_high}%")
+                            
+
+                            
+                            # 使用提示
+                            st.caption("💡 提示：使用上方的导航按钮或快速跳转功能切换图像")
+                        
+                        else:
+                            st.warning(f"ID {selected_id} 没有找到任何通道的图像")
+                    
+                    # 显示所有ID的概览
+                    with st.expander("所有ID概览"):
+                        st.write("可用的ID和对应的通道:")
+                        
+                        overview_data = []
+                        for file_id in sorted_ids:
+                            channels_available = list(file_groups[file_id].keys())
+                            overview_data.append({
+                                'ID': file_id,
+                                'DN1O': '✓' if 'DN1O' in channels_available else '✗',
+                                'DW1O': '✓' if 'DW1O' in channels_available else '✗',
+                                'DW2O': '✓' if 'DW2O' in channels_available else '✗',
+                                '文件数': len(channels_available)
+                            })
+                        
+                        overview_df = pd.DataFrame(overview_data)
+                        st.dataframe(overview_df, use_container_width=True)
+
+    # 快速跳转功能
+                    st.subheader("快速跳转")
+                    # 先获取跳转步长
+                    jump_step = st.number_input("跳转步长", min_value=1, max_value=10, value=5, key="jump_step_input")
+                    
+                    # 使用按钮进行跳转（不用表单，直接用按钮）
+                    col1, col2, col3 = st.columns(3)
+                    
+                    with col1:
+                        st.write(f"当前显示: ID {sorted_ids[st.session_state.current_id_index] if sorted_ids else 'None'}")
+                    
+                    with col2:
+                        if st.button(f"⏪ 后退 {jump_step} 个", key="jump_back_btn"):
+                            new_index = max(0, st.session_state.current_id_index - jump_step)
+                            st.session_state.current_id_index = new_index
+                            st.rerun()
+                    
+                    with col3:
+                        if st.button(f"⏩ 前进 {jump_step} 个", key="jump_forward_btn"):
+                            new_index = min(len(sorted_ids) - 1, st.session_state.current_id_index + jump_step)
+                            st.session_state.current_id_index = new_index
+                            st.rerun()
+                    
+        
+        except ImportError as e:
+            st.error("缺少必要的库，请安装: pip install Pillow")
+        except Exception as e:
+            st.error(f"处理文件夹时出错: {str(e)}")
+    
+    else:
+        st.info("请输入文件夹路径开始查看TIFF图像")
+        st.markdown("""
+        ### TIFF图像查看器使用说明：
+        
+        1. **文件格式要求**：
+           - 文件命名格式：`ID-通道.tiff` 或 `ID-通道.TIFF`
+           - 支持的通道：DN1O, DW1O, DW2O
+           - 例如：`1-DN1O.tiff`, `1-DW1O.tiff`, `1-DW2O.tiff`
+        
+        2. **功能特点**：
+           - 自动检测文件夹中所有符合格式的TIFF文件
+           - 按ID分组显示，一行显示三个通道
+           - 支持16位TIFF图像的正确显示
+           - 自动增强对比度，优化显示效果
+           - 批量浏览功能，快速切换不同ID
+        
+        3. **16位图像处理**：
+           - 自动进行对比度拉伸（2%-98%分位数）
+           - 显示原始数值范围和统计信息
+           - 可选择开启/关闭自动增强
+        
+        4. **浏览功能**：
+           - ID选择下拉框
+           - 上一个/下一个ID快速切换
+           - 所有ID概览表格
+           - 详细的图像信息显示
+        """)
@@ -0,0 +1,348 @@
+import os
+
+import streamlit as st
+import pandas as pd
+
+import data_loader
+import result_store
+import klarf_tools
+from ui_common import st_log
+
+
+def render():
+    """初始化处理工具页面：KLARF解析、CSV合并"""
+    session_results = result_store.get_session_store(st.session_state)
+
+    st.header("🔧 初始化处理工具")
+    
+    with st.expander("ℹ️ 功能说明", expanded=False):
+        st.markdown("""
+        **KLARF文件解析**：批量解析文件夹中的KLARF文件并存储excel
+        - 支持导出为Excel文件，可在页面预览
+        """)
+    
+    # KLARF文件解析
+    st.subheader("📄 1. KLARF文件解析")
+    
+    klarf_folder = st.text_input(
+        "请输入包含KLARF文件的文件夹路径",
+        key="klarf_folder_path",
+        help="文件夹中应包含多个KLARF格式文件"
+    )
+    
+    if klarf_folder and os.path.exists(klarf_folder):
+        if st.button("🚀 开始解析KLARF文件", type="primary", key="parse_klarf_btn"):
+            with st.spinner("正在解析KLARF文件..."):
+                try:
+                    # 创建解析器并解析
+                    progress_bar = st.progress(0)
+                    parser = klarf_tools.KLARFParser(
+                        klarf_folder,
+                        log=st_log,
+                        progress=progress_bar.progress
+                    )
+                    parsed_data = parser.parse_all_files()
+                    progress_bar.empty()
+                    
+                    if parsed_data:
+                        st.success(f"✅ 成功解析 {len(parsed_data)} 个Slot的数据")
+                        
+                        # 数值列无损降精度，减少session state内存占用
+                        parsed_data, mem_before, mem_after = data_loader.downcast_frames(parsed_data)
+                        st.caption(data_loader.format_memory_report(mem_before, mem_after))
+                        
+                        # 保存到session state
+                        session_results.put('klarf_parsed_data', parsed_data)
+                        
+                        # 显示数据预览
+                        st.subheader("📊 数据预览")
+                        
+                        # 选择要查看的Sheet
+                        selected_sheet = st.selectbox(
+                            "选择要查看的Slot",
+                            options=list(parsed_data.keys()),
+                            key="preview_sheet_selector"
+                        )
+                        
+                        if selected_sheet:
+                            df_preview = parsed_data[selected_sheet]
+                            st.write(f"**{selected_sheet}** 数据概况：")
+                            col1, col2, col3 = st.columns(3)
+                            with col1:
+                                st.metric("总记录数", len(df_preview))
+                            with col2:
+                                st.metric("字段数", len(df_preview.columns))
+                            with col3:
+                                # 统计数据类型数量
+                                dtype_counts = df_preview.dtypes.value_counts()
+                                dtype_list = []
+                                for dt, count in dtype_counts.items():
+                                    # 简化dtype名称显示
+                                    dtype_name = str(dt).replace('dtype(\'', '').replace('\')', '')
+                                    dtype_list.append(f"{dtype_name}: {count}")
+                                st.write("**数据类型：**")
+                                st.write(", ".join(dtype_list))
+                            
+                            # 显示数据表格
+                            st.dataframe(df_preview, use_container_width=True, height=400)
+                            
+                            # 显示统计信息
+                            with st.expander("查看数据统计信息"):
+                                st.write(df_preview.describe())
+                        
+                        # 导出为Excel
+                        st.subheader("💾 导出数据")
+                        
+                        # 显示汇总信息
+                        st.write("**Excel文件将包含以下Sheet：**")
+                        
+                        # 对sheet名称进行排序（按slot编号从小到大）
+                        sorted_sheet_names = sorted(parsed_data.keys(), key=klarf_tools.get_slot_number)
+                        
+                        summary_data = []
+                        total_records = 0
+                        for sheet_name in sorted_sheet_names:
+                            df = parsed_data[sheet_name]
+                            record_count = len(df)
+                            total_records += record_count
+                            summary_data.append({
+                                "Sheet名称": sheet_name,
+                                "记录数": record_count,
+                                "字段数": len(df.columns)
+                            })
+                        
+                        summary_df = pd.DataFrame(summary_data)
+                        st.dataframe(summary_df, use_container_width=True)
+                        st.info(f"📊 总计：{len(parsed_data)} 个Sheet，共 {total_records} 条记录")
+                        
+                        # 创建Excel文件（按排序后的顺序写入）
+                        excel_data = klarf_tools.frames_to_excel_bytes(parsed_data, sorted_sheet_names, engine='openpyxl')
+                        
+                        # 下载按钮
+                        st.download_button(
+                            label="📥 下载Excel文件（所有Slot合并在不同Sheet中）",
+                            data=excel_data,
+                            file_name=f"KLARF_parsed_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                            key="download_klarf_excel",
+                            help=f"包含 {len(parsed_data)} 个Sheet，共 {total_records} 条记录"
+                        )
+                        
+                    else:
+                        st.warning("未能解析到任何数据")
+                    
+                except Exception as e:
+                    st.error(f"处理过程中出错: {str(e)}")
+                    import traceback
+                    st.code(traceback.format_exc())
+    
+    elif klarf_folder:
+        st.error("❌ 文件夹路径不存在，请检查路径是否正确")
+    
+    # CSV文件合并工具
+    st.markdown("---")
+    st.subheader("📁 2. CSV文件合并工具")
+    
+    with st.expander("ℹ️ 功能说明", expanded=False):
+        st.markdown("""
+        **CSV文件合并功能**：
+        - 读取文件夹中所有包含slot的子文件夹
+        - 查找每个子文件夹内的CSV文件（可指定文件名包含的关键词）并合并
+        - 每个子文件夹的数据导出为Excel中的一个Sheet
+        - Sheet名称格式：slot1, slot2, slot10等
+        - 支持选择要导出的Slot
+        
+        **文件夹结构示例**：
+        ```
+        根文件夹/
+        ├── data_slot1/
+        │   ├── BlobFeatures_Calib.csv
+        │   ├── file2.csv
+        │   └── file3.csv
+        ├── result_slot10/
+        │   ├── BlobFeatures_Calib.csv
+        │   └── file2.csv
+        ```
+        """)
+    
+    csv_merge_folder = st.text_input(
+        "请输入包含slot子文件夹的根文件夹路径",
+        key="csv_merge_folder_path",
+        help="文件夹中应包含多个以slot命名的子文件夹，每个子文件夹内有CSV文件"
+    )
+    
+    # CSV文件名过滤关键词
+    csv_keyword = st.text_input(
+        "CSV文件名包含的关键词（可选，留空则合并所有CSV）",
+        value="BlobFeatures_Calib",
+        key="csv_keyword",
+        help="例如：BlobFeatures_Calib，只合并包含此关键词的CSV文件"
+    )
+    
+    # 开始合并按钮
+    if csv_merge_folder and os.path.exists(csv_merge_folder):
+        if st.button("🚀 开始合并CSV文件", type="primary", key="merge_csv_btn"):
+            with st.spinner("正在扫描和合并CSV文件..."):
+                try:
+                    # 执行合并
+                    merged_data = klarf_tools.merge_slot_csv_files(
+                        csv_merge_folder, csv_keyword,
+                        log=st_log
+                    )
+                    
+                    if merged_data:
+                        st.success(f"✅ 成功合并 {len(merged_data)} 个Slot的数据")
+                        
+                        # 数值列无损降精度，减少session state内存占用
+                        merged_data, mem_before, mem_after = data_loader.downcast_frames(merged_data)
+                        st.caption(data_loader.format_memory_report(mem_before, mem_after))
+                        
+                        # 保存到session state
+                        session_results.put('csv_merged_data', merged_data)
+                        # 重新合并时重置选择状态为全选
+                        st.session_state.csv_selected_slots = [f"slot{num}" for num in sorted(merged_data.keys(), key=lambda x: int(x))]
+                        
+                    else:
+                        st.warning("未找到任何包含slot的文件夹或CSV文件")
+                    
+                except Exception as e:
+                    st.error(f"处理过程中出错: {str(e)}")
+                    import traceback
+                    st.code(traceback.format_exc())
+        
+        # 显示已合并的数据（在按钮块外面，即使页面刷新也能显示）
+        merged_data = session_results.get('csv_merged_data')
+        if merged_data:
+            
+            st.success(f"✅ 已加载 {len(merged_data)} 个Slot的数据")
+            
+            # 显示数据预览
+            st.subheader("📊 数据预览")
+            
+            selected_preview = st.selectbox(
+                "选择要查看的Slot",
+                options=[f"slot{num}" for num in sorted(merged_data.keys(), key=lambda x: int(x))],
+                key="csv_preview_selector_persistent"
+            )
+            
+            if selected_preview:
+                slot_num = selected_preview.replace("slot", "")
+                df_preview = merged_data[slot_num]
+                st.write(f"**{selected_preview}** 数据概况：")
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("总记录数", len(df_preview))
+                with col2:
+                    st.metric("字段数", len(df_preview.columns))
+                
+                st.dataframe(df_preview, use_container_width=True, height=400)
+            
+            # 导出为Excel
+            st.subheader("💾 导出数据")
+            
+            # 显示汇总信息
+            st.write("**Excel文件将包含以下Sheet：**")
+            summary_data = []
+            total_records = 0
+            for slot_num in sorted(merged_data.keys(), key=lambda x: int(x)):
+                slot_name = f"slot{slot_num}"
+                df = merged_data[slot_num]
+                record_count = len(df)
+                total_records += record_count
+                summary_data.append({
+                    "Sheet名称": slot_name,
+                    "记录数": record_count,
+                    "字段数": len(df.columns)
+                })
+            
+            summary_df = pd.DataFrame(summary_data)
+            st.dataframe(summary_df, use_container_width=True)
+            st.info(f"📊 总计：{len(merged_data)} 个Sheet，共 {total_records} 条记录")
+            
+            # 添加分隔线
+            st.markdown("---")
+            
+            # 生成Excel按钮（按需生成）
+            if st.button("🔄 生成Excel文件", type="primary", key="generate_csv_excel_btn", use_container_width=True):
+                try:
+                    # 创建进度条
+                    progress_bar = st.progress(0)
+                    status_text = st.empty()
+                    
+                    sorted_slots = sorted(merged_data.keys(), key=lambda x: int(x))
+                    total_slots = len(sorted_slots)
+                    
+                    status_text.text(f"正在生成Excel文件... (0/{total_slots})")
+                    
+                    def update_excel_progress(progress, slot_name):
+                        progress_bar.progress(progress)
+                        status_text.text(f"正在写入 {slot_name}... ({round(progress * total_slots)}/{total_slots})")
+                    
+                    # 使用 xlsxwriter 引擎，比 openpyxl 快很多
+                    excel_data = klarf_tools.frames_to_excel_bytes(
+                        {f"slot{slot_num}": merged_data[slot_num] for slot_num in sorted_slots},
+                        engine='xlsxwriter',
+                        progress=update_excel_progress
+                    )
+                    
+                    # 清除进度显示
+                    progress_bar.empty()
+                    status_text.empty()
+                    
+                    # 保存到session state
+                    session_results.put('csv_excel_data', excel_data)
+                    st.success(f"✅ Excel文件生成成功！（{total_slots} 个Sheet，共 {total_records} 条记录）")
+                    
+                except Exception as e:
+                    st.error(f"生成Excel文件失败: {str(e)}")
+                    import traceback
+                    st.code(traceback.format_exc())
+            
+            # 如果Excel已生成，显示下载按钮
+            csv_excel_data = session_results.get('csv_excel_data')
+            if csv_excel_data:
+                st.download_button(
+                    label="📥 下载Excel文件（所有Slot合并在不同Sheet中）",
+                    data=csv_excel_data,
+                    file_name=f"CSV_merged_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key="download_csv_merged_excel_persistent",
+                    type="primary",
+                    use_container_width=True,
+                    help=f"包含 {len(merged_data)} 个Sheet，共 {total_records} 条记录"
+                )
+    
+    elif csv_merge_folder:
+        st.error("❌ 文件夹路径不存在，请检查路径是否正确")
+    
+    # # 显示帮助信息
+    # with st.expander("ℹ️ KLARF文件格式说明"):
+    #     st.markdown("""
+    #     ### KLARF文件格式
+        
+    #     **支持的文件格式：**
+    #     - `.klarf`, `.KLARF`
+    #     - `.txt`, `.TXT`
+    #     - `.001`, `.002`, `.003` 等数字后缀
+    #     - 文件名包含 `klarf` 或 `slot` 的文件
+        
+        
+    #     **标准字段（17个）：**
+    #     1. DEFECTID - 缺陷ID
+    #     2. XREL - X相对坐标
+    #     3. YREL - Y相对坐标
+    #     4. XINDEX - X索引
+    #     5. YINDEX - Y索引
+    #     6. XSIZE - X尺寸
+    #     7. YSIZE - Y尺寸
+    #     8. DEFECTAREA - 缺陷面积
+    #     9. DSIZE - 缺陷大小
+    #     10. CLASSNUMBER - 分类编号
+    #     11. TEST - 测试标识
+    #     12. CLUSTERNUMBER - 簇编号
+    #     13. ROUGHBINNUMBER - 粗分箱编号
+    #     14. FINEBINNUMBER - 细分箱编号
+    #     15. REVIEWSAMPLE - 复查样本
+    #     16. IMAGECOUNT - 图像数量
+    #     17. IMAGELIST - 图像列表
+    #     """)
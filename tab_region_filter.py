@@ -0,0 +1,1983 @@
+import os
+import glob
+import copy
+
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+
+import result_store
+import region_filter
+from ui_common import st_log, load_pyplot
+
+plt = load_pyplot()
+
+
+def render():
+    """区域过滤与饱和像素分析页面"""
+    session_results = result_store.get_session_store(st.session_state)
+
+    st.markdown('<a name="区域过滤"></a>', unsafe_allow_html=True)
+    st.header("✂️ 区域过滤 - 删除指定区域内的缺陷点")
+    
+    with st.expander("ℹ️ 功能说明", expanded=False):
+        st.markdown("""
+        ### 功能概述
+        1. 选择包含子文件夹的父文件夹
+        2. 自动读取每个子文件夹内的 `BlobFeatures*.csv` 文件
+        3. 支持**多边形框选**和矩形框选两种方式
+        4. 生成去除区域内点的新CSV文件
+        5. **可下载被删除的点**的CSV文件（新增）
+        
+        ### 操作步骤
+        **多边形框选（推荐）：**
+        1. 输入文件夹路径，选择子文件夹
+        2. 依次输入多个顶点的X、Y坐标，点击"➕ 添加顶点"
+        3. 至少添加3个顶点形成多边形（绿色显示预览）
+        4. 点击"🗑️ 删除多边形内"应用过滤
+        5. 可以继续添加新的多边形区域
+        
+        **矩形框选（快捷方式）：**
+        1. 直接输入X/Y的最小值和最大值
+        2. 点击"🗑️ 删除矩形区域内"
+        
+        ### 导出功能
+        - 💾 下载保留的点（过滤后的数据）
+        - 💾 下载被删除的点（方便检查删除的数据）
+        
+        ### 图例说明
+        - 🔵 蓝色点：当前保留的缺陷点
+        - ❌ 红色×：已删除的缺陷点
+        - 🟢 绿色：正在绘制的多边形（虚线为预览）
+        - 🔴 红色虚线：已应用的删除区域
+        """)
+    
+    # 文件夹选择
+    filter_folder = st.text_input("📁 输入父文件夹路径", 
+                                  value=r"D:\hazemap\ClassifyData",
+                                  key="filter_folder_input")
+    
+    if filter_folder and os.path.exists(filter_folder):
+        # 导入配置文件功能
+        st.write("---")
+        with st.expander("📥 导入已保存的删除区域配置", expanded=False):
+            st.info("选择之前导出的JSON配置文件，快速恢复删除区域设置")
+            
+            uploaded_config = st.file_uploader("上传配置文件 (JSON)", type=['json'], key="config_uploader")
+            
+            if uploaded_config is not None:
+                try:
+                    import json
+                    config_data = json.load(uploaded_config)
+                    
+                    st.write(f"📄 配置文件包含 {len(config_data)} 个子文件夹的区域设置")
+                    
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        if st.button("✅ 仅导入配置", key="apply_config"):
+                            # 初始化必要的session state
+                            if 'selection_boxes' not in st.session_state:
+                                st.session_state.selection_boxes = {}
+                            
+                            applied_count = 0
+                            for subfolder_name, regions in config_data.items():
+                                # 重置删除点数为0，表示未应用
+                                st.session_state.selection_boxes[subfolder_name] = region_filter.regions_from_config(regions)
+                                applied_count += 1
+                            
+                            st.success(f"✅ 已导入 {applied_count} 个子文件夹的删除区域配置")
+                            st.info("⚠️ 注意：配置已导入，但未应用。请使用右侧按钮批量应用，或切换到各文件夹手动应用")
+                            st.rerun()
+                    
+                    with col2:
+                        if st.button("🚀 导入并批量应用到所有文件夹", key="apply_config_batch"):
+                            # 初始化必要的session state
+                            if 'selection_boxes' not in st.session_state:
+                                st.session_state.selection_boxes = {}
+                            if 'filtered_data' not in st.session_state:
+                                st.session_state.filtered_data = {}
+                            
+                            progress_bar = st.progress(0)
+                            status_text = st.empty()
+                            
+                            def update_filter_progress(progress, subfolder_name):
+                                status_text.text(f"处理中: {subfolder_name}")
+                                progress_bar.progress(progress)
+                            
+                            # 读取各子文件夹的BlobFeatures并应用删除区域
+                            filter_results = region_filter.filter_folder(
+                                filter_folder, config_data, log=st_log, progress=update_filter_progress
+                            )
+                            
+                            total_folders_processed = 0
+                            total_points_removed = 0
+                            for subfolder_name, (df_working, region_list) in filter_results.items():
+                                st.session_state.selection_boxes[subfolder_name] = region_list
+                                # 保存过滤后的数据
+                                st.session_state.filtered_data[subfolder_name] = df_working
+                                
+                                total_folders_processed += 1
+                                total_points_removed += sum(region['removed'] for region in region_list)
+                            
+                            progress_bar.empty()
+                            status_text.empty()
+                            
+                            st.success(f"✅ 批量处理完成！")
+                            st.info(f"📊 处理了 {total_folders_processed} 个文件夹，总共删除 {total_points_removed} 个点")
+                            st.warning("💡 提示：切换到各文件夹查看效果，记得保存结果到CSV文件")
+                            st.rerun()
+                    
+                    # 预览配置内容
+                    with st.expander("👁️ 预览配置内容", expanded=False):
+                        for subfolder_name, regions in config_data.items():
+                            st.write(f"**{subfolder_name}** - {len(regions)} 个区域")
+                            for region in regions:
+                                if region['type'] == 'polygon':
+                                    st.write(f"  • 多边形 {region['region_id']}: {len(region['vertices'])} 个顶点")
+                                else:
+                                    st.write(f"  • 矩形 {region['region_id']}")
+                
+                except Exception as e:
+                    st.error(f"❌ 读取配置文件失败: {str(e)}")
+                    import traceback
+                    st.code(traceback.format_exc())
+        
+        st.write("---")
+        
+        # 获取所有子文件夹
+        subfolders = [f for f in os.listdir(filter_folder) 
+                     if os.path.isdir(os.path.join(filter_folder, f))]
+        
+        if subfolders:
+            st.success(f"找到 {len(subfolders)} 个子文件夹")
+            
+            # 初始化session state
+            if 'current_subfolder_idx' not in st.session_state:
+                st.session_state.current_subfolder_idx = 0
+            if 'filtered_data' not in st.session_state:
+                st.session_state.filtered_data = {}
+            if 'selection_boxes' not in st.session_state:
+                st.session_state.selection_boxes = {}
+            
+            # 选择子文件夹
+            current_idx = st.session_state.current_subfolder_idx
+            
+            col1, col2, col3 = st.columns([1, 3, 1])
+            with col1:
+                if st.button("⬅️ 上一个", disabled=(current_idx == 0)):
+                    st.session_state.current_subfolder_idx = max(0, current_idx - 1)
+                    st.rerun()
+            with col2:
+                selected_subfolder = st.selectbox(
+                    "选择子文件夹",
+                    subfolders,
+                    index=current_idx,
+                    key="subfolder_select"
+                )
+                if selected_subfolder != subfolders[current_idx]:
+                    st.session_state.current_subfolder_idx = subfolders.index(selected_subfolder)
+                    st.rerun()
+            with col3:
+                if st.button("➡️ 下一个", disabled=(current_idx == len(subfolders) - 1)):
+                    st.session_state.current_subfolder_idx = min(len(subfolders) - 1, current_idx + 1)
+                    st.rerun()
+            
+            st.write(f"**当前子文件夹:** {selected_subfolder} ({current_idx + 1}/{len(subfolders)})")
+            
+            # 查找BlobFeatures文件
+            subfolder_path = os.path.join(filter_folder, selected_subfolder)
+            blob_files = glob.glob(os.path.join(subfolder_path, "BlobFeatures*.csv"))
+            
+            if blob_files:
+                blob_file = blob_files[0]  # 使用第一个匹配的文件
+                st.info(f"📄 找到文件: {os.path.basename(blob_file)}")
+                
+                try:
+                    # 读取CSV文件
+                    df_blob = pd.read_csv(blob_file)
+                    
+                    # 查找坐标列
+                    x_col = None
+                    y_col = None
+                    for col in df_blob.columns:
+                        if 'dCenterXCartisian' in col and 'Move' not in col:
+                            x_col = col
+                        elif 'dCenterYCartisian' in col and 'Move' not in col:
+                            y_col = col
+                    
+                    if x_col and y_col and x_col in df_blob.columns and y_col in df_blob.columns:
+                        st.success(f"✅ 找到坐标列: X={x_col}, Y={y_col}")
+                        st.write(f"📊 原始数据点数: {len(df_blob)}")
+                        
+                        # 获取或初始化当前子文件夹的过滤数据
+                        if selected_subfolder not in st.session_state.filtered_data:
+                            st.session_state.filtered_data[selected_subfolder] = df_blob.copy()
+                            # 只在selection_boxes中没有该文件夹时才初始化为空列表
+                            # 这样可以保留之前复制过来的区域
+                            if selected_subfolder not in st.session_state.selection_boxes:
+                                st.session_state.selection_boxes[selected_subfolder] = []
+                        
+                        # 确保selection_boxes中有该文件夹的键（处理边缘情况）
+                        if selected_subfolder not in st.session_state.selection_boxes:
+                            st.session_state.selection_boxes[selected_subfolder] = []
+                        
+                        df_current = st.session_state.filtered_data[selected_subfolder]
+                        
+                        # 创建交互式散点图
+                        st.subheader("📍 缺陷点分布图")
+                        
+                        col_plot, col_control = st.columns([3, 1])
+                        
+                        with col_control:
+                            st.write("### 过滤控制")
+                            st.write(f"**当前点数:** {len(df_current)}")
+                            st.write(f"**已删除:** {len(df_blob) - len(df_current)}")
+                            
+                            # 多边形框选功能
+                            st.write("---")
+                            st.write("**多边形框选删除**")
+                            st.info("💡 在下方输入多个顶点坐标，依次点击形成多边形区域\n\n"
+                                   "**获取坐标方法：**\n"
+                                   "1. 将鼠标悬停在图表上的点附近\n"
+                                   "2. 查看弹出的坐标信息\n"
+                                   "3. 输入到下方表单中")
+                            
+                            # 初始化多边形顶点
+                            if f'polygon_points_{selected_subfolder}' not in st.session_state:
+                                st.session_state[f'polygon_points_{selected_subfolder}'] = []
+                            
+                            # 添加顶点
+                            with st.form(key=f"add_vertex_{selected_subfolder}"):
+                                col_x, col_y = st.columns(2)
+                                with col_x:
+                                    vertex_x = st.number_input("X 坐标", value=0.0, step=1000.0, key=f"vx_{selected_subfolder}")
+                                with col_y:
+                                    vertex_y = st.number_input("Y 坐标", value=0.0, step=1000.0, key=f"vy_{selected_subfolder}")
+                                
+                                submit_vertex = st.form_submit_button("➕ 添加顶点")
+                                
+                                if submit_vertex:
+                                    st.session_state[f'polygon_points_{selected_subfolder}'].append((vertex_x, vertex_y))
+                                    st.success(f"✅ 已添加顶点 ({vertex_x:.0f}, {vertex_y:.0f})")
+                                    st.rerun()
+                            
+                            # 显示当前多边形顶点
+                            polygon_points = st.session_state[f'polygon_points_{selected_subfolder}']
+                            if polygon_points:
+                                st.write(f"**当前顶点数:** {len(polygon_points)}")
+                                for idx, (px, py) in enumerate(polygon_points):
+                                    col_idx, col_coords, col_del = st.columns([1, 3, 1])
+                                    with col_idx:
+                                        st.write(f"{idx + 1}.")
+                                    with col_coords:
+                                        st.write(f"({px:.0f}, {py:.0f})")
+                                    with col_del:
+                                        if st.button("❌", key=f"del_vertex_{selected_subfolder}_{idx}"):
+                                            st.session_state[f'polygon_points_{selected_subfolder}'].pop(idx)
+                                            st.rerun()
+                                
+                                # 应用多边形过滤
+                                col_apply, col_clear = st.columns(2)
+                                with col_apply:
+                                    if st.button("🗑️ 删除多边形内", key=f"apply_poly_{selected_subfolder}", 
+                                               disabled=(len(polygon_points) < 3)):
+                                        # 使用多边形判断点是否在内部
+                                        df_current, removed_count = region_filter.apply_region(
+                                            df_current, x_col, y_col, {'type': 'polygon', 'points': polygon_points}
+                                        )
+                                        st.session_state.filtered_data[selected_subfolder] = df_current
+                                        
+                                        # 记录删除区域
+                                        st.session_state.selection_boxes[selected_subfolder].append({
+                                            'type': 'polygon',
+                                            'points': polygon_points.copy(),
+                                            'removed': removed_count
+                                        })
+                                        
+                                        # 清空当前多边形
+                                        st.session_state[f'polygon_points_{selected_subfolder}'] = []
+                                        
+                                        st.success(f"✅ 已删除 {removed_count} 个点")
+                                        st.rerun()
+                                
+                                with col_clear:
+                                    if st.button("🔄 清空顶点", key=f"clear_poly_{selected_subfolder}"):
+                                        st.session_state[f'polygon_points_{selected_subfolder}'] = []
+                                        st.rerun()
+                                
+                                if len(polygon_points) < 3:
+                                    st.warning("⚠️ 至少需要3个顶点才能形成多边形")
+                            
+                            # 矩形框选功能（保留作为备选）
+                            st.write("---")
+                            st.write("**矩形框选删除（快捷方式）**")
+                            
+                            with st.form(key=f"manual_filter_{selected_subfolder}"):
+                                x_min = st.number_input("X 最小值", value=0.0, step=1000.0)
+                                x_max = st.number_input("X 最大值", value=300000.0, step=1000.0)
+                                y_min = st.number_input("Y 最小值", value=0.0, step=1000.0)
+                                y_max = st.number_input("Y 最大值", value=300000.0, step=1000.0)
+                                
+                                submit_filter = st.form_submit_button("🗑️ 删除矩形区域内")
+                                
+                                if submit_filter:
+                                    # 过滤数据
+                                    df_current, removed_count = region_filter.apply_region(
+                                        df_current, x_col, y_col,
+                                        {'type': 'rectangle', 'x_min': x_min, 'x_max': x_max, 'y_min': y_min, 'y_max': y_max}
+                                    )
+                                    st.session_state.filtered_data[selected_subfolder] = df_current
+                                    
+                                    # 记录删除区域
+                                    st.session_state.selection_boxes[selected_subfolder].append({
+                                        'type': 'rectangle',
+                                        'x_min': x_min, 'x_max': x_max,
+                                        'y_min': y_min, 'y_max': y_max,
+                                        'removed': removed_count
+                                    })
+                                    
+                                    st.success(f"✅ 已删除 {removed_count} 个点")
+                                    st.rerun()
+                            
+                            # 显示已删除的区域
+                            if st.session_state.selection_boxes[selected_subfolder]:
+                                st.write("---")
+                                st.write("**已删除区域:**")
+                                
+                                # 检查是否有未应用的区域（removed为0的区域）
+                                unapplied_regions = [box for box in st.session_state.selection_boxes[selected_subfolder] 
+                                                    if box.get('removed', 0) == 0]
+                                
+                                if unapplied_regions:
+                                    st.warning(f"⚠️ 有 {len(unapplied_regions)} 个区域未应用（可能是从其他文件夹复制的）")
+                                    
+                                    if st.button("🔄 应用所有未应用的删除区域", key=f"apply_unapplied_{selected_subfolder}"):
+                                        df_working, total_removed = region_filter.apply_regions(
+                                            df_current, x_col, y_col, st.session_state.selection_boxes[selected_subfolder],
+                                            only_unapplied=True
+                                        )
+                                        
+                                        # 更新数据
+                                        st.session_state.filtered_data[selected_subfolder] = df_working
+                                        
+                                        st.success(f"✅ 已应用 {len(unapplied_regions)} 个删除区域，总共删除 {total_removed} 个点")
+                                        st.rerun()
+                                
+                                # 显示所有区域详情
+                                for idx, box in enumerate(st.session_state.selection_boxes[selected_subfolder]):
+                                    status_text = f"(删除 {box['removed']} 点)" if box.get('removed', 0) > 0 else "(未应用)"
+                                    status_color = "🟢" if box.get('removed', 0) > 0 else "🔴"
+                                    
+                                    if box.get('type') == 'polygon':
+                                        with st.expander(f"{status_color} 多边形区域 {idx + 1} {status_text}"):
+                                            st.write(f"顶点数: {len(box['points'])}")
+                                            for i, (px, py) in enumerate(box['points']):
+                                                st.write(f"  {i+1}. ({px:.0f}, {py:.0f})")
+                                            
+                                            # 单独应用此区域的按钮
+                                            if box.get('removed', 0) == 0:
+                                                if st.button(f"应用此区域", key=f"apply_region_{selected_subfolder}_{idx}"):
+                                                    df_current, removed_count = region_filter.apply_region(df_current, x_col, y_col, box)
+                                                    
+                                                    st.session_state.filtered_data[selected_subfolder] = df_current
+                                                    st.session_state.selection_boxes[selected_subfolder][idx]['removed'] = removed_count
+                                                    
+                                                    st.success(f"✅ 已删除 {removed_count} 个点")
+                                                    st.rerun()
+                                    else:
+                                        with st.expander(f"{status_color} 矩形区域 {idx + 1} {status_text}"):
+                                            st.write(f"X: [{box['x_min']:.0f}, {box['x_max']:.0f}]")
+                                            st.write(f"Y: [{box['y_min']:.0f}, {box['y_max']:.0f}]")
+                                            
+                                            # 单独应用此区域的按钮
+                                            if box.get('removed', 0) == 0:
+                                                if st.button(f"应用此区域", key=f"apply_region_{selected_subfolder}_{idx}"):
+                                                    df_current, removed_count = region_filter.apply_region(df_current, x_col, y_col, box)
+                                                    
+                                                    st.session_state.filtered_data[selected_subfolder] = df_current
+                                                    st.session_state.selection_boxes[selected_subfolder][idx]['removed'] = removed_count
+                                                    
+                                                    st.success(f"✅ 已删除 {removed_count} 个点")
+                                                    st.rerun()
+                            
+                            # 重置按钮
+                            st.write("---")
+                            st.write("**🔄 重置选项**")
+                            col_reset1, col_reset2 = st.columns(2)
+                            
+                            with col_reset1:
+                                if st.button("重置数据", key=f"reset_data_{selected_subfolder}", 
+                                           help="恢复原始数据，保留删除区域定义"):
+                                    st.session_state.filtered_data[selected_subfolder] = df_blob.copy()
+                                    # 将所有区域标记为未应用
+                                    for region in st.session_state.selection_boxes[selected_subfolder]:
+                                        region['removed'] = 0
+                                    st.success("✅ 数据已重置，区域定义已保留")
+                                    st.rerun()
+                            
+                            with col_reset2:
+                                if st.button("完全重置", key=f"reset_all_{selected_subfolder}",
+                                           help="恢复原始数据并清除所有删除区域"):
+                                    st.session_state.filtered_data[selected_subfolder] = df_blob.copy()
+                                    st.session_state.selection_boxes[selected_subfolder] = []
+                                    if f'polygon_points_{selected_subfolder}' in st.session_state:
+                                        st.session_state[f'polygon_points_{selected_subfolder}'] = []
+                                    st.success("✅ 已完全重置")
+                                    st.rerun()
+                            
+                            # 导出按钮
+                            st.write("---")
+                            if len(df_current) < len(df_blob):
+                                st.write("**💾 导出数据**")
+                                col_export1, col_export2 = st.columns(2)
+                                
+                                with col_export1:
+                                    # 下载过滤后的CSV（保留的点）
+                                    output_filename = f"{selected_subfolder}_filtered.csv"
+                                    csv_data = df_current.to_csv(index=False, encoding='utf-8-sig')
+                                    
+                                    st.download_button(
+                                        label="💾 下载过滤后的CSV（保留的点）",
+                                        data=csv_data,
+                                        file_name=output_filename,
+                                        mime="text/csv",
+                                        key=f"download_{selected_subfolder}"
+                                    )
+                                
+                                with col_export2:
+                                    # 下载被删除的点的CSV（新增功能）
+                                    # 找出被删除的点：原始数据中不在当前数据中的点
+                                    if len(df_current) > 0:
+                                        # 使用索引来找出被删除的行
+                                        # 假设有唯一标识列，或者通过坐标来匹配
+                                        # 这里我们通过比较索引（如果可用）或者创建一个标记
+                                        df_blob_with_index = df_blob.copy()
+                                        df_current_with_index = df_current.copy()
+                                        
+                                        # 添加临时索引用于比较
+                                        df_blob_with_index['_temp_index'] = range(len(df_blob))
+                                        
+                                        # 通过坐标匹配找出保留的点
+                                        # 创建一个合并键来标识每个点
+                                        df_blob_with_index['_merge_key'] = (
+                                            df_blob_with_index[x_col].round(2).astype(str) + '_' + 
+                                            df_blob_with_index[y_col].round(2).astype(str)
+                                        )
+                                        df_current_with_index['_merge_key'] = (
+                                            df_current_with_index[x_col].round(2).astype(str) + '_' + 
+                                            df_current_with_index[y_col].round(2).astype(str)
+                                        )
+                                        
+                                        # 找出被删除的点
+                                        deleted_keys = set(df_blob_with_index['_merge_key']) - set(df_current_with_index['_merge_key'])
+                                        df_deleted = df_blob_with_index[df_blob_with_index['_merge_key'].isin(deleted_keys)].copy()
+                                        
+                                        # 删除临时列
+                                        df_deleted = df_deleted.drop(['_temp_index', '_merge_key'], axis=1)
+                                    else:
+                                        # 如果所有点都被删除，返回原始数据
+                                        df_deleted = df_blob.copy()
+                                    
+                                    deleted_filename = f"{selected_subfolder}_deleted.csv"
+                                    csv_deleted = df_deleted.to_csv(index=False, encoding='utf-8-sig')
+                                    
+                                    st.download_button(
+                                        label=f"💾 下载被删除的点（{len(df_deleted)}个）",
+                                        data=csv_deleted,
+                                        file_name=deleted_filename,
+                                        mime="text/csv",
+                                        key=f"download_deleted_{selected_subfolder}"
+                                    )
+                                
+                                # 保存到原文件夹选项
+                                st.write("")
+                                col_save1, col_save2 = st.columns(2)
+                                with col_save1:
+                                    if st.button("💾 保存过滤后到原文件夹", key=f"save_{selected_subfolder}"):
+                                        output_path = os.path.join(subfolder_path, output_filename)
+                                        df_current.to_csv(output_path, index=False, encoding='utf-8-sig')
+                                        st.success(f"✅ 已保存到: {output_path}")
+                                
+                                with col_save2:
+                                    if st.button("💾 保存被删除点到原文件夹", key=f"save_deleted_{selected_subfolder}"):
+                                        deleted_path = os.path.join(subfolder_path, deleted_filename)
+                                        df_deleted.to_csv(deleted_path, index=False, encoding='utf-8-sig')
+                                        st.success(f"✅ 已保存到: {deleted_path}")
+                            else:
+                                st.info("未进行任何过滤")
+                            
+                            # 复制删除区域到其他子文件夹
+                            if st.session_state.selection_boxes.get(selected_subfolder):
+                                st.write("---")
+                                st.write("**📋 复制删除区域**")
+                                st.info("将当前子文件夹的删除区域应用到其他子文件夹")
+                                
+                                # 选择目标子文件夹
+                                other_subfolders = [f for f in subfolders if f != selected_subfolder]
+                                if other_subfolders:
+                                    target_folders = st.multiselect(
+                                        "选择目标子文件夹",
+                                        other_subfolders,
+                                        key=f"copy_target_{selected_subfolder}"
+                                    )
+                                    
+                                    if target_folders:
+                                        if st.button("📋 复制区域到选中的子文件夹", key=f"copy_regions_{selected_subfolder}"):
+                                            copied_regions = st.session_state.selection_boxes[selected_subfolder]
+                                            
+                                            # 复制区域到每个目标文件夹
+                                            for target in target_folders:
+                                                # 确保目标文件夹有selection_boxes键
+                                                if target not in st.session_state.selection_boxes:
+                                                    st.session_state.selection_boxes[target] = []
+                                                
+                                                # 深拷贝区域信息（追加而非覆盖）
+                                                for region in copied_regions:
+                                                    new_region = copy.deepcopy(region)
+                                                    new_region['removed'] = 0  # 重置删除数量，因为还没应用
+                                                    st.session_state.selection_boxes[target].append(new_region)
+                                            
+                                            st.success(f"✅ 已复制 {len(copied_regions)} 个删除区域到 {len(target_folders)} 个子文件夹")
+                                            st.info("💡 切换到目标子文件夹查看区域，需要重新处理数据才会实际删除点")
+                                            
+                                            # 触发页面重新加载以更新状态
+                                            st.rerun()
+                                else:
+                                    st.info("没有其他子文件夹可以复制")
+                        
+                        with col_plot:
+                            # 创建Plotly散点图
+                            fig = go.Figure()
+                            
+                            # 添加当前点
+                            fig.add_trace(go.Scatter(
+                                x=df_current[x_col],
+                                y=df_current[y_col],
+                                mode='markers',
+                                marker=dict(
+                                    size=5,
+                                    color='blue',
+                                    opacity=0.6
+                                ),
+                                name='当前点',
+                                text=[f"Index: {i}<br>X: {x:.2f}<br>Y: {y:.2f}" 
+                                      for i, (x, y) in enumerate(zip(df_current[x_col], df_current[y_col]))],
+                                hovertemplate='%{text}<extra></extra>'
+                            ))
+                            
+                            # 如果有删除的点，显示为红色
+                            if len(df_current) < len(df_blob):
+                                # 找出被删除的点
+                                df_removed = df_blob[~df_blob.index.isin(df_current.index)]
+                                if len(df_removed) > 0:
+                                    fig.add_trace(go.Scatter(
+                                        x=df_removed[x_col],
+                                        y=df_removed[y_col],
+                                        mode='markers',
+                                        marker=dict(
+                                            size=5,
+                                            color='red',
+                                            opacity=0.3,
+                                            symbol='x'
+                                        ),
+                                        name='已删除点',
+                                        text=[f"X: {x:.2f}<br>Y: {y:.2f}" 
+                                              for x, y in zip(df_removed[x_col], df_removed[y_col])],
+                                        hovertemplate='%{text}<extra></extra>'
+                                    ))
+                            
+                            # 添加已保存的删除区域
+                            for idx, box in enumerate(st.session_state.selection_boxes[selected_subfolder]):
+                                if box.get('type') == 'polygon':
+                                    # 绘制多边形
+                                    points = box['points']
+                                    # 闭合多边形
+                                    x_coords = [p[0] for p in points] + [points[0][0]]
+                                    y_coords = [p[1] for p in points] + [points[0][1]]
+                                    
+                                    fig.add_trace(go.Scatter(
+                                        x=x_coords,
+                                        y=y_coords,
+                                        mode='lines',
+                                        line=dict(color='red', width=2, dash='dash'),
+                                        fill='toself',
+                                        fillcolor='rgba(255, 0, 0, 0.1)',
+                                        name=f'已删除多边形 {idx + 1}',
+                                        showlegend=True,
+                                        hoverinfo='skip'
+                                    ))
+                                else:
+                                    # 绘制矩形
+                                    fig.add_shape(
+                                        type="rect",
+                                        x0=box['x_min'], x1=box['x_max'],
+                                        y0=box['y_min'], y1=box['y_max'],
+                                        line=dict(color="red", width=2, dash="dash"),
+                                        fillcolor="red",
+                                        opacity=0.1,
+                                        name=f"已删除矩形 {idx + 1}"
+                                    )
+                            
+                            # 显示当前正在绘制的多边形
+                            polygon_points = st.session_state[f'polygon_points_{selected_subfolder}']
+                            if polygon_points:
+                                if len(polygon_points) >= 2:
+                                    # 绘制已连接的边
+                                    x_coords = [p[0] for p in polygon_points]
+                                    y_coords = [p[1] for p in polygon_points]
+                                    
+                                    fig.add_trace(go.Scatter(
+                                        x=x_coords,
+                                        y=y_coords,
+                                        mode='lines+markers',
+                                        line=dict(color='green', width=2),
+                                        marker=dict(size=10, color='green'),
+                                        name='当前多边形（绘制中）',
+                                        showlegend=True,
+                                        hoverinfo='skip'
+                                    ))
+                                    
+                                    # 如果有3个或以上顶点，显示闭合预览
+                                    if len(polygon_points) >= 3:
+                                        x_coords_closed = x_coords + [x_coords[0]]
+                                        y_coords_closed = y_coords + [y_coords[0]]
+                                        
+                                        fig.add_trace(go.Scatter(
+                                            x=x_coords_closed,
+                                            y=y_coords_closed,
+                                            mode='lines',
+                                            line=dict(color='lightgreen', width=1, dash='dot'),
+                                            fill='toself',
+                                            fillcolor='rgba(0, 255, 0, 0.1)',
+                                            name='多边形预览',
+                                            showlegend=True,
+                                            hoverinfo='skip'
+                                        ))
+                                else:
+                                    # 只有一个顶点，显示为点
+                                    fig.add_trace(go.Scatter(
+                                        x=[polygon_points[0][0]],
+                                        y=[polygon_points[0][1]],
+                                        mode='markers',
+                                        marker=dict(size=10, color='green'),
+                                        name='当前顶点',
+                                        showlegend=True,
+                                        hoverinfo='skip'
+                                    ))
+                            
+                            # 设置坐标轴
+                            fig.update_xaxes(
+                                range=[0, 300000],
+                                title='X坐标',
+                                scaleanchor="y",
+                                scaleratio=1
+                            )
+                            fig.update_yaxes(
+                                range=[0, 300000],
+                                title='Y坐标'
+                            )
+                            
+                            fig.update_layout(
+                                title=f'{selected_subfolder} - 缺陷点分布',
+                                width=800,
+                                height=800,
+                                hovermode='closest',
+                                showlegend=True,
+                                dragmode='pan'  # 默认为拖动模式
+                            )
+                            
+                            st.plotly_chart(fig, use_container_width=True)
+                            
+                            st.info("💡 提示：\n"
+                                   "- 在左侧输入坐标添加多边形顶点（绿色显示）\n"
+                                   "- 至少添加3个顶点可以形成多边形\n"
+                                   "- 点击'删除多边形内'应用过滤\n"
+                                   "- 已删除区域显示为红色虚线\n"
+                                   "- 可以使用图表工具栏缩放和平移查看细节")
+                        
+                        # 批量导出所有过滤后的文件
+                        st.write("---")
+                        st.subheader("📦 批量导出")
+                        
+                        col_export1, col_export2 = st.columns(2)
+                        
+                        with col_export1:
+                            if st.button("💾 导出所有已过滤的子文件夹"):
+                                export_count = 0
+                                for subfolder_name, filtered_df in st.session_state.filtered_data.items():
+                                    # 获取原始数据
+                                    subfolder_path_exp = os.path.join(filter_folder, subfolder_name)
+                                    blob_files_exp = glob.glob(os.path.join(subfolder_path_exp, "BlobFeatures*.csv"))
+                                    
+                                    if blob_files_exp:
+                                        original_df = pd.read_csv(blob_files_exp[0])
+                                        
+                                        # 只导出有变化的文件
+                                        if len(filtered_df) < len(original_df):
+                                            output_path = os.path.join(subfolder_path_exp, f"{subfolder_name}_filtered.csv")
+                                            filtered_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+                                            export_count += 1
+                                
+                                if export_count > 0:
+                                    st.success(f"✅ 已导出 {export_count} 个过滤后的文件")
+                                else:
+                                    st.info("没有需要导出的文件（所有文件都未进行过滤）")
+                        
+                        with col_export2:
+                            if st.button("📄 导出删除区域配置"):
+                                # 辅助函数：转换numpy类型为Python原生类型
+                                def convert_to_native_types(obj):
+                                    """递归转换numpy类型为Python原生类型"""
+                                    if isinstance(obj, dict):
+                                        return {k: convert_to_native_types(v) for k, v in obj.items()}
+                                    elif isinstance(obj, list):
+                                        return [convert_to_native_types(item) for item in obj]
+                                    elif isinstance(obj, tuple):
+                                        return tuple(convert_to_native_types(item) for item in obj)
+                                    elif isinstance(obj, (np.integer, np.int64, np.int32)):
+                                        return int(obj)
+                                    elif isinstance(obj, (np.floating, np.float64, np.float32)):
+                                        return float(obj)
+                                    elif isinstance(obj, np.ndarray):
+                                        return obj.tolist()
+                                    else:
+                                        return obj
+                                
+                                # 收集所有子文件夹的删除区域信息
+                                all_regions_config = {}
+                                
+                                for subfolder_name, regions in st.session_state.selection_boxes.items():
+                                    if regions:  # 只导出有删除区域的子文件夹
+                                        all_regions_config[subfolder_name] = []
+                                        for idx, region in enumerate(regions):
+                                            region_info = {
+                                                'region_id': int(idx + 1),
+                                                'type': str(region.get('type', 'rectangle')),
+                                                'removed_count': int(region.get('removed', 0))
+                                            }
+                                            
+                                            if region.get('type') == 'polygon':
+                                                # 转换顶点坐标
+                                                vertices = region.get('points', [])
+                                                region_info['vertices'] = [[float(x), float(y)] for x, y in vertices]
+                                                region_info['vertex_count'] = int(len(vertices))
+                                            else:
+                                                region_info['x_min'] = float(region.get('x_min', 0))
+                                                region_info['x_max'] = float(region.get('x_max', 0))
+                                                region_info['y_min'] = float(region.get('y_min', 0))
+                                                region_info['y_max'] = float(region.get('y_max', 0))
+                                            
+                                            all_regions_config[subfolder_name].append(region_info)
+                                
+                                if all_regions_config:
+                                    import json
+                                    # 确保所有数据都是原生Python类型
+                                    all_regions_config = convert_to_native_types(all_regions_config)
+                                    json_data = json.dumps(all_regions_config, indent=2, ensure_ascii=False)
+                                    
+                                    st.download_button(
+                                        label="💾 下载JSON配置",
+                                        data=json_data,
+                                        file_name=f"filter_regions_config_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json",
+                                        mime="application/json",
+                                        key="download_regions_json"
+                                    )
+                                    
+                                    # 同时生成CSV格式（展开的多边形顶点）
+                                    regions_list = []
+                                    for subfolder_name, regions in all_regions_config.items():
+                                        for region in regions:
+                                            if region['type'] == 'polygon':
+                                                for vertex_idx, (x, y) in enumerate(region['vertices']):
+                                                    regions_list.append({
+                                                        '子文件夹': subfolder_name,
+                                                        '区域ID': region['region_id'],
+                                                        '类型': '多边形',
+                                                        '顶点序号': vertex_idx + 1,
+                                                        'X坐标': x,
+                                                        'Y坐标': y,
+                                                        '删除点数': region['removed_count'] if vertex_idx == 0 else ''
+                                                    })
+                                            else:
+                                                regions_list.append({
+                                                    '子文件夹': subfolder_name,
+                                                    '区域ID': region['region_id'],
+                                                    '类型': '矩形',
+                                                    '顶点序号': '',
+                                                    'X坐标': f"{region['x_min']} ~ {region['x_max']}",
+                                                    'Y坐标': f"{region['y_min']} ~ {region['y_max']}",
+                                                    '删除点数': region['removed_count']
+                                                })
+                                    
+                                    if regions_list:
+                                        regions_df = pd.DataFrame(regions_list)
+                                        csv_data = regions_df.to_csv(index=False, encoding='utf-8-sig')
+                                        
+                                        st.download_button(
+                                            label="📊 下载CSV配置",
+                                            data=csv_data,
+                                            file_name=f"filter_regions_config_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                                            mime="text/csv",
+                                            key="download_regions_csv"
+                                        )
+                                    
+                                    st.success("✅ 配置文件已准备好下载")
+                                else:
+                                    st.info("没有删除区域需要导出")
+                        
+                        # 删除区域配置预览和管理
+                        st.write("---")
+                        st.subheader("📋 删除区域配置管理")
+                        
+                        # 显示所有子文件夹的删除区域汇总
+                        if st.session_state.selection_boxes:
+                            total_regions = sum(len(regions) for regions in st.session_state.selection_boxes.values())
+                            total_polygon = sum(
+                                sum(1 for r in regions if r.get('type') == 'polygon')
+                                for regions in st.session_state.selection_boxes.values()
+                            )
+                            total_rectangle = total_regions - total_polygon
+                            
+                            col_stat1, col_stat2, col_stat3 = st.columns(3)
+                            with col_stat1:
+                                st.metric("总删除区域数", total_regions)
+                            with col_stat2:
+                                st.metric("多边形区域", total_polygon)
+                            with col_stat3:
+                                st.metric("矩形区域", total_rectangle)
+                            
+                            # 详细列表
+                            with st.expander("📝 查看所有删除区域详情", expanded=False):
+                                for subfolder_name, regions in st.session_state.selection_boxes.items():
+                                    if regions:
+                                        st.write(f"### {subfolder_name}")
+                                        for idx, region in enumerate(regions):
+                                            if region.get('type') == 'polygon':
+                                                st.write(f"**区域 {idx + 1} - 多边形** (删除 {region['removed']} 点)")
+                                                vertices_text = "\n".join([
+                                                    f"  顶点{i+1}: ({x:.2f}, {y:.2f})" 
+                                                    for i, (x, y) in enumerate(region['points'])
+                                                ])
+                                                st.text(vertices_text)
+                                            else:
+                                                st.write(f"**区域 {idx + 1} - 矩形** (删除 {region['removed']} 点)")
+                                                st.text(f"  X: {region['x_min']:.2f} ~ {region['x_max']:.2f}\n"
+                                                       f"  Y: {region['y_min']:.2f} ~ {region['y_max']:.2f}")
+                                        st.write("---")
+                            
+                            # 保存配置到本地文件
+                            if st.button("💾 保存配置到父文件夹", key="save_config_local"):
+                                import json
+                                
+                                # 辅助函数：转换numpy类型为Python原生类型
+                                def convert_to_native_types(obj):
+                                    """递归转换numpy类型为Python原生类型"""
+                                    if isinstance(obj, dict):
+                                        return {k: convert_to_native_types(v) for k, v in obj.items()}
+                                    elif isinstance(obj, list):
+                                        return [convert_to_native_types(item) for item in obj]
+                                    elif isinstance(obj, tuple):
+                                        return tuple(convert_to_native_types(item) for item in obj)
+                                    elif isinstance(obj, (np.integer, np.int64, np.int32)):
+                                        return int(obj)
+                                    elif isinstance(obj, (np.floating, np.float64, np.float32)):
+                                        return float(obj)
+                                    elif isinstance(obj, np.ndarray):
+                                        return obj.tolist()
+                                    else:
+                                        return obj
+                                
+                                config_data = {}
+                                for subfolder_name, regions in st.session_state.selection_boxes.items():
+                                    if regions:
+                                        config_data[subfolder_name] = region_filter.regions_to_config(regions)
+                                
+                                if config_data:
+                                    # 确保所有数据都是原生Python类型
+                                    config_data = convert_to_native_types(config_data)
+                                    config_path = os.path.join(filter_folder, f"filter_regions_config_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json")
+                                    with open(config_path, 'w', encoding='utf-8') as f:
+                                        json.dump(config_data, f, indent=2, ensure_ascii=False)
+                                    st.success(f"✅ 配置已保存到: {config_path}")
+                                else:
+                                    st.info("没有删除区域需要保存")
+                        else:
+                            st.info("当前没有任何删除区域")
+                        
+                    else:
+                        st.error(f"❌ 未找到坐标列 dCenterXCartisian 和 dCenterYCartisian")
+                        st.write("可用的列：", df_blob.columns.tolist())
+                        
+                except Exception as e:
+                    st.error(f"读取文件时出错: {str(e)}")
+                    st.exception(e)
+            else:
+                st.warning(f"⚠️ 在子文件夹 {selected_subfolder} 中未找到 BlobFeatures*.csv 文件")
+        else:
+            st.warning("⚠️ 未找到子文件夹")
+    elif filter_folder:
+        st.error("❌ 文件夹路径不存在，请检查路径")
+
+
+    st.markdown('<a name="饱和像素分析"></a>', unsafe_allow_html=True)
+    st.header("🔬 饱和像素分析")
+    st.write("分析mask图像中缺陷区域的饱和像素分布")
+    
+    # 导入必要的库
+    from pathlib import Path
+    from scipy.interpolate import interp1d
+    import saturation_analysis
+    
+    # 辅助函数
+    def create_row_plot(row_values, row_index):
+        """为一行像素值创建拟合曲线图"""
+        fig, ax = plt.subplots(figsize=(6, 3))
+        x = np.arange(len(row_values))
+        
+        # 如果数据点太多，进行采样
+        if len(row_values) > 500:
+            step = len(row_values) // 300
+            x_sampled = x[::step]
+            y_sampled = row_values[::step]
+        else:
+            x_sampled = x
+            y_sampled = row_values
+        
+        # 绘制原始数据
+        ax.plot(x_sampled, y_sampled, 'b-', alpha=0.6, linewidth=0.8, label='原始')
+        
+        # 拟合曲线
+        if len(row_values) > 3:
+            try:
+                f = interp1d(x, row_values, kind='cubic', fill_value='extrapolate')
+                x_smooth = np.linspace(0, len(row_values)-1, min(len(row_values)*3, 500))
+                y_smooth = f(x_smooth)
+                ax.plot(x_smooth, y_smooth, 'r-', linewidth=1.2, label='拟合', alpha=0.8)
+            except:
+                pass
+        
+        ax.set_xlabel('像素位置', fontsize=9)
+        ax.set_ylabel('像素值', fontsize=9)
+        ax.set_title(f'第{row_index+1}行像素值分布', fontsize=10)
+        ax.legend(fontsize=7, loc='best')
+        ax.grid(True, alpha=0.2, linewidth=0.5)
+        ax.tick_params(labelsize=8)
+        plt.tight_layout()
+        
+        return fig
+    
+    @st.cache_data
+    def process_folder_tab7(folder_path):
+        """处理单个文件夹中的所有缺陷图像"""
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        def update_progress(done, total):
+            progress_bar.progress(done / total)
+            status_text.text(f"处理中: {done}/{total}")
+        
+        results = saturation_analysis.process_folder(folder_path, progress=update_progress)
+        
+        progress_bar.empty()
+        status_text.empty()
+        
+        return results
+    
+    # UI界面
+    st.subheader("📁 选择数据文件夹")
+    
+    root_folder = st.text_input("根文件夹路径", value=r"D:\1023kehupian\slot7\slot7-P1\crop")
+    
+    if st.button("🔍 开始分析", key="start_analysis_tab7"):
+        root_path = Path(root_folder)
+        
+        if not root_path.exists():
+            st.error(f"❌ 文件夹不存在: {root_folder}")
+        else:
+            # 获取所有子文件夹
+            subfolders = [f for f in root_path.iterdir() if f.is_dir()]
+            
+            if not subfolders:
+                st.warning("⚠️ 未找到子文件夹")
+            else:
+                st.success(f"✅ 找到 {len(subfolders)} 个子文件夹")
+                
+                all_results = []
+                
+                # 处理每个子文件夹
+                for subfolder in subfolders:
+                    with st.expander(f"📂 处理文件夹: {subfolder.name}", expanded=False):
+                        results = process_folder_tab7(subfolder)
+                        all_results.extend(results)
+                        st.info(f"✅ 处理完成，找到 {len(results)} 个缺陷")
+                
+                if all_results:
+                    st.success(f"🎉 总共处理了 {len(all_results)} 个缺陷")
+                    
+                    # 保存结果到session state
+                    session_results.put('tab7_results', all_results)
+                else:
+                    st.warning("⚠️ 未找到任何缺陷数据")
+    
+    # 显示结果
+    all_results = session_results.get('tab7_results')
+    if all_results:
+        
+        st.divider()
+        st.subheader("📊 分析结果")
+        
+        # 创建数据表（不包含row_data）
+        df_results = []
+        for result in all_results:
+            df_result = {k: v for k, v in result.items() if k != 'row_data'}
+            df_results.append(df_result)
+        
+        df = pd.DataFrame(df_results)
+        
+        # 显示统计信息
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("总缺陷数", len(all_results))
+        with col2:
+            st.metric("平均主行饱和占比", f"{df['主行饱和占比(%)'].mean():.2f}%")
+        with col3:
+            st.metric("最大主行饱和占比", f"{df['主行饱和占比(%)'].max():.2f}%")
+        with col4:
+            st.metric("文件夹数", df['子文件夹'].nunique())
+        
+        # 显示数据表
+        st.dataframe(df, use_container_width=True, height=400)
+        
+        # 下载按钮
+        csv = df.to_csv(index=False).encode('utf-8-sig')
+        st.download_button(
+            label="📥 下载CSV",
+            data=csv,
+            file_name="饱和像素分析结果.csv",
+            mime="text/csv",
+        )
+        
+        st.divider()
+        st.subheader("📈 数据可视化")
+        
+        # 1. 箱线图对比
+        st.write("#### 1️⃣ 饱和像素占比箱线图对比")
+        
+        # 按子文件夹分组
+        folder_data = {}
+        for result in all_results:
+            folder = result['子文件夹']
+            if folder not in folder_data:
+                folder_data[folder] = {
+                    '主行': [],
+                    '次行1': [],
+                    '次行2': []
+                }
+            
+            folder_data[folder]['主行'].append(result['主行饱和占比(%)'])
+            if result['次行1饱和占比(%)'] > 0 or result['次行1像素数'] > 0:
+                folder_data[folder]['次行1'].append(result['次行1饱和占比(%)'])
+            if result['次行2饱和占比(%)'] > 0 or result['次行2像素数'] > 0:
+                folder_data[folder]['次行2'].append(result['次行2饱和占比(%)'])
+        
+        # 创建箱线图
+        fig, axes = plt.subplots(1, 3, figsize=(15, 5))
+        row_types = ['主行', '次行1', '次行2']
+        
+        for idx, row_type in enumerate(row_types):
+            ax = axes[idx]
+            data_to_plot = []
+            labels = []
+            
+            for folder in sorted(folder_data.keys()):
+                if folder_data[folder][row_type]:
+                    data_to_plot.append(folder_data[folder][row_type])
+                    labels.append(folder)
+            
+            if data_to_plot:
+                bp = ax.boxplot(data_to_plot, labels=labels, patch_artist=True)
+                for patch in bp['boxes']:
+                    patch.set_facecolor('lightblue')
+                
+                ax.set_xlabel('文件夹', fontsize=10)
+                ax.set_ylabel('饱和像素占比 (%)', fontsize=10)
+                ax.set_title(f'{row_type}饱和像素占比分布', fontsize=12, fontweight='bold')
+                ax.grid(True, alpha=0.3)
+                ax.tick_params(axis='x', rotation=45)
+        
+        plt.tight_layout()
+        st.pyplot(fig)
+        plt.close()
+        
+        # 2. 分文件夹的三行对比柱状图
+        st.write("#### 2️⃣ 各文件夹三行对比")
+        
+        selected_folder = st.selectbox("选择文件夹", sorted(folder_data.keys()))
+        
+        if selected_folder:
+            fig, ax = plt.subplots(figsize=(10, 6))
+            
+            data_dict = {
+                '主行': folder_data[selected_folder]['主行'],
+                '次行1': folder_data[selected_folder]['次行1'],
+                '次行2': folder_data[selected_folder]['次行2']
+            }
+            
+            # 计算统计量
+            stats_data = []
+            for row_type in ['主行', '次行1', '次行2']:
+                data = data_dict[row_type]
+                if data:
+                    stats_data.append({
+                        'type': row_type,
+                        'mean': np.mean(data),
+                        'median': np.median(data),
+                        'std': np.std(data),
+                        'min': np.min(data),
+                        'max': np.max(data)
+                    })
+            
+            if stats_data:
+                x = np.arange(len(stats_data))
+                width = 0.35
+                
+                means = [s['mean'] for s in stats_data]
+                medians = [s['median'] for s in stats_data]
+                stds = [s['std'] for s in stats_data]
+                labels_plot = [s['type'] for s in stats_data]
+                
+                ax.bar(x - width/2, means, width, label='平均值', alpha=0.8, yerr=stds, capsize=5)
+                ax.bar(x + width/2, medians, width, label='中位数', alpha=0.8)
+                
+                ax.set_xlabel('行类型', fontsize=11)
+                ax.set_ylabel('饱和像素占比 (%)', fontsize=11)
+                ax.set_title(f'{selected_folder} - 饱和像素占比统计', fontsize=13, fontweight='bold')
+                ax.set_xticks(x)
+                ax.set_xticklabels(labels_plot)
+                ax.legend()
+                ax.grid(True, alpha=0.3, axis='y')
+                
+                plt.tight_layout()
+                st.pyplot(fig)
+                plt.close()
+        
+        # 3. 热图
+        st.write("#### 3️⃣ 饱和占比热图")
+        
+        folders = sorted(folder_data.keys())
+        row_types = ['主行', '次行1', '次行2']
+        
+        heatmap_data = np.zeros((len(row_types), len(folders)))
+        
+        for i, row_type in enumerate(row_types):
+            for j, folder in enumerate(folders):
+                data = folder_data[folder][row_type]
+                if data:
+                    heatmap_data[i, j] = np.mean(data)
+        
+        fig, ax = plt.subplots(figsize=(12, 6))
+        im = ax.imshow(heatmap_data, cmap='YlOrRd', aspect='auto')
+        
+        ax.set_xticks(np.arange(len(folders)))
+        ax.set_yticks(np.arange(len(row_types)))
+        ax.set_xticklabels(folders)
+        ax.set_yticklabels(row_types)
+        
+        plt.setp(ax.get_xticklabels(), rotation=45, ha="right", rotation_mode="anchor")
+        
+        # 添加数值标注
+        for i in range(len(row_types)):
+            for j in range(len(folders)):
+                text = ax.text(j, i, f'{heatmap_data[i, j]:.1f}%',
+                              ha="center", va="center", color="black", fontsize=9)
+        
+        ax.set_title('不同文件夹各行类型平均饱和像素占比热图', fontsize=13, fontweight='bold')
+        fig.colorbar(im, ax=ax, label='平均饱和占比 (%)')
+        
+        plt.tight_layout()
+        st.pyplot(fig)
+        plt.close()
+        
+        # 4. 按通道分组的折线图
+        st.write("#### 4️⃣ 按通道分组的文件夹对比")
+        
+        # 按通道和文件夹分组
+        channel_data = {}
+        for result in all_results:
+            channel = result['通道']
+            folder = result['子文件夹']
+            
+            if channel not in channel_data:
+                channel_data[channel] = {}
+            
+            if folder not in channel_data[channel]:
+                channel_data[channel][folder] = {
+                    '主行': [],
+                    '次行1': [],
+                    '次行2': []
+                }
+            
+            channel_data[channel][folder]['主行'].append(result['主行饱和占比(%)'])
+            if result['次行1饱和占比(%)'] > 0 or result['次行1像素数'] > 0:
+                channel_data[channel][folder]['次行1'].append(result['次行1饱和占比(%)'])
+            if result['次行2饱和占比(%)'] > 0 or result['次行2像素数'] > 0:
+                channel_data[channel][folder]['次行2'].append(result['次行2饱和占比(%)'])
+        
+        # 选择通道
+        selected_channel = st.selectbox("选择通道", sorted(channel_data.keys()))
+        
+        if selected_channel:
+            fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+            row_types = ['主行', '次行1', '次行2']
+            
+            folders = sorted(channel_data[selected_channel].keys())
+            
+            for idx, row_type in enumerate(row_types):
+                ax = axes[idx]
+                
+                # 收集每个文件夹的统计数据
+                means = []
+                medians = []
+                stds = []
+                mins = []
+                maxs = []
+                
+                for folder in folders:
+                    data = channel_data[selected_channel][folder][row_type]
+                    if data:
+                        means.append(np.mean(data))
+                        medians.append(np.median(data))
+                        stds.append(np.std(data))
+                        mins.append(np.min(data))
+                        maxs.append(np.max(data))
+                    else:
+                        means.append(0)
+                        medians.append(0)
+                        stds.append(0)
+                        mins.append(0)
+                        maxs.append(0)
+                
+                x = np.arange(len(folders))
+                
+                # 绘制折线图
+                ax.plot(x, means, 'o-', label='平均值', linewidth=2, markersize=8, color='#2E86AB')
+                ax.plot(x, medians, 's-', label='中位数', linewidth=2, markersize=7, color='#A23B72')
+                ax.fill_between(x, np.array(means) - np.array(stds), 
+                               np.array(means) + np.array(stds), 
+                               alpha=0.2, color='#2E86AB', label='±1标准差')
+                
+                # 添加最大最小值范围
+                ax.fill_between(x, mins, maxs, alpha=0.1, color='gray', label='最大-最小范围')
+                
+                ax.set_xlabel('文件夹', fontsize=11)
+                ax.set_ylabel('饱和像素占比 (%)', fontsize=11)
+                ax.set_title(f'{selected_channel} 通道 - {row_type}饱和占比分布', fontsize=12, fontweight='bold')
+                ax.set_xticks(x)
+                ax.set_xticklabels(folders, rotation=45, ha='right')
+                ax.legend(fontsize=9)
+                ax.grid(True, alpha=0.3, linestyle='--')
+                
+                # 在点上标注数值
+                for i, (mean_val, median_val) in enumerate(zip(means, medians)):
+                    if mean_val > 0:
+                        ax.text(i, mean_val, f'{mean_val:.1f}', ha='center', va='bottom', fontsize=8)
+            
+            plt.suptitle(f'{selected_channel} 通道 - 不同文件夹三行饱和占比对比', fontsize=14, fontweight='bold', y=1.02)
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close()
+        
+        # 5. 像素值分布拟合图
+        st.write("#### 5️⃣ 像素值分布拟合图")
+        
+        # 选择要查看的缺陷
+        defect_options = [f"{r['缺陷ID']} - {r['子文件夹']} - {r['通道']}" for r in all_results]
+        selected_defect_idx = st.selectbox("选择缺陷", range(len(defect_options)), 
+                                          format_func=lambda x: defect_options[x])
+        
+        if selected_defect_idx is not None:
+            selected_result = all_results[selected_defect_idx]
+            row_analysis = selected_result['row_data']
+            
+            st.write(f"**缺陷信息:** {selected_result['缺陷ID']} - {selected_result['子文件夹']} - {selected_result['通道']}")
+            
+            # 找到主行、次行1、次行2
+            main_row = next((r for r in row_analysis if r.get('row_type') == '主行'), None)
+            sub_row1 = next((r for r in row_analysis if r.get('row_type') == '次行1'), None)
+            sub_row2 = next((r for r in row_analysis if r.get('row_type') == '次行2'), None)
+            
+            rows_to_plot = []
+            if main_row:
+                rows_to_plot.append(('主行', main_row))
+            if sub_row1:
+                rows_to_plot.append(('次行1', sub_row1))
+            if sub_row2:
+                rows_to_plot.append(('次行2', sub_row2))
+            
+            # 创建多列布局
+            cols = st.columns(len(rows_to_plot))
+            
+            for idx, (row_name, row_info) in enumerate(rows_to_plot):
+                with cols[idx]:
+                    st.write(f"**{row_name}**")
+                    fig = create_row_plot(row_info['pixels'], row_info['row_index'])
+                    st.pyplot(fig)
+                    plt.close()
+                    
+                    st.write(f"像素数: {row_info['total_pixels']}")
+                    st.write(f"饱和像素数: {row_info['saturated_count']}")
+                    st.write(f"饱和占比: {row_info['saturated_ratio']:.2f}%")
+        
+        # 6. 饱和占比0-100%分布直方图
+        st.write("#### 6️⃣ 饱和占比分布直方图 (0-100%)")
+        
+        # 提供不同的分组选项
+        distribution_type = st.radio(
+            "选择分布类型",
+            ["总体分布", "按通道+行类型分组", "按文件夹分组", "按通道分组", "按行类型分组"],
+            horizontal=True
+        )
+        
+        if distribution_type == "总体分布":
+            # 总体分布 - 主行、次行1、次行2分别显示
+            st.write("**所有缺陷的饱和占比分布**")
+            
+            fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+            row_types = ['主行', '次行1', '次行2']
+            colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
+            
+            for idx, (row_type, color) in enumerate(zip(row_types, colors)):
+                ax = axes[idx]
+                
+                # 收集该行类型的所有饱和占比数据
+                if row_type == '主行':
+                    data = [r['主行饱和占比(%)'] for r in all_results]
+                elif row_type == '次行1':
+                    data = [r['次行1饱和占比(%)'] for r in all_results if r['次行1像素数'] > 0]
+                else:  # 次行2
+                    data = [r['次行2饱和占比(%)'] for r in all_results if r['次行2像素数'] > 0]
+                
+                if data:
+                    # 绘制直方图
+                    n, bins, patches = ax.hist(data, bins=20, range=(0, 100), 
+                                              alpha=0.7, color=color, edgecolor='black', linewidth=0.5)
+                    
+                    # 添加统计信息
+                    mean_val = np.mean(data)
+                    median_val = np.median(data)
+                    std_val = np.std(data)
+                    
+                    ax.axvline(mean_val, color='red', linestyle='--', linewidth=2, label=f'平均值: {mean_val:.1f}%')
+                    ax.axvline(median_val, color='blue', linestyle='--', linewidth=2, label=f'中位数: {median_val:.1f}%')
+                    
+                    ax.set_xlabel('饱和像素占比 (%)', fontsize=11)
+                    ax.set_ylabel('缺陷数量', fontsize=11)
+                    ax.set_title(f'{row_type} - 饱和占比分布 (n={len(data)})', fontsize=12, fontweight='bold')
+                    ax.legend(fontsize=9)
+                    ax.grid(True, alpha=0.3, axis='y')
+                    
+                    # 添加统计文本框
+                    textstr = f'平均: {mean_val:.1f}%\n中位数: {median_val:.1f}%\n标准差: {std_val:.1f}%'
+                    props = dict(boxstyle='round', facecolor='wheat', alpha=0.5)
+                    ax.text(0.65, 0.97, textstr, transform=ax.transAxes, fontsize=9,
+                           verticalalignment='top', bbox=props)
+            
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close()
+            
+        elif distribution_type == "按通道+行类型分组":
+            # 按通道+行类型组合，显示在不同文件夹的分布
+            st.write("**特定通道+行类型在不同文件夹的饱和占比分布**")
+            
+            # 选择通道和行类型
+            col1, col2 = st.columns(2)
+            with col1:
+                channels = sorted(channel_data.keys())
+                selected_channel_dist = st.selectbox("选择通道", channels, key='dist_channel_select')
+            with col2:
+                selected_row_type_dist = st.selectbox("选择行类型", ['主行', '次行1', '次行2'], key='dist_row_select')
+            
+            st.write(f"**{selected_channel_dist} 通道 - {selected_row_type_dist} 在各文件夹的分布**")
+            
+            # 收集该通道+行类型在各文件夹的数据
+            folders = sorted(channel_data[selected_channel_dist].keys())
+            n_folders = len(folders)
+            
+            # 动态计算子图布局
+            n_cols = min(3, n_folders)
+            n_rows = (n_folders + n_cols - 1) // n_cols
+            
+            fig, axes = plt.subplots(n_rows, n_cols, figsize=(6*n_cols, 4*n_rows))
+            if n_folders == 1:
+                axes = [axes]
+            else:
+                axes = axes.flatten() if n_folders > 1 else [axes]
+            
+            # 用于存储所有文件夹的统计信息
+            all_folder_stats = []
+            
+            for idx, folder in enumerate(folders):
+                ax = axes[idx]
+                
+                # 获取该文件夹该通道该行类型的数据
+                data = channel_data[selected_channel_dist][folder][selected_row_type_dist]
+                
+                if data:
+                    # 绘制直方图
+                    n, bins, patches = ax.hist(data, bins=15, range=(0, 100), 
+                                              alpha=0.75, color='steelblue', edgecolor='black', linewidth=0.5)
+                    
+                    # 统计信息
+                    mean_val = np.mean(data)
+                    median_val = np.median(data)
+                    std_val = np.std(data)
+                    
+                    # 保存统计信息
+                    all_folder_stats.append({
+                        'folder': folder,
+                        'mean': mean_val,
+                        'median': median_val,
+                        'std': std_val,
+                        'count': len(data)
+                    })
+                    
+                    ax.axvline(mean_val, color='red', linestyle='--', linewidth=1.5, 
+                              label=f'均值: {mean_val:.1f}%')
+                    ax.axvline(median_val, color='blue', linestyle='--', linewidth=1.5, 
+                              label=f'中位: {median_val:.1f}%')
+                    
+                    ax.set_xlabel('饱和占比 (%)', fontsize=10)
+                    ax.set_ylabel('缺陷数量', fontsize=10)
+                    ax.set_title(f'{folder}\n(n={len(data)})', fontsize=11, fontweight='bold')
+                    ax.legend(fontsize=8, loc='upper right')
+                    ax.grid(True, alpha=0.3, axis='y')
+                    
+                    # 添加统计文本框
+                    textstr = f'μ={mean_val:.1f}%\nσ={std_val:.1f}%'
+                    props = dict(boxstyle='round', facecolor='lightyellow', alpha=0.7)
+                    ax.text(0.02, 0.98, textstr, transform=ax.transAxes, fontsize=8,
+                           verticalalignment='top', bbox=props)
+                else:
+                    ax.text(0.5, 0.5, '无数据', ha='center', va='center', fontsize=12)
+                    ax.set_title(f'{folder}', fontsize=11)
+            
+            # 隐藏多余的子图
+            for idx in range(n_folders, len(axes)):
+                axes[idx].axis('off')
+            
+            plt.suptitle(f'{selected_channel_dist} 通道 - {selected_row_type_dist} - 不同文件夹分布对比', 
+                        fontsize=14, fontweight='bold', y=1.0)
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close()
+            
+            # 显示统计汇总表
+            if all_folder_stats:
+                st.write("**📊 统计汇总**")
+                stats_df = pd.DataFrame(all_folder_stats)
+                stats_df.columns = ['文件夹', '平均值(%)', '中位数(%)', '标准差(%)', '样本数']
+                stats_df['平均值(%)'] = stats_df['平均值(%)'].round(2)
+                stats_df['中位数(%)'] = stats_df['中位数(%)'].round(2)
+                stats_df['标准差(%)'] = stats_df['标准差(%)'].round(2)
+                st.dataframe(stats_df, use_container_width=True)
+            
+            # 添加对比柱状图
+            if all_folder_stats and len(all_folder_stats) > 1:
+                st.write("**📊 文件夹间对比柱状图**")
+                
+                fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+                
+                folders_list = [s['folder'] for s in all_folder_stats]
+                means = [s['mean'] for s in all_folder_stats]
+                medians = [s['median'] for s in all_folder_stats]
+                stds = [s['std'] for s in all_folder_stats]
+                counts = [s['count'] for s in all_folder_stats]
+                
+                x = np.arange(len(folders_list))
+                width = 0.35
+                
+                # 左图：平均值和中位数对比
+                bars1 = ax1.bar(x - width/2, means, width, label='平均值', 
+                               alpha=0.8, color='steelblue', yerr=stds, capsize=5)
+                bars2 = ax1.bar(x + width/2, medians, width, label='中位数', 
+                               alpha=0.8, color='coral')
+                
+                # 在柱子上添加数值
+                for i, (m, med) in enumerate(zip(means, medians)):
+                    ax1.text(i - width/2, m + 1, f'{m:.1f}', ha='center', va='bottom', fontsize=9)
+                    ax1.text(i + width/2, med + 1, f'{med:.1f}', ha='center', va='bottom', fontsize=9)
+                
+                ax1.set_xlabel('文件夹', fontsize=11)
+                ax1.set_ylabel('饱和占比 (%)', fontsize=11)
+                ax1.set_title(f'{selected_channel_dist}-{selected_row_type_dist} 平均值与中位数对比', 
+                            fontsize=12, fontweight='bold')
+                ax1.set_xticks(x)
+                ax1.set_xticklabels(folders_list, rotation=45, ha='right')
+                ax1.legend()
+                ax1.grid(True, alpha=0.3, axis='y')
+                
+                # 右图：样本数量
+                bars3 = ax2.bar(x, counts, alpha=0.8, color='mediumseagreen')
+                
+                for i, c in enumerate(counts):
+                    ax2.text(i, c + 1, str(c), ha='center', va='bottom', fontsize=10, fontweight='bold')
+                
+                ax2.set_xlabel('文件夹', fontsize=11)
+                ax2.set_ylabel('缺陷数量', fontsize=11)
+                ax2.set_title(f'{selected_channel_dist}-{selected_row_type_dist} 样本数量', 
+                            fontsize=12, fontweight='bold')
+                ax2.set_xticks(x)
+                ax2.set_xticklabels(folders_list, rotation=45, ha='right')
+                ax2.grid(True, alpha=0.3, axis='y')
+                
+                plt.tight_layout()
+                st.pyplot(fig)
+                plt.close()
+            
+            # 添加箱线图对比
+            if all_folder_stats and len(all_folder_stats) > 1:
+                st.write("**📦 箱线图对比**")
+                
+                fig, ax = plt.subplots(figsize=(max(10, len(folders)*2), 6))
+                
+                # 收集所有数据用于箱线图
+                box_data = []
+                box_labels = []
+                for folder in folders:
+                    data = channel_data[selected_channel_dist][folder][selected_row_type_dist]
+                    if data:
+                        box_data.append(data)
+                        box_labels.append(folder)
+                
+                if box_data:
+                    bp = ax.boxplot(box_data, labels=box_labels, patch_artist=True,
+                                   showmeans=True, meanline=True)
+                    
+                    # 美化箱线图
+                    for patch in bp['boxes']:
+                        patch.set_facecolor('lightblue')
+                        patch.set_alpha(0.7)
+                    
+                    for median in bp['medians']:
+                        median.set(color='red', linewidth=2)
+                    
+                    for mean in bp['means']:
+                        mean.set(color='green', linewidth=2, linestyle='--')
+                    
+                    ax.set_xlabel('文件夹', fontsize=12)
+                    ax.set_ylabel('饱和像素占比 (%)', fontsize=12)
+                    ax.set_title(f'{selected_channel_dist} 通道 - {selected_row_type_dist} - 箱线图对比', 
+                               fontsize=13, fontweight='bold')
+                    ax.grid(True, alpha=0.3, axis='y')
+                    ax.tick_params(axis='x', rotation=45)
+                    
+                    # 添加图例
+                    from matplotlib.lines import Line2D
+                    legend_elements = [
+                        Line2D([0], [0], color='red', linewidth=2, label='中位数'),
+                        Line2D([0], [0], color='green', linewidth=2, linestyle='--', label='平均值')
+                    ]
+                    ax.legend(handles=legend_elements, loc='upper right', fontsize=10)
+                    
+                    plt.tight_layout()
+                    st.pyplot(fig)
+                    plt.close()
+            
+        elif distribution_type == "按文件夹分组":
+            # 按文件夹分组显示
+            st.write("**不同文件夹的饱和占比分布对比**")
+            
+            # 选择行类型
+            selected_row_type = st.selectbox("选择行类型", ['主行', '次行1', '次行2'], key='dist_row_type')
+            
+            folders = sorted(folder_data.keys())
+            n_folders = len(folders)
+            
+            # 动态计算子图布局
+            n_cols = min(3, n_folders)
+            n_rows = (n_folders + n_cols - 1) // n_cols
+            
+            fig, axes = plt.subplots(n_rows, n_cols, figsize=(6*n_cols, 4*n_rows))
+            if n_folders == 1:
+                axes = [axes]
+            else:
+                axes = axes.flatten() if n_folders > 1 else [axes]
+            
+            for idx, folder in enumerate(folders):
+                ax = axes[idx]
+                
+                # 获取数据
+                data = folder_data[folder][selected_row_type]
+                
+                if data:
+                    # 绘制直方图
+                    n, bins, patches = ax.hist(data, bins=15, range=(0, 100), 
+                                              alpha=0.7, color='skyblue', edgecolor='black', linewidth=0.5)
+                    
+                    # 统计信息
+                    mean_val = np.mean(data)
+                    median_val = np.median(data)
+                    
+                    ax.axvline(mean_val, color='red', linestyle='--', linewidth=1.5, label=f'均值: {mean_val:.1f}%')
+                    ax.axvline(median_val, color='blue', linestyle='--', linewidth=1.5, label=f'中位: {median_val:.1f}%')
+                    
+                    ax.set_xlabel('饱和占比 (%)', fontsize=10)
+                    ax.set_ylabel('数量', fontsize=10)
+                    ax.set_title(f'{folder}\n{selected_row_type} (n={len(data)})', fontsize=11, fontweight='bold')
+                    ax.legend(fontsize=8)
+                    ax.grid(True, alpha=0.3, axis='y')
+            
+            # 隐藏多余的子图
+            for idx in range(n_folders, len(axes)):
+                axes[idx].axis('off')
+            
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close()
+            
+        elif distribution_type == "按通道分组":
+            # 按通道分组显示
+            st.write("**不同通道的饱和占比分布对比**")
+            
+            # 选择行类型
+            selected_row_type = st.selectbox("选择行类型", ['主行', '次行1', '次行2'], key='dist_row_type_channel')
+            
+            channels = sorted(channel_data.keys())
+            
+            fig, axes = plt.subplots(1, len(channels), figsize=(6*len(channels), 5))
+            if len(channels) == 1:
+                axes = [axes]
+            
+            colors_palette = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
+            
+            for idx, channel in enumerate(channels):
+                ax = axes[idx]
+                
+                # 收集该通道所有文件夹的数据
+                channel_all_data = []
+                for folder in channel_data[channel].keys():
+                    channel_all_data.extend(channel_data[channel][folder][selected_row_type])
+                
+                if channel_all_data:
+                    # 绘制直方图
+                    n, bins, patches = ax.hist(channel_all_data, bins=20, range=(0, 100), 
+                                              alpha=0.7, color=colors_palette[idx % len(colors_palette)], 
+                                              edgecolor='black', linewidth=0.5)
+                    
+                    # 统计信息
+                    mean_val = np.mean(channel_all_data)
+                    median_val = np.median(channel_all_data)
+                    std_val = np.std(channel_all_data)
+                    
+                    ax.axvline(mean_val, color='red', linestyle='--', linewidth=2, label=f'平均: {mean_val:.1f}%')
+                    ax.axvline(median_val, color='blue', linestyle='--', linewidth=2, label=f'中位: {median_val:.1f}%')
+                    
+                    ax.set_xlabel('饱和占比 (%)', fontsize=11)
+                    ax.set_ylabel('缺陷数量', fontsize=11)
+                    ax.set_title(f'{channel} 通道 - {selected_row_type}\n(n={len(channel_all_data)})', 
+                               fontsize=12, fontweight='bold')
+                    ax.legend(fontsize=9)
+                    ax.grid(True, alpha=0.3, axis='y')
+                    
+                    # 添加统计文本框
+                    textstr = f'均值: {mean_val:.1f}%\n中位: {median_val:.1f}%\n标准差: {std_val:.1f}%'
+                    props = dict(boxstyle='round', facecolor='wheat', alpha=0.5)
+                    ax.text(0.65, 0.97, textstr, transform=ax.transAxes, fontsize=9,
+                           verticalalignment='top', bbox=props)
+            
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close()
+            
+        else:  # 按行类型分组
+            # 按行类型分组，对比不同情况
+            st.write("**不同行类型的饱和占比分布对比**")
+            
+            # 选择对比维度
+            compare_by = st.radio("对比维度", ["文件夹", "通道"], horizontal=True, key='compare_dim')
+            
+            if compare_by == "文件夹":
+                selected_folder = st.selectbox("选择文件夹", sorted(folder_data.keys()), key='dist_folder_comp')
+                
+                fig, ax = plt.subplots(figsize=(12, 6))
+                
+                row_types = ['主行', '次行1', '次行2']
+                colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
+                
+                for row_type, color in zip(row_types, colors):
+                    data = folder_data[selected_folder][row_type]
+                    if data:
+                        ax.hist(data, bins=20, range=(0, 100), alpha=0.5, 
+                               label=f'{row_type} (n={len(data)})', 
+                               color=color, edgecolor='black', linewidth=0.5)
+                
+                ax.set_xlabel('饱和像素占比 (%)', fontsize=12)
+                ax.set_ylabel('缺陷数量', fontsize=12)
+                ax.set_title(f'{selected_folder} - 三行类型饱和占比分布对比', fontsize=13, fontweight='bold')
+                ax.legend(fontsize=10)
+                ax.grid(True, alpha=0.3, axis='y')
+                
+                plt.tight_layout()
+                st.pyplot(fig)
+                plt.close()
+                
+            else:  # 通道
+                selected_channel_comp = st.selectbox("选择通道", sorted(channel_data.keys()), key='dist_channel_comp')
+                
+                fig, ax = plt.subplots(figsize=(12, 6))
+                
+                row_types = ['主行', '次行1', '次行2']
+                colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
+                
+                for row_type, color in zip(row_types, colors):
+                    # 收集该通道所有文件夹的数据
+                    all_data = []
+                    for folder in channel_data[selected_channel_comp].keys():
+                        all_data.extend(channel_data[selected_channel_comp][folder][row_type])
+                    
+                    if all_data:
+                        ax.hist(all_data, bins=20, range=(0, 100), alpha=0.5, 
+                               label=f'{row_type} (n={len(all_data)})', 
+                               color=color, edgecolor='black', linewidth=0.5)
+                
+                ax.set_xlabel('饱和像素占比 (%)', fontsize=12)
+                ax.set_ylabel('缺陷数量', fontsize=12)
+                ax.set_title(f'{selected_channel_comp} 通道 - 三行类型饱和占比分布对比', fontsize=13, fontweight='bold')
+                ax.legend(fontsize=10)
+                ax.grid(True, alpha=0.3, axis='y')
+                
+                plt.tight_layout()
+                st.pyplot(fig)
+                plt.close()
+        
+        # 7. 累积分布函数 (CDF)
+        st.write("#### 7️⃣ 饱和占比累积分布图 (CDF)")
+        
+        cdf_type = st.radio("CDF显示类型", ["总体CDF", "按通道+行类型分组", "按文件夹对比", "按通道对比"], horizontal=True, key='cdf_type')
+        
+        if cdf_type == "总体CDF":
+            fig, axes = plt.subplots(1, 3, figsize=(18, 5))
+            row_types = ['主行', '次行1', '次行2']
+            colors = ['#FF6B6B', '#4ECDC4', '#45B7D1']
+            
+            for idx, (row_type, color) in enumerate(zip(row_types, colors)):
+                ax = axes[idx]
+                
+                # 收集数据
+                if row_type == '主行':
+                    data = [r['主行饱和占比(%)'] for r in all_results]
+                elif row_type == '次行1':
+                    data = [r['次行1饱和占比(%)'] for r in all_results if r['次行1像素数'] > 0]
+                else:
+                    data = [r['次行2饱和占比(%)'] for r in all_results if r['次行2像素数'] > 0]
+                
+                if data:
+                    # 排序并计算CDF
+                    sorted_data = np.sort(data)
+                    y = np.arange(1, len(sorted_data) + 1) / len(sorted_data) * 100
+                    
+                    ax.plot(sorted_data, y, linewidth=2, color=color, label=row_type)
+                    ax.fill_between(sorted_data, y, alpha=0.3, color=color)
+                    
+                    # 添加参考线
+                    ax.axhline(50, color='gray', linestyle='--', linewidth=1, alpha=0.5, label='50%分位')
+                    ax.axhline(90, color='red', linestyle='--', linewidth=1, alpha=0.5, label='90%分位')
+                    
+                    # 标注关键分位点
+                    percentiles = [50, 90, 95]
+                    for p in percentiles:
+                        val = np.percentile(data, p)
+                        ax.plot(val, p, 'ro', markersize=8)
+                        ax.text(val, p, f'  {p}%: {val:.1f}%', fontsize=9, va='center')
+                    
+                    ax.set_xlabel('饱和像素占比 (%)', fontsize=11)
+                    ax.set_ylabel('累积百分比 (%)', fontsize=11)
+                    ax.set_title(f'{row_type} - 累积分布', fontsize=12, fontweight='bold')
+                    ax.legend(fontsize=9)
+                    ax.grid(True, alpha=0.3)
+                    ax.set_xlim(0, 100)
+                    ax.set_ylim(0, 100)
+            
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close()
+            
+        elif cdf_type == "按通道+行类型分组":
+            # 特定通道+行类型在不同文件夹的CDF对比
+            st.write("**特定通道+行类型在不同文件夹的累积分布对比**")
+            
+            # 选择通道和行类型
+            col1, col2 = st.columns(2)
+            with col1:
+                channels_cdf = sorted(channel_data.keys())
+                selected_channel_cdf = st.selectbox("选择通道", channels_cdf, key='cdf_channel_select')
+            with col2:
+                selected_row_type_cdf = st.selectbox("选择行类型", ['主行', '次行1', '次行2'], key='cdf_row_select')
+            
+            fig, ax = plt.subplots(figsize=(12, 7))
+            
+            folders_cdf = sorted(channel_data[selected_channel_cdf].keys())
+            colors_cdf = plt.cm.tab10(np.linspace(0, 1, len(folders_cdf)))
+            
+            # 存储统计信息
+            cdf_stats = []
+            
+            for folder, color in zip(folders_cdf, colors_cdf):
+                data = channel_data[selected_channel_cdf][folder][selected_row_type_cdf]
+                if data:
+                    sorted_data = np.sort(data)
+                    y = np.arange(1, len(sorted_data) + 1) / len(sorted_data) * 100
+                    ax.plot(sorted_data, y, linewidth=2.5, label=f'{folder} (n={len(data)})', 
+                           color=color, marker='o', markersize=3, alpha=0.8)
+                    
+                    # 计算关键分位数
+                    p50 = np.percentile(data, 50)
+                    p90 = np.percentile(data, 90)
+                    cdf_stats.append({
+                        'folder': folder,
+                        'p50': p50,
+                        'p90': p90,
+                        'mean': np.mean(data),
+                        'count': len(data)
+                    })
+            
+            # 添加参考线
+            ax.axhline(50, color='gray', linestyle='--', linewidth=1, alpha=0.5, label='50%分位线')
+            ax.axhline(90, color='red', linestyle='--', linewidth=1, alpha=0.5, label='90%分位线')
+            
+            ax.set_xlabel('饱和像素占比 (%)', fontsize=12)
+            ax.set_ylabel('累积百分比 (%)', fontsize=12)
+            ax.set_title(f'{selected_channel_cdf} 通道 - {selected_row_type_cdf} - 不同文件夹累积分布对比', 
+                        fontsize=13, fontweight='bold')
+            ax.legend(fontsize=9, loc='lower right', ncol=2)
+            ax.grid(True, alpha=0.3)
+            ax.set_xlim(0, 100)
+            ax.set_ylim(0, 100)
+            
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close()
+            
+            # 显示关键分位数统计表
+            if cdf_stats:
+                st.write("**📊 关键分位数统计**")
+                cdf_stats_df = pd.DataFrame(cdf_stats)
+                cdf_stats_df.columns = ['文件夹', '中位数(50%)', '90%分位数', '平均值', '样本数']
+                cdf_stats_df['中位数(50%)'] = cdf_stats_df['中位数(50%)'].round(2)
+                cdf_stats_df['90%分位数'] = cdf_stats_df['90%分位数'].round(2)
+                cdf_stats_df['平均值'] = cdf_stats_df['平均值'].round(2)
+                
+                # 使用颜色突出显示
+                st.dataframe(
+                    cdf_stats_df.style.background_gradient(subset=['中位数(50%)', '90%分位数', '平均值'], 
+                                                          cmap='RdYlGn_r'),
+                    use_container_width=True
+                )
+                
+                # 添加分位数对比柱状图
+                st.write("**📊 分位数对比**")
+                fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 5))
+                
+                folders_list = cdf_stats_df['文件夹'].tolist()
+                p50_vals = cdf_stats_df['中位数(50%)'].tolist()
+                p90_vals = cdf_stats_df['90%分位数'].tolist()
+                
+                x = np.arange(len(folders_list))
+                width = 0.35
+                
+                # 左图：中位数对比
+                bars1 = ax1.bar(x, p50_vals, alpha=0.8, color='steelblue')
+                for i, v in enumerate(p50_vals):
+                    ax1.text(i, v + 1, f'{v:.1f}%', ha='center', va='bottom', fontsize=10)
+                
+                ax1.set_xlabel('文件夹', fontsize=11)
+                ax1.set_ylabel('中位数 (%)', fontsize=11)
+                ax1.set_title(f'{selected_channel_cdf}-{selected_row_type_cdf} 中位数(50%分位)', 
+                            fontsize=12, fontweight='bold')
+                ax1.set_xticks(x)
+                ax1.set_xticklabels(folders_list, rotation=45, ha='right')
+                ax1.grid(True, alpha=0.3, axis='y')
+                
+                # 右图：90%分位数对比
+                bars2 = ax2.bar(x, p90_vals, alpha=0.8, color='coral')
+                for i, v in enumerate(p90_vals):
+                    ax2.text(i, v + 1, f'{v:.1f}%', ha='center', va='bottom', fontsize=10)
+                
+                ax2.set_xlabel('文件夹', fontsize=11)
+                ax2.set_ylabel('90%分位数 (%)', fontsize=11)
+                ax2.set_title(f'{selected_channel_cdf}-{selected_row_type_cdf} 90%分位数', 
+                            fontsize=12, fontweight='bold')
+                ax2.set_xticks(x)
+                ax2.set_xticklabels(folders_list, rotation=45, ha='right')
+                ax2.grid(True, alpha=0.3, axis='y')
+                
+                plt.tight_layout()
+                st.pyplot(fig)
+                plt.close()
+            
+        elif cdf_type == "按文件夹对比":
+            selected_row_type_cdf = st.selectbox("选择行类型", ['主行', '次行1', '次行2'], key='cdf_row_type')
+            
+            fig, ax = plt.subplots(figsize=(12, 6))
+            
+            folders = sorted(folder_data.keys())
+            colors_cdf = plt.cm.tab10(np.linspace(0, 1, len(folders)))
+            
+            for folder, color in zip(folders, colors_cdf):
+                data = folder_data[folder][selected_row_type_cdf]
+                if data:
+                    sorted_data = np.sort(data)
+                    y = np.arange(1, len(sorted_data) + 1) / len(sorted_data) * 100
+                    ax.plot(sorted_data, y, linewidth=2, label=f'{folder} (n={len(data)})', color=color)
+            
+            ax.axhline(50, color='gray', linestyle='--', linewidth=1, alpha=0.5)
+            ax.axhline(90, color='red', linestyle='--', linewidth=1, alpha=0.5)
+            
+            ax.set_xlabel('饱和像素占比 (%)', fontsize=12)
+            ax.set_ylabel('累积百分比 (%)', fontsize=12)
+            ax.set_title(f'{selected_row_type_cdf} - 不同文件夹累积分布对比', fontsize=13, fontweight='bold')
+            ax.legend(fontsize=9, loc='best')
+            ax.grid(True, alpha=0.3)
+            ax.set_xlim(0, 100)
+            ax.set_ylim(0, 100)
+            
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close()
+            
+        else:  # 按通道对比
+            selected_row_type_cdf2 = st.selectbox("选择行类型", ['主行', '次行1', '次行2'], key='cdf_row_type2')
+            
+            fig, ax = plt.subplots(figsize=(12, 6))
+            
+            channels = sorted(channel_data.keys())
+            colors_cdf = plt.cm.Set2(np.linspace(0, 1, len(channels)))
+            
+            for channel, color in zip(channels, colors_cdf):
+                # 收集该通道所有数据
+                all_data = []
+                for folder in channel_data[channel].keys():
+                    all_data.extend(channel_data[channel][folder][selected_row_type_cdf2])
+                
+                if all_data:
+                    sorted_data = np.sort(all_data)
+                    y = np.arange(1, len(sorted_data) + 1) / len(sorted_data) * 100
+                    ax.plot(sorted_data, y, linewidth=2.5, label=f'{channel} (n={len(all_data)})', color=color)
+            
+            ax.axhline(50, color='gray', linestyle='--', linewidth=1, alpha=0.5)
+            ax.axhline(90, color='red', linestyle='--', linewidth=1, alpha=0.5)
+            
+            ax.set_xlabel('饱和像素占比 (%)', fontsize=12)
+            ax.set_ylabel('累积百分比 (%)', fontsize=12)
+            ax.set_title(f'{selected_row_type_cdf2} - 不同通道累积分布对比', fontsize=13, fontweight='bold')
+            ax.legend(fontsize=10, loc='best')
+            ax.grid(True, alpha=0.3)
+            ax.set_xlim(0, 100)
+            ax.set_ylim(0, 100)
+            
+            plt.tight_layout()
+            st.pyplot(fig)
+            plt.close()
@@ -0,0 +1,689 @@
+import streamlit as st
+
+
+def render():
+    """分类规则编辑器页面"""
+    st.markdown('<a name="规则编辑器"></a>', unsafe_allow_html=True)
+    st.header("⚙️ 分类规则编辑器")
+    
+    import json
+    import rule_engine
+    
+    # 规则文件路径
+    default_rules_path = "classification_rules.json"
+    
+    st.subheader("📂 规则文件管理")
+    
+    # 添加加载方式选择
+    load_method = st.radio(
+        "选择加载方式",
+        ["📁 从文件路径加载", "📤 上传JSON文件"],
+        horizontal=True
+    )
+    
+    rules_file_path = None
+    load_button = False
+    uploaded_rules = None
+    
+    if load_method == "📁 从文件路径加载":
+        col1, col2, col3 = st.columns([3, 1, 1])
+        with col1:
+            rules_file_path = st.text_input("规则文件路径", value=default_rules_path, key="rules_path_input")
+        with col2:
+            st.write("")
+            st.write("")
+            load_button = st.button("🔄 加载规则", key="load_from_path")
+        with col3:
+            st.write("")
+            st.write("")
+            # 文件浏览器按钮提示
+            if st.button("💡 提示", key="path_help"):
+                st.info("💡 在文本框中输入完整的文件路径，例如：\n\n`D:/streamlit/classification_rules.json`\n\n或使用相对路径：\n\n`classification_rules.json`")
+    
+    else:  # 上传JSON文件
+        uploaded_file = st.file_uploader(
+            "选择JSON规则文件",
+            type=['json'],
+            help="上传classification_rules.json文件",
+            key="json_uploader"
+        )
+        
+        if uploaded_file is not None:
+            try:
+                # 读取上传的文件内容
+                uploaded_rules = json.load(uploaded_file)
+                st.success(f"✅ 文件 '{uploaded_file.name}' 上传成功")
+                
+                # 显示预览
+                with st.expander("📄 文件预览"):
+                    st.json(uploaded_rules)
+                
+                # 加载按钮
+                if st.button("✔️ 确认加载此文件", type="primary", key="load_uploaded"):
+                    load_button = True
+            except json.JSONDecodeError as e:
+                st.error(f"❌ JSON文件格式错误: {str(e)}")
+            except Exception as e:
+                st.error(f"❌ 读取文件失败: {str(e)}")
+    
+    # 初始化session state
+    if 'rules_config' not in st.session_state:
+        # 首次加载，尝试加载默认文件
+        try:
+            rules_config = rule_engine.load_rules_from_json(default_rules_path)
+            if rules_config:
+                st.session_state.rules_config = rules_config
+                st.session_state.current_rules_source = default_rules_path
+                st.info(f"ℹ️ 已自动加载默认规则文件：{default_rules_path}")
+            else:
+                st.warning("⚠️ 未找到默认规则文件，请加载或上传规则文件")
+                st.stop()
+        except:
+            st.warning("⚠️ 未找到默认规则文件，请加载或上传规则文件")
+            st.stop()
+    
+    # 处理加载操作
+    if load_button:
+        if load_method == "📁 从文件路径加载" and rules_file_path:
+            rules_config = rule_engine.load_rules_from_json(rules_file_path)
+            if rules_config:
+                st.session_state.rules_config = rules_config
+                st.session_state.current_rules_source = rules_file_path
+                st.success(f"✅ 成功加载规则文件：{rules_file_path}")
+                st.rerun()
+            else:
+                st.error(f"❌ 加载规则文件失败：{rules_file_path}")
+                st.error("请检查文件路径是否正确，文件是否存在")
+                st.stop()
+        elif load_method == "📤 上传JSON文件" and uploaded_rules:
+            st.session_state.rules_config = uploaded_rules
+            st.session_state.current_rules_source = uploaded_file.name
+            st.success(f"✅ 成功加载上传的规则文件：{uploaded_file.name}")
+            st.rerun()
+    
+    rules_config = st.session_state.rules_config
+    
+    # 显示当前加载的规则来源
+    current_source = st.session_state.get('current_rules_source', '未知')
+    st.caption(f"📌 当前规则来源: `{current_source}`")
+    
+    # 显示规则文件信息
+    st.subheader("📋 规则配置信息")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("规则版本", rules_config.get('version', 'N/A'))
+    with col2:
+        st.metric("规则数量", len(rules_config.get('rules', [])))
+    with col3:
+        enabled_count = sum(1 for r in rules_config.get('rules', []) if r.get('enabled', True))
+        st.metric("已启用规则", enabled_count)
+    
+    st.info(f"📝 描述: {rules_config.get('description', '无描述')}")
+    
+    # 阈值参数设置
+    st.subheader("🎛️ 全局阈值参数")
+    thresholds = rules_config.get('thresholds', {})
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        snr_adj = st.number_input("SNR调整值", 
+                                   value=float(thresholds.get('snr_adjustment', 0)),
+                                   step=0.5,
+                                   format="%.1f")
+        thresholds['snr_adjustment'] = snr_adj
+    with col2:
+        dw1o_adj = st.number_input("DW1O峰值调整", 
+                                     value=float(thresholds.get('dw1o_peak_adjustment', 0)),
+                                     step=100.0,
+                                     format="%.0f")
+        thresholds['dw1o_peak_adjustment'] = dw1o_adj
+    with col3:
+        dw2o_adj = st.number_input("DW2O峰值调整", 
+                                     value=float(thresholds.get('dw2o_peak_adjustment', 0)),
+                                     step=100.0,
+                                     format="%.0f")
+        thresholds['dw2o_peak_adjustment'] = dw2o_adj
+    
+    rules_config['thresholds'] = thresholds
+    
+    # 默认返回值设置
+    st.subheader("🔢 默认返回值")
+    default_return = st.number_input("当没有规则匹配时的返回值", 
+                                     value=int(rules_config.get('default_return', 10002)),
+                                     step=1)
+    rules_config['default_return'] = default_return
+    
+    st.markdown("---")
+    
+    # 规则列表编辑
+    st.subheader("📜 分类规则列表")
+    
+    # 添加新规则按钮
+    if st.button("➕ 添加新规则"):
+        new_rule = {
+            "rule_id": max([r.get('rule_id', 0) for r in rules_config['rules']], default=0) + 1,
+            "name": "新规则",
+            "conditions": [],
+            "logic": "AND",
+            "return_value": 0,
+            "enabled": True
+        }
+        rules_config['rules'].append(new_rule)
+        st.success("✅ 已添加新规则")
+        st.rerun()
+    
+    # 可用特征列表
+    available_features = rules_config.get('available_features', [])
+    operators = ['>', '>=', '<', '<=', '==', '!=']
+    
+    # 通道组合映射（内部值 -> 显示名称）
+    channel_combinations_map = {
+        '': '无限制',
+        'D_only': 'DW1O通道单独',
+        'J_only': 'DW2O通道单独',
+        'P_only': 'DN1O通道单独',
+        'D_and_J': 'DW1O+DW2O组合',
+        'D_and_P': 'DW1O+DN1O组合',
+        'J_and_P': 'DW2O+DN1O组合',
+        'D_and_J_and_P': 'DW1O+DW2O+DN1O全通道'
+    }
+    channel_combinations = list(channel_combinations_map.keys())
+    
+    # 按通道组合分组规则
+    from collections import defaultdict
+    rules_by_channel = defaultdict(list)
+    for idx, rule in enumerate(rules_config['rules']):
+        channel_key = rule.get('channel_combination', '')
+        rules_by_channel[channel_key].append((idx, rule))
+    
+    # 初始化session state存储选中的规则
+    if 'selected_rule_idx' not in st.session_state:
+        st.session_state.selected_rule_idx = 0 if rules_config['rules'] else None
+    
+    # 创建左右分栏布局
+    left_col, right_col = st.columns([1, 3])
+    
+    # 左侧：树形结构显示
+    with left_col:
+        st.markdown("### 📋 规则树")
+        st.markdown("---")
+        
+        # 遍历每个通道组合组（父类）
+        for channel_key in sorted(rules_by_channel.keys(), key=lambda x: (x == '', x)):
+            channel_display_name = channel_combinations_map.get(channel_key, channel_key or '无限制')
+            rules_in_group = rules_by_channel[channel_key]
+            
+            # 统计该组的信息
+            group_enabled_count = sum(1 for _, r in rules_in_group if r.get('enabled', True))
+            
+            # 使用expander作为可折叠的父类（默认折叠）
+            with st.expander(f"📂 {channel_display_name} ({len(rules_in_group)} 条规则，{group_enabled_count} 条已启用)", expanded=False):
+                # 显示该组下的所有规则（子类）
+                for idx, rule in rules_in_group:
+                    rule_status = '✅' if rule.get('enabled', True) else '❌'
+                    rule_name = rule.get('name', '未命名')
+                    rule_id = rule.get('rule_id', idx+1)
+                    
+                    # 创建两列布局：规则按钮 + 删除按钮
+                    btn_col, del_col = st.columns([4, 1])
+                    
+                    with btn_col:
+                        # 创建可点击的规则按钮
+                        if st.button(
+                            f"{rule_status} 规则{rule_id}: {rule_name}",
+                            key=f"select_rule_{idx}",
+                            use_container_width=True,
+                            type="primary" if st.session_state.selected_rule_idx == idx else "secondary"
+                        ):
+                            st.session_state.selected_rule_idx = idx
+                            st.rerun()
+                    
+                    with del_col:
+                        # 添加删除按钮
+                        if st.button("🗑️", key=f"del_rule_{idx}", help="删除此规则", use_container_width=True):
+                            # 直接删除规则
+                            rules_config['rules'].pop(idx)
+                            # 显式更新 session_state 以确保更改持久化
+                            st.session_state.rules_config = rules_config
+                            # 更新选中索引
+                            if st.session_state.selected_rule_idx is not None:
+                                if st.session_state.selected_rule_idx >= len(rules_config['rules']):
+                                    st.session_state.selected_rule_idx = len(rules_config['rules']) - 1 if rules_config['rules'] else None
+                                elif st.session_state.selected_rule_idx == idx:
+                                    st.session_state.selected_rule_idx = None
+                            # 重新运行
+                            st.rerun()
+    
+    # 右侧：选中规则的详细编辑界面
+    rules_to_delete = []
+    with right_col:
+        if st.session_state.selected_rule_idx is not None and st.session_state.selected_rule_idx < len(rules_config['rules']):
+            idx = st.session_state.selected_rule_idx
+            rule = rules_config['rules'][idx]
+            
+            st.markdown(f"### 🔖 编辑规则 {rule.get('rule_id', idx+1)}")
+            st.markdown("---")
+            
+            # 规则基本信息
+            col1, col2 = st.columns([3, 1])
+            
+            with col1:
+                rule['name'] = st.text_input("规则名称", value=rule.get('name', ''), key=f"name_{idx}")
+            
+            with col2:
+                rule['enabled'] = st.checkbox("启用", value=rule.get('enabled', True), key=f"enabled_{idx}")
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                rule['rule_id'] = st.number_input("规则ID", value=int(rule.get('rule_id', idx+1)), 
+                                                  step=1, key=f"id_{idx}")
+            with col2:
+                rule['return_value'] = st.number_input("返回值", value=int(rule.get('return_value', 0)), 
+                                                       step=1, key=f"return_{idx}")
+            with col3:
+                # 选择逻辑模式
+                use_complex_logic = st.checkbox("使用复杂逻辑表达式", 
+                                               value='logic_expression' in rule,
+                                               key=f"complex_{idx}",
+                                               help="启用后可以使用 &&、||、! 和括号组合条件")
+            
+            # 通道组合（可选）
+            current_combination = rule.get('channel_combination', '')
+            combination_index = channel_combinations.index(current_combination) if current_combination in channel_combinations else 0
+            
+            # 使用中文显示名称
+            selected_display = st.selectbox(
+                "通道组合限制（可选）", 
+                options=channel_combinations,
+                format_func=lambda x: channel_combinations_map.get(x, x),
+                index=combination_index,
+                key=f"channel_{idx}",
+                help="限制规则仅在特定通道组合下生效"
+            )
+            
+            if selected_display:
+                rule['channel_combination'] = selected_display
+            elif 'channel_combination' in rule:
+                del rule['channel_combination']
+            
+            # 逻辑设置
+            if use_complex_logic:
+                # 使用复杂逻辑表达式
+                st.info("💡 复杂逻辑表达式说明：使用条件ID组合，支持 && (AND)、|| (OR)、! (NOT) 和括号")
+                st.markdown("""
+                **示例**：
+                - `1 && 2` : 条件1 AND 条件2
+                - `1 || 2 || 3` : 条件1 OR 条件2 OR 条件3
+                - `1 && (2 || 3)` : 条件1 AND (条件2 OR 条件3)
+                - `(1 || 2) && !3` : (条件1 OR 条件2) AND NOT 条件3
+                - `1 && (2 || 3 || 4) && (!5)` : 条件1 AND (条件2 OR 条件3 OR 条件4) AND (NOT 条件5)
+                """)
+                
+                current_expression = rule.get('logic_expression', '')
+                rule['logic_expression'] = st.text_input(
+                    "逻辑表达式", 
+                    value=current_expression,
+                    key=f"logic_expr_{idx}",
+                    placeholder="例如: 1 && (2 || 3) && (!4)"
+                )
+                
+                # 删除简单逻辑字段
+                if 'logic' in rule:
+                    del rule['logic']
+            else:
+                # 使用简单逻辑
+                rule['logic'] = st.selectbox("逻辑关系", ['AND', 'OR'], 
+                                            index=0 if rule.get('logic', 'AND') == 'AND' else 1,
+                                            key=f"logic_{idx}",
+                                            help="AND: 所有条件都满足, OR: 任一条件满足")
+                
+                # 删除复杂逻辑字段
+                if 'logic_expression' in rule:
+                    del rule['logic_expression']
+            
+            # 条件列表
+            st.write("**条件列表:**")
+            
+            conditions = rule.get('conditions', [])
+            conditions_to_delete = []
+            use_complex = 'logic_expression' in rule
+            
+            for cond_idx, condition in enumerate(conditions):
+                # 如果使用复杂逻辑，显示条件ID
+                if use_complex:
+                    col0, col1, col2, col3, col4, col5 = st.columns([0.5, 2.5, 1, 2, 1, 1])
+                    with col0:
+                        # 确保有condition_id
+                        if 'condition_id' not in condition:
+                            condition['condition_id'] = cond_idx + 1
+                        condition['condition_id'] = st.number_input("ID", 
+                                                                    value=int(condition.get('condition_id', cond_idx+1)),
+                                                                    min_value=1,
+                                                                    step=1,
+                                                                    key=f"cond_id_{idx}_{cond_idx}")
+                else:
+                    col1, col2, col3, col4, col5 = st.columns([3, 1, 2, 1, 1])
+                    # 移除condition_id（简单逻辑不需要）
+                    if 'condition_id' in condition:
+                        del condition['condition_id']
+                
+                with col1:
+                    feature_index = available_features.index(condition['feature']) if condition['feature'] in available_features else 0
+                    condition['feature'] = st.selectbox("特征", available_features, 
+                                                       index=feature_index,
+                                                       key=f"feat_{idx}_{cond_idx}")
+                
+                with col2:
+                    op_index = operators.index(condition['operator']) if condition['operator'] in operators else 0
+                    condition['operator'] = st.selectbox("操作符", operators, 
+                                                        index=op_index,
+                                                        key=f"op_{idx}_{cond_idx}")
+                
+                with col3:
+                    condition['value'] = st.number_input("值", value=float(condition['value']), 
+                                                        step=0.1,
+                                                        key=f"val_{idx}_{cond_idx}")
+                
+                with col4:
+                    condition['use_threshold'] = st.checkbox("使用阈值", 
+                                                            value=condition.get('use_threshold', False),
+                                                            key=f"thresh_{idx}_{cond_idx}")
+                
+                with col5:
+                    if st.button("🗑️", key=f"del_cond_{idx}_{cond_idx}"):
+                        # 直接删除条件
+                        conditions.pop(cond_idx)
+                        rule['conditions'] = conditions
+                        # 显式更新 session_state 以确保更改持久化
+                        st.session_state.rules_config = rules_config
+                        st.rerun()
+            
+            rule['conditions'] = conditions
+            
+            # 添加新条件按钮
+            col1, col2 = st.columns([1, 4])
+            with col1:
+                if st.button("➕ 添加条件", key=f"add_cond_{idx}"):
+                    new_condition = {
+                        "feature": available_features[0] if available_features else "",
+                        "operator": ">",
+                        "value": 0,
+                        "use_threshold": False
+                    }
+                    # 如果使用复杂逻辑，添加condition_id
+                    if 'logic_expression' in rule:
+                        # 找到最大的condition_id
+                        max_id = max([c.get('condition_id', 0) for c in conditions], default=0)
+                        new_condition['condition_id'] = max_id + 1
+                    conditions.append(new_condition)
+                    st.rerun()
+        else:
+            st.info("👈 请从左侧选择一个规则进行编辑")
+    
+    # 删除标记的规则
+    for rule_idx in sorted(rules_to_delete, reverse=True):
+            with st.expander(f"� **{channel_display_name}** ({len(rules_in_group)} 条规则，{group_enabled_count} 条已启用)", expanded=True):
+                for idx, rule in rules_in_group:
+                    # 使用容器展示每条规则
+                    st.markdown(f"### �🔖 规则 {rule.get('rule_id', idx+1)}: {rule.get('name', '未命名')} {'✅' if rule.get('enabled', True) else '❌'}")
+                    
+                    col1, col2 = st.columns([3, 1])
+            
+            with col1:
+                rule['name'] = st.text_input("规则名称", value=rule.get('name', ''), key=f"name_{idx}")
+            
+            with col2:
+                rule['enabled'] = st.checkbox("启用", value=rule.get('enabled', True), key=f"enabled_{idx}")
+            
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                rule['rule_id'] = st.number_input("规则ID", value=int(rule.get('rule_id', idx+1)), 
+                                                  step=1, key=f"id_{idx}")
+            with col2:
+                rule['return_value'] = st.number_input("返回值", value=int(rule.get('return_value', 0)), 
+                                                       step=1, key=f"return_{idx}")
+            with col3:
+                # 选择逻辑模式
+                use_complex_logic = st.checkbox("使用复杂逻辑表达式", 
+                                               value='logic_expression' in rule,
+                                               key=f"complex_{idx}",
+                                               help="启用后可以使用 &&、||、! 和括号组合条件")
+            
+            # 通道组合（可选）
+            current_combination = rule.get('channel_combination', '')
+            combination_index = channel_combinations.index(current_combination) if current_combination in channel_combinations else 0
+            
+            # 使用中文显示名称
+            selected_display = st.selectbox(
+                "通道组合限制（可选）", 
+                options=channel_combinations,
+                format_func=lambda x: channel_combinations_map.get(x, x),
+                index=combination_index,
+                key=f"channel_{idx}",
+                help="限制规则仅在特定通道组合下生效"
+            )
+            
+            if selected_display:
+                rule['channel_combination'] = selected_display
+            elif 'channel_combination' in rule:
+                del rule['channel_combination']
+            
+            # 逻辑设置
+            if use_complex_logic:
+                # 使用复杂逻辑表达式
+                st.info("💡 复杂逻辑表达式说明：使用条件ID组合，支持 && (AND)、|| (OR)、! (NOT) 和括号")
+                st.markdown("""
+                **示例**：
+                - `1 && 2` : 条件1 AND 条件2
+                - `1 || 2 || 3` : 条件1 OR 条件2 OR 条件3
+                - `1 && (2 || 3)` : 条件1 AND (条件2 OR 条件3)
+                - `(1 || 2) && !3` : (条件1 OR 条件2) AND NOT 条件3
+                - `1 && (2 || 3 || 4) && (!5)` : 条件1 AND (条件2 OR 条件3 OR 条件4) AND (NOT 条件5)
+                """)
+                
+                current_expression = rule.get('logic_expression', '')
+                rule['logic_expression'] = st.text_input(
+                    "逻辑表达式", 
+                    value=current_expression,
+                    key=f"logic_expr_{idx}",
+                    placeholder="例如: 1 && (2 || 3) && (!4)"
+                )
+                
+                # 删除简单逻辑字段
+                if 'logic' in rule:
+                    del rule['logic']
+            else:
+                # 使用简单逻辑
+                rule['logic'] = st.selectbox("逻辑关系", ['AND', 'OR'], 
+                                            index=0 if rule.get('logic', 'AND') == 'AND' else 1,
+                                            key=f"logic_{idx}",
+                                            help="AND: 所有条件都满足, OR: 任一条件满足")
+                
+                # 删除复杂逻辑字段
+                if 'logic_expression' in rule:
+                    del rule['logic_expression']
+            
+            # 条件列表
+            st.write("**条件列表:**")
+            
+            conditions = rule.get('conditions', [])
+            use_complex = 'logic_expression' in rule
+            
+            for cond_idx, condition in enumerate(conditions):
+                # 如果使用复杂逻辑，显示条件ID
+                if use_complex:
+                    col0, col1, col2, col3, col4, col5 = st.columns([0.5, 2.5, 1, 2, 1, 1])
+                    with col0:
+                        # 确保有condition_id
+                        if 'condition_id' not in condition:
+                            condition['condition_id'] = cond_idx + 1
+                        condition['condition_id'] = st.number_input("ID", 
+                                                                    value=int(condition.get('condition_id', cond_idx+1)),
+                                                                    min_value=1,
+                                                                    step=1,
+                                                                    key=f"cond_id_{idx}_{cond_idx}")
+                else:
+                    col1, col2, col3, col4, col5 = st.columns([3, 1, 2, 1, 1])
+                    # 移除condition_id（简单逻辑不需要）
+                    if 'condition_id' in condition:
+                        del condition['condition_id']
+                
+                with col1:
+                    feature_index = available_features.index(condition['feature']) if condition['feature'] in available_features else 0
+                    condition['feature'] = st.selectbox("特征", available_features, 
+                                                       index=feature_index,
+                                                       key=f"feat_{idx}_{cond_idx}")
+                
+                with col2:
+                    op_index = operators.index(condition['operator']) if condition['operator'] in operators else 0
+                    condition['operator'] = st.selectbox("操作符", operators, 
+                                                        index=op_index,
+                                                        key=f"op_{idx}_{cond_idx}")
+                
+                with col3:
+                    condition['value'] = st.number_input("值", value=float(condition['value']), 
+                                                        step=0.1,
+                                                        key=f"val_{idx}_{cond_idx}")
+                
+                with col4:
+                    condition['use_threshold'] = st.checkbox("使用阈值", 
+                                                            value=condition.get('use_threshold', False),
+                                                            key=f"thresh_{idx}_{cond_idx}")
+                
+                with col5:
+                    if st.button("🗑️", key=f"del_cond_{idx}_{cond_idx}"):
+                        # 直接删除条件
+                        conditions.pop(cond_idx)
+                        rule['conditions'] = conditions
+                        # 显式更新 session_state 以确保更改持久化
+                        st.session_state.rules_config = rules_config
+                        st.rerun()
+            
+            rule['conditions'] = conditions
+            
+            # 添加新条件按钮
+            col1, col2 = st.columns([1, 4])
+            with col1:
+                if st.button("➕ 添加条件", key=f"add_cond_{idx}"):
+                    new_condition = {
+                        "feature": available_features[0] if available_features else "",
+                        "operator": ">",
+                        "value": 0,
+                        "use_threshold": False
+                    }
+                    # 如果使用复杂逻辑，添加condition_id
+                    if 'logic_expression' in rule:
+                        # 找到最大的condition_id
+                        max_id = max([c.get('condition_id', 0) for c in conditions], default=0)
+                        new_condition['condition_id'] = max_id + 1
+                    conditions.append(new_condition)
+                    st.rerun()
+            
+            with col2:
+                if st.button("❌ 删除此规则", key=f"del_rule_{idx}"):
+                    # 直接删除规则
+                    rules_config['rules'].pop(idx)
+                    # 显式更新 session_state 以确保更改持久化
+                    st.session_state.rules_config = rules_config
+                    # 更新选中索引
+                    if idx >= len(rules_config['rules']):
+                        st.session_state.selected_rule_idx = len(rules_config['rules']) - 1 if rules_config['rules'] else None
+                    else:
+                        st.session_state.selected_rule_idx = None
+                    # 重新运行
+                    st.rerun()
+    
+    # 删除标记的规则（保留此处以防万一，但上面已经直接删除了）
+    for rule_idx in sorted(rules_to_delete, reverse=True):
+        if rule_idx < len(rules_config['rules']):
+            rules_config['rules'].pop(rule_idx)
+    
+    st.markdown("---")
+    
+    # 保存按钮
+    st.subheader("💾 保存规则")
+    
+    # 保存方式选择
+    save_method = st.radio(
+        "选择保存方式",
+        ["💾 保存到文件路径", "⬇️ 下载JSON文件"],
+        horizontal=True,
+        key="save_method"
+    )
+    
+    if save_method == "💾 保存到文件路径":
+        col1, col2 = st.columns([3, 1])
+        
+        with col1:
+            # 获取默认保存路径
+            default_save_path = st.session_state.get('current_rules_source', default_rules_path)
+            if not default_save_path.endswith('.json'):
+                default_save_path = default_rules_path
+            
+            save_path = st.text_input(
+                "保存文件路径", 
+                value=default_save_path, 
+                key="save_path",
+                help="输入完整的文件路径，例如：D:/streamlit/my_rules.json"
+            )
+        
+        with col2:
+            st.write("")
+            st.write("")
+            if st.button("💾 保存", type="primary", key="save_to_file"):
+                st.session_state.rules_config = rules_config
+                if rule_engine.save_rules_to_json(rules_config, save_path):
+                    st.success(f"✅ 规则已成功保存到:\n`{save_path}`")
+                    st.session_state.current_rules_source = save_path
+                    st.balloons()
+                else:
+                    st.error("❌ 保存失败，请检查文件路径是否正确")
+        
+        st.info("💡 **提示**: 保存后，您可以在`离线过漏检.py`中使用此规则文件")
+    
+    else:  # 下载JSON文件
+        st.write("点击下方按钮下载规则文件到本地：")
+        
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            download_filename = st.text_input(
+                "文件名", 
+                value="classification_rules_export.json",
+                key="download_filename",
+                help="设置下载的文件名"
+            )
+        
+        with col2:
+            st.write("")
+            st.write("")
+            # 生成JSON字符串
+            json_str = json.dumps(rules_config, ensure_ascii=False, indent=2)
+            st.download_button(
+                label="⬇️ 下载JSON",
+                data=json_str,
+                file_name=download_filename,
+                mime="application/json",
+                type="primary",
+                key="download_json"
+            )
+        
+        st.info("💡 **提示**: 下载后，您可以将文件放置到工作目录，然后在规则编辑器中重新加载")
+    
+    st.markdown("---")
+    
+    # 规则预览
+    st.subheader("👁️ 规则JSON预览")
+    
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        show_full_json = st.checkbox("显示完整JSON", value=False, key="show_full_json")
+    with col2:
+        if st.button("📋 复制JSON到剪贴板", key="copy_json_btn"):
+            st.code(json.dumps(rules_config, ensure_ascii=False, indent=2), language="json")
+            st.info("💡 请选中上方代码框的内容，然后按 Ctrl+C 复制")
+    
+    if show_full_json:
+        st.json(rules_config)
+    else:
+        with st.expander("点击展开查看完整JSON"):
+            st.json(rules_config)
@@ -0,0 +1,145 @@
+"""match_points（向量化实现）与 _match_points_reference（逐点循环实现）的一致性测试"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import kla_match
+
+
+THRESHOLD = 200.0
+
+
+def casi_frame(xy, special=None):
+    """构造 match_points 使用的CASI数据（XREL、YREL、is_special_type、is_edge_point）"""
+    xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+    if special is None:
+        special = np.zeros(len(xy), dtype=bool)
+    return pd.DataFrame({
+        'XREL': xy[:, 0],
+        'YREL': xy[:, 1],
+        'is_special_type': np.asarray(special, dtype=bool),
+        'is_edge_point': np.zeros(len(xy), dtype=bool),
+    })
+
+
+def kla_frame(xy):
+    """构造 match_points 使用的KLA数据（XREL、YREL、DSIZE）"""
+    xy = np.asarray(xy, dtype=float).reshape(-1, 2)
+    return pd.DataFrame({'XREL': xy[:, 0], 'YREL': xy[:, 1], 'DSIZE': np.full(len(xy), 0.05)})
+
+
+def assert_same_as_reference(casi_work, kla_work, match_threshold=THRESHOLD):
+    """两种实现结果一致，且编码都在 MATCH_CODES / MISS_TYPES 范围内"""
+    codes, matched, miss_type = kla_match.match_points(casi_work, kla_work, match_threshold)
+    ref_codes, ref_matched, ref_miss_type = kla_match._match_points_reference(casi_work, kla_work, match_threshold)
+
+    np.testing.assert_array_equal(codes, ref_codes)
+    np.testing.assert_array_equal(matched, ref_matched)
+    np.testing.assert_array_equal(miss_type, ref_miss_type)
+
+    assert codes.shape == (len(casi_work),)
+    assert matched.shape == miss_type.shape == (len(kla_work),)
+    assert set(np.unique(codes).tolist()) <= set(kla_match.MATCH_CODES)
+    assert set(np.unique(miss_type).tolist()) <= set(kla_match.MISS_TYPES)
+    # 特殊类型CASI为-2，其余CASI按附近是否有KLA分为过检/正确检出
+    special = casi_work['is_special_type'].to_numpy(dtype=bool)
+    assert np.all(codes[special] == -2)
+    assert not np.any(codes[~special] == -2)
+    # 被匹配的KLA漏检类型为0，未被匹配的为1或2
+    assert np.all((miss_type == 0) == matched)
+    return codes, matched, miss_type
+
+
+@pytest.mark.parametrize('seed', range(8))
+def test_random_points_match_reference(seed):
+    rng = np.random.default_rng(seed)
+    n_casi, n_kla = rng.integers(1, 400, size=2)
+    # 点集中在较小区域内，保证出现一对多、多对一和多对多
+    casi_xy = rng.uniform(0, 4000, size=(n_casi, 2))
+    kla_xy = np.vstack([casi_xy[rng.choice(n_casi, n_kla // 2)] + rng.normal(0, 80, size=(n_kla // 2, 2)),
+                        rng.uniform(0, 4000, size=(n_kla - n_kla // 2, 2))])
+    special = rng.random(n_casi) < 0.2
+
+    codes, _, miss_type = assert_same_as_reference(casi_frame(casi_xy, special), kla_frame(kla_xy))
+    assert np.isin(codes, kla_match.CORRECT_CODES).any()
+    assert (miss_type == 0).any()
+
+
+def test_clustered_points_use_every_code():
+    rng = np.random.default_rng(42)
+    centers = rng.uniform(0, 20000, size=(60, 2))
+    casi_xy = np.repeat(centers, 3, axis=0) + rng.normal(0, 60, size=(180, 2))
+    kla_xy = np.repeat(centers, 2, axis=0) + rng.normal(0, 60, size=(120, 2))
+    special = rng.random(len(casi_xy)) < 0.3
+    casi_xy = np.vstack([casi_xy, [[-5000, -5000]]])
+    special = np.append(special, False)
+
+    codes, _, _ = assert_same_as_reference(casi_frame(casi_xy, special), kla_frame(kla_xy))
+    assert set(np.unique(codes).tolist()) == set(kla_match.MATCH_CODES)
+
+
+def test_all_special_casi():
+    casi_work = casi_frame([[0, 0], [1000, 0]], special=[True, True])
+    kla_work = kla_frame([[50, 0], [5000, 5000]])
+
+    codes, matched, miss_type = assert_same_as_reference(casi_work, kla_work)
+    np.testing.assert_array_equal(codes, [-2, -2])
+    np.testing.assert_array_equal(matched, [False, False])
+    # 附近只有特殊类型CASI为分类漏检，附近没有CASI为基础漏检
+    np.testing.assert_array_equal(miss_type, [2, 1])
+
+
+def test_empty_kla():
+    casi_work = casi_frame([[0, 0], [10, 10]], special=[False, True])
+
+    codes, matched, miss_type = assert_same_as_reference(casi_work, kla_frame(np.zeros((0, 2))))
+    np.testing.assert_array_equal(codes, [0, -2])
+    assert len(matched) == len(miss_type) == 0
+
+
+def test_empty_casi():
+    kla_work = kla_frame([[0, 0], [10, 10]])
+
+    codes, matched, miss_type = assert_same_as_reference(casi_frame(np.zeros((0, 2))), kla_work)
+    assert len(codes) == 0
+    np.testing.assert_array_equal(matched, [False, False])
+    np.testing.assert_array_equal(miss_type, [1, 1])
+
+
+def test_both_empty():
+    codes, matched, miss_type = assert_same_as_reference(casi_frame(np.zeros((0, 2))), kla_frame(np.zeros((0, 2))))
+    assert len(codes) == len(matched) == len(miss_type) == 0
+
+
+def test_distance_equal_to_threshold_is_matched():
+    # 3-4-5 三角形：距离恰好等于阈值（含阈值）
+    casi_work = casi_frame([[0, 0], [1000, 0]])
+    kla_work = kla_frame([[120, 160], [1000, 200.5]])
+
+    codes, matched, miss_type = assert_same_as_reference(casi_work, kla_work)
+    np.testing.assert_array_equal(codes, [1, 0])
+    np.testing.assert_array_equal(matched, [True, False])
+    np.testing.assert_array_equal(miss_type, [0, 1])
+
+
+def test_equidistant_neighbours():
+    # 一个CASI到两个KLA距离相等 -> 4；两个CASI到一个KLA距离相等 -> 3；两边都有多个 -> 5
+    casi_work = casi_frame([[0, 0],
+                            [5000, -100], [5000, 100],
+                            [10000, 0], [10100, 0]])
+    kla_work = kla_frame([[-100, 0], [100, 0],
+                          [5000, 0],
+                          [10050, -80], [10050, 80]])
+
+    codes, _, miss_type = assert_same_as_reference(casi_work, kla_work)
+    np.testing.assert_array_equal(codes, [4, 3, 3, 5, 5])
+    np.testing.assert_array_equal(miss_type, [0, 0, 0, 0, 0])
+
+
+def test_duplicate_coordinates():
+    # 完全重合的点：同一位置的特殊/非特殊CASI和重复的KLA
+    casi_work = casi_frame([[0, 0], [0, 0], [0, 0]], special=[False, True, False])
+    kla_work = kla_frame([[0, 0], [0, 0]])
+
+    codes, _, _ = assert_same_as_reference(casi_work, kla_work)
+    np.testing.assert_array_equal(codes, [5, -2, 5])
@@ -0,0 +1,365 @@
+import os
+import re
+import sqlite3
+import hashlib
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+import adaptive_radius
+import kla_match
+import match_cache
+import wafer_geometry
+
+
+# 趋势库文件，可通过环境变量 BLOBFEA_TREND_DB 调整
+DEFAULT_STORE_PATH = os.environ.get(
+    'BLOBFEA_TREND_DB', os.path.join(os.path.expanduser('~'), '.blobfea_cache', 'trend.sqlite'))
+
+# 表结构变化时递增
+STORE_VERSION = 1
+
+# 趋势库指标列 -> (analyze_pair 结果中的键, analyze_sheet_pair 结果中的键)
+# 过检类指标按 analyze_pair 的定义存储，sheet 格式没有同口径的键，由 _sheet_overdetect 换算
+METRICS = {
+    'total_casi': ('CASI总数', 'total_casi'),
+    'casi_detected': ('CASI分类后检出数', 'casi_detected_count'),
+    'total_kla': ('KLA总数', 'total_kla'),
+    'n_correct': ('正确检出(1,3,4,5)', 'n_correct'),
+    'n_overdetect': ('过检(0)', None),
+    'n_overdetect_true': ('真过检', None),
+    'n_overdetect_clean': ('过检（去除污染）', None),
+    'n_overdetect_edge': ('过检-边缘点数', 'overdetect_edge_count'),
+    'n_miss_basic': ('漏检-基础检', 'n_miss_basic'),
+    'n_miss_classified': ('漏检-分类', 'n_miss_classified'),
+    'n_miss_total': ('漏检总数', 'n_missed'),
+    'dsize_correct_mean': ('正确检出DSIZE均值', None),
+    'dsize_correct_min': ('正确检出DSIZE最小', None),
+    'dsize_correct_max': ('正确检出DSIZE最大', None),
+    'dsize_miss_mean': ('漏检DSIZE均值', None),
+    'dsize_miss_min': ('漏检DSIZE最小', None),
+    'dsize_miss_max': ('漏检DSIZE最大', None),
+}
+COUNT_METRICS = [name for name in METRICS if not name.startswith('dsize_')]
+DSIZE_METRICS = [name for name in METRICS if name.startswith('dsize_')]
+
+# 由计数重新计算的比率（%）：比率列 -> (分子, 分母)
+RATES = {
+    'detection_rate': ('n_correct', 'total_kla'),
+    'overdetect_rate': ('n_overdetect', 'total_kla'),
+    'overdetect_true_rate': ('n_overdetect_true', 'total_kla'),
+    'overdetect_clean_rate': ('n_overdetect_clean', 'total_kla'),
+    'miss_rate': ('n_miss_total', 'total_kla'),
+    'miss_basic_rate': ('n_miss_basic', 'total_kla'),
+    'miss_classified_rate': ('n_miss_classified', 'total_kla'),
+}
+
+# 界面显示名称
+LABELS = {
+    'detection_rate': '检出率(%)',
+    'overdetect_rate': '过检率(%)',
+    'overdetect_true_rate': '真过检率(%)',
+    'overdetect_clean_rate': '过检率（去除污染）(%)',
+    'miss_rate': '漏检率（总）(%)',
+    'miss_basic_rate': '漏检率-基础(%)',
+    'miss_classified_rate': '漏检率-分类(%)',
+    'n_overdetect': '过检数',
+    'n_overdetect_true': '真过检数',
+    'n_miss_total': '漏检数',
+    'dsize_correct_mean': '正确检出DSIZE均值',
+    'dsize_miss_mean': '漏检DSIZE均值',
+}
+
+KEY_COLUMNS = ['lot', 'slot', 'condition', 'rule_version']
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recorded_at TEXT NOT NULL,
+    lot TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    rule_version TEXT NOT NULL,
+    rule_desc TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS match_stats (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    recorded_at TEXT NOT NULL,
+    lot TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    condition TEXT NOT NULL,
+    rule_version TEXT NOT NULL,
+    casi_name TEXT,
+    kla_name TEXT,
+    {', '.join(f'{name} INTEGER' for name in COUNT_METRICS)},
+    {', '.join(f'{name} REAL' for name in DSIZE_METRICS)}
+);
+CREATE INDEX IF NOT EXISTS idx_stats_key ON match_stats (lot, slot, condition, rule_version, run_id);
+CREATE INDEX IF NOT EXISTS idx_stats_trend ON match_stats (condition, rule_version, lot);
+CREATE TRIGGER IF NOT EXISTS runs_no_update BEFORE UPDATE ON runs
+    BEGIN SELECT RAISE(ABORT, 'trend store is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS runs_no_delete BEFORE DELETE ON runs
+    BEGIN SELECT RAISE(ABORT, 'trend store is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS stats_no_update BEFORE UPDATE ON match_stats
+    BEGIN SELECT RAISE(ABORT, 'trend store is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS stats_no_delete BEFORE DELETE ON match_stats
+    BEGIN SELECT RAISE(ABORT, 'trend store is append-only'); END;
+"""
+
+
+def _print_log(level, message):
+    """默认日志输出（命令行模式）"""
+    print(f"[{level}] {message}")
+
+
+def _connect(path):
+    """打开趋势库（不存在时创建表结构）"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version == 0:
+        conn.executescript(_SCHEMA + f"PRAGMA user_version = {STORE_VERSION};")
+    elif version != STORE_VERSION:
+        conn.close()
+        raise ValueError(f"趋势库版本不兼容: {path}（{version}，需要 {STORE_VERSION}）")
+    return conn
+
+
+def rule_version(match_threshold, align=False, align_radius=None, geometry=None, size_range=None):
+    """
+    匹配规则版本（匹配算法版本、阈值/自适应半径规则、对齐设置、晶圆几何参数和DSIZE统计范围的短哈希）
+
+    同一版本下的统计结果可以直接比较；阈值或规则变化后版本随之变化。默认的晶圆几何参数和DSIZE统计范围
+    不计入哈希，与未配置这两项时写入的版本一致。
+    """
+    parts = (match_cache.CACHE_VERSION, repr(match_threshold), bool(align), align_radius if align else None)
+    if geometry and geometry != wafer_geometry.DEFAULT_GEOMETRY:
+        parts += (repr(geometry),)
+    if size_range and tuple(size_range) != (kla_match.SIZE_BIN_MIN, kla_match.SIZE_BIN_MAX):
+        parts += (tuple(float(v) for v in size_range),)
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:10]
+
+
+def describe_rule(match_threshold, align=False, geometry=None):
+    """规则版本的说明文字"""
+    desc = f"阈值 {adaptive_radius.describe(match_threshold)}{'，自动对齐' if align else ''}"
+    if geometry and geometry != wafer_geometry.DEFAULT_GEOMETRY:
+        desc += f"，{wafer_geometry.describe(geometry)}"
+    return desc
+
+
+def parse_slot(name):
+    """从CASI文件夹/Sheet名称中提取slot编号，无法识别时返回名称本身"""
+    match = re.search(r'slot[_\s-]*(\d+)', str(name), re.IGNORECASE)
+    return match.group(1) if match else str(name)
+
+
+def _number(value):
+    """汇总表中的数值（可能是带%的字符串或N/A）转为float，无效时为None"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip().rstrip('%')
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if np.isnan(value) else value
+
+
+def _sheet_overdetect(result):
+    """
+    按 analyze_pair 的口径换算 analyze_sheet_pair 结果中的过检数
+
+    sheet 格式的 n_overdetect_all 等于真过检且都包含边缘点，与 过检(0)/真过检 不是同一个量
+
+    Returns:
+        dict: n_overdetect（CASI分类后检出数 - 正确检出）、n_overdetect_true、
+              n_overdetect_clean（均去除边缘过检点），缺少数据时为None
+    """
+    detected = _number(result.get('casi_detected_count'))
+    correct = _number(result.get('n_correct'))
+    edge = _number(result.get('overdetect_edge_count'))
+    true = _number(result.get('n_overdetect_true'))
+    clean = _number(result.get('n_overdetect_true_clean'))
+    return {
+        'n_overdetect': detected - correct if detected is not None and correct is not None else None,
+        'n_overdetect_true': true - edge if true is not None and edge is not None else None,
+        'n_overdetect_clean': clean - edge if clean is not None and edge is not None else None,
+    }
+
+
+def summary_rows(all_match_results, lot, condition, rule_version):
+    """
+    将匹配结果转换为趋势库的行（兼容 analyze_pair 和 analyze_sheet_pair 两种结果格式）
+
+    Returns:
+        DataFrame: lot、slot、condition、rule_version、casi_name、kla_name 及 METRICS 各列
+    """
+    rows = []
+    for result in all_match_results or []:
+        sheet_format = 'CASI文件夹' not in result
+        casi_name = result['casi_name'] if sheet_format else result['CASI文件夹']
+        kla_name = result['kla_name'] if sheet_format else result['KLA文件夹']
+        row = {'lot': str(lot), 'slot': parse_slot(casi_name), 'condition': str(condition),
+               'rule_version': str(rule_version), 'casi_name': str(casi_name), 'kla_name': str(kla_name)}
+        for name, keys in METRICS.items():
+            key = keys[1] if sheet_format else keys[0]
+            value = _number(result.get(key)) if key else None
+            row[name] = int(value) if value is not None and name in COUNT_METRICS else value
+        if sheet_format:
+            row.update({name: int(value) if value is not None else None
+                        for name, value in _sheet_overdetect(result).items()})
+        # 集合为空时 analyze_pair 的DSIZE统计填0，存为NULL以免拉低 lot_trend 的均值/最小值
+        for prefix, count in (('dsize_correct_', 'n_correct'), ('dsize_miss_', 'n_miss_total')):
+            if row[count] == 0:
+                for name in DSIZE_METRICS:
+                    if name.startswith(prefix):
+                        row[name] = None
+        rows.append(row)
+    return pd.DataFrame(rows, columns=KEY_COLUMNS + ['casi_name', 'kla_name'] + list(METRICS))
+
+
+def append_results(all_match_results, lot, condition, rule_version, rule_desc=None, source=None,
+                   path=DEFAULT_STORE_PATH, log=None):
+    """
+    将一次匹配的各slot汇总结果追加到趋势库（只追加，不修改已有记录）
+
+    同一 lot/slot/condition/rule_version 重复写入时保留全部记录，查询时默认只取最新一次。
+
+    Args:
+        all_match_results: 匹配结果列表（界面 kla_match_results 或 run_pairs 的返回值）
+        lot: 批次
+        condition: 工况
+        rule_version: 规则版本（见 rule_version）
+        rule_desc: 规则说明（可选，如 describe_rule 的结果）
+        source: 数据来源说明（可选，如根文件夹路径）
+        path: 趋势库文件
+        log: 日志回调 log(level, message)
+
+    Returns:
+        int: 本次写入的 run_id；没有可写入的结果时返回None
+    """
+    log = log or _print_log
+    rows = summary_rows(all_match_results, lot, condition, rule_version)
+    if rows.empty:
+        log('warning', "没有可写入趋势库的匹配结果")
+        return None
+
+    recorded_at = pd.Timestamp.now().isoformat(timespec='seconds')
+    with closing(_connect(path)) as conn, conn:
+        cursor = conn.execute(
+            "INSERT INTO runs (recorded_at, lot, condition, rule_version, rule_desc, source) VALUES (?, ?, ?, ?, ?, ?)",
+            (recorded_at, str(lot), str(condition), str(rule_version), rule_desc, source))
+        run_id = cursor.lastrowid
+        rows.insert(0, 'recorded_at', recorded_at)
+        rows.insert(0, 'run_id', run_id)
+        columns = list(rows.columns)
+        values = rows.astype(object).where(rows.notna(), None).itertuples(index=False, name=None)
+        conn.executemany(
+            f"INSERT INTO match_stats ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", values)
+    log('success', f"已写入趋势库: 批次 {lot} / 工况 {condition} / 规则 {rule_version}，共 {len(rows)} 个slot")
+    return run_id
+
+
+def _where(lots=None, slots=None, conditions=None, rule_versions=None, since=None, until=None):
+    """查询条件的SQL片段和参数"""
+    clauses, params = [], []
+    for column, values in (('lot', lots), ('slot', slots), ('condition', conditions),
+                           ('rule_version', rule_versions)):
+        if values is not None:
+            values = [str(v) for v in ([values] if isinstance(values, str) else values)]
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if since is not None:
+        clauses.append("recorded_at >= ?")
+        params.append(pd.Timestamp(since).isoformat())
+    if until is not None:
+        clauses.append("recorded_at <= ?")
+        params.append(pd.Timestamp(until).isoformat())
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def _stats_sql(latest, where):
+    """slot级记录的SQL；latest=True 时同一 lot/slot/condition/rule_version/CASI/KLA 只取最新一次写入"""
+    if not latest:
+        return f"SELECT * FROM match_stats {where}"
+    keys = "lot, slot, condition, rule_version, casi_name, kla_name"
+    return (f"SELECT s.* FROM match_stats s JOIN ("
+            f"SELECT {keys}, MAX(run_id) AS run_id FROM match_stats {where} GROUP BY {keys}"
+            f") latest USING ({keys}, run_id)")
+
+
+def _add_rates(df):
+    """按计数重新计算比率（%）"""
+    for name, (numerator, denominator) in RATES.items():
+        total = df[denominator].astype(float)
+        df[name] = np.where(total > 0, df[numerator] / total.where(total > 0, 1) * 100, 0.0)
+    return df
+
+
+def query(path=DEFAULT_STORE_PATH, lots=None, slots=None, conditions=None, rule_versions=None,
+          since=None, until=None, latest=True):
+    """
+    查询slot级统计记录
+
+    Args:
+        path: 趋势库文件
+        lots, slots, conditions, rule_versions: 筛选条件（None表示不筛选）
+        since, until: 写入时间范围
+        latest: 重复写入的记录只取最新一次
+
+    Returns:
+        DataFrame: slot级记录及各比率列；趋势库不存在时为空表
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    where, params = _where(lots, slots, conditions, rule_versions, since, until)
+    with closing(_connect(path)) as conn:
+        df = pd.read_sql_query(_stats_sql(latest, where) + " ORDER BY run_id, slot", conn, params=params)
+    return _add_rates(df)
+
+
+def lot_trend(path=DEFAULT_STORE_PATH, lots=None, conditions=None, rule_versions=None,
+              since=None, until=None, latest=True):
+    """
+    按批次汇总的趋势（每个 lot/condition/rule_version 一行，按首次写入时间排序）
+
+    计数按CASI/KLA组合求和后重新计算比率；DSIZE 均值取各组合均值的平均，最小/最大取各组合的最小/最大。
+
+    Returns:
+        DataFrame: lot、condition、rule_version、first_recorded、n_slots（不同slot数）、
+                   n_pairs（CASI/KLA组合数）、计数、DSIZE统计及比率列
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    where, params = _where(lots, None, conditions, rule_versions, since, until)
+    aggregates = ([f"SUM({name}) AS {name}" for name in COUNT_METRICS] +
+                  [f"{'MIN' if name.endswith('_min') else 'MAX' if name.endswith('_max') else 'AVG'}({name}) AS {name}"
+                   for name in DSIZE_METRICS])
+    sql = (f"SELECT lot, condition, rule_version, MIN(recorded_at) AS first_recorded, "
+           f"COUNT(DISTINCT slot) AS n_slots, COUNT(*) AS n_pairs, {', '.join(aggregates)} "
+           f"FROM ({_stats_sql(latest, where)}) "
+           f"GROUP BY lot, condition, rule_version ORDER BY first_recorded, lot")
+    with closing(_connect(path)) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    return _add_rates(df)
+
+
+def list_values(path=DEFAULT_STORE_PATH):
+    """
+    趋势库中已有的批次、工况和规则版本（用于界面筛选）
+
+    Returns:
+        dict: {'lot': [...], 'condition': [...], 'rule_version': [(版本, 说明), ...]}
+    """
+    if not os.path.exists(path):
+        return {'lot': [], 'condition': [], 'rule_version': []}
+    with closing(_connect(path)) as conn:
+        lots = [row[0] for row in conn.execute("SELECT lot FROM runs GROUP BY lot ORDER BY MIN(run_id)")]
+        conditions = [row[0] for row in conn.execute("SELECT DISTINCT condition FROM runs ORDER BY condition")]
+        versions = conn.execute("SELECT rule_version, MAX(rule_desc) FROM runs GROUP BY rule_version "
+                                "ORDER BY MAX(run_id) DESC").fetchall()
+    return {'lot': lots, 'condition': conditions, 'rule_version': versions}
@@ -0,0 +1,70 @@
+import streamlit as st
+
+
+def show_divider(style="gradient"):
+    """
+    显示不同样式的分隔线
+    
+    Args:
+        style: 分隔线样式 - "gradient"(渐变), "dotted"(点状), "dashed"(虚线), "wave"(波浪)
+    """
+    if style == "gradient":
+        st.markdown('<hr class="gradient-divider">', unsafe_allow_html=True)
+    elif style == "dotted":
+        st.markdown('<hr class="dotted-divider">', unsafe_allow_html=True)
+    elif style == "dashed":
+        st.markdown('<hr class="dashed-divider">', unsafe_allow_html=True)
+    elif style == "wave":
+        st.markdown('<div class="wave-divider"></div>', unsafe_allow_html=True)
+    else:
+        st.markdown('<hr class="gradient-divider">', unsafe_allow_html=True)
+
+
+def st_log(level, message):
+    """分析模块的日志回调：level为 info/success/warning/error，输出到页面"""
+    getattr(st, level)(message)
+
+
+def load_pyplot():
+    """导入matplotlib并设置中文字体（只在需要绘图的页面调用）"""
+    import matplotlib.pyplot as plt
+    plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'Arial Unicode MS']
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt
+
+
+def radius_rule_input(threshold, key, sources=('casi', 'kla')):
+    """
+    自适应匹配半径的开关和规则编辑（JSON，见 adaptive_radius）
+
+    Args:
+        threshold: 固定匹配距离阈值（作为规则的默认基础半径）
+        key: 控件key前缀
+        sources: 规则中可配置尺寸的数据源
+
+    Returns:
+        未启用或规则无效时返回 threshold，否则返回规则dict
+    """
+    import json
+    import adaptive_radius
+
+    enabled = st.checkbox("按缺陷尺寸自适应匹配半径", value=False, key=f"{key}_enabled",
+                          help="每个点按尺寸列计算自己的匹配半径（大缺陷容差大、小缺陷容差小）")
+    if not enabled:
+        return threshold
+
+    default = {name: value for name, value in adaptive_radius.EXAMPLE_RULE.items()
+               if name not in ('casi', 'kla') or name in sources}
+    default['base'] = threshold
+    text = st.text_area("半径规则(JSON)", value=json.dumps(default, indent=2, ensure_ascii=False),
+                        key=f"{key}_rule", height=220,
+                        help="base: 基础半径；column: 尺寸列；scale: 半径=base+scale×尺寸；"
+                             "table: [[尺寸上限, 半径], ...] 查表；combine: 点对半径取 max/min/mean")
+    try:
+        rule = json.loads(text)
+        rule['base'] = float(rule.get('base', threshold))
+    except (ValueError, TypeError, AttributeError) as e:
+        st.error(f"半径规则格式错误，使用固定阈值: {str(e)}")
+        return threshold
+    st.caption(adaptive_radius.describe(rule))
+    return rule
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+
+# 晶圆几何参数（um）：中心坐标、直径和边缘去除宽度
+WAFER_CENTER = (150000, 150000)
+WAFER_DIAMETER = 300000
+EDGE_EXCLUSION = 3000
+
+
+def make_geometry(center=WAFER_CENTER, diameter=WAFER_DIAMETER, edge_exclusion=EDGE_EXCLUSION):
+    """
+    晶圆几何参数配置（传给 kla_match.prepare_casi 等）
+
+    Args:
+        center: 晶圆中心 (x, y)
+        diameter: 晶圆直径
+        edge_exclusion: 边缘去除宽度，到中心距离 >= 直径/2 - 边缘去除宽度 的点为边缘点
+
+    Returns:
+        dict: center、diameter、edge_exclusion（统一为float，相同配置的缓存键一致）
+    """
+    return {
+        'center': (float(center[0]), float(center[1])),
+        'diameter': float(diameter),
+        'edge_exclusion': float(edge_exclusion),
+    }
+
+
+DEFAULT_GEOMETRY = make_geometry()
+
+
+def describe(geometry):
+    """几何参数的说明文字"""
+    return (f"中心({geometry['center'][0]:g}, {geometry['center'][1]:g})，直径 {geometry['diameter']:g}，"
+            f"边缘去除 {geometry['edge_exclusion']:g}")
+
+
+# 缓存在DataFrame中的极坐标列
+RADIUS_COLUMN = 'distance_to_center'
+ANGLE_COLUMN = 'angle_to_center'
+
+
+def edge_radius(diameter=WAFER_DIAMETER, edge_exclusion=EDGE_EXCLUSION):
+    """边缘判定半径：到中心距离大于等于该值的点为边缘点"""
+    return diameter / 2 - edge_exclusion
+
+
+def polar_coordinates(x, y, center=WAFER_CENTER):
+    """
+    计算相对晶圆中心的极坐标
+
+    Args:
+        x, y: 坐标数组
+        center: 晶圆中心 (x, y)
+
+    Returns:
+        tuple: (半径, 角度(°，0~360，X正方向为0，逆时针))
+    """
+    dx = np.asarray(x, dtype=float) - center[0]
+    dy = np.asarray(y, dtype=float) - center[1]
+    return np.hypot(dx, dy), np.degrees(np.arctan2(dy, dx)) % 360
+
+
+def add_polar_columns(df, x_col, y_col, center=WAFER_CENTER):
+    """
+    在DataFrame中缓存极坐标列（distance_to_center、angle_to_center）
+
+    同一中心已计算过时直接返回，不重复计算。
+
+    Args:
+        df: 数据（原地添加列）
+        x_col, y_col: 坐标列名
+        center: 晶圆中心 (x, y)
+
+    Returns:
+        DataFrame: df 本身
+    """
+    cached = (x_col, y_col, tuple(center))
+    if df.attrs.get('wafer_polar') == cached and RADIUS_COLUMN in df.columns and ANGLE_COLUMN in df.columns:
+        return df
+
+    radius, angle = polar_coordinates(pd.to_numeric(df[x_col], errors='coerce'),
+                                      pd.to_numeric(df[y_col], errors='coerce'), center)
+    df[RADIUS_COLUMN] = radius
+    df[ANGLE_COLUMN] = angle
+    df.attrs['wafer_polar'] = cached
+    return df
+
+
+def edge_mask(radius, diameter=WAFER_DIAMETER, edge_exclusion=EDGE_EXCLUSION):
+    """到中心距离大于等于边缘判定半径的点（NaN为False）"""
+    return np.asarray(radius, dtype=float) >= edge_radius(diameter, edge_exclusion)
+
+
+def ring_index(radius, n_rings, diameter=WAFER_DIAMETER, equal_area=False):
+    """
+    环带编号（0为中心），晶圆外的点归入最外环
+
+    Args:
+        radius: 到中心的距离
+        n_rings: 环带数
+        diameter: 晶圆直径
+        equal_area: True 时各环面积相等，否则各环宽度相等
+
+    Returns:
+        ndarray: 环带编号，NaN 坐标为 -1
+    """
+    radius = np.asarray(radius, dtype=float)
+    fraction = np.clip(np.nan_to_num(radius) / (diameter / 2), 0, 1)
+    if equal_area:
+        fraction = fraction ** 2
+    index = np.minimum((fraction * n_rings).astype(np.intp), n_rings - 1)
+    return np.where(np.isnan(radius), -1, index)
+
+
+def ring_edges(n_rings, diameter=WAFER_DIAMETER, equal_area=False):
+    """各环带的内外半径（与 ring_index 的划分一致），长度为 n_rings + 1"""
+    fraction = np.linspace(0, 1, n_rings + 1)
+    if equal_area:
+        fraction = np.sqrt(fraction)
+    return fraction * diameter / 2
+
+
+def sector_index(angle, n_sectors):
+    """扇区编号（从X正方向开始逆时针），NaN 角度为 -1"""
+    angle = np.asarray(angle, dtype=float)
+    index = np.minimum((np.nan_to_num(angle % 360) / (360 / n_sectors)).astype(np.intp), n_sectors - 1)
+    return np.where(np.isnan(angle), -1, index)
+
+
+def zone_counts(radius, angle, n_rings, n_sectors, mask=None, diameter=WAFER_DIAMETER, equal_area=False):
+    """
+    按环带×扇区统计点数
+
+    Args:
+        radius, angle: polar_coordinates 的结果
+        n_rings, n_sectors: 环带数和扇区数
+        mask: 只统计该布尔数组为True的点
+        diameter, equal_area: 见 ring_index
+
+    Returns:
+        DataFrame: 行为环带、列为扇区的点数表
+    """
+    rings = ring_index(radius, n_rings, diameter, equal_area)
+    sectors = sector_index(angle, n_sectors)
+    valid = (rings >= 0) & (sectors >= 0)
+    if mask is not None:
+        valid &= np.asarray(mask, dtype=bool)
+    counts = np.bincount(rings[valid] * n_sectors + sectors[valid], minlength=n_rings * n_sectors)
+    return pd.DataFrame(counts.reshape(n_rings, n_sectors),
+                        index=pd.RangeIndex(n_rings, name='环带'), columns=pd.RangeIndex(n_sectors, name='扇区'))
+
+
+def boundary_circle(center=WAFER_CENTER, radius=WAFER_DIAMETER / 2, n_points=100):
+    """晶圆边界圆的坐标 (x, y)，用于绘图"""
+    theta = np.linspace(0, 2 * np.pi, n_points)
+    return center[0] + radius * np.cos(theta), center[1] + radius * np.sin(theta)